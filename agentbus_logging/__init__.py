@@ -64,6 +64,7 @@ from .log_query import (
     LogQuery,
     LogQueryEngine,
     LogAnalyzer,
+    StreamingLogAggregator,
     LogStreamReader,
     LogAnalysisResult,
     LogQuery,
@@ -159,6 +160,7 @@ __all__ = [
     "LogQuery",
     "LogQueryEngine",
     "LogAnalyzer",
+    "StreamingLogAggregator",
     "LogStreamReader",
     "LogAnalysisResult",
     "create_query_engine",
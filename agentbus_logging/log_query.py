@@ -7,24 +7,30 @@ AgentBus日志查询和分析系统
 import os
 import re
 import json
+import itertools
 import sqlite3
 import threading
 import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Callable, Union, Iterator
+from typing import Any, Dict, List, Optional, Callable, Union, Iterator, Iterable, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 from collections import defaultdict, Counter
 import gzip
 import pickle
 import mmap
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import bisect
 import statistics
+import random
 
 from .log_manager import LogRecord, LogLevel
 
 
+# 单条日志记录读取的最大字节数
+MAX_RECORD_BYTES = 1024 * 1024
+
+
 @dataclass
 class LogQuery:
     """日志查询条件"""
@@ -70,6 +76,7 @@ class LogIndex:
             str(self.index_path), 
             check_same_thread=False
         )
+        self._index_db.create_function("REGEXP", 2, _sqlite_regexp)
         self._index_db.execute("""
             CREATE TABLE IF NOT EXISTS log_index (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -85,6 +92,19 @@ class LogIndex:
             )
         """)
         
+        # 增量索引检查点：记录每个文件已索引到的偏移量和inode
+        self._index_db.execute("""
+            CREATE TABLE IF NOT EXISTS index_checkpoints (
+                file_path TEXT PRIMARY KEY,
+                inode INTEGER NOT NULL,
+                device INTEGER NOT NULL,
+                file_offset INTEGER NOT NULL,
+                file_size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
         # 创建索引
         self._index_db.execute("""
             CREATE INDEX IF NOT EXISTS idx_timestamp ON log_index(timestamp)
@@ -105,79 +125,80 @@ class LogIndex:
                   message: str, file_path: str, file_offset: int,
                   compressed: bool = False, extra_fields: Optional[Dict] = None) -> None:
         """添加索引条目"""
+        self.add_entries([(
+            timestamp, level, logger, message, file_path, file_offset,
+            1 if compressed else 0,
+            json.dumps(extra_fields) if extra_fields else None
+        )])
+        
+    def add_entries(self, rows: List[tuple], checkpoint: Optional[Dict[str, Any]] = None) -> None:
+        """批量添加索引条目，并在同一事务中更新文件检查点"""
         with self._lock:
-            self._index_db.execute("""
-                INSERT INTO log_index 
-                (timestamp, level, logger, message, file_path, file_offset, compressed, extra_fields)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                timestamp, level, logger, message, file_path, file_offset, 
-                1 if compressed else 0, 
-                json.dumps(extra_fields) if extra_fields else None
-            ))
-            self._index_db.commit()
-            
-    def search(self, query: LogQuery) -> List[Dict[str, Any]]:
-        """搜索日志条目"""
+            with self._index_db:
+                if rows:
+                    self._index_db.executemany("""
+                        INSERT INTO log_index 
+                        (timestamp, level, logger, message, file_path, file_offset, compressed, extra_fields)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, rows)
+                if checkpoint:
+                    self._index_db.execute("""
+                        INSERT OR REPLACE INTO index_checkpoints
+                        (file_path, inode, device, file_offset, file_size, mtime)
+                        VALUES (:file_path, :inode, :device, :file_offset, :file_size, :mtime)
+                    """, checkpoint)
+                    
+    def get_checkpoint(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """获取文件的索引检查点"""
         with self._lock:
-            # 构建WHERE子句
-            conditions = []
-            params = []
-            
-            if query.start_time:
-                conditions.append("timestamp >= ?")
-                params.append(query.start_time.isoformat())
-                
-            if query.end_time:
-                conditions.append("timestamp <= ?")
-                params.append(query.end_time.isoformat())
-                
-            if query.levels:
-                placeholders = ",".join("?" * len(query.levels))
-                conditions.append(f"level IN ({placeholders})")
-                params.extend(query.levels)
-                
-            if query.loggers:
-                placeholders = ",".join("?" * len(query.loggers))
-                conditions.append(f"logger IN ({placeholders})")
-                params.extend(query.loggers)
-                
-            if query.message_pattern:
-                conditions.append("message LIKE ?")
-                params.append(f"%{query.message_pattern}%")
-                
-            if query.regex_pattern:
-                conditions.append("message REGEXP ?")
-                params.append(query.regex_pattern)
+            row = self._index_db.execute("""
+                SELECT inode, device, file_offset, file_size, mtime
+                FROM index_checkpoints WHERE file_path = ?
+            """, (file_path,)).fetchone()
+        if not row:
+            return None
+        return {
+            "file_path": file_path,
+            "inode": row[0],
+            "device": row[1],
+            "file_offset": row[2],
+            "file_size": row[3],
+            "mtime": row[4],
+        }
+        
+    def remove_file(self, file_path: str) -> None:
+        """删除文件的全部索引条目和检查点"""
+        with self._lock:
+            with self._index_db:
+                self._index_db.execute("DELETE FROM log_index WHERE file_path = ?", (file_path,))
+                self._index_db.execute("DELETE FROM index_checkpoints WHERE file_path = ?", (file_path,))
                 
-            where_clause = " AND ".join(conditions) if conditions else "1=1"
-            
-            # 构建排序
-            if query.sort_order == "desc":
-                order_clause = f"{query.sort_by} DESC"
-            else:
-                order_clause = f"{query.sort_by} ASC"
+    def clear(self) -> None:
+        """清空索引"""
+        with self._lock:
+            with self._index_db:
+                self._index_db.execute("DELETE FROM log_index")
+                self._index_db.execute("DELETE FROM index_checkpoints")
                 
-            # 构建LIMIT
-            limit_clause = ""
-            if query.limit:
-                limit_clause = f"LIMIT {query.limit}"
-                if query.offset:
-                    limit_clause += f" OFFSET {query.offset}"
-            
-            sql = f"""
-                SELECT timestamp, level, logger, message, file_path, file_offset, compressed, extra_fields
-                FROM log_index
-                WHERE {where_clause}
-                ORDER BY {order_clause}
-                {limit_clause}
-            """
-            
+    def search(self, query: LogQuery) -> List[Dict[str, Any]]:
+        """搜索日志条目"""
+        return list(self.iter_search(query))
+        
+    def iter_search(self, query: LogQuery, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """逐批搜索日志条目，结果不整体加载到内存"""
+        sql, params = self._build_search_sql(query)
+        
+        with self._lock:
             cursor = self._index_db.execute(sql, params)
-            results = []
             
-            for row in cursor.fetchall():
-                results.append({
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+                
+            for row in rows:
+                yield {
                     "timestamp": row[0],
                     "level": row[1],
                     "logger": row[2],
@@ -186,36 +207,202 @@ class LogIndex:
                     "file_offset": row[5],
                     "compressed": bool(row[6]),
                     "extra_fields": json.loads(row[7]) if row[7] else None
-                })
+                }
+                
+    def _build_search_sql(self, query: LogQuery) -> Tuple[str, List[Any]]:
+        """构建搜索SQL"""
+        # 构建WHERE子句
+        conditions = []
+        params = []
+        
+        if query.start_time:
+            conditions.append("timestamp >= ?")
+            params.append(query.start_time.isoformat())
+            
+        if query.end_time:
+            conditions.append("timestamp <= ?")
+            params.append(query.end_time.isoformat())
+            
+        if query.levels:
+            placeholders = ",".join("?" * len(query.levels))
+            conditions.append(f"level IN ({placeholders})")
+            params.extend(query.levels)
+            
+        if query.loggers:
+            placeholders = ",".join("?" * len(query.loggers))
+            conditions.append(f"logger IN ({placeholders})")
+            params.extend(query.loggers)
+            
+        if query.message_pattern:
+            conditions.append("message LIKE ?")
+            params.append(f"%{query.message_pattern}%")
+            
+        if query.regex_pattern:
+            conditions.append("message REGEXP ?")
+            params.append(query.regex_pattern)
+            
+        where_clause = " AND ".join(conditions) if conditions else "1=1"
+        
+        # 构建排序
+        if query.sort_order == "desc":
+            order_clause = f"{query.sort_by} DESC"
+        else:
+            order_clause = f"{query.sort_by} ASC"
+            
+        # 构建LIMIT
+        limit_clause = ""
+        if query.limit:
+            limit_clause = f"LIMIT {query.limit}"
+            if query.offset:
+                limit_clause += f" OFFSET {query.offset}"
+        
+        sql = f"""
+            SELECT timestamp, level, logger, message, file_path, file_offset, compressed, extra_fields
+            FROM log_index
+            WHERE {where_clause}
+            ORDER BY {order_clause}
+            {limit_clause}
+        """
+        return sql, params
+
+
+def _sqlite_regexp(pattern: str, value: Optional[str]) -> bool:
+    """SQLite REGEXP 函数实现"""
+    return value is not None and re.search(pattern, value) is not None
+
+
+def parse_log_line(line: str) -> Optional[LogRecord]:
+    """解析单行日志（JSON或文本格式）"""
+    try:
+        if line.startswith('{'):
+            data = json.loads(line)
+            return LogRecord(**data)
+        else:
+            # 简单的文本解析
+            pattern = r'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d{3})?Z)\s+(\w+)\s+(\S+)\s+(.+)$'
+            match = re.match(pattern, line)
+            if match:
+                timestamp, level, logger, message = match.groups()
+                return LogRecord(
+                    timestamp=timestamp,
+                    level=level,
+                    logger=logger,
+                    message=message,
+                    module="",
+                    function="",
+                    line=0
+                )
+    except Exception as e:
+        print(f"Failed to parse line: {e}")
+        
+    return None
+
+
+def scan_log_file(file_path: str, start_offset: int = 0,
+                  compressed: bool = False) -> Tuple[List[tuple], int]:
+    """从指定偏移扫描日志文件，返回 (索引行, 新的检查点偏移)
+    
+    只处理以换行结尾的完整行，末尾尚未写完的行留到下次扫描。
+    该函数是模块级函数，可以直接提交到进程池执行。
+    """
+    rows = []
+    opener = gzip.open if compressed else open
+    compressed_flag = 1 if compressed else 0
+    
+    with opener(file_path, 'rb') as f:
+        f.seek(start_offset)
+        offset = start_offset
+        
+        for raw_line in f:
+            if not raw_line.endswith(b'\n'):
+                break
+                
+            line_offset = offset
+            offset += len(raw_line)
+            
+            try:
+                line = raw_line.decode('utf-8').strip()
+            except UnicodeDecodeError:
+                continue
+            if not line:
+                continue
+                
+            record = parse_log_line(line)
+            if record:
+                rows.append((
+                    record.timestamp,
+                    record.level,
+                    record.logger,
+                    record.message,
+                    file_path,
+                    line_offset,
+                    compressed_flag,
+                    json.dumps(record.extra_fields) if record.extra_fields else None
+                ))
                 
-            return results
+    return rows, offset
 
 
 class LogFileReader:
-    """日志文件读取器"""
+    """日志文件读取器
+
+    ``open()`` 之后在整个查询期间复用同一个文件句柄；按偏移升序读取时只需要
+    向前移动，gzip 文件不会因为每条记录重新打开、从头解压而退化为 O(n²)。
+    """
     
     def __init__(self, file_path: str, compressed: bool = False):
         self.file_path = file_path
         self.compressed = compressed
         self._file_handle = None
         
+    def open(self) -> "LogFileReader":
+        """打开文件句柄"""
+        if self._file_handle is None:
+            opener = gzip.open if self.compressed else open
+            self._file_handle = opener(self.file_path, 'rb')
+        return self
+        
+    def close(self) -> None:
+        """关闭文件句柄"""
+        if self._file_handle is not None:
+            self._file_handle.close()
+            self._file_handle = None
+            
+    def __enter__(self) -> "LogFileReader":
+        return self.open()
+        
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+        
     def read_record(self, offset: int, size: int) -> Optional[LogRecord]:
-        """读取指定位置的日志记录"""
+        """读取指定位置的日志记录（最多读取size字节的一行）"""
         try:
-            with open(self.file_path, 'rb') as f:
-                f.seek(offset)
-                data = f.read(size)
-                
-            if self.compressed:
-                data = gzip.decompress(data)
-                
-            line = data.decode('utf-8').strip()
-            return self._parse_line(line)
+            if self._file_handle is None:
+                with self:
+                    return self._read_at(offset, size)
+            return self._read_at(offset, size)
             
         except Exception as e:
             print(f"Failed to read log record: {e}")
             return None
             
+    def read_records(self, offsets: Iterable[int], size: int) -> Dict[int, LogRecord]:
+        """按偏移升序批量读取记录，返回 {偏移: 记录}"""
+        records = {}
+        for offset in sorted(set(offsets)):
+            record = self.read_record(offset, size)
+            if record:
+                records[offset] = record
+        return records
+        
+    def _read_at(self, offset: int, size: int) -> Optional[LogRecord]:
+        """在已打开的句柄上读取一行；已位于目标偏移时不再seek"""
+        f = self._file_handle
+        if f.tell() != offset:
+            f.seek(offset)
+        data = f.readline(size)
+        return self._parse_line(data.decode('utf-8').strip())
+            
     def _parse_line(self, line: str) -> Optional[LogRecord]:
         """解析日志行"""
         try:
@@ -248,122 +435,192 @@ class LogFileReader:
 class LogQueryEngine:
     """日志查询引擎"""
     
-    def __init__(self, log_dirs: List[str], index_path: str):
+    def __init__(self, log_dirs: List[str], index_path: str,
+                 max_workers: int = 4,
+                 parallel_threshold_bytes: int = 64 * 1024 * 1024,
+                 read_batch_size: int = 1000):
         self.log_dirs = [Path(d) for d in log_dirs]
         self.index = LogIndex(index_path)
-        self._file_readers: Dict[str, LogFileReader] = {}
+        self.max_workers = max_workers
+        self.parallel_threshold_bytes = parallel_threshold_bytes
+        self.read_batch_size = read_batch_size
         self._index_lock = threading.Lock()
         self._executor = ThreadPoolExecutor(max_workers=4)
         
     def index_logs(self, force: bool = False) -> None:
-        """索引日志文件"""
-        if force:
-            # 重建索引
-            self.index._index_db.execute("DELETE FROM log_index")
-            self.index._index_db.commit()
-            
-        for log_dir in self.log_dirs:
-            if not log_dir.exists():
-                continue
+        """增量索引日志文件
+        
+        每个文件记录已索引的偏移量和inode，只解析新增的字节；文件被轮转或截断时
+        重新索引。待索引数据量超过 ``parallel_threshold_bytes`` 时使用进程池并行解析。
+        """
+        with self._index_lock:
+            if force:
+                # 重建索引
+                self.index.clear()
                 
-            for log_file in log_dir.glob("**/*.log*"):
-                self._index_file(log_file)
+            pending = []
+            for log_dir in self.log_dirs:
+                if not log_dir.exists():
+                    continue
+                    
+                for log_file in log_dir.glob("**/*.log*"):
+                    task = self._plan_file(log_file)
+                    if task:
+                        pending.append(task)
+                        
+            if not pending:
+                return
+                
+            backlog = sum(task["file_size"] - task["start_offset"] for task in pending)
+            if len(pending) > 1 and self.max_workers > 1 and backlog >= self.parallel_threshold_bytes:
+                self._index_parallel(pending)
+            else:
+                for task in pending:
+                    self._index_task(task)
+                    
+    def _plan_file(self, file_path: Path) -> Optional[Dict[str, Any]]:
+        """根据检查点确定文件需要索引的范围"""
+        try:
+            stat = file_path.stat()
+        except OSError:
+            return None
+            
+        path = str(file_path)
+        compressed = file_path.suffix == '.gz'
+        checkpoint = self.index.get_checkpoint(path)
+        
+        if checkpoint:
+            rotated = checkpoint["inode"] != stat.st_ino or checkpoint["device"] != stat.st_dev
+            if compressed:
+                unchanged = (not rotated and checkpoint["file_size"] == stat.st_size
+                             and checkpoint["mtime"] == stat.st_mtime)
+                if unchanged:
+                    return None
+                # 压缩文件无法追加，发生变化时整体重建
+                self.index.remove_file(path)
+                checkpoint = None
+            elif rotated or stat.st_size < checkpoint["file_offset"]:
+                # 文件被轮转或截断
+                self.index.remove_file(path)
+                checkpoint = None
+            elif stat.st_size == checkpoint["file_offset"]:
+                return None
                 
+        return {
+            "file_path": path,
+            "compressed": compressed,
+            "start_offset": checkpoint["file_offset"] if checkpoint else 0,
+            "inode": stat.st_ino,
+            "device": stat.st_dev,
+            "file_size": stat.st_size,
+            "mtime": stat.st_mtime,
+        }
+        
+    def _index_task(self, task: Dict[str, Any]) -> None:
+        """在当前线程中索引单个文件"""
+        try:
+            rows, offset = scan_log_file(task["file_path"], task["start_offset"], task["compressed"])
+            self._commit_task(task, rows, offset)
+        except Exception as e:
+            print(f"Failed to index file {task['file_path']}: {e}")
+            
+    def _index_parallel(self, pending: List[Dict[str, Any]]) -> None:
+        """使用进程池并行索引多个文件"""
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                pool.submit(scan_log_file, task["file_path"], task["start_offset"], task["compressed"]): task
+                for task in pending
+            }
+            for future in as_completed(futures):
+                task = futures[future]
+                try:
+                    rows, offset = future.result()
+                    self._commit_task(task, rows, offset)
+                except Exception as e:
+                    print(f"Failed to index file {task['file_path']}: {e}")
+                    
+    def _commit_task(self, task: Dict[str, Any], rows: List[tuple], offset: int) -> None:
+        """写入索引行并推进检查点"""
+        self.index.add_entries(rows, checkpoint={
+            "file_path": task["file_path"],
+            "inode": task["inode"],
+            "device": task["device"],
+            "file_offset": offset,
+            "file_size": task["file_size"],
+            "mtime": task["mtime"],
+        })
+        
     def _index_file(self, file_path: Path) -> None:
         """索引单个日志文件"""
-        is_compressed = file_path.suffix == '.gz'
+        task = self._plan_file(file_path)
+        if task:
+            self._index_task(task)
+            
+    def _parse_line(self, line: str) -> Optional[LogRecord]:
+        """解析日志行"""
+        return parse_log_line(line)
         
+    def query(self, query: LogQuery) -> List[LogRecord]:
+        """执行日志查询"""
+        return list(self.iter_query(query))
+        
+    def iter_query(self, query: LogQuery) -> Iterator[LogRecord]:
+        """流式执行日志查询，逐条返回记录
+        
+        索引结果按批读取：每批内按文件分组、偏移升序向前读取，再按索引顺序返回。
+        每个文件在整个查询期间只打开一次，查询结束（或提前停止迭代）时关闭。
+        """
+        readers: Dict[str, Optional[LogFileReader]] = {}
+        results = self.index.iter_search(query)
         try:
-            with open(file_path, 'rb') as f:
-                if is_compressed:
-                    f = gzip.open(f, 'rt', encoding='utf-8')
-                else:
-                    f = open(file_path, 'r', encoding='utf-8')
+            while True:
+                batch = list(itertools.islice(results, self.read_batch_size))
+                if not batch:
+                    break
+                    
+                offsets = defaultdict(list)
+                compressed = {}
+                for result in batch:
+                    offsets[result["file_path"]].append(result["file_offset"])
+                    compressed[result["file_path"]] = result["compressed"]
                     
-                offset = 0
-                for line in f:
-                    line = line.strip()
-                    if not line:
+                records = {}
+                for file_path, file_offsets in offsets.items():
+                    if file_path not in readers:
+                        readers[file_path] = self._open_reader(file_path, compressed[file_path])
+                    reader = readers[file_path]
+                    if reader is None:
                         continue
+                    for offset, record in reader.read_records(file_offsets, MAX_RECORD_BYTES).items():
+                        records[(file_path, offset)] = record
                         
-                    # 解析日志行
-                    record = self._parse_line(line)
+                for result in batch:
+                    record = records.get((result["file_path"], result["file_offset"]))
                     if record:
-                        # 计算文件偏移量
-                        with open(file_path, 'rb') as bf:
-                            if is_compressed:
-                                # 对于压缩文件，使用字符偏移
-                                bf.seek(0)
-                                content = gzip.decompress(bf.read()).decode('utf-8')
-                                offset = content.find(line.encode('utf-8'))
-                            else:
-                                offset = bf.tell() - len(line.encode('utf-8'))
-                                
-                        # 添加到索引
-                        self.index.add_entry(
-                            timestamp=record.timestamp,
-                            level=record.level,
-                            logger=record.logger,
-                            message=record.message,
-                            file_path=str(file_path),
-                            file_offset=offset,
-                            compressed=is_compressed,
-                            extra_fields=record.extra_fields
-                        )
-                        
-        except Exception as e:
-            print(f"Failed to index file {file_path}: {e}")
-            
-    def _parse_line(self, line: str) -> Optional[LogRecord]:
-        """解析日志行"""
+                        yield record
+        finally:
+            for reader in readers.values():
+                if reader is not None:
+                    reader.close()
+                    
+    def _open_reader(self, file_path: str, compressed: bool) -> Optional[LogFileReader]:
+        """打开查询期间使用的文件读取器，文件不可读时返回None"""
         try:
-            if line.startswith('{'):
-                data = json.loads(line)
-                return LogRecord(**data)
-            else:
-                # 简单的文本解析
-                pattern = r'^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d{3})?Z)\s+(\w+)\s+(\S+)\s+(.+)$'
-                match = re.match(pattern, line)
-                if match:
-                    timestamp, level, logger, message = match.groups()
-                    return LogRecord(
-                        timestamp=timestamp,
-                        level=level,
-                        logger=logger,
-                        message=message,
-                        module="",
-                        function="",
-                        line=0
-                    )
-        except Exception as e:
-            print(f"Failed to parse line: {e}")
+            return LogFileReader(file_path, compressed).open()
+        except OSError as e:
+            print(f"Failed to open log file {file_path}: {e}")
+            return None
             
-        return None
-        
-    def query(self, query: LogQuery) -> List[LogRecord]:
-        """执行日志查询"""
-        # 从索引获取匹配条目
-        index_results = self.index.search(query)
-        records = []
-        
-        # 根据文件路径读取实际日志记录
-        for result in index_results:
-            reader = self._file_readers.get(result["file_path"])
-            if not reader:
-                reader = LogFileReader(result["file_path"], result["compressed"])
-                self._file_readers[result["file_path"]] = reader
-                
-            record = reader.read_record(result["file_offset"], 4096)  # 假设最大记录4KB
-            if record:
-                records.append(record)
-                
-        return records
+    def analyze(self, query: LogQuery, analyzer: Optional["LogAnalyzer"] = None) -> LogAnalysisResult:
+        """以流式聚合方式分析查询结果，内存占用与记录数无关"""
+        analyzer = analyzer or LogAnalyzer()
+        return analyzer.analyze(self.iter_query(query))
 
 
 class LogAnalyzer:
     """日志分析器"""
     
-    def __init__(self):
+    def __init__(self, max_examples: int = 5, reservoir_size: int = 10000):
         self._error_patterns = [
             r"Exception",
             r"Error",
@@ -373,149 +630,175 @@ class LogAnalyzer:
             r"OutOfMemory",
             r"NullPointer"
         ]
-        
-    def analyze(self, records: List[LogRecord]) -> LogAnalysisResult:
-        """分析日志记录"""
-        if not records:
-            return LogAnalysisResult(
-                total_count=0,
-                time_range=(None, None),
-                level_distribution={},
-                logger_distribution={},
-                hourly_distribution={},
-                error_patterns=[],
-                performance_stats={},
-                custom_analysis={}
-            )
-            
-        # 基本统计
-        total_count = len(records)
-        timestamps = [datetime.fromisoformat(r.timestamp.replace('Z', '+00:00')) 
-                     for r in records if r.timestamp]
-        timestamps.sort()
-        
-        time_range = (
-            timestamps[0] if timestamps else None,
-            timestamps[-1] if timestamps else None
+        self.max_examples = max_examples
+        self.reservoir_size = reservoir_size
+        
+    def create_aggregator(self) -> "StreamingLogAggregator":
+        """创建流式聚合器"""
+        return StreamingLogAggregator(
+            self._error_patterns,
+            max_examples=self.max_examples,
+            reservoir_size=self.reservoir_size
         )
         
-        # 级别分布
-        level_dist = Counter(r.level for r in records)
+    def analyze(self, records: Iterable[LogRecord]) -> LogAnalysisResult:
+        """分析日志记录
         
-        # 日志器分布
-        logger_dist = Counter(r.logger for r in records)
-        
-        # 按小时分布
-        hourly_dist = Counter()
-        for ts in timestamps:
-            hourly_dist[ts.hour] += 1
+        记录以迭代器方式逐条消费，可以直接传入查询结果流。
+        """
+        aggregator = self.create_aggregator()
+        for record in records:
+            aggregator.add(record)
+        return aggregator.result()
+
+
+class StreamingLogAggregator:
+    """流式日志聚合器
+    
+    单遍扫描记录，只保留计数器、滑动最值和固定大小的采样池，
+    分位数基于蓄水池采样估算。
+    """
+    
+    def __init__(self, error_patterns: List[str], max_examples: int = 5,
+                 reservoir_size: int = 10000):
+        self._error_patterns = [(pattern, re.compile(pattern, re.IGNORECASE)) for pattern in error_patterns]
+        self.max_examples = max_examples
+        self.reservoir_size = reservoir_size
+        self._random = random.Random(0)
+        
+        self.total_count = 0
+        self._min_ts: Optional[datetime] = None
+        self._max_ts: Optional[datetime] = None
+        self._levels: Counter = Counter()
+        self._loggers: Counter = Counter()
+        self._hourly: Counter = Counter()
+        self._pattern_counts: Counter = Counter()
+        self._pattern_examples: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        
+        # 响应时间统计
+        self._duration_count = 0
+        self._duration_sum = 0.0
+        self._duration_min = float("inf")
+        self._duration_max = float("-inf")
+        self._duration_sample: List[float] = []
+        
+        self._user_activity: Counter = Counter()
+        self._module_durations: Dict[str, List[float]] = {}  # module -> [sum, max, count]
+        
+    def add(self, record: LogRecord) -> None:
+        """聚合单条记录"""
+        self.total_count += 1
+        self._levels[record.level] += 1
+        self._loggers[record.logger] += 1
+        
+        if record.timestamp:
+            ts = datetime.fromisoformat(record.timestamp.replace('Z', '+00:00'))
+            if self._min_ts is None or ts < self._min_ts:
+                self._min_ts = ts
+            if self._max_ts is None or ts > self._max_ts:
+                self._max_ts = ts
+            self._hourly[ts.hour] += 1
             
-        # 错误模式分析
-        error_patterns = self._analyze_error_patterns(records)
-        
-        # 性能统计
-        perf_stats = self._calculate_performance_stats(records)
-        
-        # 自定义分析
-        custom_analysis = self._custom_analysis(records)
-        
-        return LogAnalysisResult(
-            total_count=total_count,
-            time_range=time_range,
-            level_distribution=dict(level_dist),
-            logger_distribution=dict(logger_dist),
-            hourly_distribution=dict(hourly_dist),
-            error_patterns=error_patterns,
-            performance_stats=perf_stats,
-            custom_analysis=custom_analysis
-        )
-        
-    def _analyze_error_patterns(self, records: List[LogRecord]) -> List[Dict[str, Any]]:
-        """分析错误模式"""
-        patterns = []
-        
-        for pattern in self._error_patterns:
-            matches = []
-            for record in records:
-                if re.search(pattern, record.message, re.IGNORECASE):
-                    matches.append({
+        # 错误模式
+        message = record.message
+        for pattern, regex in self._error_patterns:
+            if regex.search(message):
+                self._pattern_counts[pattern] += 1
+                examples = self._pattern_examples[pattern]
+                if len(examples) < self.max_examples:
+                    examples.append({
                         "timestamp": record.timestamp,
                         "logger": record.logger,
-                        "message": record.message[:200] + "..." if len(record.message) > 200 else record.message
+                        "message": message[:200] + "..." if len(message) > 200 else message
                     })
                     
-            if matches:
-                patterns.append({
-                    "pattern": pattern,
-                    "count": len(matches),
-                    "examples": matches[:5]  # 只保留前5个示例
-                })
-                
-        return sorted(patterns, key=lambda x: x["count"], reverse=True)
-        
-    def _calculate_performance_stats(self, records: List[LogRecord]) -> Dict[str, float]:
-        """计算性能统计"""
-        stats = {}
-        
-        # 提取响应时间相关的日志
-        response_times = []
-        for record in records:
-            if record.extra_fields:
-                duration = record.extra_fields.get('duration')
-                if duration:
-                    try:
-                        response_times.append(float(duration))
-                    except ValueError:
-                        continue
-                        
-        if response_times:
-            stats.update({
-                "avg_response_time": statistics.mean(response_times),
-                "min_response_time": min(response_times),
-                "max_response_time": max(response_times),
-                "p95_response_time": statistics.quantiles(response_times, n=20)[18] if len(response_times) >= 20 else max(response_times),
-                "p99_response_time": statistics.quantiles(response_times, n=100)[98] if len(response_times) >= 100 else max(response_times)
-            })
+        extra = record.extra_fields
+        if not extra:
+            return
             
-        return stats
-        
-    def _custom_analysis(self, records: List[LogRecord]) -> Dict[str, Any]:
-        """自定义分析"""
-        analysis = {}
-        
-        # 用户活动分析（如果有user_id字段）
-        user_activity = defaultdict(int)
-        for record in records:
-            if record.extra_fields:
-                user_id = record.extra_fields.get('user_id')
-                if user_id:
-                    user_activity[user_id] += 1
-                    
-        if user_activity:
-            analysis["top_users"] = dict(sorted(user_activity.items(), key=lambda x: x[1], reverse=True)[:10])
+        user_id = extra.get('user_id')
+        if user_id:
+            self._user_activity[user_id] += 1
             
-        # 模块性能分析
-        module_performance = defaultdict(list)
-        for record in records:
-            if record.extra_fields and record.extra_fields.get('duration'):
-                try:
-                    duration = float(record.extra_fields['duration'])
-                    module_performance[record.module].append(duration)
-                except ValueError:
-                    continue
-                    
-        module_stats = {}
-        for module, durations in module_performance.items():
-            if durations:
-                module_stats[module] = {
-                    "avg_duration": statistics.mean(durations),
-                    "max_duration": max(durations),
-                    "call_count": len(durations)
-                }
+        duration = extra.get('duration')
+        if duration:
+            try:
+                duration = float(duration)
+            except (TypeError, ValueError):
+                return
+            self._add_duration(duration)
+            
+            stats = self._module_durations.get(record.module)
+            if stats is None:
+                self._module_durations[record.module] = [duration, duration, 1]
+            else:
+                stats[0] += duration
+                stats[1] = max(stats[1], duration)
+                stats[2] += 1
                 
-        analysis["module_performance"] = module_stats
+    def _add_duration(self, duration: float) -> None:
+        """记录响应时间（蓄水池采样）"""
+        self._duration_count += 1
+        self._duration_sum += duration
+        self._duration_min = min(self._duration_min, duration)
+        self._duration_max = max(self._duration_max, duration)
+        
+        if len(self._duration_sample) < self.reservoir_size:
+            self._duration_sample.append(duration)
+        else:
+            slot = self._random.randrange(self._duration_count)
+            if slot < self.reservoir_size:
+                self._duration_sample[slot] = duration
+                
+    def result(self) -> LogAnalysisResult:
+        """生成分析结果"""
+        error_patterns = [
+            {
+                "pattern": pattern,
+                "count": count,
+                "examples": self._pattern_examples[pattern]
+            }
+            for pattern, count in self._pattern_counts.items()
+        ]
+        error_patterns.sort(key=lambda x: x["count"], reverse=True)
+        
+        custom_analysis: Dict[str, Any] = {}
+        if self._user_activity:
+            custom_analysis["top_users"] = dict(self._user_activity.most_common(10))
+        if self.total_count:
+            custom_analysis["module_performance"] = {
+                module: {
+                    "avg_duration": total / count,
+                    "max_duration": maximum,
+                    "call_count": count
+                }
+                for module, (total, maximum, count) in self._module_durations.items()
+            }
+            
+        return LogAnalysisResult(
+            total_count=self.total_count,
+            time_range=(self._min_ts, self._max_ts),
+            level_distribution=dict(self._levels),
+            logger_distribution=dict(self._loggers),
+            hourly_distribution=dict(self._hourly),
+            error_patterns=error_patterns,
+            performance_stats=self._performance_stats(),
+            custom_analysis=custom_analysis
+        )
         
-        return analysis
+    def _performance_stats(self) -> Dict[str, float]:
+        """计算性能统计"""
+        if not self._duration_count:
+            return {}
+            
+        sample = self._duration_sample
+        return {
+            "avg_response_time": self._duration_sum / self._duration_count,
+            "min_response_time": self._duration_min,
+            "max_response_time": self._duration_max,
+            "p95_response_time": statistics.quantiles(sample, n=20)[18] if len(sample) >= 20 else self._duration_max,
+            "p99_response_time": statistics.quantiles(sample, n=100)[98] if len(sample) >= 100 else self._duration_max
+        }
 
 
 class LogStreamReader:
@@ -685,8 +968,8 @@ def create_query_engine(log_dirs: List[str], index_path: str) -> LogQueryEngine:
     return LogQueryEngine(log_dirs, index_path)
 
 
-def analyze_logs(records: List[LogRecord]) -> LogAnalysisResult:
-    """分析日志记录"""
+def analyze_logs(records: Iterable[LogRecord]) -> LogAnalysisResult:
+    """分析日志记录（支持任意可迭代对象）"""
     analyzer = LogAnalyzer()
     return analyzer.analyze(records)
 
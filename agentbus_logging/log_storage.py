@@ -8,7 +8,6 @@ import os
 import json
 import sqlite3
 import threading
-import time
 import shutil
 import gzip
 import pickle
@@ -25,6 +24,9 @@ import tempfile
 import subprocess
 import mmap
 import bisect
+import zlib
+import struct
+from collections import OrderedDict
 
 from .log_manager import LogRecord, LogLevel
 
@@ -36,6 +38,7 @@ class StorageStrategy(Enum):
     BINARY = "binary"      # 二进制格式
     COMPRESSED = "compressed"  # 压缩格式
     MIXED = "mixed"        # 混合格式
+    COLUMNAR = "columnar"  # 列式压缩块
 
 
 class CompressionType(Enum):
@@ -59,6 +62,10 @@ class StorageConfig:
     enable_partitioning: bool = True
     partition_interval: str = "hour"  # hour, day, week
     encrypt_sensitive: bool = False
+    write_buffer_size: int = 512  # 缓冲记录数达到该值时组提交
+    write_buffer_bytes: int = 1024 * 1024  # 缓冲字节数达到该值时组提交
+    flush_interval: float = 0.2  # 后台定时刷新间隔（秒）
+    block_size: int = 4096  # 列式存储每个块的最大记录数
 
 
 @dataclass
@@ -74,6 +81,124 @@ class LogSegment:
     metadata: Dict[str, Any]
 
 
+# 列式块格式: [头部][列数据(可压缩)][块尾]
+# 块尾保存时间范围、级别位图和logger字典，查询时无需解压列数据即可跳过整块
+BLOCK_MAGIC = b"ALB1"
+BLOCK_HEADER = struct.Struct("<4sBII")  # magic, codec, payload_len, footer_len
+BLOCK_CODEC_NONE = 0
+BLOCK_CODEC_ZLIB = 1
+
+_BLOCK_COLUMNS = ("timestamp", "message", "module", "function", "line",
+                  "thread_id", "process_id", "extra_fields")
+
+
+@dataclass
+class BlockFooter:
+    """列式块尾信息"""
+    count: int
+    min_timestamp: str
+    max_timestamp: str
+    level_bitmaps: Dict[str, int]
+    loggers: List[str]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "min_ts": self.min_timestamp,
+            "max_ts": self.max_timestamp,
+            "levels": {level: format(bitmap, "x") for level, bitmap in self.level_bitmaps.items()},
+            "loggers": self.loggers,
+        }
+        
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BlockFooter":
+        return cls(
+            count=data["count"],
+            min_timestamp=data["min_ts"],
+            max_timestamp=data["max_ts"],
+            level_bitmaps={level: int(bitmap, 16) for level, bitmap in data["levels"].items()},
+            loggers=data["loggers"],
+        )
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def encode_block(records: List[LogRecord], compression: CompressionType) -> bytes:
+    """将一批记录编码为列式块"""
+    columns: Dict[str, List[Any]] = {name: [] for name in _BLOCK_COLUMNS}
+    logger_codes: Dict[str, int] = {}
+    logger_column: List[int] = []
+    level_bitmaps: Dict[str, int] = {}
+    
+    for row, record in enumerate(records):
+        for name in _BLOCK_COLUMNS:
+            columns[name].append(getattr(record, name))
+        code = logger_codes.setdefault(record.logger, len(logger_codes))
+        logger_column.append(code)
+        level_bitmaps[record.level] = level_bitmaps.get(record.level, 0) | (1 << row)
+        
+    columns["logger"] = logger_column
+    payload = json.dumps(columns, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    codec = BLOCK_CODEC_NONE
+    if compression != CompressionType.NONE:
+        # zstd/lz4 不在标准库中，统一回退到zlib
+        payload = zlib.compress(payload)
+        codec = BLOCK_CODEC_ZLIB
+        
+    timestamps = columns["timestamp"]
+    footer = BlockFooter(
+        count=len(records),
+        min_timestamp=min(timestamps),
+        max_timestamp=max(timestamps),
+        level_bitmaps=level_bitmaps,
+        loggers=list(logger_codes),
+    )
+    footer_bytes = json.dumps(footer.to_dict(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    return BLOCK_HEADER.pack(BLOCK_MAGIC, codec, len(payload), len(footer_bytes)) + payload + footer_bytes
+
+
+def decode_block_payload(codec: int, payload: bytes) -> Dict[str, List[Any]]:
+    """解码列式块的列数据"""
+    if codec == BLOCK_CODEC_ZLIB:
+        payload = zlib.decompress(payload)
+    return json.loads(payload)
+
+
+def read_block_at(f, offset: int) -> tuple:
+    """读取指定偏移处的块，返回 (footer, columns)"""
+    f.seek(offset)
+    magic, codec, payload_len, footer_len = BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+    if magic != BLOCK_MAGIC:
+        raise ValueError(f"Invalid block magic at offset {offset}")
+    payload = f.read(payload_len)
+    footer = BlockFooter.from_dict(json.loads(f.read(footer_len)))
+    return footer, decode_block_payload(codec, payload)
+
+
+def block_row_to_record(footer: BlockFooter, columns: Dict[str, List[Any]], row: int) -> LogRecord:
+    """从列数据中取出单条记录"""
+    level = next(
+        (name for name, bitmap in footer.level_bitmaps.items() if bitmap >> row & 1),
+        ""
+    )
+    return LogRecord(
+        timestamp=columns["timestamp"][row],
+        level=level,
+        logger=footer.loggers[columns["logger"][row]],
+        message=columns["message"][row],
+        module=columns["module"][row],
+        function=columns["function"][row],
+        line=columns["line"][row],
+        thread_id=columns["thread_id"][row],
+        process_id=columns["process_id"][row],
+        extra_fields=columns["extra_fields"][row],
+    )
+
+
 class LogStorage:
     """日志存储管理器"""
     
@@ -86,6 +211,17 @@ class LogStorage:
         self._executor = ThreadPoolExecutor(max_workers=2)
         self._metadata_db = None
         self._index_db = None
+        self._current_segment_id: Optional[int] = None
+        self._block_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._block_cache_lock = threading.Lock()
+        self._block_cache_size = 8
+        
+        # 写缓冲（组提交）
+        self._buffer_lock = threading.Lock()
+        self._write_buffer: List[tuple] = []
+        self._buffered_bytes = 0
+        self._stop_event = threading.Event()
+        self._flush_thread: Optional[threading.Thread] = None
         
         # 初始化存储目录
         self._init_storage()
@@ -150,6 +286,10 @@ class LogStorage:
         index_path = self.base_path / "index" / "logs.db"
         self._index_db = sqlite3.connect(str(index_path), check_same_thread=False)
         
+        # 挂载元数据库，索引查询需要关联段表
+        metadata_path = self.base_path / "metadata" / "storage.db"
+        self._index_db.execute("ATTACH DATABASE ? AS meta", (str(metadata_path),))
+        
         self._index_db.execute("""
             CREATE TABLE IF NOT EXISTS log_index (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -160,10 +300,16 @@ class LogStorage:
                 position INTEGER NOT NULL,
                 size INTEGER NOT NULL,
                 checksum TEXT,
+                block_row INTEGER,
                 FOREIGN KEY (segment_id) REFERENCES segments (id)
             )
         """)
         
+        # 兼容旧索引库：补充列式块内行号
+        columns = {row[1] for row in self._index_db.execute("PRAGMA table_info(log_index)")}
+        if "block_row" not in columns:
+            self._index_db.execute("ALTER TABLE log_index ADD COLUMN block_row INTEGER")
+        
         # 创建索引
         self._index_db.execute("CREATE INDEX IF NOT EXISTS idx_timestamp ON log_index(timestamp)")
         self._index_db.execute("CREATE INDEX IF NOT EXISTS idx_level ON log_index(level)")
@@ -185,10 +331,12 @@ class LogStorage:
         if row:
             segment = self._segment_from_row(row)
             self._current_segment = segment
+            self._current_segment_id = row[0]
             
             # 打开文件继续写入
             if Path(segment.file_path).exists():
-                self._segment_file = open(segment.file_path, 'a', encoding='utf-8')
+                self._segment_file = open(segment.file_path, 'ab')
+                segment.file_size = self._segment_file.tell()
             else:
                 self._start_new_segment()
         else:
@@ -203,16 +351,18 @@ class LogStorage:
             segment_name = f"logs_{timestamp.strftime('%Y%m%d')}.log"
         else:
             segment_name = f"logs_{timestamp.strftime('%Y%m%d_%H%M%S')}.log"
+        if self.config.strategy == StorageStrategy.COLUMNAR:
+            segment_name = segment_name[:-len(".log")] + ".blk"
             
-        segment_path = self.base_path / "logs" / segment_name
+        segment_path = self._unique_segment_path(segment_name)
         
         # 关闭当前段
         if self._segment_file:
             self._segment_file.close()
             self._finalize_segment()
             
-        # 开始新段
-        self._segment_file = open(segment_path, 'a', encoding='utf-8')
+        # 开始新段（二进制追加，便于按字节偏移建立索引）
+        self._segment_file = open(segment_path, 'ab')
         
         # 创建段对象
         self._current_segment = LogSegment(
@@ -220,33 +370,80 @@ class LogStorage:
             start_time=timestamp,
             end_time=None,
             record_count=0,
-            file_size=0,
+            file_size=self._segment_file.tell(),
             compressed=False,
             checksum="",
             metadata={}
         )
         
-        # 保存到数据库
-        self._save_segment(self._current_segment)
+        # 保存到数据库，并缓存段ID
+        self._current_segment_id = self._save_segment(self._current_segment)
+        
+    def _unique_segment_path(self, segment_name: str) -> Path:
+        """生成不与已有段冲突的段文件路径
+
+        同一分区周期内重新打开存储时，按分区时间得到的文件名可能已被之前的段占用
+        （包括压缩后的 ``.gz`` 文件和段表记录），此时追加递增序号。
+        """
+        logs_dir = self.base_path / "logs"
+        stem, suffix = os.path.splitext(segment_name)
+        candidate = logs_dir / segment_name
+        sequence = 0
+        while self._segment_path_taken(candidate):
+            sequence += 1
+            candidate = logs_dir / f"{stem}_{sequence:03d}{suffix}"
+        return candidate
+        
+    def _segment_path_taken(self, path: Path) -> bool:
+        """检查段路径是否已被文件或段表记录占用"""
+        compressed_path = Path(str(path) + '.gz')
+        if path.exists() or compressed_path.exists():
+            return True
+        with self._lock:
+            row = self._metadata_db.execute(
+                "SELECT 1 FROM segments WHERE file_path IN (?, ?) LIMIT 1",
+                (str(path), str(compressed_path))
+            ).fetchone()
+        return row is not None
         
-    def _save_segment(self, segment: LogSegment) -> None:
-        """保存段到数据库"""
+    def _save_segment(self, segment: LogSegment, segment_id: Optional[int] = None) -> int:
+        """保存段到数据库，返回段ID"""
+        values = (
+            segment.file_path,
+            segment.start_time.isoformat(),
+            segment.end_time.isoformat() if segment.end_time else None,
+            segment.record_count,
+            segment.file_size,
+            1 if segment.compressed else 0,
+            segment.checksum,
+            json.dumps(segment.metadata)
+        )
         with self._lock:
-            self._metadata_db.execute("""
-                INSERT OR REPLACE INTO segments 
-                (file_path, start_time, end_time, record_count, file_size, compressed, checksum, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                segment.file_path,
-                segment.start_time.isoformat(),
-                segment.end_time.isoformat() if segment.end_time else None,
-                segment.record_count,
-                segment.file_size,
-                1 if segment.compressed else 0,
-                segment.checksum,
-                json.dumps(segment.metadata)
-            ))
+            if segment_id is not None:
+                # 按ID更新，保持索引中的segment_id稳定（压缩后文件路径会变化）
+                self._metadata_db.execute("""
+                    UPDATE segments SET file_path = ?, start_time = ?, end_time = ?,
+                        record_count = ?, file_size = ?, compressed = ?, checksum = ?, metadata = ?
+                    WHERE id = ?
+                """, values + (segment_id,))
+            else:
+                self._metadata_db.execute("""
+                    INSERT INTO segments 
+                    (file_path, start_time, end_time, record_count, file_size, compressed, checksum, metadata)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(file_path) DO UPDATE SET
+                        end_time = excluded.end_time,
+                        record_count = excluded.record_count,
+                        file_size = excluded.file_size,
+                        compressed = excluded.compressed,
+                        checksum = excluded.checksum,
+                        metadata = excluded.metadata
+                """, values)
+                segment_id = self._metadata_db.execute(
+                    "SELECT id FROM segments WHERE file_path = ? LIMIT 1", (segment.file_path,)
+                ).fetchone()[0]
             self._metadata_db.commit()
+        return segment_id
             
     def _segment_from_row(self, row) -> LogSegment:
         """从数据库行创建段对象"""
@@ -262,29 +459,99 @@ class LogStorage:
         )
         
     def write_record(self, record: LogRecord) -> None:
-        """写入日志记录"""
+        """写入日志记录
+        
+        记录只序列化一次并放入写缓冲，缓冲达到记录数或字节数阈值时由当前调用方
+        组提交，其余情况由后台线程按 ``flush_interval`` 定时刷新。
+        """
+        if self.config.strategy == StorageStrategy.COLUMNAR:
+            # 列式存储在刷新时按块编码
+            payload = None
+            payload_size = len(record.message) + 64
+        else:
+            data = self._serialize_record(record)
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            payload = data + b'\n'
+            payload_size = len(payload)
+        
+        with self._buffer_lock:
+            self._write_buffer.append((record, payload))
+            self._buffered_bytes += payload_size
+            should_flush = (
+                len(self._write_buffer) >= self.config.write_buffer_size
+                or self._buffered_bytes >= self.config.write_buffer_bytes
+            )
+            
+        if should_flush:
+            self.flush()
+            
+    def flush(self) -> None:
+        """将写缓冲中的记录批量落盘并提交索引"""
         with self._lock:
-            # 检查是否需要轮转段
+            with self._buffer_lock:
+                if not self._write_buffer:
+                    return
+                batch = self._write_buffer
+                self._write_buffer = []
+                self._buffered_bytes = 0
+                
             if self._should_rotate_segment():
                 self._start_new_segment()
                 
-            # 序列化记录
-            serialized_record = self._serialize_record(record)
+            segment = self._current_segment
+            position = segment.file_size
+            index_rows = []
+            index_enabled = self.config.enable_indexing and self._index_db is not None
+            chunks = []
             
-            # 写入文件
-            self._segment_file.write(serialized_record + '\n')
+            if self.config.strategy == StorageStrategy.COLUMNAR:
+                block_size = max(1, self.config.block_size)
+                for start in range(0, len(batch), block_size):
+                    records = [record for record, _ in batch[start:start + block_size]]
+                    block = encode_block(records, self.config.compression)
+                    if index_enabled:
+                        checksum = format(zlib.crc32(block), '08x')
+                        for row, record in enumerate(records):
+                            index_rows.append((
+                                self._current_segment_id,
+                                record.timestamp,
+                                record.level,
+                                record.logger,
+                                position,
+                                len(block),
+                                checksum,
+                                row
+                            ))
+                    chunks.append(block)
+                    position += len(block)
+            else:
+                for record, payload in batch:
+                    if index_enabled:
+                        index_rows.append((
+                            self._current_segment_id,
+                            record.timestamp,
+                            record.level,
+                            record.logger,
+                            position,
+                            len(payload) - 1,
+                            format(zlib.crc32(payload), '08x'),
+                            None
+                        ))
+                    chunks.append(payload)
+                    position += len(payload)
+                
+            self._segment_file.write(b''.join(chunks))
             self._segment_file.flush()
             
-            # 更新段信息
-            if self._current_segment:
-                self._current_segment.record_count += 1
-                self._current_segment.file_size = Path(self._current_segment.file_path).stat().st_size
+            segment.record_count += len(batch)
+            segment.file_size = position
+            
+            # 批量写入索引，单个事务提交
+            if index_rows:
+                self._index_record_batch(index_rows)
                 
-                # 更新索引
-                if self.config.enable_indexing:
-                    self._index_record(record)
-                    
-    def _serialize_record(self, record: LogRecord) -> str:
+    def _serialize_record(self, record: LogRecord) -> Union[str, bytes]:
         """序列化日志记录"""
         if self.config.strategy == StorageStrategy.JSON:
             return json.dumps(record.to_dict(), ensure_ascii=False)
@@ -298,38 +565,14 @@ class LogStorage:
             # 默认JSON
             return json.dumps(record.to_dict(), ensure_ascii=False)
             
-    def _index_record(self, record: LogRecord) -> None:
-        """索引日志记录"""
-        if not self._index_db or not self._current_segment:
-            return
-            
-        # 计算位置和校验和
-        position = self._segment_file.tell()
-        serialized = self._serialize_record(record)
-        checksum = hashlib.sha256(serialized.encode()).hexdigest()
-        
-        # 保存到索引
-        self._index_db.execute("""
-            INSERT INTO log_index 
-            (segment_id, timestamp, level, logger, position, size, checksum)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            self._get_current_segment_id(),
-            record.timestamp,
-            record.level,
-            record.logger,
-            position,
-            len(serialized.encode()),
-            checksum
-        ))
-        
-    def _get_current_segment_id(self) -> int:
-        """获取当前段ID"""
-        cursor = self._metadata_db.execute("""
-            SELECT id FROM segments WHERE file_path = ? LIMIT 1
-        """, (self._current_segment.file_path,))
-        row = cursor.fetchone()
-        return row[0] if row else 0
+    def _index_record_batch(self, rows: List[tuple]) -> None:
+        """批量写入索引行"""
+        with self._index_db:
+            self._index_db.executemany("""
+                INSERT INTO log_index 
+                (segment_id, timestamp, level, logger, position, size, checksum, block_row)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
         
     def _should_rotate_segment(self) -> bool:
         """检查是否应该轮转段"""
@@ -363,12 +606,13 @@ class LogStorage:
         # 计算校验和
         self._current_segment.checksum = self._calculate_file_checksum(self._current_segment.file_path)
         
-        # 压缩文件（如果启用）
-        if self.config.compression != CompressionType.NONE:
+        # 压缩文件（如果启用；列式块已经逐块压缩）
+        if (self.config.compression != CompressionType.NONE
+                and self.config.strategy != StorageStrategy.COLUMNAR):
             self._compress_segment()
             
         # 保存到数据库
-        self._save_segment(self._current_segment)
+        self._save_segment(self._current_segment, self._current_segment_id)
         
     def _calculate_file_checksum(self, file_path: str) -> str:
         """计算文件校验和"""
@@ -408,6 +652,9 @@ class LogStorage:
                      loggers: Optional[List[str]] = None,
                      limit: Optional[int] = None) -> Iterator[LogRecord]:
         """查询日志记录"""
+        # 先刷新写缓冲，保证查询能看到已写入的记录
+        self.flush()
+        
         if not self.config.enable_indexing:
             # 如果没有索引，使用全表扫描
             return self._full_scan_query(start_time, end_time, levels, loggers, limit)
@@ -446,17 +693,20 @@ class LogStorage:
         limit_clause = f"LIMIT {limit}" if limit else ""
         
         sql = f"""
-            SELECT li.*, s.file_path, s.compressed
+            SELECT li.id, li.segment_id, li.timestamp, li.level, li.logger,
+                   li.position, li.size, li.block_row, s.file_path, s.compressed
             FROM log_index li
-            JOIN segments s ON li.segment_id = s.id
+            JOIN meta.segments s ON li.segment_id = s.id
             WHERE {where_clause}
             ORDER BY li.timestamp DESC
             {limit_clause}
         """
         
-        cursor = self._index_db.execute(sql, params)
+        # 与写入方共用同一把锁，避免并发使用同一个连接
+        with self._lock:
+            rows = self._index_db.execute(sql, params).fetchall()
         
-        for row in cursor.fetchall():
+        for row in rows:
             yield self._record_from_index_row(row)
             
     def _full_scan_query(self, start_time: Optional[datetime] = None,
@@ -469,7 +719,7 @@ class LogStorage:
         cursor = self._metadata_db.execute("""
             SELECT * FROM segments 
             WHERE (start_time <= ? OR ? IS NULL)
-            AND (end_time >= ? OR ? IS NULL)
+            AND (end_time >= ? OR ? IS NULL OR end_time IS NULL)
             ORDER BY start_time DESC
         """, (
             end_time.isoformat() if end_time else None,
@@ -481,54 +731,85 @@ class LogStorage:
         records_yielded = 0
         
         for row in cursor.fetchall():
-            if limit and records_yielded >= limit:
-                break
-                
             segment = self._segment_from_row(row)
             
-            # 读取文件记录
-            records = self._read_segment_records(segment)
-            
-            for record in records:
+            # 流式读取段记录，不整体加载到内存
+            for record in self._iter_segment_records(segment, start_time, end_time, levels, loggers):
                 if limit and records_yielded >= limit:
-                    break
-                    
-                # 应用过滤器
-                if levels and record.level not in levels:
-                    continue
-                    
-                if loggers and record.logger not in loggers:
-                    continue
-                    
-                if start_time and datetime.fromisoformat(record.timestamp.replace('Z', '+00:00')) < start_time:
-                    continue
-                    
-                if end_time and datetime.fromisoformat(record.timestamp.replace('Z', '+00:00')) > end_time:
-                    continue
+                    return
                     
                 yield record
                 records_yielded += 1
                 
     def _record_from_index_row(self, row) -> LogRecord:
-        """从索引行创建记录对象"""
-        # 这里需要根据实际存储格式来反序列化
-        # 简化实现
+        """从索引行创建记录对象，按偏移读取完整记录"""
+        _, _, timestamp, level, logger, position, size, block_row, file_path, compressed = row
+        try:
+            record = self._fetch_record(file_path, bool(compressed), position, size, block_row)
+            if record:
+                return record
+        except Exception as e:
+            print(f"Failed to fetch record at {file_path}:{position}: {e}")
+            
+        # 读取失败时仅返回索引字段
         return LogRecord(
-            timestamp=row[2],
-            level=row[3],
-            logger=row[4],
+            timestamp=timestamp,
+            level=level,
+            logger=logger,
             message="",
             module="",
             function="",
             line=0
         )
         
+    def _fetch_record(self, file_path: str, compressed: bool, position: int,
+                      size: int, block_row: Optional[int]) -> Optional[LogRecord]:
+        """按偏移读取单条记录"""
+        if block_row is not None:
+            footer, columns = self._get_block(file_path, position)
+            return block_row_to_record(footer, columns, block_row)
+            
+        file_opener = gzip.open if compressed else open
+        with file_opener(file_path, 'rb') as f:
+            f.seek(position)
+            data = f.read(size)
+        return self._deserialize_record(data.decode('utf-8'))
+        
+    def _get_block(self, file_path: str, offset: int) -> tuple:
+        """读取列式块（带小型LRU缓存，连续命中同一块时只解码一次）"""
+        key = (file_path, offset)
+        with self._block_cache_lock:
+            block = self._block_cache.get(key)
+            if block is not None:
+                self._block_cache.move_to_end(key)
+                return block
+                
+        with open(file_path, 'rb') as f:
+            block = read_block_at(f, offset)
+            
+        with self._block_cache_lock:
+            self._block_cache[key] = block
+            while len(self._block_cache) > self._block_cache_size:
+                self._block_cache.popitem(last=False)
+        return block
+        
     def _read_segment_records(self, segment: LogSegment) -> List[LogRecord]:
         """读取段文件中的所有记录"""
-        records = []
+        return list(self._iter_segment_records(segment))
+        
+    def _iter_segment_records(self, segment: LogSegment,
+                              start_time: Optional[datetime] = None,
+                              end_time: Optional[datetime] = None,
+                              levels: Optional[List[str]] = None,
+                              loggers: Optional[List[str]] = None) -> Iterator[LogRecord]:
+        """逐条读取段文件中满足条件的记录"""
         file_path = Path(segment.file_path)
         
         try:
+            if file_path.suffix == ".blk":
+                yield from self._iter_block_records(file_path, start_time, end_time, levels, loggers)
+                return
+                
             if segment.compressed:
                 file_opener = gzip.open
             else:
@@ -537,15 +818,97 @@ class LogStorage:
             with file_opener(file_path, 'rt', encoding='utf-8') as f:
                 for line in f:
                     line = line.strip()
-                    if line:
-                        record = self._deserialize_record(line)
-                        if record:
-                            records.append(record)
+                    if not line:
+                        continue
+                    record = self._deserialize_record(line)
+                    if record and self._record_matches(record, start_time, end_time, levels, loggers):
+                        yield record
                             
         except Exception as e:
             print(f"Failed to read segment {segment.file_path}: {e}")
             
-        return records
+    @staticmethod
+    def _record_matches(record: LogRecord,
+                        start_time: Optional[datetime],
+                        end_time: Optional[datetime],
+                        levels: Optional[List[str]],
+                        loggers: Optional[List[str]]) -> bool:
+        """检查记录是否满足过滤条件"""
+        if levels and record.level not in levels:
+            return False
+            
+        if loggers and record.logger not in loggers:
+            return False
+            
+        if start_time or end_time:
+            timestamp = _parse_timestamp(record.timestamp)
+            if start_time and timestamp < start_time:
+                return False
+            if end_time and timestamp > end_time:
+                return False
+                
+        return True
+        
+    def _iter_block_records(self, file_path: Path,
+                            start_time: Optional[datetime],
+                            end_time: Optional[datetime],
+                            levels: Optional[List[str]],
+                            loggers: Optional[List[str]]) -> Iterator[LogRecord]:
+        """逐块读取列式段，利用块尾跳过不相关的块"""
+        with open(file_path, 'rb') as f:
+            while True:
+                header = f.read(BLOCK_HEADER.size)
+                if len(header) < BLOCK_HEADER.size:
+                    break
+                magic, codec, payload_len, footer_len = BLOCK_HEADER.unpack(header)
+                if magic != BLOCK_MAGIC:
+                    raise ValueError(f"Invalid block magic in {file_path}")
+                    
+                payload_pos = f.tell()
+                f.seek(payload_len, os.SEEK_CUR)
+                footer = BlockFooter.from_dict(json.loads(f.read(footer_len)))
+                
+                # 时间范围不相交则跳过
+                block_start = _parse_timestamp(footer.min_timestamp)
+                block_end = _parse_timestamp(footer.max_timestamp)
+                if (start_time and block_end < start_time) or (end_time and block_start > end_time):
+                    continue
+                    
+                # 级别位图选出候选行
+                if levels:
+                    selected = 0
+                    for level in levels:
+                        selected |= footer.level_bitmaps.get(level, 0)
+                else:
+                    selected = (1 << footer.count) - 1
+                if not selected:
+                    continue
+                    
+                # logger字典中没有目标logger则跳过
+                logger_codes = None
+                if loggers:
+                    logger_codes = {code for code, name in enumerate(footer.loggers) if name in loggers}
+                    if not logger_codes:
+                        continue
+                        
+                end_pos = f.tell()
+                f.seek(payload_pos)
+                columns = decode_block_payload(codec, f.read(payload_len))
+                f.seek(end_pos)
+                
+                check_time = bool(
+                    (start_time and block_start < start_time) or (end_time and block_end > end_time)
+                )
+                for row in range(footer.count):
+                    if not selected >> row & 1:
+                        continue
+                    if logger_codes is not None and columns["logger"][row] not in logger_codes:
+                        continue
+                    if check_time:
+                        timestamp = _parse_timestamp(columns["timestamp"][row])
+                        if (start_time and timestamp < start_time) or (end_time and timestamp > end_time):
+                            continue
+                    yield block_row_to_record(footer, columns, row)
         
     def _deserialize_record(self, data: str) -> Optional[LogRecord]:
         """反序列化记录"""
@@ -569,6 +932,11 @@ class LogStorage:
         """清理过期日志"""
         cutoff_date = datetime.now() - timedelta(days=self.config.retention_days)
         
+        with self._lock:
+            self._cleanup_segments_before(cutoff_date)
+            
+    def _cleanup_segments_before(self, cutoff_date: datetime) -> None:
+        """删除结束时间早于截止时间的段（调用方持有 ``_lock``）"""
         # 查找过期段
         cursor = self._metadata_db.execute("""
             SELECT * FROM segments 
@@ -604,19 +972,31 @@ class LogStorage:
     def _start_background_tasks(self) -> None:
         """启动后台任务"""
         def cleanup_task():
-            while True:
+            while not self._stop_event.is_set():
                 try:
                     self.cleanup_old_logs()
                     # 每天执行一次清理
-                    time.sleep(86400)
+                    self._stop_event.wait(86400)
                 except Exception as e:
                     print(f"Cleanup task error: {e}")
-                    time.sleep(3600)  # 出错时1小时后重试
+                    self._stop_event.wait(3600)  # 出错时1小时后重试
+                    
+        def flush_task():
+            while not self._stop_event.wait(self.config.flush_interval):
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"Flush task error: {e}")
                     
         self._executor.submit(cleanup_task)
         
+        self._flush_thread = threading.Thread(target=flush_task, name="log-storage-flush", daemon=True)
+        self._flush_thread.start()
+        
     def get_storage_stats(self) -> Dict[str, Any]:
         """获取存储统计信息"""
+        self.flush()
+        
         cursor = self._metadata_db.execute("""
             SELECT 
                 COUNT(*) as total_segments,
@@ -661,7 +1041,13 @@ class LogStorage:
                     
     def close(self) -> None:
         """关闭存储管理器"""
+        self._stop_event.set()
+        if self._flush_thread:
+            self._flush_thread.join()
+            
         with self._lock:
+            self.flush()
+            
             if self._segment_file:
                 self._segment_file.close()
                 self._finalize_segment()
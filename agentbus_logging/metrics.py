@@ -12,11 +12,13 @@ import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Callable, Union
 from dataclasses import dataclass, asdict, field
-from collections import defaultdict, deque
+from collections import deque
 from enum import Enum
 import queue
 from pathlib import Path
-import statistics
+import itertools
+import math
+import re
 
 
 class MetricType(Enum):
@@ -89,20 +91,165 @@ class ApplicationMetrics:
         return asdict(self)
 
 
+class QuantileSketch:
+    """可合并的分位数草图
+    
+    采用DDSketch风格的对数分桶：数值落入 ``gamma^(k-1) < v <= gamma^k`` 的桶k，
+    分位数估计的相对误差不超过 ``relative_accuracy``。记录为O(1)，
+    不同线程/分片的草图可以直接合并。
+    """
+    
+    __slots__ = ("relative_accuracy", "_gamma", "_log_gamma", "_positive", "_negative",
+                 "zero_count", "count", "sum", "min", "max", "last")
+    
+    MIN_INDEXABLE = 1e-9
+    
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._positive: Dict[int, int] = {}
+        self._negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.last = 0.0
+        
+    def add(self, value: float) -> None:
+        """记录一个数值"""
+        self.count += 1
+        self.sum += value
+        self.last = value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+            
+        if value > self.MIN_INDEXABLE:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self._positive[index] = self._positive.get(index, 0) + 1
+        elif value < -self.MIN_INDEXABLE:
+            index = math.ceil(math.log(-value) / self._log_gamma)
+            self._negative[index] = self._negative.get(index, 0) + 1
+        else:
+            self.zero_count += 1
+            
+    def merge(self, other: "QuantileSketch") -> None:
+        """合并另一个相同精度的草图"""
+        for index, count in other._positive.items():
+            self._positive[index] = self._positive.get(index, 0) + count
+        for index, count in other._negative.items():
+            self._negative[index] = self._negative.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.last = other.last
+        
+    def copy(self) -> "QuantileSketch":
+        sketch = QuantileSketch(self.relative_accuracy)
+        sketch.merge(self)
+        sketch.last = self.last
+        return sketch
+        
+    def _bucket_value(self, index: int) -> float:
+        return 2 * self._gamma ** index / (self._gamma + 1)
+        
+    def quantile(self, q: float) -> float:
+        """估计分位数（q取值0~1）"""
+        if self.count == 0:
+            return 0.0
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+            
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self._negative, reverse=True):
+            seen += self._negative[index]
+            if seen > rank:
+                return max(self.min, -self._bucket_value(index))
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for index in sorted(self._positive):
+            seen += self._positive[index]
+            if seen > rank:
+                return min(self.max, self._bucket_value(index))
+        return self.max
+        
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class _MetricShard:
+    """指标分片：每个线程固定写入一个分片，减少锁竞争"""
+    
+    __slots__ = ("lock", "counters", "timers", "histograms")
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[tuple, float] = {}
+        self.timers: Dict[tuple, QuantileSketch] = {}
+        self.histograms: Dict[tuple, QuantileSketch] = {}
+
+
 class MetricsCollector:
-    """指标收集器"""
+    """指标收集器
+    
+    计数器、计时器和直方图按线程写入独立分片，标签集合在首次出现时驻留，
+    记录路径不做JSON序列化也不创建时间戳；读取时再合并各分片。
+    计时器和直方图使用 :class:`QuantileSketch` 统计分位数。
+    """
     
-    def __init__(self, collection_interval: float = 1.0):
+    def __init__(self, collection_interval: float = 1.0, shard_count: int = 16,
+                 relative_accuracy: float = 0.01):
         self.collection_interval = collection_interval
-        self.metrics: Dict[str, Metric] = {}
+        self.relative_accuracy = relative_accuracy
         self.system_history: deque = deque(maxlen=3600)  # 保存1小时数据
         self.app_history: deque = deque(maxlen=3600)
-        self.response_times: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
         self._lock = threading.Lock()
         self._running = False
         self._collection_thread: Optional[threading.Thread] = None
         self._callbacks: List[Callable[[Dict[str, Metric]], None]] = []
         
+        self._registered: Dict[str, Metric] = {}
+        self._gauges: Dict[tuple, Union[int, float]] = {}
+        self._label_sets: Dict[tuple, tuple] = {}
+        self._shards = [_MetricShard() for _ in range(max(1, shard_count))]
+        self._shard_assigner = itertools.count()
+        self._local = threading.local()
+        
+    def _shard(self) -> _MetricShard:
+        """获取当前线程的分片"""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._shards[next(self._shard_assigner) % len(self._shards)]
+            self._local.shard = shard
+        return shard
+        
+    def _series_key(self, name: str, labels: Optional[Dict[str, str]]) -> tuple:
+        """生成 (名称, 标签) 序列键，相同标签集合复用同一对象"""
+        if not labels:
+            key = (name, ())
+        else:
+            key = (name, tuple(sorted(labels.items())))
+        interned = self._label_sets.get(key)
+        if interned is None:
+            interned = self._label_sets.setdefault(key, key)
+        return interned
+        
+    @staticmethod
+    def _legacy_key(series: tuple) -> str:
+        """兼容旧版的指标键格式 name:{labels}"""
+        name, labels = series
+        return f"{name}:{json.dumps(dict(labels), sort_keys=True)}"
+        
     def start_collection(self) -> None:
         """开始指标收集"""
         with self._lock:
@@ -119,60 +266,89 @@ class MetricsCollector:
         """停止指标收集"""
         with self._lock:
             self._running = False
-            if self._collection_thread:
-                self._collection_thread.join(timeout=5)
+            thread = self._collection_thread
+        if thread:
+            thread.join(timeout=5)
                 
     def register_metric(self, metric: Metric) -> None:
         """注册指标"""
         with self._lock:
-            self.metrics[metric.name] = metric
+            self._registered[metric.name] = metric
             
     def increment_counter(self, name: str, value: int = 1, labels: Optional[Dict[str, str]] = None) -> None:
         """增加计数器"""
-        with self._lock:
-            key = f"{name}:{json.dumps(labels or {}, sort_keys=True)}"
-            if key not in self.metrics:
-                self.metrics[key] = Metric(name, MetricType.COUNTER, 0, labels or {})
-            self.metrics[key].value += value
-            self.metrics[key].timestamp = datetime.utcnow().isoformat()
+        key = self._series_key(name, labels)
+        shard = self._shard()
+        with shard.lock:
+            shard.counters[key] = shard.counters.get(key, 0) + value
             
     def set_gauge(self, name: str, value: Union[int, float], labels: Optional[Dict[str, str]] = None) -> None:
         """设置仪表盘值"""
+        key = self._series_key(name, labels)
         with self._lock:
-            key = f"{name}:{json.dumps(labels or {}, sort_keys=True)}"
-            if key not in self.metrics:
-                self.metrics[key] = Metric(name, MetricType.GAUGE, value, labels or {})
-            self.metrics[key].value = value
-            self.metrics[key].timestamp = datetime.utcnow().isoformat()
+            self._gauges[key] = value
             
     def record_timer(self, name: str, duration: float, labels: Optional[Dict[str, str]] = None) -> None:
         """记录计时器"""
-        with self._lock:
-            # 更新统计信息
-            response_times = self.response_times[name]
-            response_times.append(duration)
-            
-            # 更新指标
-            key = f"{name}:{json.dumps(labels or {}, sort_keys=True)}"
-            self.metrics[key] = Metric(
-                name=name,
-                type=MetricType.TIMER,
-                value=duration,
-                labels=labels or {},
-                timestamp=datetime.utcnow().isoformat()
-            )
+        key = self._series_key(name, labels)
+        shard = self._shard()
+        with shard.lock:
+            sketch = shard.timers.get(key)
+            if sketch is None:
+                sketch = shard.timers[key] = QuantileSketch(self.relative_accuracy)
+            sketch.add(duration)
             
     def record_histogram(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
         """记录直方图"""
+        key = self._series_key(name, labels)
+        shard = self._shard()
+        with shard.lock:
+            sketch = shard.histograms.get(key)
+            if sketch is None:
+                sketch = shard.histograms[key] = QuantileSketch(self.relative_accuracy)
+            sketch.add(value)
+            
+    def _merge_counters(self) -> Dict[tuple, float]:
+        """合并各分片的计数器"""
+        merged: Dict[tuple, float] = {}
+        for shard in self._shards:
+            with shard.lock:
+                items = list(shard.counters.items())
+            for key, value in items:
+                merged[key] = merged.get(key, 0) + value
+        return merged
+        
+    def _merge_sketches(self, attr: str) -> Dict[tuple, QuantileSketch]:
+        """合并各分片的计时器或直方图草图"""
+        merged: Dict[tuple, QuantileSketch] = {}
+        for shard in self._shards:
+            with shard.lock:
+                items = [(key, sketch.copy()) for key, sketch in getattr(shard, attr).items()]
+            for key, sketch in items:
+                if key in merged:
+                    merged[key].merge(sketch)
+                else:
+                    merged[key] = sketch
+        return merged
+        
+    @property
+    def metrics(self) -> Dict[str, Metric]:
+        """当前全部指标的快照（按需物化为Metric对象）"""
+        timestamp = datetime.utcnow().isoformat()
+        result = dict(self._registered)
+        
+        for key, value in self._merge_counters().items():
+            result[self._legacy_key(key)] = Metric(key[0], MetricType.COUNTER, value, dict(key[1]), timestamp)
         with self._lock:
-            key = f"{name}:{json.dumps(labels or {}, sort_keys=True)}"
-            self.metrics[key] = Metric(
-                name=name,
-                type=MetricType.HISTOGRAM,
-                value=value,
-                labels=labels or {},
-                timestamp=datetime.utcnow().isoformat()
-            )
+            gauges = list(self._gauges.items())
+        for key, value in gauges:
+            result[self._legacy_key(key)] = Metric(key[0], MetricType.GAUGE, value, dict(key[1]), timestamp)
+        for key, sketch in self._merge_sketches("timers").items():
+            result[self._legacy_key(key)] = Metric(key[0], MetricType.TIMER, sketch.last, dict(key[1]), timestamp)
+        for key, sketch in self._merge_sketches("histograms").items():
+            result[self._legacy_key(key)] = Metric(key[0], MetricType.HISTOGRAM, sketch.last, dict(key[1]), timestamp)
+            
+        return result
             
     def get_system_metrics(self) -> SystemMetrics:
         """获取系统指标"""
@@ -236,32 +412,34 @@ class MetricsCollector:
                 
         return metrics
         
+    def get_timer_sketch(self, name: str, labels: Optional[Dict[str, str]] = None) -> QuantileSketch:
+        """获取计时器草图；不指定标签时合并该名称下的所有标签集合"""
+        merged = QuantileSketch(self.relative_accuracy)
+        target = self._series_key(name, labels) if labels else None
+        for key, sketch in self._merge_sketches("timers").items():
+            if key[0] == name and (target is None or key == target):
+                merged.merge(sketch)
+        return merged
+        
     def get_response_time_stats(self, name: str) -> Dict[str, float]:
         """获取响应时间统计"""
-        response_times = self.response_times.get(name, deque())
-        if not response_times:
+        sketch = self.get_timer_sketch(name)
+        return self._sketch_stats(sketch)
+        
+    @staticmethod
+    def _sketch_stats(sketch: QuantileSketch) -> Dict[str, float]:
+        if not sketch.count:
             return {"avg": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "min": 0.0, "max": 0.0}
             
-        values = list(response_times)
         return {
-            "avg": statistics.mean(values),
-            "p50": statistics.median(values),
-            "p95": self._percentile(values, 95),
-            "p99": self._percentile(values, 99),
-            "min": min(values),
-            "max": max(values)
+            "avg": sketch.mean,
+            "p50": sketch.quantile(0.5),
+            "p95": sketch.quantile(0.95),
+            "p99": sketch.quantile(0.99),
+            "min": sketch.min,
+            "max": sketch.max
         }
         
-    def _percentile(self, data: List[float], percentile: int) -> float:
-        """计算百分位数"""
-        if not data:
-            return 0.0
-        sorted_data = sorted(data)
-        index = int(len(sorted_data) * percentile / 100)
-        if index >= len(sorted_data):
-            index = len(sorted_data) - 1
-        return sorted_data[index]
-        
     def _collection_loop(self) -> None:
         """指标收集循环"""
         while self._running:
@@ -298,16 +476,22 @@ class MetricsCollector:
         
     def get_metrics_snapshot(self) -> Dict[str, Any]:
         """获取指标快照"""
-        with self._lock:
-            return {
-                "system": self.get_system_metrics().to_dict(),
-                "application": self.get_application_metrics().to_dict(),
-                "custom_metrics": {name: metric.to_dict() for name, metric in self.metrics.items()},
-                "response_time_stats": {
-                    name: self.get_response_time_stats(name)
-                    for name in self.response_times.keys()
-                }
+        timer_stats: Dict[str, QuantileSketch] = {}
+        for key, sketch in self._merge_sketches("timers").items():
+            if key[0] in timer_stats:
+                timer_stats[key[0]].merge(sketch)
+            else:
+                timer_stats[key[0]] = sketch
+                
+        return {
+            "system": self.get_system_metrics().to_dict(),
+            "application": self.get_application_metrics().to_dict(),
+            "custom_metrics": {name: metric.to_dict() for name, metric in self.metrics.items()},
+            "response_time_stats": {
+                name: self._sketch_stats(sketch)
+                for name, sketch in timer_stats.items()
             }
+        }
             
     def export_metrics(self, format_type: str = "json") -> str:
         """导出指标数据"""
@@ -316,18 +500,52 @@ class MetricsCollector:
         if format_type == "json":
             return json.dumps(snapshot, indent=2, ensure_ascii=False)
         elif format_type == "prometheus":
-            # Prometheus格式
-            lines = []
-            for name, metric in self.metrics.items():
-                labels_str = ""
-                if metric.labels:
-                    label_parts = [f'{k}="{v}"' for k, v in metric.labels.items()]
-                    labels_str = "{" + ",".join(label_parts) + "}"
-                lines.append(f"{metric.name}{labels_str} {metric.value}")
-            return "\n".join(lines)
+            return self.export_prometheus()
         else:
             return str(snapshot)
             
+    def export_prometheus(self) -> str:
+        """导出Prometheus文本格式（计时器和直方图导出为summary）
+        
+        同一个名称被不同种类的指标使用时（例如既是计时器又是直方图），先导出的种类
+        保留原名，其余种类加 ``_<种类>`` 后缀，避免同名指标出现冲突的 ``# TYPE`` 行。
+        """
+        families: Dict[str, tuple] = {}  # name -> (kind, type, [lines])
+        
+        def family(name: str, kind: str, metric_type: str) -> tuple:
+            name = _prometheus_name(name)
+            if name in families and families[name][0] != kind:
+                name = f"{name}_{kind}"
+            if name not in families:
+                families[name] = (kind, metric_type, [])
+            return name, families[name][2]
+            
+        for metric in self._registered.values():
+            metric_name, lines = family(metric.name, "registered", "untyped")
+            lines.append(f"{metric_name}{_prometheus_labels(metric.labels.items())} {metric.value}")
+        for (name, labels), value in self._merge_counters().items():
+            metric_name, lines = family(name, "counter", "counter")
+            lines.append(f"{metric_name}{_prometheus_labels(labels)} {value}")
+        with self._lock:
+            gauges = list(self._gauges.items())
+        for (name, labels), value in gauges:
+            metric_name, lines = family(name, "gauge", "gauge")
+            lines.append(f"{metric_name}{_prometheus_labels(labels)} {value}")
+        for attr, kind in (("timers", "timer"), ("histograms", "histogram")):
+            for (name, labels), sketch in self._merge_sketches(attr).items():
+                metric_name, lines = family(name, kind, "summary")
+                for q in (0.5, 0.9, 0.95, 0.99):
+                    quantile_labels = labels + (("quantile", str(q)),)
+                    lines.append(f"{metric_name}{_prometheus_labels(quantile_labels)} {sketch.quantile(q)}")
+                lines.append(f"{metric_name}_sum{_prometheus_labels(labels)} {sketch.sum}")
+                lines.append(f"{metric_name}_count{_prometheus_labels(labels)} {sketch.count}")
+                
+        output = []
+        for name, (_, metric_type, lines) in families.items():
+            output.append(f"# TYPE {name} {metric_type}")
+            output.extend(lines)
+        return "\n".join(output) + "\n"
+            
     def save_metrics_to_file(self, file_path: str, format_type: str = "json") -> None:
         """保存指标到文件"""
         data = self.export_metrics(format_type)
@@ -408,6 +626,26 @@ class PerformanceMonitor:
         return decorator
 
 
+_PROMETHEUS_NAME_RE = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def _prometheus_name(name: str) -> str:
+    """将指标名转换为合法的Prometheus名称"""
+    name = _PROMETHEUS_NAME_RE.sub("_", name)
+    return f"_{name}" if name[:1].isdigit() else name
+
+
+def _prometheus_labels(labels) -> str:
+    """格式化Prometheus标签"""
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{_PROMETHEUS_NAME_RE.sub("_", str(key))}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
 # 全局指标收集器实例
 _metrics_collector: Optional[MetricsCollector] = None
 
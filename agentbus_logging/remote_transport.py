@@ -4,35 +4,91 @@ AgentBus远程日志传输系统
 支持多种远程日志传输方式：HTTP、HTTPS、WebSocket、TCP等
 """
 
-import asyncio
 import json
-import logging as py_logging
 import threading
 import time
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Callable, Union
-from dataclasses import asdict
+import random
+import zlib
+import itertools
+from collections import deque
+from typing import Any, Dict, List, Optional, Callable
+from dataclasses import dataclass
 from pathlib import Path
-import ssl
 import websocket
 import requests
 import socket
-from urllib.parse import urlparse
 from concurrent.futures import ThreadPoolExecutor
 import gzip
 import base64
 
 from .log_manager import LogRecord, LogTransport
+from .metrics import MetricsCollector
+
+
+# 批次编码：每条记录一行JSON（NDJSON），启用压缩时以gzip流式编码
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+# spool文件后缀；写入时先写 .tmp 再重命名
+SPOOL_SUFFIXES = (".ndjson", ".ndjson.gz")
+SPOOL_TMP_SUFFIX = ".tmp"
+
+
+@dataclass
+class LogBatch:
+    """待发送的日志批次"""
+    payload: bytes
+    record_count: int
+    compressed: bool
+    spool_file: Optional[Path] = None
+
+
+def encode_records(records: List[LogRecord], compress: bool = True) -> bytes:
+    """将记录流式编码为（gzip压缩的）NDJSON"""
+    lines = (
+        (json.dumps(record.to_dict(), ensure_ascii=False) + "\n").encode("utf-8")
+        for record in records
+    )
+    if not compress:
+        return b"".join(lines)
+        
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 输出gzip格式
+    chunks = [compressor.compress(line) for line in lines]
+    chunks.append(compressor.flush())
+    return b"".join(chunks)
+
+
+def decode_records(payload: bytes, compressed: bool) -> List[LogRecord]:
+    """解码NDJSON批次"""
+    if compressed:
+        payload = gzip.decompress(payload)
+    return [
+        LogRecord(**json.loads(line))
+        for line in payload.decode("utf-8").splitlines()
+        if line.strip()
+    ]
 
 
 class RemoteTransport(LogTransport):
-    """远程日志传输基类"""
+    """远程日志传输基类
+    
+    write() 只把记录放入有界内存缓冲并立即返回。后台发送线程按批次编码，
+    并用 ``max_in_flight`` 限制同时在途的批次数；发送跟不上时缓冲区写满，
+    最早的记录溢出到磁盘 spool 目录，连接恢复或进程重启后补发。
+    """
     
     def __init__(self, name: str, endpoint: str, 
                  timeout: int = 30, retry_count: int = 3,
                  enable_compression: bool = True,
                  batch_size: int = 100,
-                 batch_timeout: float = 5.0):
+                 batch_timeout: float = 5.0,
+                 max_buffer_records: int = 10000,
+                 max_in_flight: int = 2,
+                 spool_dir: Optional[str] = None,
+                 max_spool_bytes: int = 256 * 1024 * 1024,
+                 max_spool_attempts: int = 5,
+                 retry_backoff: float = 0.5,
+                 max_retry_delay: float = 30.0,
+                 metrics_collector: Optional[MetricsCollector] = None):
         super().__init__(name)
         self.endpoint = endpoint
         self.timeout = timeout
@@ -40,88 +96,344 @@ class RemoteTransport(LogTransport):
         self.enable_compression = enable_compression
         self.batch_size = batch_size
         self.batch_timeout = batch_timeout
-        self._buffer: List[LogRecord] = []
+        self.max_buffer_records = max(max_buffer_records, batch_size)
+        self.max_in_flight = max_in_flight
+        self.max_spool_bytes = max_spool_bytes
+        self.max_spool_attempts = max_spool_attempts
+        self.retry_backoff = retry_backoff
+        self.max_retry_delay = max_retry_delay
+        self.metrics_collector = metrics_collector
+        
+        self._buffer: deque = deque()
         self._buffer_lock = threading.Lock()
-        self._executor = ThreadPoolExecutor(max_workers=2)
+        self._buffer_cond = threading.Condition(self._buffer_lock)
+        self._flush_requested = False
         self._last_flush = time.time()
         
-    def _compress_data(self, data: bytes) -> bytes:
-        """压缩数据"""
-        if self.enable_compression:
-            return gzip.compress(data)
-        return data
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        self._in_flight_count = 0
+        self._stop_event = threading.Event()
+        self._sender_thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
         
-    def _encode_data(self, data: bytes) -> str:
-        """编码数据为字符串"""
-        return base64.b64encode(data).decode('utf-8')
-        
-    def _flush_buffer(self) -> None:
-        """刷新缓冲区"""
-        with self._buffer_lock:
-            if len(self._buffer) == 0:
-                return
-                
-            records = self._buffer.copy()
-            self._buffer.clear()
-            self._last_flush = time.time()
+        # 磁盘spool
+        self._spool_path = Path(spool_dir) / name if spool_dir else None
+        self._spool_lock = threading.Lock()
+        self._spool_files: deque = deque()
+        self._spool_bytes = 0
+        self._spool_retry_at = 0.0
+        self._spool_seq = itertools.count()
+        self._spool_attempts: Dict[Path, int] = {}
+        if self._spool_path:
+            self._load_spool()
             
-        # 异步发送
-        self._executor.submit(self._send_records, records)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "sent_records": 0,
+            "sent_batches": 0,
+            "sent_bytes": 0,
+            "spooled_records": 0,
+            "dropped_records": 0,
+            "failed_batches": 0,
+            "dead_letter_batches": 0,
+        }
+        self._last_error: Optional[str] = None
         
-    def _send_records(self, records: List[LogRecord]) -> None:
-        """发送日志记录"""
+    def _ensure_started(self) -> None:
+        """按需启动后台发送线程（子类初始化完成后才会发送）"""
+        if self._sender_thread is not None:
+            return
+            
+        with self._start_lock:
+            if self._sender_thread is None and not self._stop_event.is_set():
+                self._sender_thread = threading.Thread(
+                    target=self._sender_loop,
+                    name=f"log-shipper-{self.name}",
+                    daemon=True
+                )
+                self._sender_thread.start()
+                
+    def _sender_loop(self) -> None:
+        """后台发送循环"""
+        while True:
+            with self._buffer_cond:
+                deadline = self._last_flush + self.batch_timeout
+                while (len(self._buffer) < self.batch_size
+                       and not self._flush_requested
+                       and not self._stop_event.is_set()
+                       and not self._spool_ready()):
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    if self._spool_files:
+                        # 补发被推迟时，到点后醒来重试
+                        remaining = min(remaining, max(0.0, self._spool_retry_at - time.time()))
+                    self._buffer_cond.wait(remaining)
+                    
+                count = min(self.batch_size, len(self._buffer))
+                records = [self._buffer.popleft() for _ in range(count)]
+                if not self._buffer:
+                    self._flush_requested = False
+                self._last_flush = time.time()
+                stopping = self._stop_event.is_set()
+                
+            if records:
+                self._dispatch(LogBatch(
+                    payload=encode_records(records, self.enable_compression),
+                    record_count=len(records),
+                    compressed=self.enable_compression
+                ))
+            elif stopping:
+                break
+            elif self._spool_ready():
+                self._ship_spooled()
+                
+    def _dispatch(self, batch: LogBatch) -> None:
+        """提交批次发送；在途批次达到上限时阻塞发送线程（流控）"""
+        self._in_flight.acquire()
+        with self._stats_lock:
+            self._in_flight_count += 1
         try:
-            # 序列化记录
-            data = {
-                "timestamp": datetime.utcnow().isoformat(),
-                "source": "agentbus",
-                "records": [record.to_dict() for record in records]
-            }
+            self._executor.submit(self._send_batch, batch)
+        except RuntimeError:
+            # 执行器已关闭
+            self._release_in_flight()
+            self._spool_batch(batch)
             
-            # 转换为JSON并压缩
-            json_data = json.dumps(data, ensure_ascii=False).encode('utf-8')
-            compressed_data = self._compress_data(json_data)
-            encoded_data = self._encode_data(compressed_data)
+    def _release_in_flight(self) -> None:
+        with self._stats_lock:
+            self._in_flight_count -= 1
+        self._in_flight.release()
             
-            # 发送到远程端点
+    def _send_batch(self, batch: LogBatch) -> None:
+        """发送批次，失败时按指数退避加抖动重试，最终失败写入spool"""
+        try:
             for attempt in range(self.retry_count):
                 try:
-                    success = self._transmit(encoded_data, len(compressed_data))
-                    if success:
-                        break
+                    if self._transmit(batch):
+                        self._record_sent(batch)
+                        if batch.spool_file:
+                            self._remove_spooled(batch.spool_file)
+                        return
                 except Exception as e:
-                    if attempt == self.retry_count - 1:
-                        print(f"Remote transport {self.name} failed after {self.retry_count} attempts: {e}")
-                    time.sleep(2 ** attempt)  # 指数退避
+                    self._last_error = str(e)
                     
-        except Exception as e:
-            print(f"Failed to send records: {e}")
+                if attempt < self.retry_count - 1:
+                    delay = min(self.max_retry_delay, self.retry_backoff * (2 ** attempt))
+                    self._stop_event.wait(delay * (0.5 + random.random()))
+                    
+            self._bump("failed_batches")
+            if batch.spool_file:
+                # 已在spool中，稍后重试
+                self._release_spooled(batch.spool_file)
+            else:
+                self._spool_batch(batch)
+        finally:
+            self._release_in_flight()
             
-    def _transmit(self, data: str, original_size: int) -> bool:
+    def _transmit(self, batch: LogBatch) -> bool:
         """传输数据 - 子类实现"""
         raise NotImplementedError
         
-    def write(self, record: LogRecord) -> None:
-        """写入日志记录"""
-        with self._buffer_lock:
-            self._buffer.append(record)
+    # ---- spool ----
+    
+    def _load_spool(self) -> None:
+        """加载上次遗留的spool文件
+
+        崩溃时可能遗留未完成重命名的 ``.tmp`` 文件：内容能完整解码的补完重命名，
+        否则视为写了一半的文件直接删除。
+        """
+        self._spool_path.mkdir(parents=True, exist_ok=True)
+        for tmp_file in self._spool_path.glob("*" + SPOOL_TMP_SUFFIX):
+            self._recover_tmp_spool(tmp_file)
+            
+        files = [
+            file for file in self._spool_path.iterdir()
+            if file.is_file() and file.name.endswith(SPOOL_SUFFIXES)
+        ]
+        for file in sorted(files):
+            self._spool_files.append(file)
+            self._spool_bytes += file.stat().st_size
+            
+    def _recover_tmp_spool(self, tmp_file: Path) -> None:
+        """处理崩溃遗留的临时spool文件"""
+        file = tmp_file.with_name(tmp_file.name[:-len(SPOOL_TMP_SUFFIX)])
+        try:
+            if not file.name.endswith(SPOOL_SUFFIXES):
+                raise ValueError(f"unexpected spool file {tmp_file.name}")
+            decode_records(tmp_file.read_bytes(), file.name.endswith(".gz"))
+            tmp_file.rename(file)
+        except Exception:
+            try:
+                tmp_file.unlink()
+            except OSError:
+                pass
+            
+    def _spool_ready(self) -> bool:
+        """是否有可补发的spool批次"""
+        return bool(self._spool_files) and time.time() >= self._spool_retry_at
+        
+    def _spool_batch(self, batch: LogBatch) -> None:
+        """将批次写入磁盘spool，未配置spool或超出容量时丢弃"""
+        if not self._spool_path:
+            self._bump("dropped_records", batch.record_count)
+            return
+            
+        with self._spool_lock:
+            if self._spool_bytes + len(batch.payload) > self.max_spool_bytes:
+                self._bump("dropped_records", batch.record_count)
+                return
+                
+            suffix = ".ndjson.gz" if batch.compressed else ".ndjson"
+            file = self._spool_path / f"{time.time_ns():020d}-{next(self._spool_seq):06d}-{batch.record_count}{suffix}"
+            tmp_file = file.with_name(file.name + SPOOL_TMP_SUFFIX)
+            tmp_file.write_bytes(batch.payload)
+            tmp_file.rename(file)
+            self._spool_files.append(file)
+            self._spool_bytes += len(batch.payload)
             
-            # 检查是否需要刷新
-            should_flush = (
-                len(self._buffer) >= self.batch_size or
-                time.time() - self._last_flush >= self.batch_timeout
+        self._bump("spooled_records", batch.record_count)
+        
+    def _spill_records(self, records: List[LogRecord]) -> None:
+        """内存缓冲溢出的记录直接写入spool"""
+        self._spool_batch(LogBatch(
+            payload=encode_records(records, self.enable_compression),
+            record_count=len(records),
+            compressed=self.enable_compression
+        ))
+        
+    def _ship_spooled(self) -> None:
+        """补发一个spool批次"""
+        with self._spool_lock:
+            if not self._spool_files:
+                return
+            file = self._spool_files.popleft()
+            
+        try:
+            payload = file.read_bytes()
+        except OSError:
+            return
+            
+        record_count = int(file.name.split(".")[0].rsplit("-", 1)[-1])
+        self._dispatch(LogBatch(
+            payload=payload,
+            record_count=record_count,
+            compressed=file.name.endswith(".gz"),
+            spool_file=file
+        ))
+        
+    def _remove_spooled(self, file: Path) -> None:
+        """补发成功后删除spool文件"""
+        with self._spool_lock:
+            self._spool_attempts.pop(file, None)
+            try:
+                self._spool_bytes -= file.stat().st_size
+                file.unlink()
+            except OSError:
+                pass
+                
+    def _release_spooled(self, file: Path) -> None:
+        """补发失败，放回队首并推迟下次补发
+
+        同一批次补发失败达到 ``max_spool_attempts`` 次后移入死信目录，
+        避免一个始终失败的批次永久阻塞后续补发。
+        """
+        with self._spool_lock:
+            attempts = self._spool_attempts.pop(file, 0) + 1
+            if attempts >= self.max_spool_attempts:
+                self._dead_letter_spooled(file)
+            else:
+                self._spool_attempts[file] = attempts
+                self._spool_files.appendleft(file)
+                self._spool_retry_at = time.time() + self.max_retry_delay
+                
+        if attempts >= self.max_spool_attempts:
+            self._bump("dead_letter_batches")
+        else:
+            # 唤醒发送线程，按新的补发时间重新计算等待
+            with self._buffer_cond:
+                self._buffer_cond.notify()
+                
+    def _dead_letter_spooled(self, file: Path) -> None:
+        """将多次补发失败的spool文件移入死信目录（调用方持有 ``_spool_lock``）"""
+        try:
+            size = file.stat().st_size
+            dead_letter = self._spool_path / "dead"
+            dead_letter.mkdir(exist_ok=True)
+            file.rename(dead_letter / file.name)
+            self._spool_bytes -= size
+        except OSError:
+            pass
+            
+    # ---- 统计 ----
+    
+    def _bump(self, key: str, value: int = 1) -> None:
+        """更新统计计数并导出到指标收集器"""
+        with self._stats_lock:
+            self._stats[key] += value
+        if self.metrics_collector:
+            self.metrics_collector.increment_counter(
+                f"remote_log_{key}_total", value, {"transport": self.name}
             )
             
-        if should_flush:
-            self._flush_buffer()
+    def _record_sent(self, batch: LogBatch) -> None:
+        self._bump("sent_records", batch.record_count)
+        self._bump("sent_batches")
+        self._bump("sent_bytes", len(batch.payload))
+        
+    def get_stats(self) -> Dict[str, Any]:
+        """获取传输统计信息"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = self._in_flight_count
+        with self._buffer_lock:
+            stats["buffered_records"] = len(self._buffer)
+        with self._spool_lock:
+            stats["spooled_batches"] = len(self._spool_files)
+            stats["spool_bytes"] = self._spool_bytes
+        stats["last_error"] = self._last_error
+        return stats
+        
+    # ---- LogTransport接口 ----
+        
+    def write(self, record: LogRecord) -> None:
+        """写入日志记录（不阻塞调用方网络I/O）"""
+        if self._stop_event.is_set():
+            self._bump("dropped_records")
+            return
             
-    def flush(self) -> None:
-        """刷新输出"""
-        self._flush_buffer()
+        self._ensure_started()
+        overflow = None
         
+        with self._buffer_cond:
+            if len(self._buffer) >= self.max_buffer_records:
+                # 缓冲区已满：最早的一批记录溢出到spool
+                count = min(self.batch_size, len(self._buffer))
+                overflow = [self._buffer.popleft() for _ in range(count)]
+            self._buffer.append(record)
+            if len(self._buffer) >= self.batch_size:
+                self._buffer_cond.notify()
+                
+        if overflow:
+            self._spill_records(overflow)
+            
+    def flush(self) -> None:
+        """请求尽快发送缓冲中的记录"""
+        self._ensure_started()
+        with self._buffer_cond:
+            self._flush_requested = True
+            self._buffer_cond.notify()
+            
     def close(self) -> None:
-        """关闭传输"""
-        self.flush()
+        """关闭传输：发送剩余记录，发送失败的批次写入spool"""
+        self._ensure_started()
+        with self._buffer_cond:
+            self._stop_event.set()
+            self._buffer_cond.notify()
+            
+        if self._sender_thread:
+            self._sender_thread.join()
         self._executor.shutdown(wait=True)
 
 
@@ -134,26 +446,46 @@ class HTTPLogTransport(RemoteTransport):
         super().__init__(name, url, **kwargs)
         self.headers = headers or {}
         self.headers.update({
-            "Content-Type": "application/json",
+            "Content-Type": NDJSON_CONTENT_TYPE,
             "User-Agent": "AgentBus-Logger/1.0"
         })
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._sessions_lock = threading.Lock()
         
-    def _transmit(self, data: str, original_size: int) -> bool:
-        """HTTP传输"""
-        payload = {
-            "data": data,
-            "original_size": original_size,
-            "compressed": self.enable_compression
-        }
+    def _get_session(self) -> requests.Session:
+        """每个发送线程复用一个长连接会话"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
         
-        response = requests.post(
+    def _transmit(self, batch: LogBatch) -> bool:
+        """HTTP传输"""
+        headers = {"X-Log-Records": str(batch.record_count)}
+        if batch.compressed:
+            headers["Content-Encoding"] = "gzip"
+            
+        response = self._get_session().post(
             self.endpoint,
-            json=payload,
-            headers=self.headers,
+            data=batch.payload,
+            headers=headers,
             timeout=self.timeout
         )
         response.raise_for_status()
         return True
+        
+    def close(self) -> None:
+        """关闭传输并释放各发送线程的会话连接"""
+        super().close()
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
 
 
 class WebSocketLogTransport(RemoteTransport):
@@ -166,6 +498,7 @@ class WebSocketLogTransport(RemoteTransport):
         self.reconnect_interval = reconnect_interval
         self.ws = None
         self._connect_lock = threading.Lock()
+        self._send_lock = threading.Lock()
         self._connected = False
         
     def _ensure_connected(self) -> None:
@@ -187,28 +520,28 @@ class WebSocketLogTransport(RemoteTransport):
                 print(f"WebSocket connection failed: {e}")
                 raise
                 
-    def _transmit(self, data: str, original_size: int) -> bool:
-        """WebSocket传输"""
+    def _transmit(self, batch: LogBatch) -> bool:
+        """WebSocket传输（二进制帧，连接复用）"""
         self._ensure_connected()
         
-        message = json.dumps({
-            "type": "logs",
-            "data": data,
-            "original_size": original_size
-        })
-        
-        self.ws.send(message)
+        try:
+            with self._send_lock:
+                self.ws.send_binary(batch.payload)
+        except Exception:
+            # 连接失效，下次发送时重连
+            self._connected = False
+            raise
         return True
         
     def close(self) -> None:
         """关闭WebSocket连接"""
+        super().close()
         if self.ws:
             try:
                 self.ws.close()
             except:
                 pass
         self._connected = False
-        super().close()
 
 
 class TCPLogTransport(RemoteTransport):
@@ -219,26 +552,38 @@ class TCPLogTransport(RemoteTransport):
         self.host = host
         self.port = port
         self._socket = None
+        self._socket_lock = threading.Lock()
         
-    def _transmit(self, data: str, original_size: int) -> bool:
-        """TCP传输"""
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.settimeout(self.timeout)
-                sock.connect((self.host, self.port))
-                
-                # 发送数据长度前缀
-                length_prefix = f"{len(data):10d}"
-                sock.sendall(length_prefix.encode('utf-8'))
+    def _transmit(self, batch: LogBatch) -> bool:
+        """TCP传输（长连接，10字节长度前缀 + 批次数据）"""
+        with self._socket_lock:
+            try:
+                if self._socket is None:
+                    self._socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+                    
+                # 发送数据长度前缀和数据
+                length_prefix = f"{len(batch.payload):10d}"
+                self._socket.sendall(length_prefix.encode('utf-8') + batch.payload)
+                return True
                 
-                # 发送数据
-                sock.sendall(data.encode('utf-8'))
+            except Exception as e:
+                print(f"TCP transport failed: {e}")
+                self._close_socket()
+                return False
                 
-            return True
+    def _close_socket(self) -> None:
+        if self._socket:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+            self._socket = None
             
-        except Exception as e:
-            print(f"TCP transport failed: {e}")
-            return False
+    def close(self) -> None:
+        """关闭TCP连接"""
+        super().close()
+        with self._socket_lock:
+            self._close_socket()
 
 
 class RedisLogTransport(RemoteTransport):
@@ -262,7 +607,7 @@ class RedisLogTransport(RemoteTransport):
                 raise Exception("Redis transport requires redis-py library")
         return self._redis_client
         
-    def _transmit(self, data: str, original_size: int) -> bool:
+    def _transmit(self, batch: LogBatch) -> bool:
         """Redis传输"""
         try:
             client = self._get_redis_client()
@@ -271,7 +616,7 @@ class RedisLogTransport(RemoteTransport):
             )
             
             # 存储到Redis
-            client.lpush(key, data)
+            client.lpush(key, batch.payload)
             client.expire(key, 86400)  # 24小时过期
             
             return True
@@ -355,63 +700,64 @@ class CentralizedLogServer:
         """启动服务器"""
         import http.server
         import socketserver
-        from urllib.parse import urlparse, parse_qs
         
         class LogHandler(http.server.BaseHTTPRequestHandler):
             def __init__(self, *args, server_instance=None, **kwargs):
                 self.server_instance = server_instance
                 super().__init__(*args, **kwargs)
                 
+            protocol_version = "HTTP/1.1"  # 支持客户端长连接
+            
             def do_POST(self):
-                if self.path == '/logs':
-                    content_length = int(self.headers['Content-Length'])
-                    post_data = self.rfile.read(content_length)
+                if self.path != '/logs':
+                    self._reply(404, {"error": "not found"})
+                    return
                     
-                    try:
-                        # 解析接收到的数据
+                content_length = int(self.headers['Content-Length'])
+                post_data = self.rfile.read(content_length)
+                
+                try:
+                    content_type = self.headers.get('Content-Type', '')
+                    
+                    if content_type.startswith(NDJSON_CONTENT_TYPE):
+                        # 流式NDJSON批次
+                        compressed = self.headers.get('Content-Encoding') == 'gzip'
+                        records = decode_records(post_data, compressed)
+                    else:
+                        # 兼容旧格式：base64编码的JSON
                         data = json.loads(post_data.decode('utf-8'))
-                        
-                        if 'data' in data:
-                            # 解码和解析日志数据
-                            import base64
-                            import gzip
-                            
-                            encoded_data = data['data']
-                            compressed_data = base64.b64decode(encoded_data.encode('utf-8'))
-                            
-                            if data.get('compressed', False):
-                                decompressed_data = gzip.decompress(compressed_data)
-                            else:
-                                decompressed_data = compressed_data
-                                
-                            parsed_data = json.loads(decompressed_data.decode('utf-8'))
-                            records_data = parsed_data.get('records', [])
-                            
-                            # 转换为LogRecord对象
-                            from .log_manager import LogRecord
-                            records = [
-                                LogRecord(**record_data) 
-                                for record_data in records_data
-                            ]
-                            
-                            # 调用所有处理器
-                            for handler in self.server_instance._handlers:
-                                handler(records)
-                                
-                            self.send_response(200)
-                            self.send_header('Content-type', 'application/json')
-                            self.end_headers()
-                            self.wfile.write(b'{"status": "ok"}')
+                        if 'data' not in data:
+                            self._reply(400, {"error": "missing data"})
+                            return
                             
+                        compressed_data = base64.b64decode(data['data'].encode('utf-8'))
+                        if data.get('compressed', False):
+                            decompressed_data = gzip.decompress(compressed_data)
                         else:
-                            self.send_response(400)
-                            self.end_headers()
+                            decompressed_data = compressed_data
                             
-                    except Exception as e:
-                        self.send_response(500)
-                        self.send_header('Content-type', 'application/json')
-                        self.end_headers()
-                        self.wfile.write(json.dumps({"error": str(e)}).encode())
+                        parsed_data = json.loads(decompressed_data.decode('utf-8'))
+                        records = [
+                            LogRecord(**record_data) 
+                            for record_data in parsed_data.get('records', [])
+                        ]
+                        
+                    # 调用所有处理器
+                    for handler in self.server_instance._handlers:
+                        handler(records)
+                        
+                    self._reply(200, {"status": "ok", "records": len(records)})
+                    
+                except Exception as e:
+                    self._reply(500, {"error": str(e)})
+                    
+            def _reply(self, status: int, body: Dict[str, Any]) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
                         
             def log_message(self, format, *args):
                 # 禁用默认日志
@@ -421,17 +767,22 @@ class CentralizedLogServer:
         def handler_factory(*args, **kwargs):
             return LogHandler(*args, server_instance=self, **kwargs)
             
+        # 多线程服务器，允许多个客户端长连接并发发送
+        class LogHTTPServer(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+            
+        httpd = LogHTTPServer(("", self.port), handler_factory)
+        
         if self.enable_ssl:
             # HTTPS服务器
             import ssl
-            httpd = socketserver.TCPServer(("", self.port), handler_factory)
             context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
             context.load_cert_chain(self.cert_file, self.key_file)
             httpd.socket = context.wrap_socket(httpd.socket, server_side=True)
-        else:
-            # HTTP服务器
-            httpd = socketserver.TCPServer(("", self.port), handler_factory)
             
+        # port=0 时使用系统分配的端口
+        self.port = httpd.server_address[1]
         self._server = httpd
         self._running = True
         
@@ -442,6 +793,7 @@ class CentralizedLogServer:
         """停止服务器"""
         if self._server:
             self._server.shutdown()
+            self._server.server_close()
             self._server = None
         self._running = False
 
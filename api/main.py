@@ -16,7 +16,7 @@ from .routes import (
 from core.dependencies import (
     startup_event, shutdown_event, 
     get_plugin_manager, get_channel_manager,
-    check_services_health
+    check_services_health, get_startup_report
 )
 from plugins.manager import PluginManager
 from channels.manager import ChannelManager
@@ -75,6 +75,16 @@ def create_app() -> FastAPI:
             "timestamp": "2026-01-29T11:47:03Z"
         }
     
+    # 就绪检查端点：服务预热完成前返回 503
+    @app.get("/ready")
+    async def readiness_check():
+        """就绪检查"""
+        report = get_startup_report()
+        return JSONResponse(
+            status_code=200 if report["ready"] else 503,
+            content=report
+        )
+    
     # 根端点
     @app.get("/")
     async def root():
@@ -84,6 +94,7 @@ def create_app() -> FastAPI:
             "version": "1.0.0",
             "docs": "/docs",
             "health": "/health",
+            "ready": "/ready",
             "api_prefix": "/api",
             "ui": "/ui",
             "management": "/management"
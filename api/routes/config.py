@@ -6,6 +6,7 @@ AgentBus配置管理API路由
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import PlainTextResponse
 
 router = APIRouter(prefix="/api/config", tags=["config"])
 
@@ -282,3 +283,14 @@ async def get_metrics():
         "cpu_usage_percent": 15.0,
         "active_connections": 5
     }
+
+
+@router.get("/metrics/prometheus", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """以Prometheus文本格式导出指标"""
+    from agentbus_logging.metrics import get_metrics_collector
+    
+    return PlainTextResponse(
+        get_metrics_collector().export_prometheus(),
+        media_type="text/plain; version=0.0.4"
+    )
@@ -8,7 +8,7 @@ Stream Response Processing API routes for AgentBus
 
 from datetime import datetime
 from typing import Dict, List, Optional, Any
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends, Query, Header
 from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
@@ -32,7 +32,8 @@ from api.schemas.stream_response import (
 from core.dependencies import get_stream_response_processor
 from services.stream_response import (
     StreamResponseProcessor, StreamRequest, StreamChunk as ServiceStreamChunk,
-    StreamEventType as ServiceStreamEventType, StreamStatus as ServiceStreamStatus
+    StreamEventType as ServiceStreamEventType, StreamStatus as ServiceStreamStatus,
+    SubscriberDropped
 )
 
 
@@ -52,6 +53,8 @@ def api_to_service_stream_request(api_request: StreamRequestCreate) -> StreamReq
         temperature=api_request.temperature,
         chunk_size=api_request.chunk_size,
         delay_ms=api_request.delay_ms,
+        flush_latency_ms=api_request.flush_latency_ms,
+        max_flush_bytes=api_request.max_flush_bytes,
         metadata=api_request.metadata
     )
 
@@ -255,50 +258,51 @@ async def create_batch_streams(
 @router.get("/sse/{stream_id}")
 async def stream_sse(
     stream_id: str,
+    last_event_id: Optional[int] = Query(None, description="从该序号之后续传"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
     processor: StreamResponseProcessor = Depends(get_stream_response_processor)
 ):
-    """Server-Sent Events流端点"""
+    """Server-Sent Events流端点，每个连接独立订阅，断线后按Last-Event-ID续传"""
+    if last_event_id is None and last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = int(last_event_id_header)
     
     async def event_generator():
         """事件生成器"""
+        subscription = processor.subscribe(stream_id, last_event_id)
+        if subscription is None:
+            yield f"data: {json.dumps({'error': 'Stream not found'})}\n\n"
+            return
+        
         try:
-            queue = await processor.get_stream_queue(stream_id)
-            if queue is None:
-                yield f"data: {json.dumps({'error': 'Stream not found'})}\n\n"
-                return
+            if subscription.missed:
+                # 请求的续传位置已超出保留窗口
+                yield f"data: {json.dumps({'event': 'gap', 'missed': subscription.missed})}\n\n"
             
             while True:
                 try:
                     # 等待数据块
-                    chunk = await asyncio.wait_for(queue.get(), timeout=30)
-                    
-                    # 转换为SSE格式
-                    event_data = {
-                        "stream_id": chunk.stream_id,
-                        "event": chunk.event_type.value,
-                        "data": {
-                            "content": chunk.content,
-                            "token_count": chunk.token_count,
-                            "progress": chunk.progress,
-                            "timestamp": chunk.timestamp.isoformat(),
-                            "metadata": chunk.metadata,
-                            "error": chunk.error
-                        }
-                    }
+                    chunk = await asyncio.wait_for(subscription.get(), timeout=30)
                     
-                    yield f"data: {json.dumps(event_data, ensure_ascii=False)}\n\n"
+                    # SSE帧在数据块上只编码一次，所有订阅者共享
+                    yield chunk.to_sse()
                     
                     # 如果是完成或错误事件，结束流
-                    if chunk.event_type in [StreamEventType.COMPLETE, StreamEventType.ERROR, StreamEventType.CANCEL]:
+                    if chunk.event_type.value in (StreamEventType.COMPLETE.value, StreamEventType.ERROR.value,
+                                                  StreamEventType.CANCEL.value):
                         break
                         
                 except asyncio.TimeoutError:
                     # 发送心跳
                     yield f"data: {json.dumps({'event': 'heartbeat', 'timestamp': datetime.now().isoformat()})}\n\n"
                     
+        except SubscriberDropped as e:
+            # 订阅者过慢被断开，客户端可携带Last-Event-ID重连续传
+            yield f"data: {json.dumps({'error': e.reason, 'resume_from': e.resume_from - 1})}\n\n"
         except Exception as e:
             logger.error(f"SSE流错误: {e}")
             yield f"data: {json.dumps({'error': str(e)})}\n\n"
+        finally:
+            subscription.close()
     
     return StreamingResponse(
         event_generator(),
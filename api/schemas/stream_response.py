@@ -48,7 +48,9 @@ class StreamRequestBase(BaseModel):
     max_tokens: Optional[int] = Field(None, description="最大令牌数")
     temperature: float = Field(default=0.7, description="温度参数")
     chunk_size: int = Field(default=10, description="数据块大小")
-    delay_ms: int = Field(default=50, description="延迟毫秒数")
+    delay_ms: int = Field(default=50, description="最小发送间隔毫秒数")
+    flush_latency_ms: int = Field(default=30, description="token最长等待毫秒数")
+    max_flush_bytes: int = Field(default=4096, description="单次发送最大字节数")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="元数据")
 
 
@@ -0,0 +1,7 @@
+"""
+AgentBus性能基准测试
+
+每个模块都可以直接运行，例如::
+
+    python -m benchmarks.bench_log_storage
+"""
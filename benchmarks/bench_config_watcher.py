@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+配置监听器轮询开销基准测试
+
+生成大量配置文件，统计每次轮询的 CPU 时间（空闲 / 少量文件变化），
+以及事件后端空闲时的 CPU 占用。对照组复刻旧实现：每次轮询 rglob 整个目录树，
+逐个 stat，mtime 变化的文件整体读入计算 md5。
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from config.watcher import (
+    BACKEND_INOTIFY,
+    BACKEND_WATCHDOG,
+    CONFIG_EXTENSIONS,
+    HAS_WATCHDOG,
+    ConfigTreeScanner,
+    ConfigWatcher,
+    InotifyBackend,
+)
+
+
+class LegacyPoller:
+    """复刻旧版 _poll_for_changes，作为对照组"""
+
+    def __init__(self, config_dir: Path):
+        self.config_dir = config_dir
+        self._last_modified_times = {}
+
+    def poll(self):
+        changes = []
+        for file_path in self.config_dir.rglob('*'):
+            if not (file_path.is_file() and file_path.suffix.lower() in CONFIG_EXTENSIONS):
+                continue
+            if file_path.exists():
+                stat = file_path.stat()
+                if stat.st_mtime > self._last_modified_times.get(file_path, 0):
+                    with open(file_path, 'rb') as f:
+                        changes.append(hashlib.md5(f.read()).hexdigest())
+                    self._last_modified_times[file_path] = stat.st_mtime
+        return changes
+
+
+def make_tree(root: Path, files: int, per_dir: int = 100) -> list:
+    paths = []
+    for i in range(files):
+        directory = root / f"tenant{i // per_dir:04d}"
+        directory.mkdir(exist_ok=True)
+        path = directory / f"service{i % per_dir:03d}.yaml"
+        path.write_text(f"id: {i}\nname: service-{i}\nreplicas: 2\n")
+        paths.append(path)
+    return paths
+
+
+def touch(paths, round_no: int) -> None:
+    for path in paths:
+        path.write_text(f"revision: {round_no}\n")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + round_no * 1_000_000_000))
+
+
+def cpu_per_tick(tick, rounds: int, before=None) -> float:
+    """返回每次轮询的平均 CPU 毫秒数"""
+    total = 0.0
+    for round_no in range(1, rounds + 1):
+        if before:
+            before(round_no)
+        start = time.process_time()
+        tick()
+        total += time.process_time() - start
+    return total / rounds * 1000
+
+
+def idle_cpu(root: Path, backend: str, seconds: float) -> float:
+    """事件后端空闲时每秒的 CPU 毫秒数"""
+    watcher = ConfigWatcher(root, backend=backend)
+    watcher.start()
+    try:
+        start = time.process_time()
+        time.sleep(seconds)
+        return (time.process_time() - start) / seconds * 1000
+    finally:
+        watcher.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--changed", type=int, default=10, help="每轮变化的文件数")
+    parser.add_argument("--idle-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp())
+    try:
+        paths = make_tree(root, args.files)
+        changed = paths[::max(1, len(paths) // args.changed)][:args.changed]
+
+        legacy = LegacyPoller(root)
+        legacy.poll()
+        scanner = ConfigTreeScanner(root)
+        scanner.scan()
+
+        print(f"files={args.files} rounds={args.rounds} changed={len(changed)}")
+        print(f"{'legacy   idle':24} {cpu_per_tick(legacy.poll, args.rounds):>10.1f} ms CPU/tick")
+        print(f"{'legacy   changed':24} "
+              f"{cpu_per_tick(legacy.poll, args.rounds, lambda r: touch(changed, r)):>10.1f} ms CPU/tick")
+        print(f"{'cached   idle':24} {cpu_per_tick(scanner.scan, args.rounds):>10.1f} ms CPU/tick")
+        print(f"{'cached   changed':24} "
+              f"{cpu_per_tick(scanner.scan, args.rounds, lambda r: touch(changed, r + args.rounds)):>10.1f}"
+              f" ms CPU/tick")
+
+        backends = []
+        if HAS_WATCHDOG:
+            backends.append(BACKEND_WATCHDOG)
+        if InotifyBackend.available():
+            backends.append(BACKEND_INOTIFY)
+        for backend in backends:
+            print(f"{backend + ' idle':24} {idle_cpu(root, backend, args.idle_seconds):>10.1f} ms CPU/s")
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Cron下次运行时间计算基准测试
+
+为大量定时任务计算下次运行时间，对比旧实现（逐秒扫描、每步重新解析字段）
+与编译位图实现。旧实现对超过约2.8小时的计划返回None，只在少量样本上测量。
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from scheduler.cron_handler import CronExpression
+
+
+EXPRESSIONS = [
+    "* * * * *",
+    "*/5 * * * *",
+    "0 * * * *",
+    "15,45 * * * *",
+    "0 9 * * *",
+    "30 2 * * 1-5",
+    "0 9 * * 1",
+    "0 0 1 * *",
+    "0 0 1 1,4,7,10 *",
+    "*/10 * * * * *",
+]
+
+
+class LegacyCronExpression:
+    """复刻旧版逐秒扫描路径，作为对照组"""
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) == 6:
+            parts = parts[1:]
+        self.minute, self.hour, self.day_of_month, self.month, self.day_of_week = parts
+
+    def get_next_run(self, from_time: datetime):
+        next_time = from_time + timedelta(seconds=1)
+        for _ in range(10000):
+            if self._matches(next_time):
+                return next_time
+            next_time += timedelta(seconds=1)
+        return None
+
+    def _matches(self, dt: datetime) -> bool:
+        return (
+            self._match_field(self.minute, dt.minute) and
+            self._match_field(self.hour, dt.hour) and
+            self._match_field(self.day_of_month, dt.day) and
+            self._match_field(self.month, dt.month) and
+            self._match_field(self.day_of_week, dt.weekday() + 1)
+        )
+
+    def _match_field(self, pattern: str, value: int) -> bool:
+        if pattern == "*":
+            return True
+        if "/" in pattern:
+            base, step = pattern.split("/")
+            base = 0 if base == "*" else int(base)
+            return (value - base) % int(step) == 0 and value >= base
+        if "-" in pattern:
+            start, end = pattern.split("-")
+            return int(start) <= value <= int(end)
+        if "," in pattern:
+            return any(self._match_field(p, value) for p in pattern.split(","))
+        return int(pattern) == value
+
+
+def bench(factory, expressions, from_time):
+    """返回 (编译耗时, 计算耗时, 未找到数)"""
+    start = time.perf_counter()
+    compiled = [factory(e) for e in expressions]
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    missing = sum(1 for c in compiled if c.get_next_run(from_time) is None)
+    return compile_time, time.perf_counter() - start, missing
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--schedules", type=int, default=100000)
+    parser.add_argument("--legacy-sample", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    expressions = [rng.choice(EXPRESSIONS) for _ in range(args.schedules)]
+    from_time = datetime(2026, 10, 18, 12, 30, 15)
+
+    compile_time, run_time, missing = bench(CronExpression, expressions, from_time)
+    print(f"compiled   schedules={args.schedules:,} compile={compile_time:.2f}s "
+          f"next_run={run_time:.2f}s ({run_time / args.schedules * 1e6:.1f} us/schedule) none={missing}")
+
+    sample = expressions[:args.legacy_sample]
+    _, legacy_time, legacy_missing = bench(LegacyCronExpression, sample, from_time)
+    per_call = legacy_time / len(sample)
+    print(f"legacy     schedules={len(sample):,} next_run={legacy_time:.2f}s "
+          f"({per_call * 1e6:.0f} us/schedule, ~{per_call * args.schedules:.0f}s for "
+          f"{args.schedules:,}) none={legacy_missing}")
+
+
+if __name__ == "__main__":
+    main()
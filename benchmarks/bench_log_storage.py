@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+LogStorage写入路径基准测试
+
+对比逐条写入（旧实现：每条记录加锁序列化两次、flush、stat、查询段ID）
+与缓冲组提交写入的吞吐量（records/s）和调用方延迟。
+"""
+
+import argparse
+import hashlib
+import json
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from agentbus_logging.log_manager import LogRecord
+from agentbus_logging.log_storage import CompressionType, LogStorage, StorageConfig
+
+
+class LegacyLogStorage(LogStorage):
+    """复刻旧版逐条写入路径，作为对照组"""
+
+    def write_record(self, record: LogRecord) -> None:
+        with self._lock:
+            if self._should_rotate_segment():
+                self._start_new_segment()
+
+            serialized = json.dumps(record.to_dict(), ensure_ascii=False)
+            self._segment_file.write((serialized + '\n').encode('utf-8'))
+            self._segment_file.flush()
+
+            self._current_segment.record_count += 1
+            self._current_segment.file_size = Path(self._current_segment.file_path).stat().st_size
+
+            if self.config.enable_indexing:
+                position = self._segment_file.tell()
+                serialized = json.dumps(record.to_dict(), ensure_ascii=False)
+                checksum = hashlib.sha256(serialized.encode()).hexdigest()
+                segment_id = self._metadata_db.execute(
+                    "SELECT id FROM segments WHERE file_path = ? LIMIT 1",
+                    (self._current_segment.file_path,)
+                ).fetchone()[0]
+                self._index_db.execute("""
+                    INSERT INTO log_index
+                    (segment_id, timestamp, level, logger, position, size, checksum)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (segment_id, record.timestamp, record.level, record.logger,
+                      position, len(serialized.encode()), checksum))
+
+
+def _make_record(i: int) -> LogRecord:
+    return LogRecord(
+        timestamp=datetime.now().isoformat(),
+        level="INFO" if i % 10 else "ERROR",
+        logger=f"bench.worker{i % 8}",
+        message=f"benchmark message {i} " + "x" * 64,
+        module="bench",
+        function="run",
+        line=i % 500,
+    )
+
+
+def run_case(storage_cls, records: int, threads: int) -> Dict[str, float]:
+    """运行单个基准用例"""
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = storage_cls(StorageConfig(base_path=tmp, compression=CompressionType.NONE))
+        latencies: List[float] = []
+        lat_lock = threading.Lock()
+        per_thread = records // threads
+
+        def producer(offset: int) -> None:
+            local = []
+            for i in range(offset, offset + per_thread):
+                record = _make_record(i)
+                t0 = time.perf_counter()
+                storage.write_record(record)
+                local.append(time.perf_counter() - t0)
+            with lat_lock:
+                latencies.extend(local)
+
+        workers = [threading.Thread(target=producer, args=(n * per_thread,)) for n in range(threads)]
+        start = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        storage.flush()
+        elapsed = time.perf_counter() - start
+        storage.close()
+
+    latencies.sort()
+    return {
+        "records_per_sec": len(latencies) / elapsed,
+        "p50_us": statistics.median(latencies) * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99) - 1] * 1e6,
+        "max_us": latencies[-1] * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"records={args.records} threads={args.threads}")
+    for name, cls in (("legacy", LegacyLogStorage), ("buffered", LogStorage)):
+        result = run_case(cls, args.records, args.threads)
+        print(
+            f"{name:10} {result['records_per_sec']:>12,.0f} rec/s  "
+            f"p50={result['p50_us']:.1f}us  p99={result['p99_us']:.1f}us  max={result['max_us']:.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+MetricsCollector记录开销基准测试
+
+多线程并发调用 record_timer / increment_counter，对比旧实现
+（全局锁 + json.dumps标签 + 每次新建Metric与时间戳）与分片实现的单次记录开销。
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Dict, Optional
+
+from agentbus_logging.metrics import Metric, MetricType, MetricsCollector
+
+
+class LegacyMetricsCollector:
+    """复刻旧版记录路径，作为对照组"""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self.response_times = defaultdict(lambda: deque(maxlen=1000))
+        self._lock = threading.Lock()
+
+    def increment_counter(self, name: str, value: int = 1, labels: Optional[Dict[str, str]] = None) -> None:
+        with self._lock:
+            key = f"{name}:{json.dumps(labels or {}, sort_keys=True)}"
+            if key not in self.metrics:
+                self.metrics[key] = Metric(name, MetricType.COUNTER, 0, labels or {})
+            self.metrics[key].value += value
+            self.metrics[key].timestamp = datetime.utcnow().isoformat()
+
+    def record_timer(self, name: str, duration: float, labels: Optional[Dict[str, str]] = None) -> None:
+        with self._lock:
+            self.response_times[name].append(duration)
+            key = f"{name}:{json.dumps(labels or {}, sort_keys=True)}"
+            self.metrics[key] = Metric(
+                name=name,
+                type=MetricType.TIMER,
+                value=duration,
+                labels=labels or {},
+                timestamp=datetime.utcnow().isoformat()
+            )
+
+
+def run_case(collector, threads: int, ops: int) -> float:
+    """返回每次记录的平均耗时（纳秒）"""
+    barrier = threading.Barrier(threads + 1)
+    labels = [{"route": f"/api/{i}", "method": "GET"} for i in range(16)]
+
+    def worker(offset: int) -> None:
+        barrier.wait()
+        for i in range(ops):
+            label = labels[(i + offset) % 16]
+            collector.record_timer("http_request_duration", 0.001 * (i % 100), label)
+            collector.increment_counter("http_requests_total", 1, label)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    return elapsed / (threads * ops * 2) * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"threads={args.threads} ops/thread={args.ops}")
+    for name, collector in (("legacy", LegacyMetricsCollector()), ("sharded", MetricsCollector())):
+        ns = run_case(collector, args.threads, args.ops)
+        print(f"{name:10} {ns:8.0f} ns/record  {1e9 / ns:>12,.0f} records/s")
+
+    collector = MetricsCollector()
+    run_case(collector, args.threads, 1000)
+    start = time.perf_counter()
+    collector.get_response_time_stats("http_request_duration")
+    print(f"get_response_time_stats: {(time.perf_counter() - start) * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
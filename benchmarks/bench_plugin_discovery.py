@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+插件发现启动耗时基准测试
+
+对内置插件目录执行 PluginManager.discover_plugins，统计耗时。对照组复刻
+旧实现：exec_module 每个 .py 文件并实例化插件类来读取信息。每个用例在
+独立子进程中运行，使插件模块的重量级导入计入耗时。
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import inspect
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+from plugins.core import AgentBusPlugin, PluginContext
+from plugins.manager import PluginInfo, PluginManager
+
+
+BUNDLED_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "plugins"))
+
+
+class LegacyPluginManager(PluginManager):
+    """复刻旧版发现路径（执行模块并实例化插件类），作为对照组"""
+
+    async def discover_plugins(self) -> List[PluginInfo]:
+        discovered = []
+        for plugin_dir in self._plugin_dirs:
+            if not os.path.exists(plugin_dir):
+                continue
+            for root, dirs, files in os.walk(plugin_dir):
+                for file in files:
+                    if file.endswith('.py') and not file.startswith('_'):
+                        info = self._legacy_info(os.path.join(root, file))
+                        if info:
+                            discovered.append(info)
+        return discovered
+
+    def _legacy_info(self, module_path: str) -> Optional[PluginInfo]:
+        try:
+            spec = importlib.util.spec_from_file_location("temp_module", module_path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            for name, obj in inspect.getmembers(module):
+                if inspect.isclass(obj) and issubclass(obj, AgentBusPlugin) and obj != AgentBusPlugin:
+                    info = obj("temp", PluginContext(config={}, logger=self._logger, runtime={})).get_info()
+                    return PluginInfo(
+                        plugin_id=info.get('id', name.lower()), name=info.get('name', name),
+                        version=info.get('version', '1.0.0'), description=info.get('description', ''),
+                        author=info.get('author', 'Unknown'), class_name=name,
+                        module_path=module_path, dependencies=info.get('dependencies', [])
+                    )
+        except Exception:
+            return None
+        finally:
+            sys.modules.pop('temp_module', None)
+        return None
+
+
+def run_case(case: str, cache_path: str) -> None:
+    """在当前进程中执行一次发现，输出 耗时 插件数"""
+    logging.disable(logging.CRITICAL)
+    manager_cls = LegacyPluginManager if case == "legacy" else PluginManager
+    start = time.perf_counter()
+    manager = manager_cls(plugin_dirs=[BUNDLED_DIR], discovery_cache_path=cache_path)
+    discovered = asyncio.run(manager.discover_plugins())
+    print(f"{time.perf_counter() - start:.6f} {len(discovered)}")
+
+
+def spawn(case: str, cache_path: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_plugin_discovery", "--case", case, "--cache", cache_path],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(BUNDLED_DIR)
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--case", choices=["legacy", "ast"])
+    parser.add_argument("--cache", default="")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.case:
+        run_case(args.case, args.cache)
+        return
+
+    print(f"plugin dir={BUNDLED_DIR}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache_path = os.path.join(temp_dir, "plugin_discovery.json")
+        for label, case, cold in (
+            ("legacy exec_module", "legacy", True),
+            ("ast    cold cache", "ast", True),
+            ("ast    warm cache", "ast", False),
+        ):
+            timings = []
+            for _ in range(args.repeat):
+                if cold and os.path.exists(cache_path):
+                    os.remove(cache_path)
+                elapsed, count = spawn(case, cache_path).split()
+                timings.append(float(elapsed))
+            print(f"{label:20} {min(timings) * 1000:>9.1f} ms  plugins={count}")
+
+
+if __name__ == "__main__":
+    main()
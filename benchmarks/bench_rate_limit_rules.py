@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+限流规则匹配基准测试
+
+构造大量租户规则（前缀/后缀/精确端点模式与用户模式混合），统计每次查找匹配规则的耗时。
+对照组复刻旧实现：加锁后遍历全部规则，逐条调用 matches_endpoint / matches_user。
+"""
+
+import argparse
+import importlib.util
+import random
+import sys
+import time
+from pathlib import Path
+
+
+def load_rate_limiter():
+    """按文件加载限流模块
+
+    security/__init__.py 会导入 auth/encryption，它们通过 ``..core``、``..storage``
+    相对导入依赖完整的 agentbus 包结构，在仓库根目录下无法作为顶层包导入；
+    限流模块本身运行时不依赖其他包，因此直接按文件加载。
+    """
+    name = "security.rate_limiter"
+    if name in sys.modules:
+        return sys.modules[name]
+    path = Path(__file__).resolve().parent.parent / "security" / "rate_limiter.py"
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+rate_limiter = load_rate_limiter()
+RateLimiter = rate_limiter.RateLimiter
+RateLimitRule = rate_limiter.RateLimitRule
+RateLimitScope = rate_limiter.RateLimitScope
+RateLimitStrategy = rate_limiter.RateLimitStrategy
+
+
+class LegacyRateLimiter(RateLimiter):
+    """复刻旧版规则匹配路径，作为对照组"""
+
+    def get_rules_for_endpoint(self, endpoint):
+        with self._rules_lock:
+            return [rule for rule in self.rules.values() if rule.matches_endpoint(endpoint)]
+
+    def _matching_rules(self, endpoint, user_id=None):
+        return [
+            rule for rule in self.get_rules_for_endpoint(endpoint)
+            if not (user_id and not rule.matches_user(user_id))
+        ]
+
+
+def make_rules(count: int):
+    rules = []
+    for i in range(count):
+        kind = i % 4
+        if kind == 0:
+            patterns = [f"/api/tenants/t{i}/*"]
+        elif kind == 1:
+            patterns = [f"/api/tenants/t{i}/export", f"/api/tenants/t{i}/import"]
+        elif kind == 2:
+            patterns = [f"*/t{i}.json"]
+        else:
+            patterns = [f"/api/v{i}/*"]
+        rules.append(RateLimitRule(
+            id=f"tenant_{i}",
+            name=f"租户规则{i}",
+            strategy=RateLimitStrategy.SLIDING_WINDOW,
+            scope=RateLimitScope.USER_ENDPOINT,
+            limit=100,
+            window=60,
+            endpoint_patterns=patterns,
+            user_patterns=[f"tenant-{i}-*"] if i % 2 else []
+        ))
+    return rules
+
+
+def make_requests(count: int, rules: int, distinct: int):
+    rng = random.Random(0)
+    endpoints = []
+    for _ in range(distinct):
+        tenant = rng.randrange(rules)
+        endpoints.append(rng.choice([
+            f"/api/tenants/t{tenant}/items/{rng.randrange(1000)}",
+            f"/api/tenants/t{tenant}/export",
+            f"/files/t{tenant}.json",
+            f"/api/v{tenant}/status",
+        ]))
+    return [
+        (rng.choice(endpoints), f"tenant-{rng.randrange(rules)}-user")
+        for _ in range(count)
+    ]
+
+
+def run_case(limiter: RateLimiter, requests) -> float:
+    """返回每次查找的平均微秒数"""
+    start = time.perf_counter()
+    for endpoint, user_id in requests:
+        limiter._matching_rules(endpoint, user_id)
+    return (time.perf_counter() - start) / len(requests) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rules", type=int, default=1000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--endpoints", type=int, default=500, help="不同端点数量（决定缓存命中率）")
+    args = parser.parse_args()
+
+    rules = make_rules(args.rules)
+    requests = make_requests(args.lookups, args.rules, args.endpoints)
+    # 每次查找都是新端点，缓存不命中
+    unique = [(f"{endpoint}?n={i}", user_id) for i, (endpoint, user_id) in enumerate(requests)]
+
+    limiters = {}
+    for name, cls in (("legacy", LegacyRateLimiter), ("compiled", RateLimiter)):
+        limiter = limiters[name] = cls(settings=None)
+        for rule in rules:
+            limiter.add_rule(rule)
+
+    # 结果必须与旧实现一致
+    for endpoint, user_id in requests[:1000]:
+        expected = [rule.id for rule in limiters["legacy"]._matching_rules(endpoint, user_id)]
+        actual = [rule.id for rule in limiters["compiled"]._matching_rules(endpoint, user_id)]
+        assert expected == actual, (endpoint, user_id)
+
+    start = time.perf_counter()
+    limiters["compiled"].add_rule(rules[0])
+    limiters["compiled"]._compiled_rules()
+    rebuild = (time.perf_counter() - start) * 1000
+
+    print(f"rules={len(limiters['compiled'].rules)} lookups={args.lookups} endpoints={args.endpoints}")
+    print(f"{'legacy':22} {run_case(limiters['legacy'], requests):>10.2f} us/lookup")
+    print(f"{'compiled (no memo)':22} {run_case(limiters['compiled'], unique):>10.2f} us/lookup")
+    print(f"{'compiled (memo)':22} {run_case(limiters['compiled'], requests):>10.2f} us/lookup")
+    print(f"{'rebuild':22} {rebuild:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
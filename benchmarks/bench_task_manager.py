@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+TaskManager短任务吞吐基准测试
+
+创建并执行大量极短任务，统计 tasks/s。对照组复刻旧实现：
+每次状态变化重写一个缩进JSON文件，同步函数直接在事件循环中调用。
+"""
+
+import argparse
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from scheduler.task_manager import ExecutorType, Task, TaskConfig, TaskManager
+
+
+def tiny(value):
+    return value + 1
+
+
+async def tiny_async(value):
+    return value + 1
+
+
+class LegacyTaskManager(TaskManager):
+    """复刻旧版持久化与执行路径，作为对照组"""
+
+    def _save_task(self, task: Task):
+        task_file = self.storage_path / f"{task.id}.json"
+        with open(task_file, 'w', encoding='utf-8') as f:
+            json.dump(task.to_dict(), f, indent=2, ensure_ascii=False, default=str)
+
+    def _invoke(self, task: Task):
+        if asyncio.iscoroutinefunction(task.func):
+            return task.func(*task.args, **task.kwargs)
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(task.func(*task.args, **task.kwargs))
+        return future
+
+
+async def run_case(manager_cls, func, executor: ExecutorType, count: int) -> float:
+    """返回 tasks/s"""
+    temp_dir = Path(tempfile.mkdtemp())
+    try:
+        manager = manager_cls(storage_path=str(temp_dir / "tasks"))
+        await manager.start()
+        config = TaskConfig(executor=executor)
+
+        start = time.perf_counter()
+        ids = [manager.create_task(f"t{i}", func, args=(i,), config=config) for i in range(count)]
+        for task_id in ids:
+            await manager.start_task(task_id)
+        for task_id in ids:
+            await manager.wait_for_task(task_id)
+        await manager.stop()
+        elapsed = time.perf_counter() - start
+        return count / elapsed
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+async def main_async(count: int) -> None:
+    cases = [
+        ("legacy   sync", LegacyTaskManager, tiny, ExecutorType.AUTO),
+        ("legacy   async", LegacyTaskManager, tiny_async, ExecutorType.AUTO),
+        ("sqlite   sync/thread", TaskManager, tiny, ExecutorType.AUTO),
+        ("sqlite   sync/inline", TaskManager, tiny, ExecutorType.INLINE),
+        ("sqlite   async", TaskManager, tiny_async, ExecutorType.AUTO),
+    ]
+    print(f"tasks={count}")
+    for name, manager_cls, func, executor in cases:
+        rate = await run_case(manager_cls, func, executor, count)
+        print(f"{name:22} {rate:>10,.0f} tasks/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.tasks))
+
+
+if __name__ == "__main__":
+    main()
@@ -166,6 +166,13 @@ class ChannelCapabilities:
     media: bool = False
     native_commands: bool = False
     block_streaming: bool = False
+    # 出站限速与合并（None表示使用平台默认值或不限速）
+    rate_limit: Optional[float] = None
+    rate_burst: Optional[int] = None
+    chat_rate_limit: Optional[float] = None
+    chat_rate_burst: Optional[int] = None
+    coalesce_messages: bool = False
+    max_message_length: int = 4096
 
 
 @dataclass
@@ -244,6 +251,12 @@ class ChannelConfig:
                 "media": self.capabilities.media,
                 "native_commands": self.capabilities.native_commands,
                 "block_streaming": self.capabilities.block_streaming,
+                "rate_limit": self.capabilities.rate_limit,
+                "rate_burst": self.capabilities.rate_burst,
+                "chat_rate_limit": self.capabilities.chat_rate_limit,
+                "chat_rate_burst": self.capabilities.chat_rate_burst,
+                "coalesce_messages": self.capabilities.coalesce_messages,
+                "max_message_length": self.capabilities.max_message_length,
             },
             "settings": self.settings,
             "enabled": self.enabled,
@@ -266,6 +279,12 @@ class ChannelConfig:
             media=capabilities_data.get("media", False),
             native_commands=capabilities_data.get("native_commands", False),
             block_streaming=capabilities_data.get("block_streaming", False),
+            rate_limit=capabilities_data.get("rate_limit"),
+            rate_burst=capabilities_data.get("rate_burst"),
+            chat_rate_limit=capabilities_data.get("chat_rate_limit"),
+            chat_rate_burst=capabilities_data.get("chat_rate_burst"),
+            coalesce_messages=capabilities_data.get("coalesce_messages", False),
+            max_message_length=capabilities_data.get("max_message_length", 4096),
         )
 
         return cls(
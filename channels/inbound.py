@@ -0,0 +1,224 @@
+"""
+AgentBus入站消息分发
+
+将适配器接收路径与下游处理器解耦：
+- 按会话划分有界队列，会话内按到达顺序处理，不同会话并行处理
+- 全局并发会话数上限
+- 过载时丢弃（会话队列满 / 全局积压超限）
+- 统计从接收到处理器开始执行的延迟
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from .base import Message
+
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+
+# 处理器签名：handler(message, channel_id)
+InboundCallback = Callable[[Message, str], Awaitable[Any]]
+
+
+def chat_key_of(message: Message) -> str:
+    """会话键：显式 chat_id > 线程ID > 发送者ID"""
+    metadata = message.metadata
+    return str(
+        metadata.custom_data.get("chat_id")
+        or metadata.thread_id
+        or metadata.sender_id
+        or ""
+    )
+
+
+class InboundDispatcher:
+    """
+    入站消息分发器
+
+    submit() 是同步、非阻塞的，可直接在适配器的接收回调中调用；
+    每个有积压的会话由一个协程按顺序处理，协程数受 max_active_chats 限制。
+    """
+
+    def __init__(
+        self,
+        deliver: Optional[InboundCallback] = None,
+        max_chat_queue: int = 100,
+        max_pending: int = 10000,
+        max_active_chats: int = 64,
+        drop_policy: str = DROP_OLDEST,
+        logger: Optional[logging.Logger] = None
+    ):
+        self.deliver = deliver
+        self.max_chat_queue = max_chat_queue
+        self.max_pending = max_pending
+        self.max_active_chats = max_active_chats
+        self.drop_policy = drop_policy if drop_policy in (DROP_OLDEST, DROP_NEWEST) else DROP_OLDEST
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._queues: Dict[Tuple[str, str], Deque[Tuple[Message, float]]] = {}
+        self._runners: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending = 0
+        self._idle: Optional[asyncio.Event] = None
+
+        self.received = 0
+        self.processed = 0
+        self.errors = 0
+        self.shed_chat_full = 0
+        self.shed_overload = 0
+        self._latencies: Deque[float] = deque(maxlen=2048)
+        self._latency_total = 0.0
+        self._latency_count = 0
+        self._latency_max = 0.0
+        self._handler_time = 0.0
+
+    def _bind_loop(self) -> bool:
+        if self._loop is not None:
+            return True
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        self._semaphore = asyncio.Semaphore(self.max_active_chats)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        return True
+
+    def submit(self, message: Message, channel_id: str) -> bool:
+        """
+        提交入站消息
+
+        Args:
+            message: 接收到的消息
+            channel_id: 来源渠道
+
+        Returns:
+            False 表示消息因过载被丢弃
+        """
+        ingested_at = time.perf_counter()
+        if not self._bind_loop():
+            self.logger.error("入站分发器没有可用的事件循环，消息被丢弃")
+            self.shed_overload += 1
+            return False
+
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not self._loop:
+            # 适配器在其他线程中接收：转交到分发器所在的事件循环
+            self._loop.call_soon_threadsafe(self._enqueue, message, channel_id, ingested_at)
+            return True
+        return self._enqueue(message, channel_id, ingested_at)
+
+    def _enqueue(self, message: Message, channel_id: str, ingested_at: float) -> bool:
+        self.received += 1
+        key = (channel_id, chat_key_of(message))
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+
+        if len(queue) >= self.max_chat_queue:
+            self.shed_chat_full += 1
+            if self.drop_policy == DROP_NEWEST:
+                return False
+            queue.popleft()
+            self._pending -= 1
+        elif self._pending >= self.max_pending:
+            self.shed_overload += 1
+            if not queue:
+                del self._queues[key]
+            return False
+
+        queue.append((message, ingested_at))
+        self._pending += 1
+        self._idle.clear()
+        if key not in self._runners:
+            self._runners[key] = asyncio.create_task(self._run_chat(key))
+        return True
+
+    async def _run_chat(self, key: Tuple[str, str]) -> None:
+        queue = self._queues[key]
+        channel_id = key[0]
+        try:
+            async with self._semaphore:
+                while queue:
+                    message, ingested_at = queue.popleft()
+                    self._pending -= 1
+                    started = time.perf_counter()
+                    self._record_latency(started - ingested_at)
+                    try:
+                        await self.deliver(message, channel_id)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        self.errors += 1
+                        self.logger.error(f"入站消息处理失败 {channel_id}: {e}")
+                    self.processed += 1
+                    self._handler_time += time.perf_counter() - started
+        finally:
+            self._runners.pop(key, None)
+            if queue:
+                # 被取消时仍有积压：计为丢弃
+                self._pending -= len(queue)
+                self.shed_overload += len(queue)
+            self._queues.pop(key, None)
+            if not self._runners:
+                self._idle.set()
+
+    def _record_latency(self, latency: float) -> None:
+        self._latencies.append(latency)
+        self._latency_total += latency
+        self._latency_count += 1
+        self._latency_max = max(self._latency_max, latency)
+
+    @property
+    def depth(self) -> int:
+        return self._pending
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """等待所有已接收消息处理完成"""
+        if self._idle is None:
+            return True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self, timeout: Optional[float] = 5.0) -> None:
+        """等待积压处理完成（超时后取消剩余处理）"""
+        if await self.drain(timeout):
+            return
+        runners = list(self._runners.values())
+        for task in runners:
+            task.cancel()
+        await asyncio.gather(*runners, return_exceptions=True)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """队列深度、丢弃数量和接收到处理的延迟"""
+        ordered = sorted(self._latencies)
+        p95 = ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] if ordered else 0.0
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "errors": self.errors,
+            "depth": self._pending,
+            "active_chats": len(self._runners),
+            "queued_chats": len(self._queues),
+            "shed": {
+                "chat_full": self.shed_chat_full,
+                "overload": self.shed_overload
+            },
+            "dispatch_latency": {
+                "average": self._latency_total / self._latency_count if self._latency_count else 0.0,
+                "p95": p95,
+                "max": self._latency_max
+            },
+            "handler_time_average": self._handler_time / self.processed if self.processed else 0.0
+        }
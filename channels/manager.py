@@ -6,6 +6,7 @@ AgentBus渠道管理器
 """
 
 import asyncio
+import itertools
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -27,6 +28,8 @@ from .base import (
     ChannelRegistry,
     MessageMetadata,
 )
+from .outbound import OutboundPipeline, OutboundRequest
+from .inbound import InboundDispatcher
 
 
 class ChannelManager:
@@ -35,17 +38,24 @@ class ChannelManager:
     统一管理所有渠道适配器，提供：
     - 渠道注册和管理
     - 连接状态管理
-    - 消息路由和发送
+    - 消息路由和发送（出站管道：按账户排队、限速、重试、合并）
     - 配置管理
     - 状态监控
     """
     
-    def __init__(self, config_path: Optional[Path] = None):
+    def __init__(
+        self,
+        config_path: Optional[Path] = None,
+        outbound: Optional[OutboundPipeline] = None,
+        inbound: Optional[InboundDispatcher] = None
+    ):
         self.logger = logging.getLogger(__name__)
         self._adapters: Dict[str, ChannelAdapter] = {}
         self._configs: Dict[str, ChannelConfig] = {}
         self._status_cache: Dict[str, Dict[str, ChannelStatus]] = {}
         self._message_handlers: Set[Callable] = set()
+        # 经入站分发器执行的处理器 -> 是否在线程池中执行
+        self._dispatched_handlers: Dict[Callable, bool] = {}
         self._status_handlers: Set[Callable] = set()
         self._config_path = config_path or Path("channels_config.json")
         # 使用全局注册表而不是自己的实例
@@ -56,6 +66,14 @@ class ChannelManager:
         
         # 自动保存配置的任务
         self._auto_save_task: Optional[asyncio.Task] = None
+        
+        # 出站消息管道
+        self._outbound = outbound or OutboundPipeline(logger=self.logger)
+        self._unkeyed_sequence = itertools.count()
+        
+        # 入站消息分发器
+        self._inbound = inbound or InboundDispatcher(logger=self.logger)
+        self._inbound.deliver = self._deliver_message
     
     @property
     def registry(self) -> ChannelRegistry:
@@ -87,12 +105,18 @@ class ChannelManager:
         
         if not self._running:
             # 即使没有运行，也设置关闭事件
+            await self._inbound.close()
+            await self._outbound.close()
             self._shutdown_event.set()
             return
         
         self.logger.info("停止渠道管理器")
         self._running = False
         
+        # 处理完已接收的入站消息，发送完队列中的出站消息
+        await self._inbound.close()
+        await self._outbound.close()
+        
         # 停止自动保存任务
         if self._auto_save_task:
             self._auto_save_task.cancel()
@@ -156,6 +180,7 @@ class ChannelManager:
                 
                 # 移除适配器
                 del self._adapters[channel_id]
+            self._outbound.remove_channel(channel_id)
             
             # 移除配置
             if channel_id in self._configs:
@@ -291,6 +316,124 @@ class ChannelManager:
     
     # 消息发送方法
     
+    def _failed_future(self) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(False)
+        return future
+    
+    def _submit(self, kind: str, channel_id: str, account_id: Optional[str],
+                message: Optional[Message] = None, chat_key: Optional[str] = None,
+                **fields) -> asyncio.Future:
+        """将发送请求提交到出站管道"""
+        adapter = self._adapters.get(channel_id)
+        if not adapter:
+            self.logger.error(f"渠道未找到: {channel_id}")
+            return self._failed_future()
+        
+        config = self._configs.get(channel_id)
+        default_account = config.default_account_id if config else None
+        if chat_key is None and message is not None:
+            metadata = message.metadata
+            chat_key = str(metadata.custom_data.get("chat_id") or metadata.thread_id or "")
+        if not chat_key:
+            # 没有会话键的请求不做会话内排序与限速，各自独立排队，避免共用同一个空键串行发送
+            chat_key = f"{kind}:{next(self._unkeyed_sequence)}"
+        
+        request = OutboundRequest(
+            kind=kind,
+            channel_id=channel_id,
+            account_id=account_id,
+            chat_key=chat_key,
+            future=asyncio.get_running_loop().create_future(),
+            message=message,
+            **fields
+        )
+        # 队列按实际使用的账户划分；适配器仍收到调用方传入的 account_id
+        return self._outbound.submit(
+            request, adapter,
+            channel_type=config.channel_type if config else None,
+            lane_account=account_id or default_account
+        )
+    
+    def _build_message(self, channel_id: str, message_type: MessageType, content: str,
+                       metadata: MessageMetadata, extra: Dict[str, Any]) -> Message:
+        message = Message(type=message_type, content=content, metadata=metadata)
+        
+        # 添加额外元数据
+        for key, value in extra.items():
+            if hasattr(message.metadata, key):
+                setattr(message.metadata, key, value)
+            else:
+                message.metadata.custom_data[key] = value
+        return message
+    
+    def submit_message(
+        self,
+        channel_id: str,
+        content: str,
+        message_type: MessageType = MessageType.TEXT,
+        account_id: Optional[str] = None,
+        **kwargs
+    ) -> asyncio.Future:
+        """提交消息到出站管道，立即返回发送结果 Future（bool）"""
+        message = self._build_message(
+            channel_id, message_type, content,
+            MessageMetadata(
+                channel_id=channel_id,
+                chat_type=ChatType.DIRECT  # 默认值，可以根据需要调整
+            ),
+            kwargs
+        )
+        return self._submit("message", channel_id, account_id, message)
+    
+    def submit_media(
+        self,
+        channel_id: str,
+        content: str,
+        media_url: str,
+        account_id: Optional[str] = None,
+        **kwargs
+    ) -> asyncio.Future:
+        """提交媒体消息到出站管道，立即返回发送结果 Future（bool）"""
+        message = self._build_message(
+            channel_id, MessageType.MEDIA, content,
+            MessageMetadata(
+                channel_id=channel_id,
+                media_urls=[media_url]
+            ),
+            kwargs
+        )
+        return self._submit("media", channel_id, account_id, message, media_url=media_url)
+    
+    def submit_poll(
+        self,
+        channel_id: str,
+        question: str,
+        options: List[str],
+        account_id: Optional[str] = None,
+        chat_id: Optional[str] = None
+    ) -> asyncio.Future:
+        """
+        提交投票到出站管道，立即返回发送结果 Future（bool）
+        
+        chat_id 用于会话内排序与限速；未指定时每个投票独立排队，互不阻塞。
+        """
+        chat_key = str(chat_id) if chat_id else None
+        return self._submit("poll", channel_id, account_id, chat_key=chat_key,
+                            question=question, options=options)
+    
+    async def _await_send(self, future: asyncio.Future, channel_id: str, label: str) -> bool:
+        try:
+            success = await future
+        except Exception as e:
+            self.logger.error(f"发送{label}异常 {channel_id}: {e}")
+            return False
+        if success:
+            self.logger.debug(f"成功发送{label}到渠道: {channel_id}")
+        elif channel_id in self._adapters:
+            self.logger.error(f"发送{label}失败到渠道: {channel_id}")
+        return success
+    
     async def send_message(
         self, 
         channel_id: str, 
@@ -299,42 +442,13 @@ class ChannelManager:
         account_id: Optional[str] = None,
         **kwargs
     ) -> bool:
-        """发送消息"""
+        """发送消息（经出站管道，等待发送完成）"""
         try:
-            adapter = self._adapters.get(channel_id)
-            if not adapter:
-                self.logger.error(f"渠道未找到: {channel_id}")
-                return False
-            
-            # 创建消息对象
-            message = Message(
-                type=message_type,
-                content=content,
-                metadata=MessageMetadata(
-                    channel_id=channel_id,
-                    chat_type=ChatType.DIRECT  # 默认值，可以根据需要调整
-                )
-            )
-            
-            # 添加额外元数据
-            for key, value in kwargs.items():
-                if hasattr(message.metadata, key):
-                    setattr(message.metadata, key, value)
-                else:
-                    message.metadata.custom_data[key] = value
-            
-            # 发送消息
-            success = await adapter.send_message(message, account_id)
-            if success:
-                self.logger.debug(f"成功发送消息到渠道: {channel_id}")
-            else:
-                self.logger.error(f"发送消息失败到渠道: {channel_id}")
-            
-            return success
-            
+            future = self.submit_message(channel_id, content, message_type, account_id, **kwargs)
         except Exception as e:
             self.logger.error(f"发送消息异常 {channel_id}: {e}")
             return False
+        return await self._await_send(future, channel_id, "消息")
     
     async def send_media(
         self,
@@ -344,68 +458,29 @@ class ChannelManager:
         account_id: Optional[str] = None,
         **kwargs
     ) -> bool:
-        """发送媒体消息"""
+        """发送媒体消息（经出站管道，等待发送完成）"""
         try:
-            adapter = self._adapters.get(channel_id)
-            if not adapter:
-                self.logger.error(f"渠道未找到: {channel_id}")
-                return False
-            
-            # 创建媒体消息
-            message = Message(
-                type=MessageType.MEDIA,
-                content=content,
-                metadata=MessageMetadata(
-                    channel_id=channel_id,
-                    media_urls=[media_url]
-                )
-            )
-            
-            # 添加额外元数据
-            for key, value in kwargs.items():
-                if hasattr(message.metadata, key):
-                    setattr(message.metadata, key, value)
-                else:
-                    message.metadata.custom_data[key] = value
-            
-            # 发送媒体消息
-            success = await adapter.send_media(message, media_url, account_id)
-            if success:
-                self.logger.debug(f"成功发送媒体消息到渠道: {channel_id}")
-            else:
-                self.logger.error(f"发送媒体消息失败到渠道: {channel_id}")
-            
-            return success
-            
+            future = self.submit_media(channel_id, content, media_url, account_id, **kwargs)
         except Exception as e:
             self.logger.error(f"发送媒体消息异常 {channel_id}: {e}")
             return False
+        return await self._await_send(future, channel_id, "媒体消息")
     
     async def send_poll(
         self,
         channel_id: str,
         question: str,
         options: List[str],
-        account_id: Optional[str] = None
+        account_id: Optional[str] = None,
+        chat_id: Optional[str] = None
     ) -> bool:
-        """发送投票"""
+        """发送投票（经出站管道，等待发送完成）"""
         try:
-            adapter = self._adapters.get(channel_id)
-            if not adapter:
-                self.logger.error(f"渠道未找到: {channel_id}")
-                return False
-            
-            success = await adapter.send_poll(question, options, account_id)
-            if success:
-                self.logger.debug(f"成功发送投票到渠道: {channel_id}")
-            else:
-                self.logger.error(f"发送投票失败到渠道: {channel_id}")
-            
-            return success
-            
+            future = self.submit_poll(channel_id, question, options, account_id, chat_id)
         except Exception as e:
             self.logger.error(f"发送投票异常 {channel_id}: {e}")
             return False
+        return await self._await_send(future, channel_id, "投票")
     
     # 状态管理方法
     
@@ -527,13 +602,22 @@ class ChannelManager:
     
     # 事件处理方法
     
-    def add_message_handler(self, handler: Callable[[Message, str], None]):
-        """添加消息处理器"""
-        self._message_handlers.add(handler)
-    
-    def remove_message_handler(self, handler: Callable[[Message, str], None]):
+    def add_message_handler(self, handler: Callable[[Message, str], Any], blocking: bool = False):
+        """
+        添加消息处理器
+        
+        协程处理器经入站分发器异步执行（同一会话按顺序，不同会话并行）；
+        普通函数默认在接收路径中同步调用，blocking=True 时改为经分发器在线程池中执行。
+        """
+        if asyncio.iscoroutinefunction(handler) or blocking:
+            self._dispatched_handlers[handler] = not asyncio.iscoroutinefunction(handler)
+        else:
+            self._message_handlers.add(handler)
+    
+    def remove_message_handler(self, handler: Callable[[Message, str], Any]):
         """移除消息处理器"""
         self._message_handlers.discard(handler)
+        self._dispatched_handlers.pop(handler, None)
     
     def add_status_handler(self, handler: Callable[[str, ChannelStatus], None]):
         """添加状态处理器"""
@@ -545,12 +629,31 @@ class ChannelManager:
     
     def _on_message_received(self, message: Message):
         """消息接收处理"""
-        # 通知所有注册的处理器
-        for handler in self._message_handlers:
+        channel_id = message.metadata.channel_id or ""
+        # 通知所有同步处理器
+        for handler in list(self._message_handlers):
             try:
-                handler(message, message.metadata.channel_id or "")
+                handler(message, channel_id)
             except Exception as e:
                 self.logger.error(f"消息处理器错误: {e}")
+        
+        # 异步处理器交给入站分发器，不阻塞适配器的接收循环
+        if self._dispatched_handlers:
+            self._inbound.submit(message, channel_id)
+    
+    async def _deliver_message(self, message: Message, channel_id: str):
+        """在入站分发器中执行异步/阻塞处理器"""
+        calls = []
+        for handler, blocking in list(self._dispatched_handlers.items()):
+            if blocking:
+                calls.append(asyncio.to_thread(handler, message, channel_id))
+            else:
+                calls.append(handler(message, channel_id))
+        
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                self.logger.error(f"消息处理器错误: {result}")
     
     def _on_channel_event(self, event_type: str, data: Any):
         """渠道事件处理"""
@@ -584,6 +687,8 @@ class ChannelManager:
             "connected_channels": connected_count,
             "running": self._running,
             "config_path": str(self._config_path),
+            "outbound": self._outbound.get_statistics(),
+            "inbound": self._inbound.get_statistics(),
         }
     
     async def health_check(self) -> Dict[str, Any]:
@@ -0,0 +1,427 @@
+"""
+AgentBus出站消息管道
+
+为渠道管理器提供异步出站发送：
+- 按 (渠道, 账户) 划分发送队列，每个队列独立限速
+- 令牌桶限速（账户级 + 会话级），参数来自适配器的 ChannelCapabilities
+- 失败自动重试（指数退避 + 随机抖动）
+- 同一会话的短文本消息在平台允许时合并发送
+- 调用方拿到 Future，无需等待实际发送
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from .base import ChannelAdapter, Message, MessageType
+
+
+# 常见平台的默认限速：(账户每秒条数, 账户突发, 会话每秒条数, 会话突发)
+PLATFORM_RATE_LIMITS: Dict[str, Tuple[Optional[float], Optional[int], Optional[float], Optional[int]]] = {
+    "telegram": (30.0, 30, 1.0, 3),
+    "discord": (50.0, 50, 1.0, 5),
+    "slack": (None, None, 1.0, 1),
+}
+
+
+class TokenBucket:
+    """令牌桶限速器"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: Optional[int] = None):
+        self.rate = rate
+        self.capacity = float(capacity or max(1, int(rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """获取一个令牌需要等待的秒数（0表示可立即获取）"""
+        self._refill(time.monotonic() if now is None else now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        self.tokens -= 1
+
+    @property
+    def idle(self) -> bool:
+        """令牌已满，可以安全回收"""
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+@dataclass
+class OutboundRequest:
+    """一次出站发送请求"""
+    kind: str                      # message / media / poll
+    channel_id: str
+    account_id: Optional[str]
+    chat_key: str
+    future: asyncio.Future
+    message: Optional[Message] = None
+    media_url: Optional[str] = None
+    question: Optional[str] = None
+    options: Optional[List[str]] = None
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def coalescible(self) -> bool:
+        message = self.message
+        return (
+            self.kind == "message"
+            and message is not None
+            and message.type == MessageType.TEXT
+            and not message.metadata.reply_to_id
+            and not message.metadata.media_urls
+        )
+
+
+@dataclass
+class _Lane:
+    """单个 (渠道, 账户) 的发送队列"""
+    adapter: ChannelAdapter
+    bucket: Optional[TokenBucket]
+    chat_rate: Optional[float]
+    chat_burst: Optional[int]
+    coalesce: bool
+    max_length: int
+    pending: Deque[OutboundRequest] = field(default_factory=deque)
+    chat_buckets: Dict[str, TokenBucket] = field(default_factory=dict)
+    busy_chats: Set[str] = field(default_factory=set)
+    wakeup: asyncio.Event = field(default_factory=asyncio.Event)
+    worker: Optional[asyncio.Task] = None
+    in_flight: int = 0
+    enqueued: int = 0
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    coalesced: int = 0
+    throttled: int = 0
+
+
+class OutboundPipeline:
+    """
+    出站消息管道
+
+    每个 (渠道, 账户) 一个队列和一个按需启动的调度协程。调度协程从队列中
+    选取会话未被占用且令牌充足的请求发送；同一会话同一时刻只有一个请求在途，
+    保证会话内消息顺序。
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 4,
+        max_retries: int = 3,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 10.0,
+        coalesce_window: float = 0.0,
+        max_coalesce: int = 20,
+        scan_limit: int = 64,
+        logger: Optional[logging.Logger] = None
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.coalesce_window = coalesce_window
+        self.max_coalesce = max_coalesce
+        self.scan_limit = scan_limit
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._lanes: Dict[Tuple[str, str], _Lane] = {}
+        self._latencies: Deque[float] = deque(maxlen=1024)
+        self._latency_total = 0.0
+        self._latency_count = 0
+        self._latency_max = 0.0
+
+    # 队列管理
+
+    def _lane_for(self, channel_id: str, account_key: str, adapter: ChannelAdapter,
+                  channel_type: Optional[str] = None) -> _Lane:
+        key = (channel_id, account_key)
+        lane = self._lanes.get(key)
+        if lane is not None:
+            # 适配器可能因配置更新被替换，队列和限速状态保留
+            lane.adapter = adapter
+        else:
+            caps = adapter.capabilities
+            defaults = PLATFORM_RATE_LIMITS.get((channel_type or "").lower(), (None, None, None, None))
+            rate = getattr(caps, "rate_limit", None) or defaults[0]
+            burst = getattr(caps, "rate_burst", None) or defaults[1]
+            chat_rate = getattr(caps, "chat_rate_limit", None) or defaults[2]
+            chat_burst = getattr(caps, "chat_rate_burst", None) or defaults[3]
+            lane = self._lanes[key] = _Lane(
+                adapter=adapter,
+                bucket=TokenBucket(rate, burst) if rate else None,
+                chat_rate=chat_rate,
+                chat_burst=chat_burst,
+                coalesce=bool(getattr(caps, "coalesce_messages", False)),
+                max_length=getattr(caps, "max_message_length", 4096) or 4096
+            )
+        return lane
+
+    def submit(self, request: OutboundRequest, adapter: ChannelAdapter,
+               channel_type: Optional[str] = None,
+               lane_account: Optional[str] = None) -> asyncio.Future:
+        """
+        提交发送请求
+
+        Args:
+            request: 发送请求
+            adapter: 目标渠道适配器
+            channel_type: 渠道类型（用于选择平台默认限速）
+            lane_account: 队列所属账户（默认为请求的 account_id）
+
+        Returns:
+            发送结果 Future（bool）
+        """
+        lane = self._lane_for(request.channel_id, lane_account or request.account_id or "", adapter, channel_type)
+        lane.pending.append(request)
+        lane.enqueued += 1
+        lane.wakeup.set()
+        if lane.worker is None or lane.worker.done():
+            lane.worker = asyncio.create_task(self._run_lane(lane))
+        return request.future
+
+    # 调度
+
+    def _chat_bucket(self, lane: _Lane, chat_key: str) -> Optional[TokenBucket]:
+        if not lane.chat_rate:
+            return None
+        bucket = lane.chat_buckets.get(chat_key)
+        if bucket is None:
+            if len(lane.chat_buckets) > 4096:
+                for key in [k for k, b in lane.chat_buckets.items() if b.idle and k not in lane.busy_chats]:
+                    del lane.chat_buckets[key]
+            bucket = lane.chat_buckets[chat_key] = TokenBucket(lane.chat_rate, lane.chat_burst)
+        return bucket
+
+    def _next_ready(self, lane: _Lane) -> Tuple[Optional[int], float]:
+        """返回可发送请求的下标以及无可发送请求时需要等待的秒数"""
+        now = time.monotonic()
+        if lane.bucket is not None:
+            delay = lane.bucket.delay(now)
+            if delay > 0:
+                return None, delay
+
+        wait = float("inf")
+        for index, request in enumerate(lane.pending):
+            if index >= self.scan_limit:
+                break
+            if request.chat_key in lane.busy_chats:
+                continue
+            bucket = self._chat_bucket(lane, request.chat_key)
+            delay = bucket.delay(now) if bucket is not None else 0.0
+            if delay <= 0:
+                return index, 0.0
+            wait = min(wait, delay)
+        return None, wait
+
+    async def _run_lane(self, lane: _Lane) -> None:
+        tasks: Set[asyncio.Task] = set()
+        try:
+            while lane.pending or tasks:
+                index = None
+                wait = float("inf")
+                if lane.pending and lane.in_flight < self.max_in_flight:
+                    index, wait = self._next_ready(lane)
+
+                if index is None:
+                    lane.wakeup.clear()
+                    if wait != float("inf"):
+                        lane.throttled += 1
+                    timeout = None if wait == float("inf") else wait
+                    try:
+                        await asyncio.wait_for(lane.wakeup.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                request = lane.pending[index]
+                del lane.pending[index]
+                batch = [request]
+                if lane.coalesce and request.coalescible:
+                    if self.coalesce_window > 0 and not lane.pending:
+                        try:
+                            await asyncio.sleep(self.coalesce_window)
+                        except asyncio.CancelledError:
+                            # 放回队首，由 close()/remove_channel() 统一置为失败
+                            lane.pending.appendleft(request)
+                            raise
+                    batch.extend(self._take_coalescible(lane, request))
+
+                if lane.bucket is not None:
+                    lane.bucket.consume()
+                chat_bucket = self._chat_bucket(lane, request.chat_key)
+                if chat_bucket is not None:
+                    chat_bucket.consume()
+
+                lane.busy_chats.add(request.chat_key)
+                lane.in_flight += 1
+                task = asyncio.create_task(self._deliver(lane, batch))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda _: lane.wakeup.set())
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _take_coalescible(self, lane: _Lane, first: OutboundRequest) -> List[OutboundRequest]:
+        """从队列中取出可与 first 合并的同会话短文本消息（保持会话内顺序）"""
+        taken: List[OutboundRequest] = []
+        length = len(first.message.content)
+        for request in list(lane.pending):
+            if request.chat_key != first.chat_key:
+                continue
+            # 遇到不可合并的同会话消息即停止，避免打乱顺序
+            if not request.coalescible or len(taken) + 1 >= self.max_coalesce:
+                break
+            length += 1 + len(request.message.content)
+            if length > lane.max_length:
+                break
+            lane.pending.remove(request)
+            taken.append(request)
+        return taken
+
+    async def _deliver(self, lane: _Lane, batch: List[OutboundRequest]) -> None:
+        first = batch[0]
+        success = False
+        try:
+            if len(batch) > 1:
+                lane.coalesced += len(batch) - 1
+                merged = Message(
+                    type=first.message.type,
+                    content="\n".join(r.message.content for r in batch),
+                    metadata=first.message.metadata,
+                    raw_data=first.message.raw_data
+                )
+                success = await self._send_with_retry(lane, first, merged)
+            else:
+                success = await self._send_with_retry(lane, first, first.message)
+        finally:
+            lane.busy_chats.discard(first.chat_key)
+            lane.in_flight -= 1
+            # 队列关闭时发送任务被取消，批次内的 Future 同样需要置为失败，否则调用方永远等待
+            now = time.perf_counter()
+            for request in batch:
+                if success:
+                    lane.sent += 1
+                else:
+                    lane.failed += 1
+                self._record_latency(now - request.enqueued_at)
+                if not request.future.done():
+                    request.future.set_result(success)
+
+    async def _send_with_retry(self, lane: _Lane, request: OutboundRequest,
+                               message: Optional[Message]) -> bool:
+        adapter = lane.adapter
+        attempt = 0
+        while True:
+            try:
+                if request.kind == "media":
+                    return bool(await adapter.send_media(message, request.media_url, request.account_id))
+                if request.kind == "poll":
+                    return bool(await adapter.send_poll(request.question, request.options, request.account_id))
+                return bool(await adapter.send_message(message, request.account_id))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    self.logger.error(f"出站发送失败 {request.channel_id}（已重试{attempt}次）: {e}")
+                    return False
+                # 优先使用平台返回的 retry_after，否则指数退避 + 全抖动
+                retry_after = getattr(e, "retry_after", None)
+                backoff = min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt))
+                delay = float(retry_after) if retry_after else random.uniform(0, backoff)
+                attempt += 1
+                lane.retries += 1
+                self.logger.warning(f"出站发送异常 {request.channel_id}，{delay:.2f}s 后重试: {e}")
+                await asyncio.sleep(delay)
+
+    # 生命周期与统计
+
+    def _record_latency(self, latency: float) -> None:
+        self._latencies.append(latency)
+        self._latency_total += latency
+        self._latency_count += 1
+        self._latency_max = max(self._latency_max, latency)
+
+    @property
+    def depth(self) -> int:
+        return sum(len(lane.pending) + lane.in_flight for lane in self._lanes.values())
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """等待所有已提交请求处理完成"""
+        workers = [lane.worker for lane in self._lanes.values() if lane.worker and not lane.worker.done()]
+        if not workers:
+            return True
+        done, pending = await asyncio.wait(workers, timeout=timeout)
+        return not pending
+
+    async def close(self, timeout: Optional[float] = 5.0) -> None:
+        """等待队列排空（超时后取消），未完成请求的 Future 置为 False"""
+        await self.drain(timeout)
+        for lane in self._lanes.values():
+            if lane.worker and not lane.worker.done():
+                lane.worker.cancel()
+                try:
+                    await lane.worker
+                except asyncio.CancelledError:
+                    pass
+            while lane.pending:
+                request = lane.pending.popleft()
+                if not request.future.done():
+                    request.future.set_result(False)
+
+    def remove_channel(self, channel_id: str) -> None:
+        """移除渠道的队列（未发送请求置为失败）"""
+        for key in [k for k in self._lanes if k[0] == channel_id]:
+            lane = self._lanes.pop(key)
+            if lane.worker and not lane.worker.done():
+                lane.worker.cancel()
+            while lane.pending:
+                request = lane.pending.popleft()
+                if not request.future.done():
+                    request.future.set_result(False)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """队列深度、吞吐、重试与发送延迟统计"""
+        lanes = self._lanes
+        ordered = sorted(self._latencies)
+        p95 = ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] if ordered else 0.0
+        return {
+            "depth": self.depth,
+            "enqueued": sum(l.enqueued for l in lanes.values()),
+            "sent": sum(l.sent for l in lanes.values()),
+            "failed": sum(l.failed for l in lanes.values()),
+            "retries": sum(l.retries for l in lanes.values()),
+            "coalesced": sum(l.coalesced for l in lanes.values()),
+            "throttled": sum(l.throttled for l in lanes.values()),
+            "latency": {
+                "average": self._latency_total / self._latency_count if self._latency_count else 0.0,
+                "p95": p95,
+                "max": self._latency_max
+            },
+            "queues": {
+                f"{channel_id}:{account_key or 'default'}": {
+                    "depth": len(lane.pending),
+                    "in_flight": lane.in_flight,
+                    "enqueued": lane.enqueued,
+                    "sent": lane.sent,
+                    "failed": lane.failed,
+                    "retries": lane.retries,
+                    "coalesced": lane.coalesced,
+                    "rate_limit": lane.bucket.rate if lane.bucket else None,
+                    "chat_rate_limit": lane.chat_rate
+                }
+                for (channel_id, account_key), lane in lanes.items()
+            }
+        }
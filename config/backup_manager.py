@@ -15,8 +15,9 @@ import gzip
 import hashlib
 import time
 import threading
+import zlib
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Union, Tuple, Callable
+from typing import Dict, Any, Optional, List, Union, Tuple, Callable, Iterator, Set
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
@@ -46,6 +47,7 @@ class BackupFormat(str, Enum):
     ZIP = "zip"
     TAR = "tar"
     TAR_GZ = "tar.gz"
+    CHUNKED = "chunked"
 
 
 class BackupCompression(str, Enum):
@@ -82,6 +84,10 @@ class BackupMetadata:
             self.tags = []
         if self.metadata is None:
             self.metadata = {}
+        # 从 JSON 读回时枚举字段是普通字符串
+        self.backup_type = BackupType(self.backup_type)
+        self.format = BackupFormat(self.format)
+        self.compression = BackupCompression(self.compression)
 
 
 @dataclass
@@ -95,6 +101,89 @@ class RecoveryResult:
     restored_at: datetime
 
 
+# 分块备份默认块大小
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+class ChunkStore:
+    """
+    内容寻址的块存储
+    
+    块以原始内容的 SHA-256 命名，按摘要前两位分目录存放，内容相同的块只写一次。
+    块文件首字节标记编码（z=zlib 压缩，r=原样），因此同一存储中可混合压缩与未压缩的块。
+    """
+    
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+    
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:]
+    
+    def has(self, digest: str) -> bool:
+        return self._path(digest).is_file()
+    
+    def put(self, data: bytes, compress: bool = True) -> Tuple[str, int]:
+        """写入块，返回 (摘要, 实际写入的字节数)；已存在的块不重复写入"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if path.exists():
+            return digest, 0
+        
+        payload = b"z" + zlib.compress(data) if compress else b"r" + data
+        path.parent.mkdir(exist_ok=True)
+        # 先写临时文件再原子替换，中断时不会留下半个块
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(temp_path, path)
+        return digest, len(payload)
+    
+    def get(self, digest: str, verify: bool = False) -> bytes:
+        """读取块内容，verify=True 时重新计算摘要"""
+        with open(self._path(digest), 'rb') as f:
+            payload = f.read()
+        data = zlib.decompress(payload[1:]) if payload[:1] == b"z" else payload[1:]
+        if verify and hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"块内容与摘要不符: {digest}")
+        return data
+    
+    def iter_digests(self) -> Iterator[str]:
+        """遍历存储中的全部块摘要"""
+        for directory in os.scandir(self.root):
+            if not directory.is_dir() or len(directory.name) != 2:
+                continue
+            for entry in os.scandir(directory.path):
+                if not entry.name.endswith('.tmp'):
+                    yield directory.name + entry.name
+    
+    def collect(self, referenced: Set[str]) -> Tuple[int, int]:
+        """删除未被引用的块，返回 (删除块数, 释放字节数)"""
+        removed = freed = 0
+        for digest in list(self.iter_digests()):
+            if digest in referenced:
+                continue
+            path = self._path(digest)
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += size
+        return removed, freed
+    
+    def get_statistics(self) -> Dict[str, int]:
+        chunks = stored = 0
+        for digest in self.iter_digests():
+            chunks += 1
+            stored += self._path(digest).stat().st_size
+        return {"chunks": chunks, "stored_bytes": stored}
+
+
 class ConfigBackupManager:
     """配置备份管理器"""
     
@@ -106,6 +195,10 @@ class ConfigBackupManager:
         self._backup_schedules: Dict[str, Any] = {}
         self._auto_backup_enabled = False
         
+        # 分块备份共享的块存储；删除备份后块需等待垃圾回收
+        self._chunks = ChunkStore(self.backup_dir / "chunks")
+        self._gc_pending = False
+        
         # 加密器
         self._encryption = ConfigEncryption()
         
@@ -117,12 +210,11 @@ class ConfigBackupManager:
             "compression_enabled": True,
             "encryption_enabled": False,
             "cleanup_enabled": True,
-            "retention_days": 30
+            "retention_days": 30,
+            "chunk_size": DEFAULT_CHUNK_SIZE
         }
         
         # 创建备份目录
-        self.backup_dir.mkdir(parents=True, exist_ok=True)
-        
         # 加载配置
         self._load_backup_config()
     
@@ -152,7 +244,7 @@ class ConfigBackupManager:
                      name: str,
                      description: str = "",
                      backup_type: BackupType = BackupType.MANUAL,
-                     format: BackupFormat = BackupFormat.ZIP,
+                     format: BackupFormat = BackupFormat.CHUNKED,
                      compression: BackupCompression = BackupCompression.GZIP,
                      include_encryption: bool = False,
                      tags: Optional[List[str]] = None) -> str:
@@ -160,12 +252,16 @@ class ConfigBackupManager:
         
         with self._lock:
             try:
-                # 生成备份ID
+                # 生成备份ID（同一秒内重名时追加序号）
                 backup_id = f"{name}_{int(time.time())}"
+                suffix = 1
+                while (self.backup_dir / backup_id).exists():
+                    backup_id = f"{name}_{int(time.time())}_{suffix}"
+                    suffix += 1
                 
                 # 创建备份目录
                 backup_path = self.backup_dir / backup_id
-                backup_path.mkdir(exist_ok=True)
+                backup_path.mkdir()
                 
                 # 收集配置文件
                 config_files = self._collect_config_files()
@@ -174,9 +270,17 @@ class ConfigBackupManager:
                     raise ValueError("没有找到可备份的配置文件")
                 
                 # 创建备份
-                backup_file = self._create_backup_archive(
-                    backup_id, config_files, backup_path, format, compression
-                )
+                extra: Dict[str, Any] = {}
+                if format == BackupFormat.CHUNKED:
+                    backup_file, extra = self._create_chunked_backup(
+                        backup_id, config_files, backup_path, compression
+                    )
+                    total_size = extra.pop("total_size")
+                else:
+                    backup_file = self._create_backup_archive(
+                        backup_id, config_files, backup_path, format, compression
+                    )
+                    total_size = backup_file.stat().st_size if backup_file.exists() else 0
                 
                 # 创建元数据
                 metadata = BackupMetadata(
@@ -191,10 +295,11 @@ class ConfigBackupManager:
                     environment="development",  # 应该从当前配置获取
                     profile="default",
                     file_count=len(config_files),
-                    total_size=backup_file.stat().st_size if backup_file.exists() else 0,
+                    total_size=total_size,
                     checksum=self._calculate_checksum(backup_file),
                     encrypted=include_encryption,
-                    tags=tags or []
+                    tags=tags or [],
+                    metadata=extra
                 )
                 
                 # 保存元数据
@@ -206,12 +311,14 @@ class ConfigBackupManager:
                 
                 # 清理旧备份
                 if self._backup_config.get("cleanup_enabled", True):
-                    self._cleanup_old_backups()
+                    self.cleanup_old_backups()
                 
                 logger.info(f"备份已创建: {backup_id}")
                 return backup_id
                 
             except Exception as e:
+                # 失败的分块备份可能已写入部分块
+                self._gc_pending = True
                 logger.error(f"创建备份失败: {e}")
                 raise
     
@@ -237,6 +344,9 @@ class ConfigBackupManager:
                     restored_at=datetime.now()
                 )
             
+            if metadata.format == BackupFormat.CHUNKED:
+                return self._restore_chunked_backup(metadata, target_dir, overwrite, validate_only)
+            
             # 解压备份
             backup_files = self._extract_backup_archive(backup_id, metadata, target_dir)
             
@@ -368,8 +478,9 @@ class ConfigBackupManager:
                 logger.warning(f"备份不存在: {backup_id}")
                 return False
             
-            # 删除备份目录
+            # 删除备份目录；其引用的块在下次垃圾回收时释放
             shutil.rmtree(backup_path)
+            self._gc_pending = True
             
             logger.info(f"备份已删除: {backup_id}")
             return True
@@ -378,11 +489,12 @@ class ConfigBackupManager:
             logger.error(f"删除备份失败: {e}")
             return False
     
-    def cleanup_old_backups(self) -> int:
-        """清理旧备份"""
+    def cleanup_old_backups(self, retention_days: Optional[int] = None) -> int:
+        """清理旧备份，并回收不再被任何备份引用的块"""
         
         try:
-            retention_days = self._backup_config.get("retention_days", 30)
+            if retention_days is None:
+                retention_days = self._backup_config.get("retention_days", 30)
             max_backups = self._backup_config.get("max_backups", 50)
             
             # 按创建时间清理
@@ -399,10 +511,11 @@ class ConfigBackupManager:
                     if self.delete_backup(backup.id):
                         deleted_count += 1
             
-            # 如果备份数量超过限制，删除最旧的
-            if len(backups) > max_backups:
-                sorted_backups = sorted(backups, key=lambda x: x.created_at)
-                excess_count = len(backups) - max_backups
+            # 如果剩余备份数量超过限制，删除最旧的
+            remaining = [backup for backup in backups if backup.created_at >= cutoff_date]
+            if len(remaining) > max_backups:
+                sorted_backups = sorted(remaining, key=lambda x: x.created_at)
+                excess_count = len(remaining) - max_backups
                 
                 for backup in sorted_backups[:excess_count]:
                     if self.delete_backup(backup.id):
@@ -411,6 +524,9 @@ class ConfigBackupManager:
             if deleted_count > 0:
                 logger.info(f"清理了 {deleted_count} 个旧备份")
             
+            if self._gc_pending:
+                self.collect_garbage()
+            
             return deleted_count
             
         except Exception as e:
@@ -468,18 +584,28 @@ class ConfigBackupManager:
         
         logger.info("自动备份已停止")
     
-    def verify_backup(self, backup_id: str) -> Tuple[bool, List[str]]:
-        """验证备份完整性"""
+    def verify_backup(self, backup_id: str, deep: bool = False) -> Tuple[bool, List[str]]:
+        """
+        验证备份完整性
+        
+        分块备份默认只核对清单校验和与块是否存在；deep=True 时读取全部块并重新计算摘要。
+        """
         
         try:
             metadata = self._get_backup_metadata(backup_id)
             if not metadata:
                 return False, [f"备份不存在: {backup_id}"]
             
+            if metadata.format == BackupFormat.CHUNKED:
+                errors = self._verify_chunked_backup(metadata, deep)
+                if errors:
+                    logger.warning(f"备份验证失败: {backup_id}, 错误: {errors[:5]}")
+                return len(errors) == 0, errors
+            
             errors = []
             
             # 检查备份文件是否存在
-            backup_file = self.backup_dir / f"{backup_id}.{metadata.format.value}"
+            backup_file = self._archive_file(metadata)
             if not backup_file.exists():
                 errors.append(f"备份文件不存在: {backup_file}")
             
@@ -518,6 +644,67 @@ class ConfigBackupManager:
             logger.error(f"验证备份失败: {e}")
             return False, [str(e)]
     
+    def restore_file(self,
+                     backup_id: str,
+                     relative_path: str,
+                     target_file: Optional[Path] = None) -> Optional[Path]:
+        """从分块备份中恢复单个文件，默认写回配置目录中的原位置"""
+        
+        try:
+            manifest = self._load_manifest(backup_id)
+            if manifest is None:
+                logger.error(f"备份不存在或不是分块备份: {backup_id}")
+                return None
+            
+            relative_path = Path(relative_path).as_posix()
+            entry = manifest["files"].get(relative_path)
+            if entry is None:
+                logger.error(f"备份 {backup_id} 中没有文件: {relative_path}")
+                return None
+            
+            target_file = Path(target_file) if target_file else self._safe_target(self.config_dir, relative_path)
+            self._write_from_chunks(entry, target_file)
+            
+            logger.info(f"已从备份 {backup_id} 恢复文件: {relative_path}")
+            return target_file
+            
+        except Exception as e:
+            logger.error(f"恢复文件失败: {e}")
+            return None
+    
+    def collect_garbage(self) -> Dict[str, int]:
+        """删除不再被任何备份清单引用的块"""
+        
+        with self._lock:
+            referenced: Set[str] = set()
+            for manifest_file in self.backup_dir.glob(f"*/{MANIFEST_FILE}"):
+                try:
+                    with open(manifest_file, 'r', encoding='utf-8') as f:
+                        manifest = json.load(f)
+                except Exception as e:
+                    # 清单不可读时无法确定引用关系，放弃本次回收以免误删
+                    logger.error(f"读取备份清单失败，跳过垃圾回收 {manifest_file}: {e}")
+                    return {"removed_chunks": 0, "freed_bytes": 0}
+                for entry in manifest["files"].values():
+                    referenced.update(entry["chunks"])
+            
+            removed, freed = self._chunks.collect(referenced)
+            self._gc_pending = False
+            
+            if removed:
+                logger.info(f"回收了 {removed} 个未引用的块，释放 {freed} 字节")
+            return {"removed_chunks": removed, "freed_bytes": freed}
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """获取备份存储统计"""
+        backups = self.list_backups()
+        stats = self._chunks.get_statistics()
+        stats["backups"] = len(backups)
+        stats["logical_bytes"] = sum(
+            backup.total_size for backup in backups if backup.format == BackupFormat.CHUNKED
+        )
+        return stats
+    
     def export_backup_info(self, backup_id: str, output_file: Path) -> bool:
         """导出备份信息"""
         
@@ -560,20 +747,233 @@ class ConfigBackupManager:
         
         # 配置文件扩展名
         config_extensions = {'.yaml', '.yml', '.json', '.toml', '.env'}
+        backup_dir = self.backup_dir.resolve()
         
         try:
-            # 递归搜索配置文件
-            for file_path in self.config_dir.rglob('*'):
-                if (file_path.is_file() and 
-                    file_path.suffix.lower() in config_extensions and
-                    not any(part.startswith('.') for part in file_path.parts)):
-                    config_files.append(file_path)
+            # 递归搜索配置文件；剪掉隐藏目录和备份目录本身，避免把清单和元数据备份进去
+            for directory, dirnames, filenames in os.walk(self.config_dir):
+                dirnames[:] = sorted(
+                    name for name in dirnames
+                    if not name.startswith('.') and
+                    Path(directory, name).resolve() != backup_dir
+                )
+                for name in sorted(filenames):
+                    if (not name.startswith('.') and
+                        os.path.splitext(name)[1].lower() in config_extensions):
+                        config_files.append(Path(directory, name))
             
         except Exception as e:
             logger.error(f"收集配置文件失败: {e}")
         
         return config_files
     
+    def _create_chunked_backup(self,
+                               backup_id: str,
+                               config_files: List[Path],
+                               backup_path: Path,
+                               compression: BackupCompression) -> Tuple[Path, Dict[str, Any]]:
+        """
+        创建分块备份
+        
+        文件按固定大小分块写入块存储，备份本身只是一份记录块引用的清单。
+        大小和 mtime 与上一份清单一致的文件直接沿用原条目，不再读取。
+        """
+        
+        previous = self._latest_manifest()
+        previous_files = previous["files"] if previous else {}
+        chunk_size = int(self._backup_config.get("chunk_size", DEFAULT_CHUNK_SIZE))
+        compress = compression != BackupCompression.NONE
+        
+        files: Dict[str, Dict[str, Any]] = {}
+        stats = {"reused_files": 0, "new_chunks": 0, "stored_bytes": 0}
+        
+        for config_file in config_files:
+            relative_path = config_file.relative_to(self.config_dir).as_posix()
+            stat = config_file.stat()
+            
+            prior = previous_files.get(relative_path)
+            if prior and prior["size"] == stat.st_size and prior["mtime_ns"] == stat.st_mtime_ns:
+                files[relative_path] = prior
+                stats["reused_files"] += 1
+                continue
+            
+            file_hash = hashlib.sha256()
+            chunks = []
+            size = 0
+            with open(config_file, 'rb') as f:
+                for block in iter(lambda: f.read(chunk_size), b""):
+                    file_hash.update(block)
+                    size += len(block)
+                    digest, written = self._chunks.put(block, compress)
+                    chunks.append(digest)
+                    if written:
+                        stats["new_chunks"] += 1
+                        stats["stored_bytes"] += written
+            
+            files[relative_path] = {
+                "size": size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": file_hash.hexdigest(),
+                "chunks": chunks
+            }
+        
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "backup_id": backup_id,
+            "created_at": datetime.now().isoformat(),
+            "chunk_size": chunk_size,
+            "files": files
+        }
+        
+        manifest_file = backup_path / MANIFEST_FILE
+        with open(manifest_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(manifest, ensure_ascii=False, sort_keys=True))
+        
+        stats["total_size"] = sum(entry["size"] for entry in files.values())
+        return manifest_file, stats
+    
+    def _load_manifest(self, backup_id: str) -> Optional[Dict[str, Any]]:
+        """读取分块备份清单"""
+        manifest_file = self.backup_dir / backup_id / MANIFEST_FILE
+        if not manifest_file.exists():
+            return None
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _latest_manifest(self) -> Optional[Dict[str, Any]]:
+        """最近一次分块备份的清单，作为增量备份的基准"""
+        for backup in self.list_backups():
+            if backup.format != BackupFormat.CHUNKED:
+                continue
+            try:
+                manifest = self._load_manifest(backup.id)
+            except Exception as e:
+                logger.warning(f"读取备份清单失败 {backup.id}: {e}")
+                continue
+            if manifest is not None:
+                return manifest
+        return None
+    
+    def _verify_chunked_backup(self, metadata: BackupMetadata, deep: bool) -> List[str]:
+        """验证分块备份"""
+        manifest_file = self.backup_dir / metadata.id / MANIFEST_FILE
+        if not manifest_file.exists():
+            return [f"备份清单不存在: {manifest_file}"]
+        if self._calculate_checksum(manifest_file) != metadata.checksum:
+            return ["备份清单校验和不匹配"]
+        
+        manifest = self._load_manifest(metadata.id)
+        errors = []
+        checked: Set[str] = set()
+        
+        for relative_path, entry in manifest["files"].items():
+            file_hash = hashlib.sha256() if deep else None
+            for digest in entry["chunks"]:
+                try:
+                    if deep:
+                        file_hash.update(self._chunks.get(digest, verify=True))
+                    elif digest not in checked and not self._chunks.has(digest):
+                        errors.append(f"缺少数据块 {digest}: {relative_path}")
+                        break
+                except Exception as e:
+                    errors.append(f"数据块损坏 {digest}: {relative_path}: {e}")
+                    break
+                checked.add(digest)
+            else:
+                if deep and file_hash.hexdigest() != entry["sha256"]:
+                    errors.append(f"文件校验和不匹配: {relative_path}")
+        
+        return errors
+    
+    def _restore_chunked_backup(self,
+                                metadata: BackupMetadata,
+                                target_dir: Path,
+                                overwrite: bool,
+                                validate_only: bool) -> RecoveryResult:
+        """从块存储直接恢复分块备份，无需解压临时目录"""
+        
+        manifest = self._load_manifest(metadata.id)
+        if manifest is None:
+            return RecoveryResult(
+                success=False,
+                backup_id=metadata.id,
+                restored_files=[],
+                errors=[f"备份清单不存在: {metadata.id}"],
+                warnings=[],
+                restored_at=datetime.now()
+            )
+        
+        restored_files = []
+        errors = []
+        
+        for relative_path, entry in manifest["files"].items():
+            try:
+                target_file = self._safe_target(target_dir, relative_path)
+                
+                if validate_only:
+                    missing = [digest for digest in entry["chunks"] if not self._chunks.has(digest)]
+                    if missing:
+                        errors.append(f"缺少数据块: {relative_path}")
+                    else:
+                        restored_files.append(target_file)
+                    continue
+                
+                if target_file.exists() and not overwrite:
+                    errors.append(f"文件已存在: {target_file}")
+                    continue
+                
+                self._write_from_chunks(entry, target_file)
+                restored_files.append(target_file)
+                
+            except Exception as e:
+                errors.append(f"恢复文件失败 {relative_path}: {e}")
+        
+        result = RecoveryResult(
+            success=len(errors) == 0,
+            backup_id=metadata.id,
+            restored_files=restored_files,
+            errors=errors,
+            warnings=[],
+            restored_at=datetime.now()
+        )
+        
+        if not validate_only:
+            if result.success:
+                logger.info(f"备份恢复成功: {metadata.id}")
+            else:
+                logger.error(f"备份恢复失败: {metadata.id}, 错误: {errors}")
+        
+        return result
+    
+    def _safe_target(self, target_dir: Path, relative_path: str) -> Path:
+        """解析清单中的相对路径，拒绝指向目标目录之外的条目"""
+        target_dir = Path(target_dir).resolve()
+        target_file = (target_dir / relative_path).resolve()
+        if target_dir not in target_file.parents:
+            raise ValueError(f"非法的备份路径: {relative_path}")
+        return target_file
+    
+    def _write_from_chunks(self, entry: Dict[str, Any], target_file: Path):
+        """按清单条目拼接数据块写出文件，校验通过后原子替换目标文件"""
+        target_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = target_file.with_name(f".{target_file.name}.{os.getpid()}.restore")
+        file_hash = hashlib.sha256()
+        
+        try:
+            with open(temp_file, 'wb') as f:
+                for digest in entry["chunks"]:
+                    data = self._chunks.get(digest)
+                    file_hash.update(data)
+                    f.write(data)
+            if file_hash.hexdigest() != entry["sha256"]:
+                raise ValueError(f"恢复内容校验失败: {target_file}")
+            # 还原 mtime，恢复后的下一次增量备份可直接沿用该条目
+            os.utime(temp_file, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+            os.replace(temp_file, target_file)
+        finally:
+            if temp_file.exists():
+                temp_file.unlink()
+    
     def _create_backup_archive(self, 
                              backup_id: str,
                              config_files: List[Path],
@@ -708,6 +1108,16 @@ class ConfigBackupManager:
             logger.error(f"创建JSON备份失败: {e}")
             raise
     
+    def _archive_file(self, metadata: BackupMetadata) -> Path:
+        """归档文件路径，与 _create_*_backup 的命名一致"""
+        backup_path = self.backup_dir / metadata.id
+        if metadata.format == BackupFormat.ZIP:
+            return backup_path / f"{metadata.id}.zip"
+        if metadata.format in [BackupFormat.TAR, BackupFormat.TAR_GZ]:
+            suffix = ".tar.gz" if metadata.compression == BackupCompression.GZIP else ".tar"
+            return backup_path / f"{metadata.id}{suffix}"
+        return backup_path / f"{metadata.id}.json"
+    
     def _extract_backup_archive(self, 
                                backup_id: str,
                                metadata: BackupMetadata,
@@ -719,16 +1129,13 @@ class ConfigBackupManager:
         temp_dir.mkdir(exist_ok=True)
         
         try:
+            archive_file = self._archive_file(metadata)
             if metadata.format == BackupFormat.ZIP:
-                archive_file = self.backup_dir / f"{backup_id}.zip"
                 return self._extract_zip_backup(archive_file, temp_dir)
             elif metadata.format in [BackupFormat.TAR, BackupFormat.TAR_GZ]:
-                archive_file = self.backup_dir / f"{backup_id}.tar"
-                if metadata.compression == BackupCompression.GZIP:
-                    archive_file = self.backup_dir / f"{backup_id}.tar.gz"
                 return self._extract_tar_backup(archive_file, temp_dir)
             else:
-                return self._extract_json_backup(backup_path / f"{backup_id}.json", temp_dir)
+                return self._extract_json_backup(archive_file, temp_dir)
                 
         except Exception as e:
             logger.error(f"解压备份失败: {e}")
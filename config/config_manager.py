@@ -13,8 +13,9 @@ import hashlib
 import threading
 import time
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Union, Callable, Set
-from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Union, Callable, Set, Generic, Type, TypeVar
+from datetime import datetime
 from dataclasses import asdict
 from enum import Enum
 import logging
@@ -36,7 +37,7 @@ from .config_types import (
 )
 from .settings import ExtendedSettings
 from .env_loader import EnvironmentLoader, get_env_loader
-from .security import ConfigEncryption, ConfigValidator
+from .security import ConfigEncryption, ConfigValidator, ValidationState
 from .watcher import ConfigWatcher
 from .backup_manager import ConfigBackupManager
 from .file_manager import ConfigFileManager
@@ -55,9 +56,135 @@ class ConfigManagerState(Enum):
     ERROR = "error"
 
 
+_MISSING = object()
+
+T = TypeVar("T")
+
+
+class FrozenConfig:
+    """
+    展平的只读配置快照
+    
+    每个可通过点分路径访问的节点（含中间字典）都展平为一个键，查找为 O(1)。
+    快照创建后不再修改；配置变更时生成新快照并整体替换。
+    传入 previous 时，与上一快照是同一对象的顶层子树直接复用其展平结果。
+    """
+    
+    __slots__ = ("version", "data", "flat", "_paths")
+    
+    def __init__(self, data: Dict[str, Any], version: int, previous: Optional["FrozenConfig"] = None):
+        self.version = version
+        self.data = data
+        if previous is None:
+            flat: Dict[str, Any] = {}
+            paths: Dict[str, tuple] = {}
+        else:
+            flat = dict(previous.flat)
+            paths = dict(previous._paths)
+            for key in previous.data:
+                if data.get(key, _MISSING) is not previous.data[key]:
+                    for path in paths.pop(key, ()):
+                        del flat[path]
+        
+        for key, value in data.items():
+            if previous is not None and previous.data.get(key, _MISSING) is value:
+                continue
+            # 与逐级查找的语义一致：非字符串键或含点的键无法通过点分路径访问
+            if not isinstance(key, str) or '.' in key:
+                continue
+            subtree = {key: value}
+            if isinstance(value, dict):
+                self._flatten(value, key + '.', subtree)
+            flat.update(subtree)
+            paths[key] = tuple(subtree)
+        
+        self.flat = MappingProxyType(flat)
+        # 顶层字段 -> 其子树的展平路径
+        self._paths = paths
+    
+    @classmethod
+    def _flatten(cls, node: Dict[str, Any], prefix: str, flat: Dict[str, Any]):
+        for key, value in node.items():
+            if not isinstance(key, str) or '.' in key:
+                continue
+            path = prefix + key
+            flat[path] = value
+            if isinstance(value, dict):
+                cls._flatten(value, path + '.', flat)
+    
+    def get(self, path: str, default: Any = None) -> Any:
+        return self.flat.get(path, default)
+    
+    def changed_keys(self, other: Optional["FrozenConfig"], keys: Optional[Set[str]] = None) -> Set[str]:
+        """与另一快照相比发生变化的顶层字段（keys 限定只比较这些字段）"""
+        if other is None:
+            return set(self.data) if keys is None else set(keys)
+        if keys is None:
+            keys = set(self.data) | set(other.data)
+        changed = set()
+        for key in keys:
+            new, old = self.data.get(key, _MISSING), other.data.get(key, _MISSING)
+            if new is not old and new != old:
+                changed.add(key)
+        return changed
+
+
+class ConfigAccessor(Generic[T]):
+    """
+    绑定到配置键的类型化访问器
+    
+    键只解析一次；每次读取时检查快照版本，版本未变直接返回缓存的转换结果。
+    """
+    
+    __slots__ = ("_manager", "path", "default", "value_type", "_cached")
+    
+    _TRUE = {"1", "true", "yes", "on"}
+    _FALSE = {"0", "false", "no", "off", ""}
+    
+    def __init__(self, manager: "ConfigManager", path: str, default: Any = None,
+                 value_type: Optional[Type[T]] = None):
+        self._manager = manager
+        self.path = path
+        self.default = default
+        self.value_type = value_type
+        self._cached = (-1, None)
+    
+    def get(self) -> T:
+        snapshot = self._manager._snapshot
+        version, value = self._cached
+        if version != snapshot.version:
+            value = self._convert(snapshot.get(self.path, _MISSING))
+            self._cached = (snapshot.version, value)
+        return value
+    
+    __call__ = get
+    
+    def _convert(self, raw: Any) -> Any:
+        if raw is _MISSING:
+            return self.default
+        value_type = self.value_type
+        if value_type is None or isinstance(raw, value_type) and not (
+                value_type is int and isinstance(raw, bool)):
+            return raw
+        try:
+            if value_type is bool and isinstance(raw, str):
+                lowered = raw.strip().lower()
+                if lowered in self._TRUE:
+                    return True
+                if lowered in self._FALSE:
+                    return False
+                raise ValueError(raw)
+            return value_type(raw)
+        except (TypeError, ValueError):
+            logger.warning(f"配置值类型转换失败 {self.path}: {raw!r} -> {value_type.__name__}，使用默认值")
+            return self.default
+
+
 class ConfigManager:
     """配置管理器"""
     
+    WATCH_IGNORE = ("backups", "snapshots", "encrypted")
+    
     def __init__(self, config_dir: Optional[Union[str, Path]] = None):
         self.config_dir = Path(config_dir) if config_dir else Path("./config")
         self.state = ConfigManagerState.UNINITIALIZED
@@ -70,6 +197,8 @@ class ConfigManager:
         self._environment: EnvironmentType = "development"
         self._config_data: Dict[str, Any] = {}
         self._settings: Optional[ExtendedSettings] = None
+        # 读路径使用的只读快照，配置变更后整体替换
+        self._snapshot = FrozenConfig({}, 0)
         
         # 依赖组件
         self._env_loader = EnvironmentLoader()
@@ -84,8 +213,11 @@ class ConfigManager:
         self._history: List[ConfigHistory] = []
         self._changes: List[ConfigChange] = []
         
-        # 验证结果缓存
-        self._validation_cache: Dict[str, ValidationResult] = {}
+        # 验证结果缓存：按快照版本缓存，只重新验证变化的顶层字段
+        self._validation_result: Optional[ValidationResult] = None
+        self._validated_version = -1
+        self._validation_state: Optional[ValidationState] = None
+        self._validated_snapshot: Optional[FrozenConfig] = None
         self._last_validation_time: Optional[datetime] = None
         
         # 初始化默认配置
@@ -150,6 +282,7 @@ class ConfigManager:
                 
                 # 加载配置
                 self._load_configurations()
+                self._publish_snapshot()
                 
                 # 应用配置
                 self._apply_configuration()
@@ -181,6 +314,7 @@ class ConfigManager:
                 
                 # 重新加载配置
                 self._load_configurations()
+                self._publish_snapshot()
                 
                 # 应用配置
                 self._apply_configuration()
@@ -268,6 +402,7 @@ class ConfigManager:
             
             # 设置新值
             self._set_nested_value(self._config_data, path, value)
+            self._publish_snapshot(incremental=True)
             
             # 验证配置
             if self._settings:
@@ -284,24 +419,45 @@ class ConfigManager:
     
     def get_config_value(self, path: str, default: Any = None) -> Any:
         """获取配置值"""
-        return self._get_nested_value(self._config_data, path, default)
+        return self._snapshot.flat.get(path, default)
+    
+    def get_snapshot(self) -> FrozenConfig:
+        """获取当前只读配置快照"""
+        return self._snapshot
+    
+    def accessor(self, path: str, default: Any = None,
+                 value_type: Optional[Type[T]] = None) -> ConfigAccessor[T]:
+        """
+        获取绑定到配置键的访问器，适合在热路径中反复读取
+        
+        Args:
+            path: 点分配置路径
+            default: 键不存在或类型转换失败时的默认值
+            value_type: 目标类型（如 int、bool），None 表示不转换
+        """
+        return ConfigAccessor(self, path, default, value_type)
     
     def validate(self) -> ValidationResult:
         """验证当前配置"""
         with self._lock:
+            snapshot = self._snapshot
+            
             # 检查缓存
-            cache_key = self._get_validation_cache_key()
-            if (self._last_validation_time and 
-                datetime.now() - self._last_validation_time < timedelta(minutes=5)):
-                cached_result = self._validation_cache.get(cache_key)
-                if cached_result:
-                    return cached_result
+            if self._validation_result is not None and self._validated_version == snapshot.version:
+                return self._validation_result
             
-            # 执行验证
-            result = self._validator.validate_config(self._config_data, self._settings)
+            # 只重新执行依赖字段发生变化的验证
+            changed = None
+            if self._validation_state:
+                changed = snapshot.changed_keys(self._validated_snapshot, self._validator.dependency_keys())
+            result, self._validation_state = self._validator.validate_incremental(
+                snapshot.data, changed, self._validation_state
+            )
             
             # 缓存结果
-            self._validation_cache[cache_key] = result
+            self._validation_result = result
+            self._validated_version = snapshot.version
+            self._validated_snapshot = snapshot
             self._last_validation_time = datetime.now()
             
             return result
@@ -369,6 +525,7 @@ class ConfigManager:
             
             # 应用配置
             self._config_data.update(config_data)
+            self._publish_snapshot()
             
             # 重新应用设置
             self._apply_configuration()
@@ -400,6 +557,7 @@ class ConfigManager:
             
             # 恢复配置
             self._config_data = snapshot.data.copy()
+            self._publish_snapshot()
             
             # 重新应用设置
             self._apply_configuration()
@@ -472,6 +630,7 @@ class ConfigManager:
             
             # 应用解密后的数据
             self._config_data.update(decrypted_data.data)
+            self._publish_snapshot()
             
             logger.info("敏感数据已解密")
             return True
@@ -742,13 +901,15 @@ class ConfigManager:
     
     def _start_watching(self):
         """启动配置监听"""
-        self._watcher = ConfigWatcher(self.config_dir)
+        # 快照、备份等由配置管理器自身写入，不触发重新加载
+        self._watcher = ConfigWatcher(self.config_dir, ignore=self.WATCH_IGNORE)
         self._watcher.add_callback(self._on_config_change)
         self._watcher.start()
     
     def _on_config_change(self, event: WatchEvent):
         """配置变更回调"""
-        logger.info(f"检测到配置变更: {event.path}")
+        changes = (event.data or {}).get("changes") or []
+        logger.info(f"检测到配置变更: {event.path}（{len(changes) or 1} 个文件）")
         
         # 重新加载配置
         self.reload()
@@ -850,21 +1011,29 @@ class ConfigManager:
             return default
     
     def _set_nested_value(self, data: Dict[str, Any], path: str, value: Any):
-        """设置嵌套配置值"""
+        """设置嵌套配置值（路径上的字典写时复制，不修改已发布的快照）"""
         keys = path.split('.')
         current = data
         
         for key in keys[:-1]:
             if key not in current:
                 current[key] = {}
+            elif isinstance(current[key], dict):
+                current[key] = dict(current[key])
             current = current[key]
         
         current[keys[-1]] = value
     
-    def _get_validation_cache_key(self) -> str:
-        """获取验证缓存键"""
-        config_str = json.dumps(self._config_data, sort_keys=True)
-        return hashlib.md5(config_str.encode()).hexdigest()
+    def _publish_snapshot(self, incremental: bool = False):
+        """
+        以当前配置数据生成新快照并替换（读路径无需加锁）
+        
+        嵌套字典只会被整体替换或写时复制（见 _set_nested_value），快照可与之共享；
+        incremental=True 时未被替换的顶层子树复用上一快照的展平结果。
+        """
+        with self._lock:
+            previous = self._snapshot if incremental else None
+            self._snapshot = FrozenConfig(dict(self._config_data), self._snapshot.version + 1, previous)
     
     def __enter__(self):
         """上下文管理器入口"""
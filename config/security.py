@@ -69,13 +69,37 @@ class SecurityConfig:
             self.forbidden_passwords = set()
 
 
+# 验证单元的输出：(错误, 警告, 建议)
+UnitResult = Tuple[List[str], List[str], List[str]]
+
+
+@dataclass
+class ValidationState:
+    """增量验证状态：各验证单元上次的输出"""
+    rules_version: int
+    units: Dict[str, UnitResult]
+
+
 class ConfigValidator:
     """配置验证器"""
     
+    # 全局检查读取的顶层字段；增量验证时只在这些字段变化后重新执行
+    CHECK_DEPENDENCIES = {
+        "schema": {"app_name", "environment", "host", "port", "workers", "debug", "log_level", "secret_key"},
+        "security": {"environment", "secret_key", "debug", "cors_origins",
+                     "openai_api_key", "anthropic_api_key", "google_api_key"},
+        "dependencies": {"database_url", "database_type", "redis_url", "cache_enabled", "cache_backend"},
+        "suggestions": {"workers", "database_pool_size", "encryption_enabled",
+                        "monitoring_enabled", "backup_enabled"},
+    }
+    
     def __init__(self, security_config: Optional[SecurityConfig] = None):
         self.security_config = security_config or SecurityConfig()
         self._validation_rules: List[ValidationRule] = []
         self._schema_cache: Dict[str, Dict[str, Any]] = {}
+        # 规则增删时递增，使之前的增量验证状态失效
+        self.rules_version = 0
+        self._dependency_keys: Optional[Tuple[int, Set[str]]] = None
         self._load_default_rules()
     
     def _load_default_rules(self):
@@ -157,50 +181,93 @@ class ConfigValidator:
     def validate_config(self, config: Dict[str, Any], 
                        settings: Optional[Any] = None) -> ValidationResult:
         """验证配置"""
-        errors = []
-        warnings = []
-        suggestions = []
-        
-        # 执行规则验证
-        for rule in self._validation_rules:
-            try:
-                field_value = self._get_nested_value(config, rule.field)
-                if field_value is not None:
-                    rule_result = self._validate_field(rule, field_value)
-                    
-                    if rule_result:
-                        if rule.severity == ValidationSeverity.ERROR:
-                            errors.append(f"{rule.field}: {rule.message}")
-                        elif rule.severity == ValidationSeverity.WARNING:
-                            warnings.append(f"{rule.field}: {rule.message}")
-                        else:
-                            suggestions.append(f"{rule.rule_type}: {rule.message}")
-                            
-            except Exception as e:
-                logger.error(f"验证规则执行失败 {rule.field}: {e}")
-                errors.append(f"{rule.field}: 验证规则执行失败")
-        
-        # 执行模式验证
-        schema_errors = self._validate_with_schema(config)
-        errors.extend(schema_errors)
-        
-        # 执行安全验证
-        security_errors = self._validate_security(config)
-        errors.extend(security_errors)
-        
-        # 执行依赖验证
-        dependency_errors = self._validate_dependencies(config)
-        errors.extend(dependency_errors)
-        
-        # 生成建议
-        suggestions.extend(self._generate_suggestions(config))
-        
-        return ValidationResult(
+        return self.validate_incremental(config)[0]
+    
+    def validate_incremental(self, config: Dict[str, Any], changed: Optional[Set[str]] = None,
+                             previous: Optional[ValidationState] = None
+                             ) -> Tuple[ValidationResult, ValidationState]:
+        """
+        增量验证配置
+        
+        Args:
+            config: 配置数据
+            changed: 发生变化的顶层字段；None 表示全部重新验证
+            previous: 上次验证返回的状态
+        
+        Returns:
+            (验证结果, 新状态)；只有依赖字段变化的验证单元会重新执行，
+            结果与完整验证一致
+        """
+        if previous is None or previous.rules_version != self.rules_version:
+            previous = None
+            changed = None
+        
+        units: Dict[str, UnitResult] = {}
+        errors: List[str] = []
+        warnings: List[str] = []
+        suggestions: List[str] = []
+        
+        for unit_id, dependencies, run in self._validation_units():
+            output = previous.units.get(unit_id) if previous else None
+            if output is None or changed is None or dependencies & changed:
+                output = run(config)
+            units[unit_id] = output
+            errors.extend(output[0])
+            warnings.extend(output[1])
+            suggestions.extend(output[2])
+        
+        result = ValidationResult(
             is_valid=len(errors) == 0,
             errors=errors,
             warnings=warnings,
             suggestions=suggestions
         )
+        return result, ValidationState(self.rules_version, units)
+    
+    def dependency_keys(self) -> Set[str]:
+        """所有验证单元读取的顶层字段"""
+        cached = self._dependency_keys
+        if cached is None or cached[0] != self.rules_version:
+            keys: Set[str] = set()
+            for _, dependencies, _ in self._validation_units():
+                keys |= dependencies
+            cached = self._dependency_keys = (self.rules_version, frozenset(keys))
+        return cached[1]
+    
+    def _validation_units(self):
+        """按完整验证的顺序列出验证单元：(单元ID, 依赖的顶层字段, 执行函数)"""
+        for index, rule in enumerate(self._validation_rules):
+            yield (f"rule:{index}", {rule.field.split('.', 1)[0]},
+                   lambda config, rule=rule: self._run_rule(rule, config))
+        yield ("schema", self.CHECK_DEPENDENCIES["schema"],
+               lambda config: (self._validate_with_schema(config), [], []))
+        yield ("security", self.CHECK_DEPENDENCIES["security"],
+               lambda config: (self._validate_security(config), [], []))
+        yield ("dependencies", self.CHECK_DEPENDENCIES["dependencies"],
+               lambda config: (self._validate_dependencies(config), [], []))
+        yield ("suggestions", self.CHECK_DEPENDENCIES["suggestions"],
+               lambda config: ([], [], self._generate_suggestions(config)))
+    
+    def _run_rule(self, rule: ValidationRule, config: Dict[str, Any]) -> UnitResult:
+        """执行单条规则验证"""
+        errors, warnings, suggestions = [], [], []
+        try:
+            field_value = self._get_nested_value(config, rule.field)
+            if field_value is not None:
+                rule_result = self._validate_field(rule, field_value)
+                
+                if rule_result:
+                    if rule.severity == ValidationSeverity.ERROR:
+                        errors.append(f"{rule.field}: {rule.message}")
+                    elif rule.severity == ValidationSeverity.WARNING:
+                        warnings.append(f"{rule.field}: {rule.message}")
+                    else:
+                        suggestions.append(f"{rule.rule_type}: {rule.message}")
+                        
+        except Exception as e:
+            logger.error(f"验证规则执行失败 {rule.field}: {e}")
+            errors.append(f"{rule.field}: 验证规则执行失败")
+        return errors, warnings, suggestions
     
     def _validate_field(self, rule: ValidationRule, value: Any) -> bool:
         """验证单个字段"""
@@ -453,6 +520,7 @@ class ConfigValidator:
     def add_validation_rule(self, rule: ValidationRule):
         """添加验证规则"""
         self._validation_rules.append(rule)
+        self.rules_version += 1
     
     def remove_validation_rule(self, field: str, rule_type: str):
         """移除验证规则"""
@@ -460,6 +528,7 @@ class ConfigValidator:
             rule for rule in self._validation_rules
             if not (rule.field == field and rule.rule_type == rule_type)
         ]
+        self.rules_version += 1
 
 
 class ConfigEncryption:
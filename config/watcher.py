@@ -2,16 +2,25 @@
 AgentBus 配置监听器
 Configuration File Watcher for AgentBus
 
-提供配置文件监听和热重载功能，基于watchdog库实现。
+提供配置文件监听和热重载功能：
+- 事件后端：watchdog（Linux 上即 inotify），未安装 watchdog 时在 Linux 上直接使用 inotify
+- 轮询后端：缓存目录列表，只在目录 mtime 变化时重新列目录，按 (大小, mtime) 判断文件变化
+- 短时间内的多次写入（编辑器保存）防抖合并为一次变更事件，内容哈希未变的变更被忽略
 """
 
 import os
+import sys
 import time
 import threading
 import hashlib
 import json
+import select
+import struct
+import ctypes
+import ctypes.util
+from collections import deque
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Callable, Set
+from typing import Dict, Any, Optional, List, Callable, Set, Tuple, Iterable, Union
 from datetime import datetime
 from dataclasses import dataclass
 from enum import Enum
@@ -35,6 +44,18 @@ from .config_types import WatchEvent, ConfigEvent, ConfigCallback
 logger = logging.getLogger(__name__)
 
 
+CONFIG_EXTENSIONS = {'.yaml', '.yml', '.json', '.toml', '.env'}
+
+BACKEND_WATCHDOG = "watchdog"
+BACKEND_INOTIFY = "inotify"
+BACKEND_POLLING = "polling"
+
+
+def is_config_path(path: str) -> bool:
+    """按扩展名判断是否为配置文件"""
+    return os.path.splitext(path)[1].lower() in CONFIG_EXTENSIONS
+
+
 class WatchEventType(str, Enum):
     """监听事件类型"""
     CREATED = "created"
@@ -54,399 +75,736 @@ class FileChangeInfo:
 
 
 class ConfigFileHandler(FileSystemEventHandler if HAS_WATCHDOG else object):
-    """配置文件事件处理器"""
-    
+    """watchdog 事件处理器：只转发原始事件，防抖与去重由监听器统一处理"""
+
     def __init__(self, watcher: 'ConfigWatcher'):
         self.watcher = watcher
-        self._last_modified_times: Dict[Path, float] = {}
-        self._file_hashes: Dict[Path, str] = {}
-    
+
     def on_modified(self, event):
         """文件修改事件处理"""
-        if not HAS_WATCHDOG:
-            return
-            
-        if event.is_directory:
-            return
-            
-        file_path = Path(event.src_path)
-        self._handle_file_change(file_path, WatchEventType.MODIFIED)
-    
+        if not event.is_directory:
+            self.watcher._record_event(event.src_path, WatchEventType.MODIFIED)
+
     def on_created(self, event):
         """文件创建事件处理"""
-        if not HAS_WATCHDOG:
-            return
-            
-        if event.is_directory:
-            return
-            
-        file_path = Path(event.src_path)
-        self._handle_file_change(file_path, WatchEventType.CREATED)
-    
+        if not event.is_directory:
+            self.watcher._record_event(event.src_path, WatchEventType.CREATED)
+
     def on_deleted(self, event):
         """文件删除事件处理"""
-        if not HAS_WATCHDOG:
-            return
-            
         if event.is_directory:
-            return
-            
-        file_path = Path(event.src_path)
-        self._handle_file_change(file_path, WatchEventType.DELETED)
-    
+            self.watcher._directory_removed(event.src_path)
+        else:
+            self.watcher._record_event(event.src_path, WatchEventType.DELETED)
+
     def on_moved(self, event):
         """文件移动事件处理"""
-        if not HAS_WATCHDOG:
-            return
-            
         if event.is_directory:
+            self.watcher._directory_removed(event.src_path)
             return
-            
-        dest_path = Path(event.dest_path)
-        self._handle_file_change(dest_path, WatchEventType.MOVED)
-    
-    def _handle_file_change(self, file_path: Path, event_type: WatchEventType):
-        """处理文件变更"""
-        # 检查是否为配置文件
-        if not self._is_config_file(file_path):
-            return
-        
-        # 防抖处理
-        current_time = time.time()
-        last_modified = self._last_modified_times.get(file_path, 0)
-        
-        if current_time - last_modified < 1.0:  # 1秒内忽略重复事件
-            return
-        
-        self._last_modified_times[file_path] = current_time
-        
-        # 计算文件哈希
-        file_hash = None
-        file_size = None
-        
-        if file_path.exists() and file_path.is_file():
+        self.watcher._record_event(event.src_path, WatchEventType.DELETED)
+        self.watcher._record_event(event.dest_path, WatchEventType.CREATED)
+
+
+def _load_inotify():
+    """加载 libc 中的 inotify 接口（仅 Linux）"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class InotifyBackend:
+    """
+    inotify 监听后端（不依赖 watchdog）
+
+    每个目录一个 watch；新建目录时补充 watch 并上报其中已有的配置文件，
+    队列溢出时请求监听器全量重新扫描。
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = struct.Struct("iIII")
+
+    _libc = None
+
+    def __init__(self, root: Path, recursive: bool, watcher: 'ConfigWatcher'):
+        self.root = str(root)
+        self.recursive = recursive
+        self.watcher = watcher
+        self._fd = -1
+        self._watches: Dict[int, str] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    @classmethod
+    def available(cls) -> bool:
+        if cls._libc is None:
+            cls._libc = _load_inotify() or False
+        return bool(cls._libc)
+
+    def start(self):
+        if not self.available():
+            raise OSError("inotify 不可用")
+        fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self._fd = fd
+        try:
+            self._add_tree(self.root)
+        except OSError:
+            os.close(fd)
+            self._fd = -1
+            raise
+        self._running = True
+        self._thread = threading.Thread(target=self._read_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._watches.clear()
+
+    def _add_watch(self, directory: str):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.WATCH_MASK)
+        if wd < 0:
+            # ENOSPC 表示超出 max_user_watches，由调用方决定是否回退到轮询
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch 失败: {directory}")
+        self._watches[wd] = directory
+
+    def _add_tree(self, directory: str) -> List[str]:
+        """添加目录（递归时包括子目录）的 watch，返回其中已有的配置文件"""
+        files = []
+        self._add_watch(directory)
+        for entry in os.scandir(directory):
+            if entry.is_dir(follow_symlinks=False):
+                if self.recursive and entry.path not in self.watcher.ignored:
+                    files.extend(self._add_tree(entry.path))
+            elif is_config_path(entry.name):
+                files.append(entry.path)
+        return files
+
+    def _read_loop(self):
+        while self._running:
             try:
-                file_size = file_path.stat().st_size
-                with open(file_path, 'rb') as f:
-                    file_hash = hashlib.md5(f.read()).hexdigest()
-            except Exception as e:
-                logger.error(f"读取文件失败 {file_path}: {e}")
+                ready, _, _ = select.select([self._fd], [], [], 0.5)
+                if not ready:
+                    continue
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            except OSError as e:
+                if self._running:
+                    logger.error(f"读取 inotify 事件失败: {e}")
                 return
-        
-        # 检查是否真的发生了变化
-        if event_type == WatchEventType.MODIFIED:
-            old_hash = self._file_hashes.get(file_path)
-            if old_hash and old_hash == file_hash:
-                return  # 内容没有变化
-        
-        # 更新哈希记录
-        self._file_hashes[file_path] = file_hash
-        
-        # 创建变更信息
-        change_info = FileChangeInfo(
-            path=file_path,
-            event_type=event_type,
-            timestamp=current_time,
-            file_hash=file_hash,
-            size=file_size
-        )
-        
-        # 添加到变更队列
-        self.watcher._add_change(change_info)
-    
-    def _is_config_file(self, file_path: Path) -> bool:
-        """检查是否为配置文件"""
-        if not file_path.is_file():
-            return False
-        
-        config_extensions = {'.yaml', '.yml', '.json', '.toml', '.env'}
-        return file_path.suffix.lower() in config_extensions
+            self._dispatch(data)
+
+    def _dispatch(self, data: bytes):
+        offset = 0
+        header = self.EVENT.size
+        while offset + header <= len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            name = data[offset + header:offset + header + length].split(b"\0", 1)[0]
+            offset += header + length
+
+            if mask & self.IN_Q_OVERFLOW:
+                self.watcher._request_rescan()
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & self.IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    if self.recursive and path not in self.watcher.ignored:
+                        try:
+                            for file_path in self._add_tree(path):
+                                self.watcher._record_event(file_path, WatchEventType.CREATED)
+                        except OSError as e:
+                            logger.warning(f"监听新目录失败 {path}: {e}")
+                            self.watcher._request_rescan()
+                elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                    self.watcher._directory_removed(path)
+                continue
+
+            if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                self.watcher._record_event(path, WatchEventType.CREATED)
+            elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                self.watcher._record_event(path, WatchEventType.DELETED)
+            elif mask & (self.IN_MODIFY | self.IN_CLOSE_WRITE):
+                self.watcher._record_event(path, WatchEventType.MODIFIED)
+
+
+class ConfigTreeScanner:
+    """
+    轮询扫描器
+
+    缓存每个目录的 mtime 与其中的配置文件/子目录，目录 mtime 未变时不重新列目录；
+    文件只做 stat，按 (大小, mtime) 判断是否变化。
+    """
+
+    def __init__(self, root: Path, recursive: bool = True, ignored: Iterable[str] = ()):
+        self.root = str(root)
+        self.recursive = recursive
+        self.ignored = frozenset(ignored)
+        self._dirs: Dict[str, int] = {}
+        self._dir_files: Dict[str, Set[str]] = {}
+        self._dir_subdirs: Dict[str, Set[str]] = {}
+        self.files: Dict[str, Tuple[int, int]] = {}
+        self.listings = 0
+
+    def scan(self) -> List[Tuple[str, WatchEventType]]:
+        """返回自上次扫描以来的变更；首次扫描只建立基线"""
+        changes: List[Tuple[str, WatchEventType]] = []
+        if not self._dirs:
+            self._list_dir(self.root, None)
+            return changes
+
+        for directory in list(self._dirs):
+            if directory not in self._dirs:
+                continue  # 已随父目录移除
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+            except OSError:
+                self._drop_dir(directory, changes)
+                continue
+            if mtime != self._dirs[directory]:
+                self._list_dir(directory, changes)
+
+        for path, signature in self.files.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # 删除会改变目录 mtime，下次扫描列目录时处理
+            current = (stat.st_size, stat.st_mtime_ns)
+            if current != signature:
+                self.files[path] = current
+                changes.append((path, WatchEventType.MODIFIED))
+        return changes
+
+    def _list_dir(self, directory: str, changes: Optional[List[Tuple[str, WatchEventType]]]):
+        try:
+            # 先取目录 mtime 再列目录：列目录期间的变更会在下次扫描时再次触发
+            self._dirs[directory] = os.stat(directory).st_mtime_ns
+            entries = list(os.scandir(directory))
+        except OSError:
+            self._drop_dir(directory, changes)
+            return
+        self.listings += 1
+
+        files: Set[str] = set()
+        subdirs: Set[str] = set()
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if self.recursive and entry.path not in self.ignored:
+                        subdirs.add(entry.path)
+                elif is_config_path(entry.name) and entry.is_file():
+                    files.add(entry.path)
+            except OSError:
+                continue
+
+        previous_files = self._dir_files.get(directory, set())
+        for path in files - previous_files:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                files.discard(path)
+                continue
+            self.files[path] = (stat.st_size, stat.st_mtime_ns)
+            if changes is not None:
+                changes.append((path, WatchEventType.CREATED))
+        for path in previous_files - files:
+            self.files.pop(path, None)
+            if changes is not None:
+                changes.append((path, WatchEventType.DELETED))
+        self._dir_files[directory] = files
+
+        previous_subdirs = self._dir_subdirs.get(directory, set())
+        for subdir in previous_subdirs - subdirs:
+            self._drop_dir(subdir, changes)
+        for subdir in subdirs - previous_subdirs:
+            self._list_dir(subdir, changes)
+        self._dir_subdirs[directory] = subdirs
+
+    def _drop_dir(self, directory: str, changes: Optional[List[Tuple[str, WatchEventType]]]):
+        self._dirs.pop(directory, None)
+        for path in self._dir_files.pop(directory, set()):
+            self.files.pop(path, None)
+            if changes is not None:
+                changes.append((path, WatchEventType.DELETED))
+        for subdir in self._dir_subdirs.pop(directory, set()):
+            self._drop_dir(subdir, changes)
 
 
 class ConfigWatcher:
-    """配置监听器"""
-    
-    def __init__(self, config_dir: Path, recursive: bool = True):
+    """
+    配置监听器
+
+    各后端上报的原始事件先进入待处理表，同一文件的多次事件合并；
+    安静 debounce 秒（或最早事件已等待 max_delay 秒）后整批处理：
+    计算内容哈希（文件大小和 mtime 未变时复用缓存），丢弃内容未变的变更，
+    剩余变更作为一个事件发送给回调。
+    """
+
+    def __init__(self, config_dir: Path, recursive: bool = True, backend: str = "auto",
+                 poll_interval: float = 1.0, debounce: float = 0.2, max_delay: float = 2.0,
+                 ignore: Optional[Iterable[Union[str, Path]]] = None):
         self.config_dir = Path(config_dir)
         self.recursive = recursive
+        # 各后端统一使用绝对路径；ignore 中的目录（相对 config_dir）不监听，例如自身写入的快照目录
+        self._root = os.path.abspath(self.config_dir)
+        self.ignored = frozenset(os.path.join(self._root, str(path)) for path in (ignore or ()))
+        self.requested_backend = backend
+        self.backend: Optional[str] = None
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.max_delay = max_delay
         self._observer: Optional[Observer] = None
         self._handler: Optional[ConfigFileHandler] = None
+        self._inotify: Optional[InotifyBackend] = None
+        self._scanner = ConfigTreeScanner(self._root, recursive, self.ignored)
         self._callbacks: List[ConfigCallback] = []
-        self._change_queue: List[FileChangeInfo] = []
         self._queue_lock = threading.RLock()
+        self._wakeup = threading.Condition(self._queue_lock)
         self._watch_thread: Optional[threading.Thread] = None
         self._running = False
-        
+
+        # 待处理事件：路径 -> 合并后的事件类型
+        self._pending: Dict[str, WatchEventType] = {}
+        self._first_pending_at = 0.0
+        self._last_event_at = 0.0
+        self._rescan_requested = False
+        self._next_poll = 0.0
+
+        # 已知文件及其 (大小, mtime_ns, 内容哈希)
+        self._known: Set[str] = set()
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+
+        # 统计
+        self.events_received = 0
+        self.batches_emitted = 0
+        self.changes_emitted = 0
+        self.duplicates_suppressed = 0
+        self.files_hashed = 0
+        self.bytes_hashed = 0
+        self.scans = 0
+        self._scan_times: deque = deque(maxlen=256)
+
         # 创建必要的目录
         self.config_dir.mkdir(parents=True, exist_ok=True)
-    
+
     def start(self):
         """启动监听器"""
         if self._running:
             logger.warning("监听器已在运行")
             return
-        
-        if not HAS_WATCHDOG:
-            logger.warning("watchdog库未安装，使用轮询模式")
-            self._start_polling()
-            return
-        
-        try:
-            # 创建观察者
-            self._observer = Observer()
-            self._handler = ConfigFileHandler(self)
-            
-            # 添加监控目录
-            self._observer.schedule(
-                self._handler,
-                str(self.config_dir),
-                recursive=self.recursive
-            )
-            
-            # 启动观察者
-            self._observer.start()
-            self._running = True
-            
-            # 启动处理线程
-            self._start_processing_thread()
-            
-            logger.info(f"配置监听器已启动，监控目录: {self.config_dir}")
-            
-        except Exception as e:
-            logger.error(f"启动配置监听器失败: {e}")
-            raise
-    
+
+        # 建立基线：已有文件不产生事件
+        self._scan()
+        self._known = set(self._scanner.files)
+
+        self.backend = self._start_backend()
+        self._running = True
+        self._next_poll = time.monotonic() + self.poll_interval
+        self._start_processing_thread()
+
+        logger.info(f"配置监听器已启动（{self.backend}），监控目录: {self.config_dir}")
+
+    def _start_backend(self) -> str:
+        requested = self.requested_backend
+
+        if requested in ("auto", BACKEND_WATCHDOG) and HAS_WATCHDOG:
+            try:
+                self._observer = Observer()
+                self._handler = ConfigFileHandler(self)
+                self._observer.schedule(self._handler, self._root, recursive=self.recursive)
+                self._observer.start()
+                return BACKEND_WATCHDOG
+            except Exception as e:
+                logger.warning(f"watchdog 启动失败，尝试其他后端: {e}")
+                self._observer = None
+
+        if requested in ("auto", BACKEND_INOTIFY) and InotifyBackend.available():
+            backend = InotifyBackend(self._root, self.recursive, self)
+            try:
+                backend.start()
+                self._inotify = backend
+                return BACKEND_INOTIFY
+            except OSError as e:
+                logger.warning(f"inotify 启动失败，使用轮询模式: {e}")
+
+        if requested not in ("auto", BACKEND_POLLING):
+            logger.warning(f"监听后端 {requested} 不可用，使用轮询模式")
+        return BACKEND_POLLING
+
     def stop(self):
         """停止监听器"""
         if not self._running:
             return
-        
-        self._running = False
-        
+
+        with self._wakeup:
+            self._running = False
+            self._wakeup.notify_all()
+
         try:
-            if self._observer and HAS_WATCHDOG:
+            if self._observer:
                 self._observer.stop()
                 self._observer.join(timeout=5)
-            
+                self._observer = None
+
+            if self._inotify:
+                self._inotify.stop()
+                self._inotify = None
+
             if self._watch_thread and self._watch_thread.is_alive():
                 self._watch_thread.join(timeout=5)
-            
+
             logger.info("配置监听器已停止")
-            
+
         except Exception as e:
             logger.error(f"停止配置监听器失败: {e}")
-    
+
     def add_callback(self, callback: ConfigCallback):
         """添加变更回调"""
         with self._queue_lock:
             if callback not in self._callbacks:
                 self._callbacks.append(callback)
-    
+
     def remove_callback(self, callback: ConfigCallback):
         """移除变更回调"""
         with self._queue_lock:
             if callback in self._callbacks:
                 self._callbacks.remove(callback)
-    
+
     def is_running(self) -> bool:
         """检查是否在运行"""
         return self._running
-    
+
     def get_watched_files(self) -> Set[Path]:
         """获取监控的文件列表"""
-        if not HAS_WATCHDOG or not self._observer:
-            return set()
-        
-        watched_files = set()
-        
-        try:
-            for watch in self._observer.watches:
-                if watch.is_recursive == self.recursive:
-                    watched_files.update(self._get_files_in_watch(watch))
-        except Exception as e:
-            logger.error(f"获取监控文件列表失败: {e}")
-        
-        return watched_files
-    
+        with self._queue_lock:
+            return {Path(path) for path in self._known}
+
     def force_rescan(self):
-        """强制重新扫描"""
-        if not HAS_WATCHDOG:
+        """
+        强制重新扫描
+
+        运行中交给处理线程执行，扫描器和哈希缓存只在处理线程中修改；未启动时直接扫描。
+        """
+        if self._running:
+            self._request_rescan()
+        else:
             self._poll_for_changes()
-            return
-        
-        # 停止并重新启动观察者
-        if self._observer:
-            self._observer.stop()
-            self._observer.join()
-            
-            self._observer = Observer()
-            self._observer.schedule(
-                self._handler,
-                str(self.config_dir),
-                recursive=self.recursive
-            )
-            self._observer.start()
-    
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """后端、事件合并/去重数量、哈希读取量和扫描耗时"""
+        scan_times = list(self._scan_times)
+        return {
+            "backend": self.backend,
+            "watched_files": len(self._known),
+            "events_received": self.events_received,
+            "batches_emitted": self.batches_emitted,
+            "changes_emitted": self.changes_emitted,
+            "duplicates_suppressed": self.duplicates_suppressed,
+            "files_hashed": self.files_hashed,
+            "bytes_hashed": self.bytes_hashed,
+            "scans": self.scans,
+            "directory_listings": self._scanner.listings,
+            "scan_time": {
+                "average": sum(scan_times) / len(scan_times) if scan_times else 0.0,
+                "max": max(scan_times) if scan_times else 0.0
+            }
+        }
+
     def _start_processing_thread(self):
         """启动处理线程"""
         self._watch_thread = threading.Thread(target=self._process_changes, daemon=True)
         self._watch_thread.start()
-    
-    def _start_polling(self):
-        """启动轮询模式"""
-        self._running = True
-        self._start_processing_thread()
-    
+
+    def _record_event(self, path: str, event_type: WatchEventType):
+        """记录一个原始事件（可在后端线程中调用）"""
+        if not is_config_path(path) or self._is_ignored(path):
+            return
+        now = time.monotonic()
+        with self._wakeup:
+            self.events_received += 1
+            previous = self._pending.get(path)
+            merged = self._merge(previous, event_type)
+            if merged is None:
+                self._pending.pop(path, None)
+            else:
+                self._pending[path] = merged
+            if not self._first_pending_at:
+                self._first_pending_at = now
+            self._last_event_at = now
+            self._wakeup.notify()
+
+    def _is_ignored(self, path: str) -> bool:
+        return any(path.startswith(os.path.join(directory, "")) for directory in self.ignored)
+
+    @staticmethod
+    def _merge(previous: Optional[WatchEventType], current: WatchEventType) -> Optional[WatchEventType]:
+        """合并同一文件在一个批次内的多个事件"""
+        if previous is None:
+            return current
+        if previous == WatchEventType.CREATED:
+            # 创建后又删除：整体无变化
+            return None if current == WatchEventType.DELETED else WatchEventType.CREATED
+        if previous == WatchEventType.DELETED and current != WatchEventType.DELETED:
+            # 编辑器先删除再写入新文件
+            return WatchEventType.MODIFIED
+        return current
+
+    def _directory_removed(self, directory: str):
+        """目录被删除或移出：其中已知的文件都视为删除"""
+        prefix = os.path.join(directory, "")
+        with self._queue_lock:
+            removed = [path for path in self._known if path.startswith(prefix)]
+        for path in removed:
+            self._record_event(path, WatchEventType.DELETED)
+
+    def _request_rescan(self):
+        """事件可能丢失（如 inotify 队列溢出）时请求全量扫描"""
+        with self._wakeup:
+            self._rescan_requested = True
+            self._wakeup.notify()
+
     def _process_changes(self):
-        """处理变更队列"""
+        """处理线程：轮询扫描、等待防抖到期后整批处理"""
         while self._running:
             try:
-                # 从队列获取变更
-                change_info = self._get_next_change()
-                
-                if change_info:
-                    # 发送变更事件
-                    self._emit_change_event(change_info)
-                
-                time.sleep(0.1)  # 避免CPU占用过高
-                
+                with self._wakeup:
+                    timeout = self._seconds_until_due(time.monotonic())
+                    if timeout > 0:
+                        self._wakeup.wait(timeout)
+                    if not self._running:
+                        return
+                    rescan = self._rescan_requested
+                    self._rescan_requested = False
+
+                now = time.monotonic()
+                if rescan or (self.backend == BACKEND_POLLING and now >= self._next_poll):
+                    self._poll_for_changes()
+                    self._next_poll = now + self.poll_interval
+
+                batch = self._take_batch(time.monotonic())
+                if batch:
+                    self._emit_batch(batch)
+
             except Exception as e:
                 logger.error(f"处理配置变更失败: {e}")
                 time.sleep(1)
-    
+
+    def _seconds_until_due(self, now: float) -> float:
+        deadlines = [now + 0.5]
+        if self._rescan_requested:
+            return 0.0
+        if self.backend == BACKEND_POLLING:
+            deadlines.append(self._next_poll)
+        if self._pending:
+            deadlines.append(min(self._last_event_at + self.debounce,
+                                 self._first_pending_at + self.max_delay))
+        return max(0.0, min(deadlines) - now)
+
+    def _take_batch(self, now: float) -> Dict[str, WatchEventType]:
+        """防抖到期时取出全部待处理事件"""
+        with self._queue_lock:
+            if not self._pending:
+                return {}
+            quiet = now - self._last_event_at >= self.debounce
+            overdue = now - self._first_pending_at >= self.max_delay
+            if not (quiet or overdue):
+                return {}
+            batch = self._pending
+            self._pending = {}
+            self._first_pending_at = 0.0
+            return batch
+
     def _poll_for_changes(self):
         """轮询检查文件变更"""
         try:
-            for file_path in self._get_all_config_files():
-                current_time = time.time()
-                last_modified = self._last_modified_times.get(file_path, 0)
-                
-                if file_path.exists():
-                    stat = file_path.stat()
-                    current_mtime = stat.st_mtime
-                    
-                    if current_mtime > last_modified:
-                        # 文件发生变化
-                        change_info = FileChangeInfo(
-                            path=file_path,
-                            event_type=WatchEventType.MODIFIED,
-                            timestamp=current_time,
-                            file_hash=hashlib.md5(open(file_path, 'rb').read()).hexdigest(),
-                            size=stat.st_size
-                        )
-                        
-                        self._add_change(change_info)
-                        self._last_modified_times[file_path] = current_mtime
-                else:
-                    # 文件被删除
-                    if last_modified > 0:
-                        change_info = FileChangeInfo(
-                            path=file_path,
-                            event_type=WatchEventType.DELETED,
-                            timestamp=current_time
-                        )
-                        
-                        self._add_change(change_info)
-                        self._last_modified_times[file_path] = 0
-        
+            for path, event_type in self._scan():
+                self._record_event(path, event_type)
         except Exception as e:
             logger.error(f"轮询文件变更失败: {e}")
-    
+
+    def _scan(self) -> List[Tuple[str, WatchEventType]]:
+        start = time.perf_counter()
+        changes = self._scanner.scan()
+        self._scan_times.append(time.perf_counter() - start)
+        self.scans += 1
+        return changes
+
     def _get_all_config_files(self) -> Set[Path]:
         """获取所有配置文件"""
-        config_files = set()
-        config_extensions = {'.yaml', '.yml', '.json', '.toml', '.env'}
-        
+        return {Path(path) for path in self._scanner.files}
+
+    def _hash_file(self, path: str) -> Optional[Tuple[str, int, int]]:
+        """
+        返回 (内容哈希, 大小, mtime_ns)；文件不存在时返回 None
+
+        大小和 mtime 与上次相同则复用缓存的哈希，否则分块读取计算。
+        """
         try:
-            if self.recursive:
-                for file_path in self.config_dir.rglob('*'):
-                    if file_path.is_file() and file_path.suffix.lower() in config_extensions:
-                        config_files.add(file_path)
-            else:
-                for file_path in self.config_dir.glob('*'):
-                    if file_path.is_file() and file_path.suffix.lower() in config_extensions:
-                        config_files.add(file_path)
-        except Exception as e:
-            logger.error(f"获取配置文件列表失败: {e}")
-        
-        return config_files
-    
+            stat = os.stat(path)
+        except OSError:
+            return None
+        cached = self._hashes.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2], stat.st_size, stat.st_mtime_ns
+
+        digest = hashlib.md5()
+        try:
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(64 * 1024), b''):
+                    digest.update(block)
+        except OSError as e:
+            logger.error(f"读取文件失败 {path}: {e}")
+            return None
+        self.files_hashed += 1
+        self.bytes_hashed += stat.st_size
+        return digest.hexdigest(), stat.st_size, stat.st_mtime_ns
+
+    def _emit_batch(self, batch: Dict[str, WatchEventType]):
+        """去掉内容未变的变更，把整批变更作为一个事件发送"""
+        now = time.time()
+        changes: List[FileChangeInfo] = []
+
+        for path, event_type in batch.items():
+            result = None if event_type == WatchEventType.DELETED else self._hash_file(path)
+            known = path in self._known
+
+            if result is None:
+                if not known:
+                    continue
+                with self._queue_lock:
+                    self._known.discard(path)
+                self._hashes.pop(path, None)
+                changes.append(FileChangeInfo(Path(path), WatchEventType.DELETED, now))
+                continue
+
+            file_hash, size, mtime_ns = result
+            previous = self._hashes.get(path)
+            self._hashes[path] = (size, mtime_ns, file_hash)
+            if known and previous and previous[2] == file_hash:
+                self.duplicates_suppressed += 1
+                continue
+
+            with self._queue_lock:
+                self._known.add(path)
+            changes.append(FileChangeInfo(
+                path=Path(path),
+                event_type=WatchEventType.MODIFIED if known else WatchEventType.CREATED,
+                timestamp=now,
+                file_hash=file_hash,
+                size=size
+            ))
+
+        if changes:
+            self.batches_emitted += 1
+            self.changes_emitted += len(changes)
+            self._emit_change_event(changes)
+
     def _add_change(self, change_info: FileChangeInfo):
         """添加变更到队列"""
-        with self._queue_lock:
-            self._change_queue.append(change_info)
-    
-    def _get_next_change(self) -> Optional[FileChangeInfo]:
-        """从队列获取下一个变更"""
-        with self._queue_lock:
-            if self._change_queue:
-                return self._change_queue.pop(0)
-            return None
-    
-    def _emit_change_event(self, change_info: FileChangeInfo):
-        """发送变更事件"""
+        self._record_event(str(change_info.path), change_info.event_type)
+
+    def _emit_change_event(self, changes: List[FileChangeInfo]):
+        """
+        发送变更事件
+
+        单个文件变更沿用原有的事件类型；多个文件变更合并为一个 RELOADED 事件，
+        data["changes"] 中列出每个文件的变更。
+        """
         try:
-            # 确定事件类型
-            if change_info.event_type == WatchEventType.MODIFIED:
-                event_type = ConfigEvent.UPDATED
-            elif change_info.event_type == WatchEventType.CREATED:
-                event_type = ConfigEvent.LOADED
-            elif change_info.event_type == WatchEventType.DELETED:
-                event_type = ConfigEvent.ERROR
+            details = [
+                {
+                    "path": str(change.path),
+                    "event_type": change.event_type.value,
+                    "file_hash": change.file_hash,
+                    "file_size": change.size
+                }
+                for change in changes
+            ]
+
+            if len(changes) == 1:
+                change_info = changes[0]
+                # 确定事件类型
+                if change_info.event_type == WatchEventType.MODIFIED:
+                    event_type = ConfigEvent.UPDATED
+                elif change_info.event_type == WatchEventType.CREATED:
+                    event_type = ConfigEvent.LOADED
+                elif change_info.event_type == WatchEventType.DELETED:
+                    event_type = ConfigEvent.ERROR
+                else:
+                    event_type = ConfigEvent.RELOADED
+                path = change_info.path
+                data = {
+                    "event_type": change_info.event_type.value,
+                    "file_hash": change_info.file_hash,
+                    "file_size": change_info.size,
+                    "changes": details
+                }
             else:
                 event_type = ConfigEvent.RELOADED
-            
+                path = self.config_dir
+                data = {"changes": details}
+
             # 创建事件
             event = WatchEvent(
                 event_type=event_type,
-                path=change_info.path,
-                timestamp=change_info.timestamp,
-                data={
-                    "event_type": change_info.event_type.value,
-                    "file_hash": change_info.file_hash,
-                    "file_size": change_info.size
-                }
+                path=path,
+                timestamp=changes[-1].timestamp,
+                data=data
             )
-            
+
             # 调用回调
-            for callback in self._callbacks:
+            with self._queue_lock:
+                callbacks = list(self._callbacks)
+            for callback in callbacks:
                 try:
                     callback(event)
                 except Exception as e:
                     logger.error(f"配置变更回调执行失败: {e}")
-            
-            logger.debug(f"配置文件变更: {change_info.path} ({change_info.event_type.value})")
-            
+
+            logger.debug(f"配置文件变更: {len(changes)} 个文件 ({event_type.value})")
+
         except Exception as e:
             logger.error(f"发送配置变更事件失败: {e}")
-    
-    def _get_files_in_watch(self, watch) -> Set[Path]:
-        """获取监控目录下的文件"""
-        files = set()
-        
-        try:
-            if hasattr(watch, 'path') and os.path.exists(watch.path):
-                if os.path.isfile(watch.path):
-                    files.add(Path(watch.path))
-                elif os.path.isdir(watch.path):
-                    if watch.is_recursive:
-                        for file_path in Path(watch.path).rglob('*'):
-                            if file_path.is_file():
-                                files.add(file_path)
-                    else:
-                        for file_path in Path(watch.path).glob('*'):
-                            if file_path.is_file():
-                                files.add(file_path)
-        except Exception as e:
-            logger.error(f"获取监控文件失败: {e}")
-        
-        return files
-    
+
     def __enter__(self):
         """上下文管理器入口"""
         self.start()
         return self
-    
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         """上下文管理器退出"""
         self.stop()
@@ -527,9 +885,5 @@ class MockConfigWatcher:
 
 # 工厂函数
 def create_watcher(config_dir: Path, recursive: bool = True) -> ConfigWatcher:
-    """创建合适的监听器"""
-    if HAS_WATCHDOG:
-        return ConfigWatcher(config_dir, recursive)
-    else:
-        logger.warning("watchdog不可用，使用模拟监听器")
-        return MockConfigWatcher(config_dir)
\ No newline at end of file
+    """创建合适的监听器（无 watchdog 时使用 inotify 或轮询后端）"""
+    return ConfigWatcher(config_dir, recursive)
\ No newline at end of file
@@ -3,10 +3,14 @@
 Dependency Injection System
 """
 
-from typing import Dict, Any, Optional
+import asyncio
+import logging
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import asyncio
 
 from services.hitl import HITLService
 from services.communication_map import CommunicationMap
@@ -20,119 +24,380 @@ from core.main_app import get_application
 from core.settings import settings
 
 
-# 全局服务实例
-_hitl_service: Optional[HITLService] = None
-_communication_map: Optional[CommunicationMap] = None
-_message_channel: Optional[MessageChannel] = None
-_knowledge_bus: Optional[KnowledgeBus] = None
-_multi_model_coordinator: Optional[MultiModelCoordinator] = None
-_stream_response_processor: Optional[StreamResponseProcessor] = None
+logger = logging.getLogger(__name__)
 
-# 全局管理器实例
-_plugin_manager: Optional[PluginManager] = None
-_channel_manager: Optional[ChannelManager] = None
 
+class ServiceUnavailableError(RuntimeError):
+    """服务既未由主应用提供，也无法由容器创建"""
 
-async def get_hitl_service() -> HITLService:
-    """获取HITL服务实例"""
-    global _hitl_service
+
+@dataclass
+class ServiceSpec:
+    """服务声明"""
+    name: str
+    description: str
+    # 创建并初始化实例；为 None 时只能复用主应用中的实例
+    factory: Optional[Callable[[], Awaitable[Any]]] = None
+    depends_on: Tuple[str, ...] = ()
+    # 主应用已初始化该服务时直接复用的属性名
+    app_attr: Optional[str] = None
+    health_check: Optional[Callable[[Any], Awaitable[Any]]] = None
+    # 关闭由容器自己创建的实例
+    shutdown: Optional[Callable[[Any], Any]] = None
+    # 是否计入就绪状态
+    required: bool = True
+
+
+@dataclass
+class ServiceStartupRecord:
+    """单个服务的启动记录"""
+    name: str
+    status: str = "pending"  # pending / starting / ready / failed / unavailable
+    source: Optional[str] = None  # application / container
+    depends_on: Tuple[str, ...] = ()
+    dependency_wait_ms: float = 0.0
+    init_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ServiceContainer:
+    """
+    服务容器
     
-    if _hitl_service is None:
-        _hitl_service = HITLService()
-        await _hitl_service.start()
+    按声明的依赖初始化服务：每个服务只初始化一次（并发请求共享同一个初始化任务），
+    互不依赖的服务并行初始化。启动时 warmup() 预热全部服务，请求路径上只取现成实例。
+    健康检查并发执行，结果在短时间内缓存。
+    """
     
-    return _hitl_service
+    def __init__(self,
+                 app_provider: Optional[Callable[[], Any]] = None,
+                 health_ttl: float = 5.0,
+                 health_timeout: float = 2.0):
+        self._app_provider = app_provider
+        self.health_ttl = health_ttl
+        self.health_timeout = health_timeout
+        
+        self._specs: Dict[str, ServiceSpec] = {}
+        self._instances: Dict[str, Any] = {}
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self._records: Dict[str, ServiceStartupRecord] = {}
+        # 由容器创建的服务，按初始化完成顺序记录，关闭时逆序
+        self._owned: List[str] = []
+        
+        self.warmed_up = False
+        self._warmup_ms: Optional[float] = None
+        
+        self._health_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        self._health_task: Optional[asyncio.Future] = None
+    
+    def register(self, spec: ServiceSpec):
+        """注册服务；依赖必须先注册，因此不会出现循环依赖"""
+        if spec.name in self._specs:
+            raise ValueError(f"服务已注册: {spec.name}")
+        missing = [name for name in spec.depends_on if name not in self._specs]
+        if missing:
+            raise ValueError(f"服务 {spec.name} 依赖未注册的服务: {missing}")
+        self._specs[spec.name] = spec
+        self._records[spec.name] = ServiceStartupRecord(spec.name, depends_on=spec.depends_on)
+    
+    def peek(self, name: str) -> Optional[Any]:
+        """已初始化的实例，不触发初始化"""
+        return self._instances.get(name)
+    
+    async def get(self, name: str) -> Any:
+        """获取服务实例，必要时初始化；初始化失败的服务在下次获取时重试"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        
+        task = self._tasks.get(name)
+        if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+            task = self._tasks[name] = asyncio.ensure_future(self._start(name))
+        # 调用方被取消时不影响共享的初始化任务
+        return await asyncio.shield(task)
+    
+    async def _start(self, name: str) -> Any:
+        spec = self._specs[name]
+        record = self._records[name] = ServiceStartupRecord(name, depends_on=spec.depends_on)
+        
+        wait_start = time.perf_counter()
+        try:
+            await asyncio.gather(*(self.get(dependency) for dependency in spec.depends_on))
+        except Exception as e:
+            record.status = "failed"
+            record.error = f"依赖服务初始化失败: {e}"
+            raise
+        record.dependency_wait_ms = (time.perf_counter() - wait_start) * 1000
+        
+        record.status = "starting"
+        init_start = time.perf_counter()
+        try:
+            instance = self._from_application(spec)
+            if instance is not None:
+                record.source = "application"
+            elif spec.factory is None:
+                raise ServiceUnavailableError(f"{spec.description}未初始化")
+            else:
+                instance = await spec.factory()
+                record.source = "container"
+                self._owned.append(name)
+        except ServiceUnavailableError as e:
+            record.status = "unavailable"
+            record.error = str(e)
+            raise
+        except Exception as e:
+            record.status = "failed"
+            record.error = str(e)
+            logger.error(f"{spec.description}初始化失败: {e}")
+            raise
+        finally:
+            record.init_ms = (time.perf_counter() - init_start) * 1000
+        
+        record.status = "ready"
+        self._instances[name] = instance
+        return instance
+    
+    def _from_application(self, spec: ServiceSpec) -> Optional[Any]:
+        if not spec.app_attr or self._app_provider is None:
+            return None
+        try:
+            app = self._app_provider()
+        except RuntimeError:
+            # 主应用未创建
+            return None
+        return getattr(app, spec.app_attr, None)
+    
+    async def warmup(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """并行初始化全部服务，返回启动报告；超时后未完成的服务继续在后台初始化"""
+        start = time.perf_counter()
+        pending = asyncio.gather(*(self.get(name) for name in self._specs), return_exceptions=True)
+        try:
+            await asyncio.wait_for(pending, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"服务预热超时（{timeout}s），未完成的服务将在后台继续初始化")
+        
+        self._warmup_ms = (time.perf_counter() - start) * 1000
+        self.warmed_up = True
+        return self.startup_report()
+    
+    @property
+    def ready(self) -> bool:
+        """预热已结束且所有必需服务均已初始化"""
+        return self.warmed_up and all(
+            name in self._instances for name, spec in self._specs.items() if spec.required
+        )
+    
+    def startup_report(self) -> Dict[str, Any]:
+        """各服务的启动耗时与状态"""
+        return {
+            "ready": self.ready,
+            "warmed_up": self.warmed_up,
+            "warmup_ms": self._warmup_ms,
+            "services": {name: asdict(record) for name, record in self._records.items()}
+        }
+    
+    async def check_health(self, force: bool = False) -> Dict[str, Any]:
+        """并发检查所有已初始化服务，结果缓存 health_ttl 秒；并发调用共享同一轮检查"""
+        cached = self._health_cache
+        if not force and cached and time.monotonic() - cached[0] < self.health_ttl:
+            return cached[1]
+        
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.ensure_future(self._run_health_checks())
+        return await asyncio.shield(self._health_task)
+    
+    async def _run_health_checks(self) -> Dict[str, Any]:
+        names = list(self._specs)
+        results = await asyncio.gather(*(self._check_one(name) for name in names))
+        
+        health_status: Dict[str, Any] = {}
+        errors = {}
+        for name, (state, error) in zip(names, results):
+            health_status[name] = state
+            if error:
+                errors[name] = error
+        
+        health_status["status"] = "unhealthy" if errors else "healthy"
+        if errors:
+            health_status["errors"] = errors
+        
+        self._health_cache = (time.monotonic(), health_status)
+        return health_status
+    
+    async def _check_one(self, name: str) -> Tuple[str, Optional[str]]:
+        instance = self._instances.get(name)
+        if instance is None:
+            return "not_initialized", None
+        
+        spec = self._specs[name]
+        if spec.health_check is None:
+            return "healthy", None
+        
+        try:
+            await asyncio.wait_for(spec.health_check(instance), self.health_timeout)
+            return "healthy", None
+        except asyncio.TimeoutError:
+            return "unhealthy", f"健康检查超时（{self.health_timeout}s）"
+        except Exception as e:
+            return "unhealthy", str(e)
+    
+    async def shutdown(self):
+        """关闭容器创建的服务（主应用提供的服务由主应用负责关闭）并清空状态"""
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
+        
+        for name in reversed(self._owned):
+            spec = self._specs[name]
+            instance = self._instances.get(name)
+            if spec.shutdown is None or instance is None:
+                continue
+            try:
+                result = spec.shutdown(instance)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"关闭{spec.description}失败: {e}")
+        
+        self._instances.clear()
+        self._tasks.clear()
+        self._owned.clear()
+        self._records = {
+            name: ServiceStartupRecord(name, depends_on=spec.depends_on)
+            for name, spec in self._specs.items()
+        }
+        self.warmed_up = False
+        self._warmup_ms = None
+        self._health_cache = None
+        self._health_task = None
+
+
+def _initialized(service_class, init_method: str) -> Callable[[], Awaitable[Any]]:
+    """创建实例并调用其异步初始化方法的工厂"""
+    async def factory():
+        instance = service_class()
+        await getattr(instance, init_method)()
+        return instance
+    return factory
+
+
+# 全局服务容器
+container = ServiceContainer(
+    app_provider=get_application,
+    health_ttl=settings.health_check_cache_ttl,
+    health_timeout=settings.health_check_timeout
+)
+
+container.register(ServiceSpec(
+    "hitl_service", "HITL服务",
+    factory=_initialized(HITLService, "start"),
+    app_attr="hitl_service",
+    health_check=lambda service: service.get_hitl_statistics(),
+    shutdown=lambda service: service.stop()
+))
+container.register(ServiceSpec(
+    "communication_map", "沟通地图",
+    factory=_initialized(CommunicationMap, "load"),
+    app_attr="communication_map",
+    health_check=lambda service: service.get_contact_stats(),
+    shutdown=lambda service: service.save()
+))
+container.register(ServiceSpec(
+    "message_channel", "消息通道",
+    factory=_initialized(MessageChannel, "initialize"),
+    app_attr="message_channel",
+    # 消息通道没有直接的健康检查方法
+    shutdown=lambda service: service.close()
+))
+container.register(ServiceSpec(
+    "knowledge_bus", "知识总线",
+    factory=_initialized(KnowledgeBus, "initialize"),
+    app_attr="knowledge_bus",
+    health_check=lambda service: service.get_knowledge_stats(),
+    shutdown=lambda service: service.shutdown()
+))
+container.register(ServiceSpec(
+    "multi_model_coordinator", "多模型协调器",
+    factory=_initialized(MultiModelCoordinator, "initialize"),
+    app_attr="multi_model_coordinator",
+    health_check=lambda service: service.get_coordinator_stats(),
+    shutdown=lambda service: service.shutdown()
+))
+container.register(ServiceSpec(
+    "stream_response_processor", "流式响应处理器",
+    factory=_initialized(StreamResponseProcessor, "initialize"),
+    app_attr="stream_response_processor",
+    health_check=lambda service: service.get_stream_stats(),
+    shutdown=lambda service: service.shutdown()
+))
+# 插件和渠道管理器只能由主应用提供
+container.register(ServiceSpec(
+    "channel_manager", "渠道管理器",
+    app_attr="channel_manager",
+    health_check=lambda manager: manager.health_check(),
+    required=False
+))
+container.register(ServiceSpec(
+    "plugin_manager", "插件管理器",
+    # 插件上下文向插件暴露 HITL 服务和知识总线，激活插件前二者需已就绪
+    depends_on=("hitl_service", "knowledge_bus"),
+    app_attr="plugin_manager",
+    health_check=lambda manager: manager.get_plugin_stats(),
+    required=False
+))
+
+
+async def _resolve(name: str) -> Any:
+    """从容器取服务；无法提供的服务返回 503"""
+    try:
+        return await container.get(name)
+    except ServiceUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+
+
+async def get_hitl_service() -> HITLService:
+    """获取HITL服务实例"""
+    return await _resolve("hitl_service")
 
 
 async def get_communication_map() -> CommunicationMap:
     """获取沟通地图实例"""
-    global _communication_map
-    
-    if _communication_map is None:
-        _communication_map = CommunicationMap()
-        await _communication_map.load()
-    
-    return _communication_map
+    return await _resolve("communication_map")
 
 
 async def get_message_channel() -> MessageChannel:
     """获取消息通道实例"""
-    global _message_channel
-    
-    if _message_channel is None:
-        _message_channel = MessageChannel()
-        await _message_channel.initialize()
-    
-    return _message_channel
+    return await _resolve("message_channel")
 
 
 async def get_knowledge_bus() -> KnowledgeBus:
     """获取知识总线实例"""
-    global _knowledge_bus
-    
-    if _knowledge_bus is None:
-        _knowledge_bus = KnowledgeBus()
-        await _knowledge_bus.initialize()
-    
-    return _knowledge_bus
+    return await _resolve("knowledge_bus")
 
 
 async def get_multi_model_coordinator() -> MultiModelCoordinator:
     """获取多模型协调器实例"""
-    global _multi_model_coordinator
-    
-    if _multi_model_coordinator is None:
-        _multi_model_coordinator = MultiModelCoordinator()
-        await _multi_model_coordinator.initialize()
-    
-    return _multi_model_coordinator
+    return await _resolve("multi_model_coordinator")
 
 
 async def get_stream_response_processor() -> StreamResponseProcessor:
     """获取流式响应处理器实例"""
-    global _stream_response_processor
-    
-    if _stream_response_processor is None:
-        _stream_response_processor = StreamResponseProcessor()
-        await _stream_response_processor.initialize()
-    
-    return _stream_response_processor
+    return await _resolve("stream_response_processor")
 
 
 # 插件和渠道管理器依赖
 
 async def get_plugin_manager() -> PluginManager:
     """获取插件管理器实例"""
-    global _plugin_manager
-    
-    if _plugin_manager is None:
-        app = get_application()
-        _plugin_manager = app.plugin_manager
-        
-    if _plugin_manager is None:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="插件管理器未初始化"
-        )
-    
-    return _plugin_manager
+    return await _resolve("plugin_manager")
 
 
 async def get_channel_manager() -> ChannelManager:
     """获取渠道管理器实例"""
-    global _channel_manager
-    
-    if _channel_manager is None:
-        app = get_application()
-        _channel_manager = app.channel_manager
-        
-    if _channel_manager is None:
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="渠道管理器未初始化"
-        )
-    
-    return _channel_manager
+    return await _resolve("channel_manager")
 
 
 # 安全依赖
@@ -150,103 +415,46 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
 
 
 # 服务健康检查
-async def check_services_health():
-    """检查所有服务健康状态"""
-    health_status = {
-        "hitl_service": "healthy",
-        "communication_map": "healthy",
-        "message_channel": "healthy",
-        "knowledge_bus": "healthy",
-        "multi_model_coordinator": "healthy",
-        "stream_response_processor": "healthy",
-        "plugin_manager": "healthy",
-        "channel_manager": "healthy"
-    }
-    
-    try:
-        # 检查HITL服务
-        if _hitl_service:
-            await _hitl_service.get_hitl_statistics()
-        
-        # 检查沟通地图
-        if _communication_map:
-            await _communication_map.get_contact_stats()
-        
-        # 检查消息通道
-        if _message_channel:
-            # 消息通道没有直接的健康检查方法
-            pass
-        
-        # 检查知识总线
-        if _knowledge_bus:
-            await _knowledge_bus.get_knowledge_stats()
-        
-        # 检查多模型协调器
-        if _multi_model_coordinator:
-            await _multi_model_coordinator.get_coordinator_stats()
-        
-        # 检查流式响应处理器
-        if _stream_response_processor:
-            await _stream_response_processor.get_stream_stats()
-        
-        # 检查插件管理器
-        if _plugin_manager:
-            await _plugin_manager.get_plugin_stats()
-        
-        # 检查渠道管理器
-        if _channel_manager:
-            await _channel_manager.health_check()
-            
-    except Exception as e:
-        health_status["error"] = str(e)
-        health_status["status"] = "unhealthy"
-    
-    return health_status
+async def check_services_health(force: bool = False) -> Dict[str, Any]:
+    """检查所有服务健康状态（并发执行，短时间内复用上次结果）"""
+    return await container.check_health(force=force)
+
+
+def is_ready() -> bool:
+    """服务预热是否完成且必需服务均可用"""
+    return container.ready
+
+
+def get_startup_report() -> Dict[str, Any]:
+    """获取各服务的启动报告"""
+    return container.startup_report()
 
 
 # 应用启动和关闭事件
 async def startup_event():
-    """应用启动事件"""
-    global _hitl_service, _communication_map, _message_channel, _knowledge_bus, _multi_model_coordinator, _stream_response_processor, _plugin_manager, _channel_manager
+    """应用启动事件：在接收请求前预热全部服务"""
+    report = await container.warmup(timeout=settings.service_warmup_timeout)
     
-    try:
-        # 获取主应用程序实例
-        from core.main_app import get_application
-        app = get_application()
-        
-        # 设置服务实例引用
-        _hitl_service = app.hitl_service
-        _communication_map = app.communication_map
-        _message_channel = app.message_channel
-        _knowledge_bus = app.knowledge_bus
-        _multi_model_coordinator = app.multi_model_coordinator
-        _stream_response_processor = app.stream_response_processor
-        _plugin_manager = app.plugin_manager
-        _channel_manager = app.channel_manager
-        
-        print("✅ 所有服务实例已设置")
-        
-    except Exception as e:
-        print(f"❌ 服务启动失败: {e}")
-        raise
+    for name, record in report["services"].items():
+        if record["status"] == "ready":
+            logger.info(
+                f"服务 {name} 就绪: 来源={record['source']}, 初始化 {record['init_ms']:.1f}ms, "
+                f"等待依赖 {record['dependency_wait_ms']:.1f}ms"
+            )
+        else:
+            logger.warning(f"服务 {name} 未就绪: 状态={record['status']}, 原因={record['error']}")
+    
+    if report["ready"]:
+        print(f"✅ 服务预热完成，耗时 {report['warmup_ms']:.1f}ms")
+    else:
+        print(f"❌ 服务预热未完成，耗时 {report['warmup_ms']:.1f}ms，就绪检查将返回 503")
 
 
 async def shutdown_event():
     """应用关闭事件"""
-    global _hitl_service, _communication_map, _message_channel, _knowledge_bus, _multi_model_coordinator, _stream_response_processor, _plugin_manager, _channel_manager
-    
     try:
-        # 主应用程序关闭时，服务关闭由应用程序管理
-        # 这里主要清理全局引用
-        
-        _hitl_service = None
-        _communication_map = None
-        _message_channel = None
-        _knowledge_bus = None
-        _multi_model_coordinator = None
-        _stream_response_processor = None
-        _plugin_manager = None
-        _channel_manager = None
+        # 主应用提供的服务由主应用负责关闭，这里只关闭容器自己创建的服务并清理引用
+        await container.shutdown()
         
         print("✅ 全局服务引用已清理")
         
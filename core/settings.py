@@ -91,6 +91,11 @@ class Settings(BaseSettings):
     multi_model_fallback_enabled: bool = Field(default=True)
     multi_model_cost_tracking: bool = Field(default=True)
     multi_model_quality_threshold: float = Field(default=0.7)
+    
+    # 服务启动与健康检查设置
+    service_warmup_timeout: float = Field(default=60.0)
+    health_check_timeout: float = Field(default=2.0)
+    health_check_cache_ttl: float = Field(default=5.0)
 
 
 # 全局设置实例
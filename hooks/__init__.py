@@ -34,6 +34,8 @@ from .manager import (
 
 from .loader import HookLoader
 
+from .observer_queue import ObserverQueue
+
 from .config import (
     HookConfig, HookConfigManager, HookExecutionConfig, HookEntryConfig,
     get_config_manager, load_hook_config, save_hook_config
@@ -89,6 +91,9 @@ __all__ = [
     # Loader
     "HookLoader",
     
+    # Observer queue
+    "ObserverQueue",
+    
     # Configuration
     "HookConfig", "HookConfigManager", "HookExecutionConfig", "HookEntryConfig",
     "get_config_manager", "load_hook_config", "save_hook_config",
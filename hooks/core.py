@@ -7,25 +7,103 @@ Provides the core hook registry and event triggering system for AgentBus.
 import asyncio
 import logging
 import time
-from typing import Dict, List, Optional, Set, Callable, Any
-from collections import defaultdict
-from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Set, Any, Tuple
+from collections import deque
+from dataclasses import dataclass, field
 
 from .types import (
-    Hook, HookEvent, HookResult, HookHandler, HookEventType,
-    HookExecutionContext, HookPriority, HookEntry
+    HookEvent, HookResult, HookHandler, HookEventType,
+    HookExecutionContext, HookEntry
 )
 from .priority import PriorityManager
+from .observer_queue import ObserverQueue
 
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class HandlerMetrics:
+    """Latency and outcome counters for a single registered handler"""
+    calls: int = 0
+    successful: int = 0
+    failed: int = 0
+    timeouts: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    throttled: int = 0  # Invocations that had to wait for a concurrency slot
+    recent: deque = field(default_factory=lambda: deque(maxlen=256))
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.recent)
+        p95 = ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] if ordered else 0.0
+        return {
+            'calls': self.calls,
+            'successful': self.successful,
+            'failed': self.failed,
+            'timeouts': self.timeouts,
+            'average_time': self.total_time / self.calls if self.calls else 0.0,
+            'p95_time': p95,
+            'max_time': self.max_time,
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'throttled': self.throttled
+        }
+
+
+@dataclass
+class HandlerSlot:
+    """A registered handler together with its dispatch settings"""
+    handler_id: str
+    handler: HookHandler
+    priority: int
+    timeout: Optional[float] = None
+    max_concurrency: Optional[int] = None
+    mode: str = "sync"
+    batch_size: Optional[int] = None
+    queue_size: Optional[int] = None
+    drop_policy: str = "drop_oldest"
+    hook_entry: Optional[HookEntry] = None
+    metrics: HandlerMetrics = field(default_factory=HandlerMetrics)
+    _semaphore: Optional[asyncio.Semaphore] = field(default=None, repr=False)
+    
+    @property
+    def is_observer(self) -> bool:
+        """Observers are queued and never block the triggering caller"""
+        return self.mode == "async"
+
+    @property
+    def semaphore(self) -> Optional[asyncio.Semaphore]:
+        if self.max_concurrency and self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+
+# Handlers grouped into priority tiers, highest priority first
+DispatchTable = Tuple[Tuple[HandlerSlot, ...], ...]
+
+
+class DispatchPlan(NamedTuple):
+    """Precomputed handlers for one event: awaited tiers plus queued observers"""
+    tiers: DispatchTable
+    observers: Tuple[HandlerSlot, ...]
+
+
+_SLOT_SETTINGS = ('timeout', 'max_concurrency', 'mode', 'batch_size', 'queue_size', 'drop_policy')
+
+
 class HookRegistry:
-    """Registry for managing hook handlers"""
+    """Registry for managing hook handlers
+
+    Handler lists are copy-on-write: every change builds new tuples and swaps
+    them in, so the dispatch path reads precomputed tables without locking.
+    """
     
     def __init__(self):
-        self._handlers: Dict[str, List[tuple[int, HookHandler]]] = defaultdict(list)
+        self._slots: Dict[str, Tuple[HandlerSlot, ...]] = {}
+        self._dispatch_cache: Dict[Tuple[str, str], DispatchPlan] = {}
         self._hook_entries: Dict[str, HookEntry] = {}
         self._priority_manager = PriorityManager()
         self._statistics = {
@@ -33,9 +111,18 @@ class HookRegistry:
             'executed': 0,
             'successful': 0,
             'failed': 0,
+            'timeouts': 0,
             'total_execution_time': 0.0
         }
     
+    @property
+    def _handlers(self) -> Dict[str, List[tuple]]:
+        """Legacy view of (priority, handler) lists per event key"""
+        return {
+            key: [(slot.priority, slot.handler) for slot in slots]
+            for key, slots in self._slots.items()
+        }
+    
     def register(
         self, 
         event_key: str, 
@@ -65,11 +152,18 @@ class HookRegistry:
             # Add to priority manager
             self._priority_manager.register(event_key, priority, handler_id)
             
-            # Add handler to registry
-            self._handlers[event_key].append((priority, handler))
+            slot = HandlerSlot(
+                handler_id=handler_id,
+                handler=handler,
+                priority=priority,
+                hook_entry=hook_entry,
+                **self._dispatch_settings(hook_entry)
+            )
             
-            # Sort handlers by priority (highest first)
-            self._handlers[event_key].sort(key=lambda x: x[0], reverse=True)
+            # Copy-on-write: sorted by priority (highest first), stable for equal priorities
+            slots = self._slots.get(event_key, ()) + (slot,)
+            self._slots[event_key] = tuple(sorted(slots, key=lambda s: -s.priority))
+            self._invalidate()
             
             # Store hook entry if provided
             if hook_entry:
@@ -83,6 +177,20 @@ class HookRegistry:
             logger.error(f"Failed to register hook handler for '{event_key}': {e}")
             return False
     
+    @staticmethod
+    def _dispatch_settings(hook_entry: Optional[HookEntry]) -> Dict[str, Any]:
+        """Resolve per-handler dispatch settings; the invocation policy overrides metadata"""
+        settings: Dict[str, Any] = {}
+        if hook_entry is not None:
+            for source in (hook_entry.metadata, hook_entry.invocation):
+                if source is None:
+                    continue
+                for name in _SLOT_SETTINGS:
+                    value = getattr(source, name, None)
+                    if value:
+                        settings[name] = value
+        return settings
+    
     def unregister(self, event_key: str, handler: HookHandler) -> bool:
         """
         Unregister a specific hook handler
@@ -95,15 +203,18 @@ class HookRegistry:
             True if unregistration successful
         """
         try:
-            handlers = self._handlers.get(event_key, [])
+            slots = self._slots.get(event_key, ())
             
             # Find and remove handler
-            for i, (priority, existing_handler) in enumerate(handlers):
-                if existing_handler == handler:
-                    handlers.pop(i)
-                    # Use a unique handler ID for priority manager
-                    handler_id = f"{event_key}:{id(handler)}"
-                    self._priority_manager.unregister(event_key, handler_id)
+            for i, slot in enumerate(slots):
+                if slot.handler == handler:
+                    remaining = slots[:i] + slots[i + 1:]
+                    if remaining:
+                        self._slots[event_key] = remaining
+                    else:
+                        self._slots.pop(event_key, None)
+                    self._invalidate()
+                    self._priority_manager.unregister(event_key, slot.handler_id)
                     logger.debug(f"Unregistered hook handler for '{event_key}'")
                     return True
             
@@ -122,17 +233,21 @@ class HookRegistry:
             event_key: Specific event key to clear, or None to clear all
         """
         if event_key:
-            if event_key in self._handlers:
-                del self._handlers[event_key]
+            self._slots.pop(event_key, None)
             if event_key in self._hook_entries:
                 del self._hook_entries[event_key]
             self._priority_manager.clear(event_key)
             logger.debug(f"Cleared hooks for event '{event_key}'")
         else:
-            self._handlers.clear()
+            self._slots = {}
             self._hook_entries.clear()
             self._priority_manager.clear()
             logger.info("Cleared all hook registrations")
+        self._invalidate()
+    
+    def _invalidate(self) -> None:
+        """Drop precomputed dispatch tables (swapped, never mutated in place)"""
+        self._dispatch_cache = {}
     
     def get_handlers(self, event_key: str) -> List[tuple[int, HookHandler]]:
         """
@@ -144,11 +259,47 @@ class HookRegistry:
         Returns:
             List of (priority, handler) tuples
         """
-        return self._handlers.get(event_key, [])
+        return [(slot.priority, slot.handler) for slot in self._slots.get(event_key, ())]
+    
+    def get_dispatch_plan(self, event_type: str, action: str) -> DispatchPlan:
+        """
+        Get the precomputed dispatch plan for an event
+        
+        Handlers registered for the event type and for the specific
+        ``type:action`` key are merged and ordered by priority. Awaited
+        handlers are grouped into tiers of equal priority; async observers
+        are listed separately.
+        """
+        cache = self._dispatch_cache
+        key = (event_type, action)
+        plan = cache.get(key)
+        if plan is None:
+            slots = self._slots.get(event_type, ()) + self._slots.get(f"{event_type}:{action}", ())
+            tiers: List[List[HandlerSlot]] = []
+            observers: List[HandlerSlot] = []
+            for slot in sorted(slots, key=lambda s: -s.priority):
+                if slot.is_observer:
+                    observers.append(slot)
+                elif tiers and tiers[-1][0].priority == slot.priority:
+                    tiers[-1].append(slot)
+                else:
+                    tiers.append([slot])
+            plan = DispatchPlan(tuple(tuple(tier) for tier in tiers), tuple(observers))
+            cache[key] = plan
+        return plan
+    
+    def get_dispatch_table(self, event_type: str, action: str) -> DispatchTable:
+        """Get the precomputed priority tiers of awaited handlers for an event"""
+        return self.get_dispatch_plan(event_type, action).tiers
+    
+    def iter_slots(self):
+        """Iterate over all registered handler slots"""
+        for slots in self._slots.values():
+            yield from slots
     
     def get_registered_event_keys(self) -> List[str]:
         """Get all registered event keys"""
-        return list(self._handlers.keys())
+        return list(self._slots.keys())
     
     def get_hook_entry(self, event_key: str) -> Optional[HookEntry]:
         """Get hook entry for event key"""
@@ -158,20 +309,31 @@ class HookRegistry:
         """Get hook registry statistics"""
         return {
             **self._statistics,
-            'registered_events': len(self._handlers),
-            'total_handlers': sum(len(handlers) for handlers in self._handlers.values())
+            'registered_events': len(self._slots),
+            'total_handlers': sum(len(slots) for slots in self._slots.values())
         }
 
 
 class HookEngine:
-    """Core engine for triggering and executing hooks"""
+    """Core engine for triggering and executing hooks
+
+    Events are dispatched without a global lock. Priority tiers run one
+    after another; handlers within a tier run concurrently. Each handler can
+    carry its own timeout and concurrency limit. Handlers in ``async`` mode
+    are observers: their events are queued and the caller does not wait.
+    """
     
-    def __init__(self):
+    def __init__(self, observer_workers: int = 4, observer_queue_size: int = 1000):
         self.registry = HookRegistry()
-        self._execution_lock = asyncio.Lock()
+        self.observers = ObserverQueue(
+            self._execute_slot,
+            workers=observer_workers,
+            default_queue_size=observer_queue_size
+        )
         self._is_enabled = True
         self._max_concurrent_executions = 10
         self._active_executions: Set[asyncio.Task] = set()
+        self._active_events = 0
     
     async def trigger(
         self, 
@@ -183,62 +345,86 @@ class HookEngine:
         
         Args:
             event: Event to trigger hooks for
-            timeout: Maximum execution time per handler
+            timeout: Maximum execution time per handler (overrides handler metadata)
             
         Returns:
-            List of execution results
+            List of execution results of awaited handlers, in priority order
         """
         if not self._is_enabled:
             logger.debug("Hook engine is disabled, skipping event triggering")
             return []
         
-        async with self._execution_lock:
-            logger.debug(f"Triggering hooks for event: {event.type.value}:{event.action}")
-            
-            # Get handlers for both the event type and specific action
-            type_handlers = self.registry.get_handlers(event.type.value)
-            specific_handlers = self.registry.get_handlers(f"{event.type.value}:{event.action}")
-            
-            # Combine and execute handlers
-            all_handlers = type_handlers + specific_handlers
-            
-            if not all_handlers:
-                logger.debug(f"No handlers found for event: {event.type.value}:{event.action}")
-                return []
-            
-            logger.info(f"Executing {len(all_handlers)} hook handlers")
-            
-            # Execute handlers concurrently
-            tasks = []
-            for priority, handler in all_handlers:
-                task = asyncio.create_task(
-                    self._execute_handler(handler, event, timeout)
-                )
-                tasks.append(task)
-                self._active_executions.add(task)
-            
-            try:
-                # Wait for all handlers to complete
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                # Process results
-                processed_results = []
-                for i, result in enumerate(results):
-                    if isinstance(result, Exception):
-                        processed_results.append(HookResult(
-                            success=False,
-                            error=str(result),
-                            execution_time=0.0
-                        ))
-                        logger.error(f"Handler execution failed: {result}")
-                    else:
-                        processed_results.append(result)
+        plan = self.registry.get_dispatch_plan(event.type.value, event.action)
+        for slot in plan.observers:
+            await self.observers.put(slot, event)
+        if not plan.tiers:
+            return []
+        
+        self._active_events += 1
+        try:
+            results: List[HookResult] = []
+            for tier in plan.tiers:
+                if len(tier) == 1:
+                    results.append(await self._execute_slot(tier[0], event, timeout))
+                    continue
                 
-                return processed_results
+                # Handlers of equal priority run concurrently
+                tasks = [
+                    asyncio.create_task(self._execute_slot(slot, event, timeout))
+                    for slot in tier
+                ]
+                self._active_executions.update(tasks)
+                try:
+                    tier_results = await asyncio.gather(*tasks, return_exceptions=True)
+                finally:
+                    self._active_executions.difference_update(tasks)
                 
-            finally:
-                # Clean up active executions
-                self._active_executions.difference_update(tasks)
+                for result in tier_results:
+                    if isinstance(result, BaseException):
+                        logger.error(f"Handler execution failed: {result}")
+                        result = HookResult(success=False, error=str(result), execution_time=0.0)
+                    results.append(result)
+            return results
+        finally:
+            self._active_events -= 1
+    
+    async def _execute_slot(
+        self,
+        slot: HandlerSlot,
+        event: HookEvent,
+        timeout: Optional[float] = None
+    ) -> HookResult:
+        """Execute a registered handler, honouring its concurrency limit and recording metrics"""
+        metrics = slot.metrics
+        semaphore = slot.semaphore
+        if semaphore is None:
+            return await self._timed_execute(slot, event, timeout)
+        
+        if semaphore.locked():
+            metrics.throttled += 1
+        async with semaphore:
+            return await self._timed_execute(slot, event, timeout)
+    
+    async def _timed_execute(self, slot: HandlerSlot, event: HookEvent, timeout: Optional[float]) -> HookResult:
+        metrics = slot.metrics
+        metrics.in_flight += 1
+        metrics.peak_in_flight = max(metrics.peak_in_flight, metrics.in_flight)
+        try:
+            result = await self._execute_handler(slot.handler, event, timeout or slot.timeout)
+        finally:
+            metrics.in_flight -= 1
+        
+        metrics.calls += 1
+        metrics.total_time += result.execution_time
+        metrics.max_time = max(metrics.max_time, result.execution_time)
+        metrics.recent.append(result.execution_time)
+        if result.success:
+            metrics.successful += 1
+        else:
+            metrics.failed += 1
+            if result.error and result.error.startswith("Execution timed out"):
+                metrics.timeouts += 1
+        return result
     
     async def _execute_handler(
         self, 
@@ -257,7 +443,8 @@ class HookEngine:
         Returns:
             Execution result
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
+        statistics = self.registry._statistics
         
         try:
             # Execute handler with timeout
@@ -266,16 +453,16 @@ class HookEngine:
             else:
                 result = await handler(event)
             
-            execution_time = time.time() - start_time
+            execution_time = time.perf_counter() - start_time
             
             # Update statistics
-            self.registry._statistics['executed'] += 1
-            self.registry._statistics['total_execution_time'] += execution_time
+            statistics['executed'] += 1
+            statistics['total_execution_time'] += execution_time
             
             if result.success:
-                self.registry._statistics['successful'] += 1
+                statistics['successful'] += 1
             else:
-                self.registry._statistics['failed'] += 1
+                statistics['failed'] += 1
             
             # Add execution time to result
             result.execution_time = execution_time
@@ -283,7 +470,8 @@ class HookEngine:
             return result
             
         except asyncio.TimeoutError:
-            execution_time = time.time() - start_time
+            execution_time = time.perf_counter() - start_time
+            statistics['timeouts'] += 1
             logger.error(f"Handler execution timed out after {timeout}s")
             return HookResult(
                 success=False,
@@ -291,7 +479,7 @@ class HookEngine:
                 execution_time=execution_time
             )
         except Exception as e:
-            execution_time = time.time() - start_time
+            execution_time = time.perf_counter() - start_time
             logger.error(f"Handler execution failed: {e}")
             return HookResult(
                 success=False,
@@ -316,6 +504,9 @@ class HookEngine:
         # Disable new executions
         self.disable()
         
+        # Deliver queued observer events before stopping the workers
+        await self.observers.shutdown()
+        
         # Cancel active executions
         for task in self._active_executions:
             if not task.done():
@@ -327,13 +518,29 @@ class HookEngine:
         
         logger.info("Hook engine shutdown complete")
     
+    def get_handler_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Get latency, timeout and concurrency metrics per handler"""
+        return {
+            slot.handler_id: {
+                **slot.metrics.to_dict(),
+                'priority': slot.priority,
+                'timeout': slot.timeout,
+                'max_concurrency': slot.max_concurrency,
+                'mode': slot.mode
+            }
+            for slot in self.registry.iter_slots()
+        }
+    
     def get_statistics(self) -> Dict[str, Any]:
         """Get engine statistics"""
         return {
             'registry': self.registry.get_statistics(),
             'is_enabled': self._is_enabled,
+            'active_events': self._active_events,
             'active_executions': len(self._active_executions),
-            'max_concurrent': self._max_concurrent_executions
+            'max_concurrent': self._max_concurrent_executions,
+            'handlers': self.get_handler_metrics(),
+            'observer_queue': self.observers.get_statistics()
         }
 
 
@@ -9,7 +9,8 @@ from typing import Any, Dict, List
 from datetime import datetime
 from collections import defaultdict, Counter
 
-from ..types import HookEvent, HookResult
+from ..core import register_hook
+from ..types import Hook, HookEntry, HookEvent, HookMetadata, HookResult, HookSource
 
 
 class CommandLoggerHook:
@@ -321,4 +322,49 @@ class ErrorTrackerHook:
 
 # Example hook instances
 command_logger = CommandLoggerHook()
-error_tracker = ErrorTrackerHook()
\ No newline at end of file
+error_tracker = ErrorTrackerHook()
+
+
+# Analytics only observe events, so both hooks run in async mode: events are
+# queued per handler and the triggering command never waits for them
+COMMAND_LOGGER_HOOK_ENTRY = HookEntry(
+    hook=Hook(
+        name="analytics-command-logger",
+        description="Collects command, session and message analytics",
+        source=HookSource.BUNDLED
+    ),
+    metadata=HookMetadata(
+        events=["command", "session", "message"],
+        priority=-500,
+        mode="async",
+        queue_size=10000,
+        drop_policy="drop_oldest",
+        tags=["logging", "analytics"]
+    )
+)
+
+ERROR_TRACKER_HOOK_ENTRY = HookEntry(
+    hook=Hook(
+        name="analytics-error-tracker",
+        description="Tracks errors reported by events",
+        source=HookSource.BUNDLED
+    ),
+    metadata=HookMetadata(
+        events=["error", "command"],
+        priority=-500,
+        mode="async",
+        queue_size=10000,
+        drop_policy="drop_oldest",
+        tags=["monitoring", "analytics"]
+    )
+)
+
+
+def register_analytics_hooks() -> None:
+    """Register the example analytics hooks as async observers"""
+    for hook, entry in (
+        (command_logger, COMMAND_LOGGER_HOOK_ENTRY),
+        (error_tracker, ERROR_TRACKER_HOOK_ENTRY),
+    ):
+        for event_key in entry.metadata.events:
+            register_hook(event_key, hook, entry.metadata.priority, entry)
@@ -399,6 +399,11 @@ class HookLoader:
                     priority=moltbot_metadata.get('priority', 0),
                     timeout=moltbot_metadata.get('timeout'),
                     retry_count=moltbot_metadata.get('retryCount', 0),
+                    max_concurrency=moltbot_metadata.get('maxConcurrency'),
+                    mode=moltbot_metadata.get('mode', 'sync'),
+                    batch_size=moltbot_metadata.get('batchSize'),
+                    queue_size=moltbot_metadata.get('queueSize'),
+                    drop_policy=moltbot_metadata.get('dropPolicy', 'drop_oldest'),
                     requires=requires if any([
                         requires.bins, requires.any_bins, requires.env, requires.config
                     ]) else None,
@@ -435,7 +440,8 @@ class HookLoader:
             priority=0,  # Would be parsed from metadata if available
             timeout=None,  # Would be parsed from metadata if available
             retry_count=0,  # Would be parsed from metadata if available
-            fail_silent=False
+            fail_silent=False,
+            mode=frontmatter.get('mode') or None
         )
     
     def _filter_and_deduplicate_hooks(
@@ -381,9 +381,11 @@ class HookManager:
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get comprehensive hook manager statistics"""
+        engine = get_hook_engine()
         return {
             **self._statistics,
-            'engine': get_hook_engine().get_statistics(),
+            'engine': engine.get_statistics(),
+            'async_hooks': engine.observers.get_statistics(),
             'status': self.get_hook_status(),
             'uptime': str(datetime.now() - self._statistics['load_time']),
             'memory_usage': self._get_memory_usage()
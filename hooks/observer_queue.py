@@ -0,0 +1,256 @@
+"""
+AgentBus Hook Observer Queue
+
+Bounded fire-and-forget delivery for hooks that only observe events.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from .types import HookEvent, HookResult
+
+
+logger = logging.getLogger(__name__)
+
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"
+DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+
+@dataclass
+class _ObserverState:
+    """Pending events and counters for one observer handler"""
+    slot: Any
+    capacity: int
+    drop_policy: str
+    batch_size: Optional[int]
+    pending: Deque[Tuple[HookEvent, float]] = field(default_factory=deque)
+    space: Optional[asyncio.Event] = None
+    enqueued: int = 0
+    dropped: int = 0
+    processed: int = 0
+    failed: int = 0
+    batches: int = 0
+
+
+class ObserverQueue:
+    """
+    Per-handler bounded queues drained by a shared worker pool
+
+    Each observer handler owns a bounded deque, so one noisy handler cannot
+    starve the others and per-handler ordering is preserved (a handler is
+    drained by at most one worker at a time). Handlers with a ``batch_size``
+    receive a list of events per call.
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[Any, Any], Awaitable[HookResult]],
+        workers: int = 4,
+        default_queue_size: int = 1000,
+        block_timeout: float = 1.0
+    ):
+        self._execute = execute
+        self.workers = workers
+        self.default_queue_size = default_queue_size
+        self.block_timeout = block_timeout
+
+        self._states: Dict[str, _ObserverState] = {}
+        self._ready: Optional[asyncio.Queue] = None
+        self._scheduled: Set[str] = set()
+        self._worker_tasks: List[asyncio.Task] = []
+        self._idle: Optional[asyncio.Event] = None
+        self._busy = 0
+
+        self._latencies: Deque[float] = deque(maxlen=1024)
+        self._latency_total = 0.0
+        self._latency_count = 0
+        self._latency_max = 0.0
+
+    def _state_for(self, slot) -> _ObserverState:
+        state = self._states.get(slot.handler_id)
+        if state is not None and state.slot is slot:
+            return state
+
+        drop_policy = slot.drop_policy if slot.drop_policy in DROP_POLICIES else DROP_OLDEST
+        capacity = slot.queue_size or self.default_queue_size
+        if state is None:
+            state = _ObserverState(
+                slot=slot,
+                capacity=capacity,
+                drop_policy=drop_policy,
+                batch_size=slot.batch_size
+            )
+            self._states[slot.handler_id] = state
+        else:
+            # Re-registered handler: keep its pending events and counters so
+            # queued events are delivered to the new slot instead of lost
+            state.slot = slot
+            state.capacity = capacity
+            state.drop_policy = drop_policy
+            state.batch_size = slot.batch_size
+        return state
+
+    def _ensure_workers(self) -> None:
+        if self._ready is None:
+            self._ready = asyncio.Queue()
+            self._idle = asyncio.Event()
+            self._idle.set()
+        self._worker_tasks = [task for task in self._worker_tasks if not task.done()]
+        while len(self._worker_tasks) < self.workers:
+            self._worker_tasks.append(asyncio.create_task(self._worker()))
+
+    async def put(self, slot, event: HookEvent) -> bool:
+        """
+        Queue an event for an observer handler
+
+        Returns:
+            False if the event was dropped
+        """
+        self._ensure_workers()
+        state = self._state_for(slot)
+
+        if len(state.pending) >= state.capacity:
+            if state.drop_policy == DROP_NEWEST:
+                state.dropped += 1
+                return False
+            if state.drop_policy == DROP_OLDEST:
+                state.pending.popleft()
+                state.dropped += 1
+            else:
+                # Backpressure: wait briefly for the handler to catch up
+                if state.space is None:
+                    state.space = asyncio.Event()
+                state.space.clear()
+                try:
+                    await asyncio.wait_for(state.space.wait(), timeout=self.block_timeout)
+                except asyncio.TimeoutError:
+                    state.dropped += 1
+                    return False
+                if len(state.pending) >= state.capacity:
+                    state.dropped += 1
+                    return False
+
+        state.pending.append((event, time.perf_counter()))
+        state.enqueued += 1
+        self._idle.clear()
+        if slot.handler_id not in self._scheduled:
+            self._scheduled.add(slot.handler_id)
+            self._ready.put_nowait(slot.handler_id)
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            handler_id = await self._ready.get()
+            state = self._states.get(handler_id)
+            if state is None or not state.pending:
+                self._scheduled.discard(handler_id)
+                self._check_idle()
+                continue
+
+            self._busy += 1
+            try:
+                await self._drain_once(state)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Observer queue worker error: {e}")
+            finally:
+                self._busy -= 1
+                if state.pending:
+                    self._ready.put_nowait(handler_id)
+                else:
+                    self._scheduled.discard(handler_id)
+                    self._check_idle()
+
+    async def _drain_once(self, state: _ObserverState) -> None:
+        """Deliver one event, or one batch for batch-capable handlers"""
+        count = min(state.batch_size or 1, len(state.pending))
+        items = [state.pending.popleft() for _ in range(count)]
+        if state.space is not None:
+            state.space.set()
+
+        now = time.perf_counter()
+        for _, enqueued_at in items:
+            self._record_latency(now - enqueued_at)
+
+        payload = [event for event, _ in items] if state.batch_size else items[0][0]
+        result = await self._execute(state.slot, payload)
+
+        state.batches += 1
+        state.processed += count
+        if not result.success:
+            state.failed += count
+
+    def _record_latency(self, latency: float) -> None:
+        self._latencies.append(latency)
+        self._latency_total += latency
+        self._latency_count += 1
+        self._latency_max = max(self._latency_max, latency)
+
+    def _check_idle(self) -> None:
+        if not self._scheduled and self._busy == 0 and self._idle is not None:
+            self._idle.set()
+
+    @property
+    def depth(self) -> int:
+        return sum(len(state.pending) for state in self._states.values())
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued event has been delivered"""
+        if self._idle is None:
+            return True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def shutdown(self, drain_timeout: Optional[float] = 5.0) -> None:
+        """Drain pending events (bounded by drain_timeout) and stop workers"""
+        if self._worker_tasks:
+            await self.drain(drain_timeout)
+        for task in self._worker_tasks:
+            task.cancel()
+        if self._worker_tasks:
+            await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Queue depth, drops and drain latency"""
+        ordered = sorted(self._latencies)
+        p95 = ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] if ordered else 0.0
+        states = self._states.values()
+        return {
+            'workers': self.workers,
+            'depth': self.depth,
+            'enqueued': sum(s.enqueued for s in states),
+            'dropped': sum(s.dropped for s in states),
+            'processed': sum(s.processed for s in states),
+            'failed': sum(s.failed for s in states),
+            'batches': sum(s.batches for s in states),
+            'drain_latency': {
+                'average': self._latency_total / self._latency_count if self._latency_count else 0.0,
+                'p95': p95,
+                'max': self._latency_max
+            },
+            'handlers': {
+                handler_id: {
+                    'depth': len(s.pending),
+                    'capacity': s.capacity,
+                    'drop_policy': s.drop_policy,
+                    'batch_size': s.batch_size,
+                    'enqueued': s.enqueued,
+                    'dropped': s.dropped,
+                    'processed': s.processed,
+                    'failed': s.failed
+                }
+                for handler_id, s in self._states.items()
+            }
+        }
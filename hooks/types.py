@@ -66,6 +66,11 @@ class HookMetadata:
     priority: int = 0
     timeout: Optional[int] = None
     retry_count: int = 0
+    max_concurrency: Optional[int] = None  # Max in-flight invocations of this handler
+    mode: str = "sync"  # "sync" (awaited by the caller) or "async" (queued observer)
+    batch_size: Optional[int] = None  # Async observers only: deliver lists of up to N events
+    queue_size: Optional[int] = None  # Async observers only: per-handler queue bound
+    drop_policy: str = "drop_oldest"  # drop_oldest, drop_newest or block when the queue is full
     requires: Optional[HookRequirements] = None
     install: List[HookInstallSpec] = field(default_factory=list)
     tags: List[str] = field(default_factory=list)
@@ -80,6 +85,11 @@ class HookInvocationPolicy:
     timeout: Optional[int] = None
     retry_count: int = 0
     fail_silent: bool = False
+    max_concurrency: Optional[int] = None
+    mode: Optional[str] = None
+    batch_size: Optional[int] = None
+    queue_size: Optional[int] = None
+    drop_policy: Optional[str] = None
 
 
 @dataclass
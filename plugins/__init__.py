@@ -16,7 +16,8 @@ from .core import (
     AgentBusPlugin,
     PluginTool,
     PluginHook,
-    PluginStatus
+    PluginStatus,
+    ExecutionMode
 )
 from .manager import PluginManager
 
@@ -27,5 +28,6 @@ __all__ = [
     "PluginTool",
     "PluginHook",
     "PluginStatus",
+    "ExecutionMode",
     "PluginManager"
 ]
\ No newline at end of file
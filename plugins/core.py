@@ -7,6 +7,7 @@ AgentBus插件框架核心模块
 - PluginTool: 插件工具定义
 - PluginHook: 插件钩子定义
 - PluginStatus: 插件状态枚举
+- ExecutionMode: 工具和钩子的执行位置
 """
 
 from abc import ABC, abstractmethod
@@ -39,6 +40,14 @@ class PluginStatus(Enum):
     DISABLED = "disabled"
 
 
+class ExecutionMode(Enum):
+    """插件工具和钩子的执行位置"""
+    AUTO = "auto"        # 协程在事件循环中执行，同步函数放到线程池
+    INLINE = "inline"    # 直接在事件循环中调用（极短的同步函数）
+    THREAD = "thread"    # 线程池（阻塞IO类同步函数）
+    PROCESS = "process"  # 进程池隔离（CPU密集型函数，函数与参数需可pickle）
+
+
 @dataclass
 class PluginContext:
     """
@@ -79,17 +88,22 @@ class PluginTool:
         function (Callable): 工具函数
         parameters (Dict[str, Any]): 工具参数定义
         async_func (bool): 是否为异步函数
+        execution (ExecutionMode): 执行位置
+        timeout (Optional[float]): 执行超时时间（秒），None表示使用管理器默认值
     """
     name: str
     description: str
     function: Callable
     parameters: Dict[str, Any]
     async_func: bool = False
+    execution: ExecutionMode = ExecutionMode.AUTO
+    timeout: Optional[float] = None
     
     def __post_init__(self):
         """验证工具定义"""
         if not callable(self.function):
             raise TypeError("Tool function must be callable")
+        self.execution = ExecutionMode(self.execution)
         
         # 检查函数签名
         sig = inspect.signature(self.function)
@@ -115,16 +129,21 @@ class PluginHook:
         handler (Callable): 事件处理函数
         priority (int): 钩子优先级，数值越大优先级越高
         async_func (bool): 是否为异步函数
+        execution (ExecutionMode): 执行位置
+        timeout (Optional[float]): 执行超时时间（秒），None表示使用管理器默认值
     """
     event: str
     handler: Callable
     priority: int = 0
     async_func: bool = False
+    execution: ExecutionMode = ExecutionMode.AUTO
+    timeout: Optional[float] = None
     
     def __post_init__(self):
         """验证钩子定义"""
         if not callable(self.handler):
             raise TypeError("Hook handler must be callable")
+        self.execution = ExecutionMode(self.execution)
         
         # 检查是否为异步函数
         self.async_func = inspect.iscoroutinefunction(self.handler)
@@ -272,7 +291,7 @@ class AgentBusPlugin(ABC):
             name: 工具名称
             description: 工具描述
             function: 工具函数
-            **kwargs: 额外的工具参数
+            **kwargs: 额外的工具参数（如 execution、timeout）
             
         Returns:
             注册的工具实例
@@ -298,7 +317,9 @@ class AgentBusPlugin(ABC):
         return tool
     
     def register_hook(self, event: str, handler: Callable, 
-                     priority: int = 0) -> PluginHook:
+                     priority: int = 0,
+                     execution: Union[ExecutionMode, str] = ExecutionMode.AUTO,
+                     timeout: Optional[float] = None) -> PluginHook:
         """
         注册事件钩子
         
@@ -306,6 +327,8 @@ class AgentBusPlugin(ABC):
             event: 事件名称
             handler: 事件处理函数
             priority: 钩子优先级，数值越大优先级越高
+            execution: 执行位置
+            timeout: 执行超时时间（秒）
             
         Returns:
             注册的钩子实例
@@ -314,7 +337,9 @@ class AgentBusPlugin(ABC):
             event=event,
             handler=handler,
             priority=priority,
-            async_func=inspect.iscoroutinefunction(handler)
+            async_func=inspect.iscoroutinefunction(handler),
+            execution=execution,
+            timeout=timeout
         )
         
         if event not in self._hooks:
@@ -0,0 +1,236 @@
+"""
+AgentBus插件发现缓存
+
+通过静态AST扫描查找插件类并提取插件信息，无需执行插件模块代码。
+扫描结果按文件路径缓存，以mtime/大小做快速校验、以内容哈希做最终
+校验，未变化的文件在下次启动时直接复用缓存结果。
+"""
+
+import ast
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+
+# 缓存格式版本，提取规则变化时递增以使旧缓存失效
+CACHE_VERSION = 1
+
+PLUGIN_BASE_CLASS = "AgentBusPlugin"
+
+# 插件信息中可被静态提取的字段
+INFO_FIELDS = ('id', 'name', 'version', 'description', 'author', 'dependencies')
+
+
+def _base_name(node: ast.expr) -> Optional[str]:
+    """获取基类表达式的名称（支持 Name 和 a.b.Name 形式）"""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def _static_info(func: ast.FunctionDef) -> Dict[str, Any]:
+    """从 get_info 中第一个返回字典字面量的 return 语句提取常量字段"""
+    for node in ast.walk(func):
+        if isinstance(node, ast.Return) and isinstance(node.value, ast.Dict):
+            info = {}
+            for key, value in zip(node.value.keys, node.value.values):
+                if not isinstance(key, ast.Constant) or key.value not in INFO_FIELDS:
+                    continue
+                try:
+                    info[key.value] = ast.literal_eval(value)
+                except ValueError:
+                    # 非常量表达式（如 self.plugin_id）使用默认值
+                    continue
+            return info
+    return {}
+
+
+def scan_plugin_source(source: str, filename: str = "<plugin>") -> List[Dict[str, Any]]:
+    """
+    静态扫描模块源码中的插件类
+
+    插件类指直接或经由同模块中的其他类继承 AgentBusPlugin 的类，
+    且自身或同模块父类实现了 get_info（否则为抽象类无法实例化）。
+
+    Args:
+        source: 模块源码
+        filename: 文件名（用于语法错误信息）
+
+    Returns:
+        插件记录列表，按类名排序，每项包含 class_name 和静态提取的插件信息
+
+    Raises:
+        SyntaxError: 源码无法解析
+    """
+    tree = ast.parse(source, filename=filename)
+    classes = {
+        node.name: node for node in tree.body if isinstance(node, ast.ClassDef)
+    }
+
+    def plugin_chain(name: str, seen: frozenset = frozenset()) -> Optional[List[ast.ClassDef]]:
+        # 返回从该类到 AgentBusPlugin 之间的同模块类链，不是插件类时返回 None
+        node = classes.get(name)
+        if node is None or name in seen:
+            return None
+        for base in node.bases:
+            base_name = _base_name(base)
+            if base_name == PLUGIN_BASE_CLASS:
+                return [node]
+            if base_name in classes:
+                chain = plugin_chain(base_name, seen | {name})
+                if chain is not None:
+                    return [node] + chain
+        return None
+
+    records = []
+    for class_name in sorted(classes):
+        if class_name == PLUGIN_BASE_CLASS:
+            continue
+        chain = plugin_chain(class_name)
+        if chain is None:
+            continue
+
+        get_info = None
+        for node in chain:
+            get_info = next(
+                (item for item in node.body
+                 if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name == 'get_info'),
+                None
+            )
+            if get_info is not None:
+                break
+        if get_info is None:
+            continue
+
+        info = _static_info(get_info)
+        records.append({
+            'class_name': class_name,
+            'plugin_id': info.get('id') or class_name.lower(),
+            'name': info.get('name', class_name),
+            'version': info.get('version', '1.0.0'),
+            'description': info.get('description', ''),
+            'author': info.get('author', 'Unknown'),
+            'dependencies': list(info.get('dependencies') or [])
+        })
+    return records
+
+
+class PluginDiscoveryCache:
+    """
+    插件发现缓存
+
+    以文件路径为键保存静态扫描结果。mtime和大小一致时直接命中；
+    不一致时比较内容哈希，内容未变只刷新mtime，否则重新扫描。
+    提供路径时缓存会持久化为JSON文件，供下次启动复用。
+    """
+
+    def __init__(self, path: Optional[str] = None, logger: Optional[logging.Logger] = None):
+        self.path = path
+        self._logger = logger or logging.getLogger(__name__)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self._entries = data.get('entries', {})
+        except (OSError, ValueError) as e:
+            self._logger.warning(f"Ignoring unreadable plugin discovery cache {self.path}: {e}")
+
+    def scan_file(self, module_path: str) -> List[Dict[str, Any]]:
+        """
+        获取文件中的插件记录，优先使用缓存
+
+        Args:
+            module_path: 模块文件路径
+
+        Returns:
+            插件记录列表（副本）
+        """
+        with self._lock:
+            self._load()
+            entry = self._entries.get(module_path)
+
+        stat = os.stat(module_path)
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            self.hits += 1
+            return [dict(record) for record in entry['plugins']]
+
+        with open(module_path, 'rb') as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()
+
+        if entry and entry['hash'] == digest:
+            self.hits += 1
+            records = entry['plugins']
+        else:
+            self.misses += 1
+            records = scan_plugin_source(content.decode('utf-8'), module_path)
+
+        with self._lock:
+            self._entries[module_path] = {
+                'mtime_ns': stat.st_mtime_ns,
+                'size': stat.st_size,
+                'hash': digest,
+                'plugins': records
+            }
+            self._dirty = True
+        return [dict(record) for record in records]
+
+    def prune(self, roots: Iterable[str], seen: Iterable[str]) -> None:
+        """移除扫描目录下已不存在的文件条目"""
+        roots = tuple(os.path.join(root, '') for root in roots)
+        seen = set(seen)
+        with self._lock:
+            stale = [
+                path for path in self._entries
+                if path.startswith(roots) and path not in seen
+            ]
+            for path in stale:
+                del self._entries[path]
+            if stale:
+                self._dirty = True
+
+    def save(self) -> None:
+        """持久化缓存（仅在有变更且配置了路径时写入）"""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            data = {'version': CACHE_VERSION, 'entries': self._entries}
+            try:
+                directory = os.path.dirname(self.path) or '.'
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                self._logger.warning(f"Failed to save plugin discovery cache {self.path}: {e}")
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._loaded = True
+            self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -15,24 +15,24 @@ PluginManager类负责管理插件的整个生命周期，包括加载、激活
 """
 
 import asyncio
+import functools
 import importlib
 import inspect
 import logging
 import os
-import sys
-from pathlib import Path
 from typing import (
-    Dict, List, Optional, Type, Any, Callable, Set, 
-    Union, Tuple, AsyncIterator
+    Dict, List, Optional, Type, Any, Callable, Tuple
 )
-from dataclasses import dataclass
-from collections import defaultdict
-import json
+from dataclasses import dataclass, field
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import time
 
 from .core import (
     AgentBusPlugin, PluginContext, PluginTool, PluginHook, 
-    PluginStatus, PluginResult
+    PluginStatus, PluginResult, ExecutionMode
 )
+from .discovery import PluginDiscoveryCache
 
 
 @dataclass
@@ -50,6 +50,46 @@ class PluginInfo:
     error_message: Optional[str] = None
 
 
+@dataclass
+class PluginMetrics:
+    """单个插件的钩子/工具执行指标"""
+    hook_calls: int = 0
+    tool_calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    recent: deque = field(default_factory=lambda: deque(maxlen=256))
+    
+    def record(self, kind: str, elapsed: float, error: Optional[BaseException] = None):
+        """记录一次执行"""
+        if kind == 'hook':
+            self.hook_calls += 1
+        else:
+            self.tool_calls += 1
+        if error is not None:
+            self.errors += 1
+            if isinstance(error, asyncio.TimeoutError):
+                self.timeouts += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.recent.append(elapsed)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        calls = self.hook_calls + self.tool_calls
+        ordered = sorted(self.recent)
+        return {
+            'hook_calls': self.hook_calls,
+            'tool_calls': self.tool_calls,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'error_rate': self.errors / calls if calls else 0.0,
+            'avg_latency': self.total_time / calls if calls else 0.0,
+            'p95_latency': ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] if ordered else 0.0,
+            'max_latency': self.max_time
+        }
+
+
 class PluginLoadError(Exception):
     """插件加载异常"""
     pass
@@ -75,19 +115,30 @@ class PluginManager:
         _event_hooks (Dict[str, List[Tuple[str, PluginHook]]]): 事件钩子
         _tool_registry (Dict[str, Tuple[str, AgentBusPlugin]]): 工具注册表
         _command_registry (Dict[str, Tuple[str, AgentBusPlugin]]): 命令注册表
+        _discovered (Dict[str, PluginInfo]): 已发现但尚未加载的插件信息
+        _discovery_cache (PluginDiscoveryCache): 插件发现缓存
         _context (PluginContext): 全局插件上下文
         _logger (logging.Logger): 日志记录器
         _lock (asyncio.Lock): 异步锁
     """
     
     def __init__(self, context: Optional[PluginContext] = None, 
-                 plugin_dirs: Optional[List[str]] = None):
+                 plugin_dirs: Optional[List[str]] = None,
+                 discovery_cache_path: Optional[str] = None,
+                 max_workers: int = 8,
+                 process_workers: Optional[int] = None,
+                 default_timeout: Optional[float] = None):
         """
         初始化插件管理器
         
         Args:
             context: 全局插件上下文，如果为None则创建默认上下文
             plugin_dirs: 插件搜索目录列表
+            discovery_cache_path: 插件发现缓存文件路径，默认为
+                AGENTBUS_PLUGIN_CACHE 环境变量或 ~/.agentbus/cache/plugin_discovery.json
+            max_workers: 同步钩子/工具线程池大小
+            process_workers: 进程池大小（仅在有PROCESS模式工具时创建）
+            default_timeout: 未单独配置超时的钩子/工具的默认超时时间（秒）
         """
         self._plugins: Dict[str, AgentBusPlugin] = {}
         self._plugin_info: Dict[str, PluginInfo] = {}
@@ -112,7 +163,26 @@ class PluginManager:
         # 设置插件搜索目录
         self._plugin_dirs = plugin_dirs or self._get_default_plugin_dirs()
         
+        # 插件发现缓存：静态扫描结果按文件缓存，模块在首次激活时才导入
+        self._discovered: Dict[str, PluginInfo] = {}
+        self._discovery_cache = PluginDiscoveryCache(
+            discovery_cache_path or os.getenv("AGENTBUS_PLUGIN_CACHE") or os.path.join(
+                os.path.expanduser("~"), ".agentbus", "cache", "plugin_discovery.json"
+            ),
+            logger=self._logger
+        )
+        self._discovery_stats: Dict[str, Any] = {}
+        
+        # 钩子/工具执行：同步函数放到线程池，CPU密集型工具可隔离到进程池
+        self.max_workers = max_workers
+        self.process_workers = process_workers
+        self.default_timeout = default_timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._process_executor: Optional[ProcessPoolExecutor] = None
+        self._metrics: Dict[str, PluginMetrics] = defaultdict(PluginMetrics)
+        
         self._logger.info("PluginManager initialized")
+    
     def _get_default_plugin_dirs(self) -> List[str]:
         """获取默认插件搜索目录"""
         dirs = [
@@ -132,98 +202,86 @@ class PluginManager:
         """
         发现可用的插件
         
-        扫描插件搜索目录，查找所有可用的插件模块。
+        并行扫描各插件搜索目录，通过静态AST分析查找插件类，不执行
+        插件模块代码。扫描结果按文件缓存，未变化的文件直接复用。
+        发现的插件会在首次 activate_plugin 时才导入加载。
         
         Returns:
             发现的所有插件信息列表
         """
-        discovered = []
+        start = time.perf_counter()
+        hits, misses = self._discovery_cache.hits, self._discovery_cache.misses
         
-        for plugin_dir in self._plugin_dirs:
-            if not os.path.exists(plugin_dir):
-                continue
-            
-            self._logger.debug(f"Scanning plugin directory: {plugin_dir}")
-            
-            for root, dirs, files in os.walk(plugin_dir):
-                # 查找Python模块文件
-                for file in files:
-                    if file.endswith('.py') and not file.startswith('_'):
-                        module_path = os.path.join(root, file)
-                        try:
-                            plugin_info = await self._load_plugin_info(module_path)
-                            if plugin_info:
-                                discovered.append(plugin_info)
-                                self._logger.debug(f"Discovered plugin: {plugin_info.plugin_id}")
-                        except Exception as e:
-                            self._logger.error(f"Failed to load plugin info from {module_path}: {e}")
+        loop = asyncio.get_running_loop()
+        plugin_dirs = [d for d in self._plugin_dirs if os.path.exists(d)]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(None, self._scan_plugin_dir, plugin_dir)
+            for plugin_dir in plugin_dirs
+        ))
         
+        discovered = []
+        scanned_files = []
+        for infos, files in results:
+            discovered.extend(infos)
+            scanned_files.extend(files)
+        
+        self._discovery_cache.prune(plugin_dirs, scanned_files)
+        await loop.run_in_executor(None, self._discovery_cache.save)
+        
+        for info in discovered:
+            self._discovered[info.plugin_id] = info
+            self._logger.debug(f"Discovered plugin: {info.plugin_id}")
+        
+        self._discovery_stats = {
+            'duration': time.perf_counter() - start,
+            'directories': len(plugin_dirs),
+            'files': len(scanned_files),
+            'plugins': len(discovered),
+            'cache_hits': self._discovery_cache.hits - hits,
+            'cache_misses': self._discovery_cache.misses - misses
+        }
         return discovered
     
-    async def _load_plugin_info(self, module_path: str) -> Optional[PluginInfo]:
-        """加载插件信息"""
+    def _scan_plugin_dir(self, plugin_dir: str) -> Tuple[List[PluginInfo], List[str]]:
+        """扫描单个插件目录（在线程池中运行）"""
+        self._logger.debug(f"Scanning plugin directory: {plugin_dir}")
+        
+        discovered = []
+        files = []
+        for root, dirs, filenames in os.walk(plugin_dir):
+            dirs[:] = [d for d in dirs if d != '__pycache__']
+            # 查找Python模块文件
+            for file in sorted(filenames):
+                if file.endswith('.py') and not file.startswith('_'):
+                    module_path = os.path.join(root, file)
+                    files.append(module_path)
+                    plugin_info = self._load_plugin_info(module_path)
+                    if plugin_info:
+                        discovered.append(plugin_info)
+        return discovered, files
+    
+    def _load_plugin_info(self, module_path: str) -> Optional[PluginInfo]:
+        """静态提取插件信息（取第一个插件类）"""
         try:
-            # 动态导入模块
-            spec = importlib.util.spec_from_file_location("temp_module", module_path)
-            if not spec or not spec.loader:
-                return None
-            
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-            
-            # 查找插件类
-            plugin_classes = []
-            for name, obj in inspect.getmembers(module):
-                if (inspect.isclass(obj) and 
-                    issubclass(obj, AgentBusPlugin) and 
-                    obj != AgentBusPlugin):
-                    plugin_classes.append((name, obj))
-            
-            if not plugin_classes:
-                return None
-            
-            # 取第一个插件类（如果有多个）
-            class_name, plugin_class = plugin_classes[0]
-            
-            # 获取插件信息
-            info = self._extract_plugin_info(plugin_class, module_path, class_name)
-            return info
-            
+            records = self._discovery_cache.scan_file(module_path)
         except Exception as e:
-            self._logger.error(f"Failed to load plugin info: {e}")
+            self._logger.error(f"Failed to load plugin info from {module_path}: {e}")
             return None
-        finally:
-            # 清理模块
-            if 'temp_module' in sys.modules:
-                del sys.modules['temp_module']
-    
-    def _extract_plugin_info(self, plugin_class: Type[AgentBusPlugin], 
-                           module_path: str, class_name: str) -> PluginInfo:
-        """从插件类提取插件信息"""
-        # 创建临时实例获取信息
-        temp_context = PluginContext(
-            config={},
-            logger=self._logger,
-            runtime={}
-        )
         
-        try:
-            temp_plugin = plugin_class("temp", temp_context)
-            plugin_info = temp_plugin.get_info()
-            
-            return PluginInfo(
-                plugin_id=plugin_info.get('id', class_name.lower()),
-                name=plugin_info.get('name', class_name),
-                version=plugin_info.get('version', '1.0.0'),
-                description=plugin_info.get('description', ''),
-                author=plugin_info.get('author', 'Unknown'),
-                class_name=class_name,
-                module_path=module_path,
-                dependencies=plugin_info.get('dependencies', [])
-            )
-        except Exception as e:
-            self._logger.error(f"Failed to extract plugin info: {e}")
-            raise PluginLoadError(f"Invalid plugin class: {e}")
+        if not records:
+            return None
+        
+        record = records[0]
+        return PluginInfo(
+            plugin_id=record['plugin_id'],
+            name=record['name'],
+            version=record['version'],
+            description=record['description'],
+            author=record['author'],
+            class_name=record['class_name'],
+            module_path=module_path,
+            dependencies=record['dependencies']
+        )
     
     async def load_plugin(self, plugin_id: str, module_path: str, 
                         class_name: str = None) -> AgentBusPlugin:
@@ -291,6 +349,8 @@ class PluginManager:
                 self._plugin_modules[plugin_id] = plugin_class
                 
                 # 核心修复：更新或创建插件信息，确保 status 正确
+                if plugin_id not in self._plugin_info and plugin_id in self._discovered:
+                    self._plugin_info[plugin_id] = self._discovered[plugin_id]
                 if plugin_id not in self._plugin_info:
                     info = plugin.get_info()
                     self._plugin_info[plugin_id] = PluginInfo(
@@ -362,9 +422,9 @@ class PluginManager:
         info = plugin.get_info()
         required_fields = ['id', 'name', 'version']
         
-        for field in required_fields:
-            if field not in info:
-                raise PluginLoadError(f"Missing required field: {field}")
+        for required in required_fields:
+            if required not in info:
+                raise PluginLoadError(f"Missing required field: {required}")
         
         # 检查工具
         tools = plugin.get_tools()
@@ -467,6 +527,17 @@ class PluginManager:
         Returns:
             激活是否成功
         """
+        if plugin_id not in self._plugins and plugin_id in self._discovered:
+            # 已发现的插件在首次激活时才导入模块
+            info = self._discovered[plugin_id]
+            try:
+                await self.load_plugin(plugin_id, info.module_path, info.class_name)
+            except Exception as e:
+                self._logger.error(f"Failed to load plugin {plugin_id}: {e}")
+                info.status = PluginStatus.ERROR
+                info.error_message = str(e)
+                return False
+        
         if plugin_id not in self._plugins:
             self._logger.error(f"Plugin {plugin_id} not loaded")
             return False
@@ -603,6 +674,9 @@ class PluginManager:
             return False
         
         plugin_info = self._plugin_info[plugin_id]
+        if plugin_id not in self._plugins:
+            self._logger.error(f"Plugin {plugin_id} not loaded")
+            return False
         was_active = self._plugins[plugin_id].status == PluginStatus.ACTIVE
         
         try:
@@ -611,7 +685,7 @@ class PluginManager:
                 return False
             
             # 重新加载插件
-            plugin = await self.load_plugin(
+            await self.load_plugin(
                 plugin_id, 
                 plugin_info.module_path, 
                 plugin_info.class_name
@@ -628,34 +702,93 @@ class PluginManager:
             self._logger.error(f"Failed to reload plugin {plugin_id}: {e}")
             return False
     
+    def _invoke(self, func: Callable, async_func: bool, mode: ExecutionMode,
+                args: tuple, kwargs: dict):
+        """按执行策略选择执行位置，返回可等待对象"""
+        if mode != ExecutionMode.PROCESS and async_func:
+            return func(*args, **kwargs)
+        if mode == ExecutionMode.INLINE:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(func(*args, **kwargs))
+            return future
+        
+        call = functools.partial(func, *args, **kwargs)
+        if mode == ExecutionMode.PROCESS:
+            if self._process_executor is None:
+                self._process_executor = ProcessPoolExecutor(max_workers=self.process_workers)
+            executor = self._process_executor
+        else:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="plugin-worker"
+                )
+            executor = self._executor
+        return asyncio.get_running_loop().run_in_executor(executor, call)
+    
+    async def _run_with_policy(self, plugin_id: str, kind: str, func: Callable,
+                               async_func: bool, mode: ExecutionMode,
+                               timeout: Optional[float], args: tuple, kwargs: dict) -> Any:
+        """执行钩子/工具并记录插件指标，超时后放弃等待（线程/进程中的函数无法被强制中断）"""
+        timeout = timeout or self.default_timeout
+        start = time.perf_counter()
+        try:
+            if timeout:
+                result = await asyncio.wait_for(self._invoke(func, async_func, mode, args, kwargs), timeout)
+            else:
+                result = await self._invoke(func, async_func, mode, args, kwargs)
+        except Exception as e:
+            self._metrics[plugin_id].record(kind, time.perf_counter() - start, e)
+            raise
+        self._metrics[plugin_id].record(kind, time.perf_counter() - start)
+        return result
+    
     async def execute_hook(self, event: str, *args, **kwargs) -> List[Any]:
         """
         执行事件钩子
         
+        按优先级分组执行：不同优先级依次执行，同一优先级的钩子并发执行。
+        同步钩子默认放到线程池，不阻塞事件循环。
+        
         Args:
             event: 事件名称
             *args: 位置参数
             **kwargs: 关键字参数
             
         Returns:
-            所有钩子的执行结果列表
+            所有钩子的执行结果列表（按优先级排序，失败或超时的钩子不计入）
         """
         if event not in self._event_hooks:
             return []
         
-        results = []
+        # 已按优先级降序排列，连续的同优先级钩子构成一组
+        tiers: List[List[Tuple[str, PluginHook]]] = []
+        for entry in self._event_hooks[event]:
+            if tiers and tiers[-1][0][1].priority == entry[1].priority:
+                tiers[-1].append(entry)
+            else:
+                tiers.append([entry])
         
-        for plugin_id, hook in self._event_hooks[event]:
-            try:
-                if hook.async_func:
-                    result = await hook.handler(*args, **kwargs)
-                else:
-                    result = hook.handler(*args, **kwargs)
-                results.append(result)
-            except Exception as e:
-                self._logger.error(
-                    f"Hook execution failed for plugin {plugin_id}: {e}"
+        results = []
+        for tier in tiers:
+            tier_results = await asyncio.gather(*(
+                self._run_with_policy(
+                    plugin_id, 'hook', hook.handler, hook.async_func,
+                    hook.execution, hook.timeout, args, kwargs
                 )
+                for plugin_id, hook in tier
+            ), return_exceptions=True)
+            
+            for (plugin_id, _), result in zip(tier, tier_results):
+                if isinstance(result, asyncio.TimeoutError):
+                    self._logger.error(f"Hook execution timed out for plugin {plugin_id}")
+                elif isinstance(result, Exception):
+                    self._logger.error(
+                        f"Hook execution failed for plugin {plugin_id}: {result}"
+                    )
+                elif isinstance(result, BaseException):
+                    raise result
+                else:
+                    results.append(result)
         
         return results
     
@@ -663,13 +796,16 @@ class PluginManager:
         """
         执行工具
         
+        按工具的执行策略运行：协程在事件循环中执行，同步工具默认放到
+        线程池，PROCESS模式的工具在进程池中隔离执行。
+        
         Args:
             tool_name: 工具名称
             *args: 位置参数
             **kwargs: 关键字参数
             
         Returns:
-            工具执行结果
+            工具执行结果，失败或超时时返回异常对象
             
         Raises:
             ValueError: 工具不存在
@@ -680,11 +816,50 @@ class PluginManager:
         plugin_id, plugin = self._tool_registry[tool_name]
         
         try:
-            return await plugin.execute_tool(tool_name, *args, **kwargs)
+            if type(plugin).execute_tool is not AgentBusPlugin.execute_tool:
+                # 插件自定义了工具分发逻辑
+                return await self._run_with_policy(
+                    plugin_id, 'tool', plugin.execute_tool, True,
+                    ExecutionMode.AUTO, None, (tool_name,) + args, kwargs
+                )
+            
+            tool = next((t for t in plugin._tools if t.name == tool_name), None)
+            if tool is None:
+                raise ValueError(f"Tool '{tool_name}' not found")
+            return await self._run_with_policy(
+                plugin_id, 'tool', tool.function, tool.async_func,
+                tool.execution, tool.timeout, args, kwargs
+            )
+        except asyncio.TimeoutError as e:
+            self._logger.error(f"Tool '{tool_name}' timed out")
+            return e
         except Exception as e:
             self._logger.error(f"Tool execution failed: {e}")
             return e
     
+    def get_plugin_metrics(self, plugin_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        获取插件执行指标
+        
+        Args:
+            plugin_id: 插件标识符，为None时返回所有插件
+            
+        Returns:
+            指标字典
+        """
+        if plugin_id is not None:
+            metrics = self._metrics.get(plugin_id)
+            return metrics.to_dict() if metrics else {}
+        return {pid: metrics.to_dict() for pid, metrics in self._metrics.items()}
+    
+    async def shutdown(self):
+        """关闭执行钩子/工具的线程池和进程池"""
+        for executor in (self._executor, self._process_executor):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._process_executor = None
+    
     def get_plugin(self, plugin_id: str) -> Optional[AgentBusPlugin]:
         """
         获取插件实例
@@ -718,6 +893,15 @@ class PluginManager:
         """
         return list(self._plugins.keys())
     
+    def list_discovered_plugins(self) -> List[PluginInfo]:
+        """
+        列出所有已发现的插件信息（包括尚未加载的插件）
+        
+        Returns:
+            插件信息列表
+        """
+        return list(self._discovered.values())
+    
     def list_plugin_info(self) -> List[PluginInfo]:
         """
         列出所有插件信息
@@ -799,6 +983,9 @@ class PluginManager:
             'total_tools': len(self._tool_registry),
             'total_commands': len(self._command_registry),
             'total_hooks': sum(len(hooks) for hooks in self._event_hooks.values()),
+            'discovered_plugins': len(self._discovered),
+            'discovery': dict(self._discovery_stats),
+            'plugin_metrics': self.get_plugin_metrics(),
             'plugins_by_status': {}
         }
         
@@ -9,13 +9,13 @@ AgentBus任务调度系统
 - 任务监控和状态跟踪
 """
 
-from .task_manager import TaskManager, TaskStatus, TaskPriority, Task, TaskConfig
-from .cron_handler import CronHandler, CronExpression, ScheduledTask
+from .task_manager import TaskManager, TaskStatus, TaskPriority, Task, TaskConfig, ExecutorType
+from .cron_handler import CronHandler, CronExpression, ScheduledTask, OverlapPolicy, MisfirePolicy
 from .workflow import WorkflowEngine, WorkflowStep, WorkflowStatus, Workflow, WorkflowContext, StepType
 
 __version__ = "1.0.0"
 __all__ = [
-    "TaskManager", "Task", "TaskConfig", "TaskStatus", "TaskPriority",
-    "CronHandler", "CronExpression", "ScheduledTask",
+    "TaskManager", "Task", "TaskConfig", "TaskStatus", "TaskPriority", "ExecutorType",
+    "CronHandler", "CronExpression", "ScheduledTask", "OverlapPolicy", "MisfirePolicy",
     "WorkflowEngine", "Workflow", "WorkflowStep", "WorkflowContext", "WorkflowStatus", "StepType"
 ]
\ No newline at end of file
@@ -6,16 +6,25 @@ Cron定时器处理器
 
 import asyncio
 import re
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Callable, Any
+from datetime import datetime, timedelta, tzinfo
+from datetime import timezone as dt_timezone
+from typing import Dict, List, Optional, Callable, Any, Set, Union
 import logging
 from dataclasses import dataclass
 from enum import Enum
 import uuid
+import functools
+import heapq
+import itertools
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 
 class CronField(Enum):
     """Cron字段枚举"""
+    SECOND = "second"
     MINUTE = "minute"
     HOUR = "hour"
     DAY_OF_MONTH = "day_of_month"
@@ -23,97 +32,270 @@ class CronField(Enum):
     DAY_OF_WEEK = "day_of_week"
 
 
+# 各字段取值范围及可用的名称别名
+_FIELD_RANGES = {
+    "second": (0, 59),
+    "minute": (0, 59),
+    "hour": (0, 23),
+    "day_of_month": (1, 31),
+    "month": (1, 12),
+    "day_of_week": (0, 7),
+}
+
+_MONTH_NAMES = {
+    name: index + 1
+    for index, name in enumerate(
+        ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+    )
+}
+
+# 星期: 0和7都表示周日, 1表示周一（兼容旧实现的 周一=1, 周日=7）
+_WEEKDAY_NAMES = {
+    name: index
+    for index, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])
+}
+
+# 查找下次运行时间时最多向后搜索的年数（如 2月30日 永远不会触发）
+_MAX_SEARCH_YEARS = 8
+
+
+_FIELD_NAMES = {
+    "month": _MONTH_NAMES,
+    "day_of_week": _WEEKDAY_NAMES,
+}
+
+
+@lru_cache(maxsize=4096)
+def _compile_cached(field: str, pattern: str) -> int:
+    """按字段名编译并缓存位图，大量任务共享相同字段时只解析一次"""
+    min_val, max_val = _FIELD_RANGES[field]
+    mask = _compile_field(pattern, min_val, max_val, _FIELD_NAMES.get(field))
+    if field == "day_of_week" and mask & (1 << 7):
+        # 7与0同为周日，统一折叠到第0位
+        mask = (mask | 1) & ~(1 << 7)
+    return mask
+
+
+def _compile_field(pattern: str, min_val: int, max_val: int,
+                   names: Optional[Dict[str, int]] = None) -> int:
+    """把单个cron字段编译为位图（第n位为1表示取值n匹配）"""
+    mask = 0
+    for part in pattern.strip().lower().split(","):
+        part = part.strip()
+        if not part:
+            raise ValueError(f"Empty element in cron field '{pattern}'")
+
+        step = 1
+        has_step = "/" in part
+        if has_step:
+            part, step_text = part.split("/", 1)
+            step = _parse_value(step_text, 1, max_val, None)
+            if step <= 0:
+                raise ValueError(f"Invalid step in cron field '{pattern}'")
+
+        if part in ("*", "?"):
+            start, end = min_val, max_val
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start = _parse_value(start_text, min_val, max_val, names)
+            end = _parse_value(end_text, min_val, max_val, names)
+            if start > end:
+                raise ValueError(f"Invalid range in cron field '{pattern}'")
+        else:
+            start = _parse_value(part, min_val, max_val, names)
+            # 与旧实现一致: "a/n" 表示从a开始每n个单位
+            end = max_val if has_step else start
+
+        for value in range(start, end + 1, step):
+            mask |= 1 << value
+    return mask
+
+
+def _parse_value(text: str, min_val: int, max_val: int,
+                 names: Optional[Dict[str, int]]) -> int:
+    """解析字段中的单个数值或名称"""
+    text = text.strip()
+    if names and text in names:
+        return names[text]
+    try:
+        value = int(text)
+    except ValueError:
+        raise ValueError(f"Invalid cron value: '{text}'")
+    if not min_val <= value <= max_val:
+        raise ValueError(f"Cron value {value} out of range [{min_val}, {max_val}]")
+    return value
+
+
+def _next_bit(mask: int, value: int) -> Optional[int]:
+    """返回位图中 >= value 的最小取值，不存在时返回None"""
+    shifted = mask >> value
+    if not shifted:
+        return None
+    return value + (shifted & -shifted).bit_length() - 1
+
+
+def _resolve_timezone(tz: Union[str, tzinfo, None]) -> Optional[tzinfo]:
+    """把时区名称解析为tzinfo"""
+    if tz is None or isinstance(tz, tzinfo):
+        return tz
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(tz)
+    except Exception as e:
+        raise ValueError(f"Unknown timezone: {tz} ({e})")
+
+
 @dataclass
 class CronExpression:
-    """Cron表达式类"""
+    """Cron表达式类
+
+    表达式在构造时编译为各字段的位图，get_next_run 按 月→日→时→分→秒
+    逐字段直接跳到下一个匹配值，而不是逐秒扫描。
+    5部分表达式在每分钟第0秒触发；6部分表达式首字段为秒。
+    指定 timezone 时按该时区的本地时间计算，返回带时区的datetime。
+    """
     expression: str
     minute: str = "*"
     hour: str = "*"
     day_of_month: str = "*"
     month: str = "*"
     day_of_week: str = "*"
+    second: str = "0"
+    timezone: Union[str, tzinfo, None] = None
     
     def __post_init__(self):
         parts = self.expression.strip().split()
         
-        # 支持5部分或6部分cron表达式（忽略秒部分）
+        # 支持5部分或6部分cron表达式（6部分时首字段为秒）
         if len(parts) == 5:
             self.minute, self.hour, self.day_of_month, self.month, self.day_of_week = parts
         elif len(parts) == 6:
-            # 6部分格式: 秒 分 时 日 月 星期，忽略秒部分
-            self.minute, self.hour, self.day_of_month, self.month, self.day_of_week = parts[1:]
+            # 6部分格式: 秒 分 时 日 月 星期
+            (self.second, self.minute, self.hour,
+             self.day_of_month, self.month, self.day_of_week) = parts
         else:
             raise ValueError(f"Invalid cron expression: {self.expression} (must have 5 or 6 parts)")
+        
+        self._tz = _resolve_timezone(self.timezone)
+        self._compile()
+    
+    def _compile(self) -> None:
+        """把各字段编译为位图"""
+        self._seconds = _compile_cached("second", self.second)
+        self._minutes = _compile_cached("minute", self.minute)
+        self._hours = _compile_cached("hour", self.hour)
+        self._days = _compile_cached("day_of_month", self.day_of_month)
+        self._months = _compile_cached("month", self.month)
+        self._weekdays = _compile_cached("day_of_week", self.day_of_week)
+        
+        # 标准cron语义: 日和星期都被限定时，满足任一即可
+        self._day_restricted = self.day_of_month.strip() not in ("*", "?")
+        self._weekday_restricted = self.day_of_week.strip() not in ("*", "?")
     
     def get_next_run(self, from_time: Optional[datetime] = None) -> Optional[datetime]:
-        """计算下次运行时间"""
+        """计算严格晚于 from_time 的下次运行时间"""
+        tz = self._tz
         if from_time is None:
-            from_time = datetime.now()
+            from_time = datetime.now(tz) if tz else datetime.now()
         
-        # 从下一秒开始计算
-        next_time = from_time + timedelta(seconds=1)
-        
-        # 最大尝试次数（防止无限循环）
-        for _ in range(10000):
-            if self._matches(next_time):
-                return next_time
-            next_time += timedelta(seconds=1)
+        result_tz = None
+        if tz is not None:
+            if from_time.tzinfo is None:
+                from_time = from_time.replace(tzinfo=tz)
+            else:
+                from_time = from_time.astimezone(tz)
+            result_tz = tz
+        elif from_time.tzinfo is not None:
+            result_tz = from_time.tzinfo
+        
+        # 在本地墙上时间上计算，从下一整秒开始
+        candidate = from_time.replace(tzinfo=None, microsecond=0) + timedelta(seconds=1)
+        
+        while True:
+            naive = self._next_naive(candidate)
+            if naive is None or result_tz is None:
+                return naive
+            
+            aware = naive.replace(tzinfo=result_tz)
+            # 夏令时跳过的时刻不存在，继续向后查找
+            roundtrip = aware.astimezone(dt_timezone.utc).astimezone(result_tz)
+            if roundtrip.replace(tzinfo=None) == naive:
+                return aware
+            candidate = naive + timedelta(seconds=1)
+    
+    def _next_naive(self, dt: datetime) -> Optional[datetime]:
+        """在不带时区的时间上逐字段跳转，返回首个 >= dt 的匹配时间"""
+        year_limit = dt.year + _MAX_SEARCH_YEARS
+        
+        while dt.year <= year_limit:
+            month = _next_bit(self._months, dt.month)
+            if month is None:
+                dt = datetime(dt.year + 1, 1, 1)
+                continue
+            if month != dt.month:
+                dt = datetime(dt.year, month, 1)
+            
+            if not self._day_matches(dt):
+                dt = self._next_day(dt)
+                continue
+            
+            hour = _next_bit(self._hours, dt.hour)
+            if hour is None:
+                dt = self._next_day(dt)
+                continue
+            if hour != dt.hour:
+                dt = dt.replace(hour=hour, minute=0, second=0)
+            
+            minute = _next_bit(self._minutes, dt.minute)
+            if minute is None:
+                dt = dt.replace(minute=0, second=0) + timedelta(hours=1)
+                continue
+            if minute != dt.minute:
+                dt = dt.replace(minute=minute, second=0)
+            
+            second = _next_bit(self._seconds, dt.second)
+            if second is None:
+                dt = dt.replace(second=0) + timedelta(minutes=1)
+                continue
+            return dt.replace(second=second)
         
         return None
     
+    @staticmethod
+    def _next_day(dt: datetime) -> datetime:
+        """跳到次日零点"""
+        return datetime(dt.year, dt.month, dt.day) + timedelta(days=1)
+    
+    def _day_matches(self, dt: datetime) -> bool:
+        """检查日期是否满足 日/星期 字段"""
+        day_ok = bool(self._days >> dt.day & 1)
+        weekday_ok = bool(self._weekdays >> ((dt.weekday() + 1) % 7) & 1)
+        if self._day_restricted and self._weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+    
     def _matches(self, dt: datetime) -> bool:
         """检查时间是否匹配cron表达式"""
         return (
-            self._match_field(self.minute, dt.minute, 0, 59) and
-            self._match_field(self.hour, dt.hour, 0, 23) and
-            self._match_field(self.day_of_month, dt.day, 1, 31) and
-            self._match_field(self.month, dt.month, 1, 12) and
-            self._match_field(self.day_of_week, dt.weekday() + 1, 1, 7)  # 周一=1, 周日=7
+            bool(self._seconds >> dt.second & 1) and
+            bool(self._minutes >> dt.minute & 1) and
+            bool(self._hours >> dt.hour & 1) and
+            bool(self._months >> dt.month & 1) and
+            self._day_matches(dt)
         )
-    
-    def _match_field(self, pattern: str, value: int, min_val: int, max_val: int) -> bool:
-        """匹配单个cron字段"""
-        pattern = pattern.strip()
-        
-        # 通配符
-        if pattern == "*":
-            return True
-        
-        # 步长（如：*/5 表示每5个单位）
-        if "/" in pattern:
-            parts = pattern.split("/")
-            if len(parts) != 2:
-                return False
-            try:
-                step = int(parts[1])
-                base = 0 if parts[0] == "*" else int(parts[0])
-                return (value - base) % step == 0 and value >= base
-            except ValueError:
-                return False
-        
-        # 范围（如：1-5 表示1到5）
-        if "-" in pattern:
-            parts = pattern.split("-")
-            if len(parts) != 2:
-                return False
-            try:
-                start, end = int(parts[0]), int(parts[1])
-                return start <= value <= end
-            except ValueError:
-                return False
-        
-        # 列表（如：1,3,5 表示1、3、5）
-        if "," in pattern:
-            for part in pattern.split(","):
-                if self._match_field(part.strip(), value, min_val, max_val):
-                    return True
-            return False
-        
-        # 单个值
-        try:
-            return int(pattern) == value
-        except ValueError:
-            return False
+
+
+class OverlapPolicy(Enum):
+    """上一次执行尚未结束时再次到期的处理策略"""
+    SKIP = "skip"        # 跳过本次触发
+    QUEUE = "queue"      # 排队，等上一次结束后执行
+    ALLOW = "allow"      # 允许并发执行
+
+
+class MisfirePolicy(Enum):
+    """错过触发时间（超过宽限期）时的处理策略"""
+    RUN_ONCE = "run_once"  # 合并错过的触发，立即补跑一次
+    SKIP = "skip"          # 放弃错过的触发，等待下一次
 
 
 @dataclass
@@ -132,6 +314,13 @@ class ScheduledTask:
     max_runs: Optional[int] = None
     timeout: Optional[float] = None
     metadata: Dict[str, Any] = None
+    overlap_policy: OverlapPolicy = OverlapPolicy.SKIP
+    misfire_policy: MisfirePolicy = MisfirePolicy.RUN_ONCE
+    misfire_grace_time: Optional[float] = None
+    active_runs: int = 0       # 已派发且未结束的执行数
+    pending_runs: int = 0      # 已派发但尚未开始的执行数
+    skipped_runs: int = 0
+    misfired_runs: int = 0
     
     def __post_init__(self):
         if self.args is None:
@@ -140,12 +329,28 @@ class ScheduledTask:
             self.kwargs = {}
         if self.metadata is None:
             self.metadata = {}
+        self.overlap_policy = OverlapPolicy(self.overlap_policy)
+        self.misfire_policy = MisfirePolicy(self.misfire_policy)
+        self._run_lock: Optional[asyncio.Lock] = None
 
 
 class CronHandler:
-    """Cron定时器处理器"""
+    """Cron定时器处理器
+
+    到期时间保存在最小堆中，调度循环精确休眠到下一个到期任务（或被新增/启用任务唤醒），
+    到期任务派发到有界的工作池中并发执行，不会因单个慢任务阻塞其它任务。
+    """
     
-    def __init__(self, task_manager=None):
+    # 单次休眠上限，防止系统时钟跳变后长时间不检查
+    MAX_SLEEP = 60.0
+    
+    def __init__(
+        self,
+        task_manager=None,
+        max_workers: int = 10,
+        misfire_grace_time: float = 1.0,
+        shutdown_timeout: float = 5.0
+    ):
         self.scheduled_tasks: Dict[str, ScheduledTask] = {}
         self.running = False
         self.task_manager = task_manager
@@ -155,12 +360,37 @@ class CronHandler:
         # 任务执行回调
         self.execution_callbacks: List[Callable] = []
         
+        # 到期堆: (计划触发时间戳, 序号, 任务ID)，过期条目在弹出时惰性丢弃
+        self._heap: List[tuple] = []
+        self._heap_seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        
+        # 有界工作池
+        self.max_workers = max_workers
+        self.misfire_grace_time = misfire_grace_time
+        self.shutdown_timeout = shutdown_timeout
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: Set[asyncio.Task] = set()
+        
+        # 调度延迟（实际开始时间 - 计划时间，秒）
+        self._lag_samples: deque = deque(maxlen=1024)
+        self._lag_count = 0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+        
     async def start(self):
         """启动定时器"""
         if self.running:
             return
         
         self.running = True
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.max_workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="cron-worker"
+        )
+        self._rebuild_heap()
         self._scheduler_task = asyncio.create_task(self._scheduler_loop())
         
         self.logger.info("CronHandler started")
@@ -178,6 +408,20 @@ class CronHandler:
             except asyncio.CancelledError:
                 pass
         
+        # 等待正在执行的任务结束，超时后取消
+        if self._inflight:
+            done, pending = await asyncio.wait(
+                set(self._inflight), timeout=self.shutdown_timeout
+            )
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        
         self.logger.info("CronHandler stopped")
     
     def add_scheduled_task(
@@ -190,33 +434,40 @@ class CronHandler:
         enabled: bool = True,
         max_runs: Optional[int] = None,
         timeout: Optional[float] = None,
-        task_id: Optional[str] = None
+        task_id: Optional[str] = None,
+        overlap_policy: Union[OverlapPolicy, str] = OverlapPolicy.SKIP,
+        misfire_policy: Union[MisfirePolicy, str] = MisfirePolicy.RUN_ONCE,
+        misfire_grace_time: Optional[float] = None,
+        timezone: Optional[str] = None
     ) -> str:
         """添加定时任务"""
         if task_id is None:
             task_id = str(uuid.uuid4())
         
         try:
-            cron_expr = CronExpression(cron_expression)
+            cron_expr = CronExpression(cron_expression, timezone=timezone)
+            task = ScheduledTask(
+                id=task_id,
+                name=name,
+                cron_expression=cron_expr,
+                func=func,
+                args=args or (),
+                kwargs=kwargs or {},
+                enabled=enabled,
+                max_runs=max_runs,
+                timeout=timeout,
+                overlap_policy=overlap_policy,
+                misfire_policy=misfire_policy,
+                misfire_grace_time=misfire_grace_time
+            )
         except ValueError as e:
             raise ValueError(f"Invalid cron expression: {e}")
         
-        task = ScheduledTask(
-            id=task_id,
-            name=name,
-            cron_expression=cron_expr,
-            func=func,
-            args=args or (),
-            kwargs=kwargs or {},
-            enabled=enabled,
-            max_runs=max_runs,
-            timeout=timeout
-        )
-        
         # 计算下次运行时间
         task.next_run = cron_expr.get_next_run()
         
         self.scheduled_tasks[task_id] = task
+        self._push(task)
         
         self.logger.info(f"Scheduled task added: {task_id} - {name} ({cron_expression})")
         return task_id
@@ -235,6 +486,7 @@ class CronHandler:
             task = self.scheduled_tasks[task_id]
             task.enabled = True
             task.next_run = task.cron_expression.get_next_run()
+            self._push(task)
             self.logger.info(f"Scheduled task enabled: {task_id}")
             return True
         return False
@@ -262,16 +514,14 @@ class CronHandler:
     
     def get_next_runs(self, count: int = 10) -> List[tuple]:
         """获取下次运行的任务"""
-        upcoming = []
-        
-        for task in self.scheduled_tasks.values():
-            if task.enabled and task.next_run:
-                upcoming.append((task.id, task.name, task.next_run))
-        
-        # 按时间排序
-        upcoming.sort(key=lambda x: x[2])
+        upcoming = [
+            (task.next_run.timestamp(), task.id, task.name, task.next_run)
+            for task in self.scheduled_tasks.values()
+            if task.enabled and task.next_run
+        ]
         
-        return upcoming[:count]
+        # 按时间排序（带时区与不带时区的时间统一按时间戳比较）
+        return [entry[1:] for entry in heapq.nsmallest(count, upcoming)]
     
     def run_task_now(self, task_id: str) -> bool:
         """立即运行任务"""
@@ -281,7 +531,7 @@ class CronHandler:
         task = self.scheduled_tasks[task_id]
         
         # 异步执行任务
-        asyncio.create_task(self._execute_scheduled_task(task))
+        self._dispatch(task, time.time())
         
         self.logger.info(f"Scheduled task run manually: {task_id}")
         return True
@@ -290,39 +540,136 @@ class CronHandler:
         """添加任务执行回调"""
         self.execution_callbacks.append(callback)
     
+    def _push(self, task: ScheduledTask):
+        """把任务的下次运行时间压入到期堆，并唤醒调度循环"""
+        if not (task.enabled and task.next_run):
+            return
+        heapq.heappush(
+            self._heap, (task.next_run.timestamp(), next(self._heap_seq), task.id)
+        )
+        if self._wakeup is not None and self._heap[0][2] == task.id:
+            self._wakeup.set()
+    
+    def _rebuild_heap(self):
+        """按当前任务状态重建到期堆"""
+        self._heap = [
+            (task.next_run.timestamp(), next(self._heap_seq), task.id)
+            for task in self.scheduled_tasks.values()
+            if task.enabled and task.next_run
+        ]
+        heapq.heapify(self._heap)
+    
     async def _scheduler_loop(self):
         """调度器主循环"""
         while self.running:
             try:
-                now = datetime.now()
-                
-                # 检查哪些任务需要执行
-                tasks_to_run = []
-                
-                for task in self.scheduled_tasks.values():
-                    if (task.enabled and 
-                        task.next_run and 
-                        now >= task.next_run):
-                        
-                        # 检查是否达到最大运行次数
-                        if task.max_runs is not None and task.run_count >= task.max_runs:
-                            task.enabled = False
-                            task.next_run = None
-                            continue
-                        
-                        tasks_to_run.append(task)
+                self._wakeup.clear()
+                now = time.time()
                 
-                # 执行到期的任务
-                for task in tasks_to_run:
-                    await self._execute_scheduled_task(task)
+                # 弹出所有到期条目
+                while self._heap and self._heap[0][0] <= now:
+                    planned, _, task_id = heapq.heappop(self._heap)
+                    task = self.scheduled_tasks.get(task_id)
+                    # 任务已删除、禁用或被重新调度时条目已过期
+                    if (task is None or not task.enabled or task.next_run is None
+                            or task.next_run.timestamp() != planned):
+                        continue
+                    self._fire(task, planned, now)
                 
-                # 等待下次检查
-                await asyncio.sleep(1)
+                # 精确休眠到下一个到期任务
+                delay = self.MAX_SLEEP
+                if self._heap:
+                    delay = min(max(self._heap[0][0] - time.time(), 0), self.MAX_SLEEP)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
                 
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 self.logger.error(f"Scheduler loop error: {e}")
                 await asyncio.sleep(5)  # 出错后等待更长时间
     
+    def _fire(self, task: ScheduledTask, planned: float, now: float):
+        """处理一次到期触发: 检查运行次数、错过触发和并发策略，并重新调度"""
+        # 检查是否达到最大运行次数
+        if task.max_runs is not None and task.run_count + task.pending_runs >= task.max_runs:
+            task.enabled = False
+            task.next_run = None
+            return
+        
+        # 从当前时间计算下次运行时间，暂停期间错过的触发合并为一次
+        task.next_run = task.cron_expression.get_next_run()
+        self._push(task)
+        
+        grace = task.misfire_grace_time
+        if grace is None:
+            grace = self.misfire_grace_time
+        if now - planned > grace:
+            task.misfired_runs += 1
+            self.logger.warning(
+                f"Scheduled task misfired: {task.id} - {task.name} "
+                f"({now - planned:.1f}s late)"
+            )
+            if task.misfire_policy == MisfirePolicy.SKIP:
+                return
+        
+        if task.active_runs and task.overlap_policy == OverlapPolicy.SKIP:
+            task.skipped_runs += 1
+            self.logger.debug(f"Scheduled task still running, skipped: {task.id}")
+            return
+        
+        self._dispatch(task, planned)
+    
+    def _dispatch(self, task: ScheduledTask, planned: float):
+        """把任务派发到工作池"""
+        task.active_runs += 1
+        task.pending_runs += 1
+        worker = asyncio.create_task(self._run_dispatched(task, planned))
+        self._inflight.add(worker)
+        worker.add_done_callback(self._inflight.discard)
+    
+    async def _run_dispatched(self, task: ScheduledTask, planned: float):
+        """在工作池中执行任务，按并发策略排队"""
+        started = False
+        try:
+            if task.overlap_policy == OverlapPolicy.QUEUE:
+                if task._run_lock is None:
+                    task._run_lock = asyncio.Lock()
+                async with task._run_lock:
+                    async with self._worker_slot():
+                        started = True
+                        await self._start_run(task, planned)
+            else:
+                async with self._worker_slot():
+                    started = True
+                    await self._start_run(task, planned)
+        finally:
+            if not started:
+                task.pending_runs -= 1
+            task.active_runs -= 1
+    
+    def _worker_slot(self):
+        """获取一个工作池槽位"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        return self._semaphore
+    
+    async def _start_run(self, task: ScheduledTask, planned: float):
+        """记录调度延迟并执行"""
+        task.pending_runs -= 1
+        self._record_lag(time.time() - planned)
+        await self._execute_scheduled_task(task)
+    
+    def _record_lag(self, lag: float):
+        """记录一次调度延迟"""
+        lag = max(lag, 0.0)
+        self._lag_samples.append(lag)
+        self._lag_count += 1
+        self._lag_total += lag
+        self._lag_max = max(self._lag_max, lag)
+    
     async def _execute_scheduled_task(self, task: ScheduledTask):
         """执行定时任务"""
         start_time = datetime.now()
@@ -332,35 +679,25 @@ class CronHandler:
             task.last_run = start_time
             task.run_count += 1
             
-            # 执行任务函数
+            # 执行任务函数，同步函数放到工作线程中，避免阻塞调度循环
+            if asyncio.iscoroutinefunction(task.func):
+                call = task.func(*task.args, **task.kwargs)
+            else:
+                call = asyncio.get_running_loop().run_in_executor(
+                    self._executor, functools.partial(task.func, *task.args, **task.kwargs)
+                )
+            
             if task.timeout:
                 # 带超时的执行
                 try:
-                    if asyncio.iscoroutinefunction(task.func):
-                        result = await asyncio.wait_for(
-                            task.func(*task.args, **task.kwargs),
-                            timeout=task.timeout
-                        )
-                    else:
-                        result = await asyncio.wait_for(
-                            asyncio.get_event_loop().run_in_executor(
-                                None, task.func, *task.args, **task.kwargs
-                            ),
-                            timeout=task.timeout
-                        )
+                    result = await asyncio.wait_for(call, timeout=task.timeout)
                 except asyncio.TimeoutError:
                     raise TimeoutError(f"Task {task.id} timed out after {task.timeout} seconds")
             else:
-                # 正常执行
-                if asyncio.iscoroutinefunction(task.func):
-                    result = await task.func(*task.args, **task.kwargs)
-                else:
-                    result = task.func(*task.args, **task.kwargs)
+                result = await call
             
-            # 计算下次运行时间
-            if task.enabled and (task.max_runs is None or task.run_count < task.max_runs):
-                task.next_run = task.cron_expression.get_next_run()
-            else:
+            # 达到最大运行次数后停用
+            if task.max_runs is not None and task.run_count >= task.max_runs:
                 task.enabled = False
                 task.next_run = None
             
@@ -390,12 +727,32 @@ class CronHandler:
                 except Exception as cb_error:
                     self.logger.error(f"Error callback error: {cb_error}")
     
+    def get_lag_statistics(self) -> Dict[str, Any]:
+        """获取调度延迟统计（秒）"""
+        samples = sorted(self._lag_samples)
+        
+        def percentile(q: float) -> float:
+            if not samples:
+                return 0.0
+            return samples[min(int(q * len(samples)), len(samples) - 1)]
+        
+        return {
+            'count': self._lag_count,
+            'avg': self._lag_total / self._lag_count if self._lag_count else 0.0,
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'max': self._lag_max,
+            'last': self._lag_samples[-1] if self._lag_samples else None
+        }
+    
     def get_statistics(self) -> Dict[str, Any]:
         """获取调度器统计信息"""
-        total_tasks = len(self.scheduled_tasks)
-        enabled_tasks = sum(1 for t in self.scheduled_tasks.values() if t.enabled)
+        tasks = list(self.scheduled_tasks.values())
+        total_tasks = len(tasks)
+        enabled_tasks = sum(1 for t in tasks if t.enabled)
         
-        total_runs = sum(t.run_count for t in self.scheduled_tasks.values())
+        total_runs = sum(t.run_count for t in tasks)
         
         # 计算下次运行的任务
         next_runs = self.get_next_runs()
@@ -406,7 +763,13 @@ class CronHandler:
             'disabled_tasks': total_tasks - enabled_tasks,
             'total_runs': total_runs,
             'upcoming_runs': len(next_runs),
-            'next_run': next_runs[0][2] if next_runs else None
+            'next_run': next_runs[0][2] if next_runs else None,
+            'max_workers': self.max_workers,
+            'active_runs': sum(t.active_runs for t in tasks),
+            'pending_runs': sum(t.pending_runs for t in tasks),
+            'skipped_runs': sum(t.skipped_runs for t in tasks),
+            'misfired_runs': sum(t.misfired_runs for t in tasks),
+            'scheduling_lag': self.get_lag_statistics()
         }
     
     @staticmethod
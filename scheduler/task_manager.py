@@ -10,14 +10,20 @@
 """
 
 import asyncio
+import functools
+import importlib
 import json
+import os
+import pickle
+import sqlite3
 import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Set, Union
 import logging
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields
 import threading
 import time
 
@@ -34,6 +40,14 @@ class TaskStatus(Enum):
     TIMEOUT = "timeout"
 
 
+class ExecutorType(Enum):
+    """任务函数的执行位置"""
+    AUTO = "auto"        # 协程在事件循环中执行，同步函数放到线程池
+    THREAD = "thread"    # 线程池（阻塞IO类同步函数）
+    PROCESS = "process"  # 进程池（CPU密集型函数，函数与参数需可pickle）
+    INLINE = "inline"    # 直接在事件循环中调用（极短的同步函数）
+
+
 class TaskPriority(Enum):
     """任务优先级"""
     LOW = 1
@@ -54,12 +68,30 @@ class TaskConfig:
     retry_backoff: float = 2.0  # 重试退避倍数
     description: str = ""
     metadata: Dict[str, Any] = None
+    executor: ExecutorType = ExecutorType.AUTO
 
     def __post_init__(self):
         if self.dependencies is None:
             self.dependencies = []
         if self.metadata is None:
             self.metadata = {}
+        self.executor = ExecutorType(self.executor)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可JSON序列化的字典"""
+        data = {f.name: getattr(self, f.name) for f in fields(self)}
+        data['dependencies'] = list(self.dependencies)
+        data['priority'] = self.priority.value
+        data['executor'] = self.executor.value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TaskConfig':
+        """从字典重建配置"""
+        data = dict(data)
+        data['priority'] = TaskPriority(data.get('priority', TaskPriority.NORMAL.value))
+        data['executor'] = ExecutorType(data.get('executor', ExecutorType.AUTO.value))
+        return cls(**data)
 
 
 @dataclass
@@ -115,6 +147,7 @@ class Task:
         """转换为字典格式"""
         data = asdict(self)
         data['status'] = self.status.value
+        data['config'] = self.config.to_dict()
         data['priority'] = self.config.priority.value
         data['created_at'] = self.created_at.isoformat()
         data['updated_at'] = self.updated_at.isoformat()
@@ -128,10 +161,235 @@ class Task:
         return data
 
 
+def _function_ref(func: Callable) -> Optional[str]:
+    """返回可导入函数的引用（module:qualname），闭包和lambda返回None"""
+    module = getattr(func, '__module__', None)
+    qualname = getattr(func, '__qualname__', None)
+    if not module or not qualname or '<' in qualname:
+        return None
+    return f"{module}:{qualname}"
+
+
+def _import_function(ref: str) -> Optional[Callable]:
+    """按 module:qualname 导入函数"""
+    module_name, _, qualname = ref.partition(':')
+    try:
+        target = importlib.import_module(module_name)
+        for attr in qualname.split('.'):
+            target = getattr(target, attr)
+        return target if callable(target) else None
+    except Exception:
+        return None
+
+
+def _dump_blob(value: Any) -> Optional[bytes]:
+    """序列化任务参数，无法pickle时返回None（该任务不可在重启后恢复）"""
+    try:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return None
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+class TaskStore:
+    """基于SQLite的持久化任务队列
+
+    状态变更只在脏集合中登记任务引用，由后台线程按批次序列化并在单个事务中
+    写入（group commit），避免每次状态变化都重写一个JSON文件。
+    """
+
+    _COLUMNS = (
+        "id", "name", "status", "priority", "func_ref", "args", "kwargs", "config",
+        "created_at", "updated_at", "started_at", "completed_at", "last_error",
+        "retry_count", "result", "progress", "metadata"
+    )
+
+    def __init__(self, db_path: Path, flush_interval: float = 0.05, batch_size: int = 256,
+                 snapshot_lock: Optional[threading.RLock] = None):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.logger = logging.getLogger(__name__)
+
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                status TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                func_ref TEXT,
+                args BLOB,
+                kwargs BLOB,
+                config TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                started_at TEXT,
+                completed_at TEXT,
+                last_error TEXT,
+                retry_count INTEGER DEFAULT 0,
+                result TEXT,
+                progress REAL DEFAULT 0,
+                metadata TEXT
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)")
+        self._conn.commit()
+
+        self._db_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        # 任务对象由管理器在该锁下修改，序列化时持有同一把锁以得到一致快照
+        self._snapshot_lock = snapshot_lock or threading.RLock()
+        self._pending: Dict[str, Optional[Task]] = {}  # task_id -> 任务，None表示删除
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._flush_thread: Optional[threading.Thread] = None
+
+        self.stats = {'flushes': 0, 'rows_written': 0, 'rows_deleted': 0}
+
+    def start(self):
+        """启动后台批量写入线程"""
+        if self._flush_thread and self._flush_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._flush_thread = threading.Thread(
+            target=self._flush_loop, name="task-store-flush", daemon=True
+        )
+        self._flush_thread.start()
+
+    def stop(self):
+        """停止写入线程并落盘所有待写状态，之后的写入改为同步提交"""
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._flush_thread:
+            self._flush_thread.join()
+            self._flush_thread = None
+        self.flush()
+
+    def close(self):
+        """停止写入并关闭数据库连接"""
+        self.stop()
+        with self._db_lock:
+            self._conn.close()
+
+    def save(self, task: Task):
+        """记录任务状态变更（异步批量落盘）"""
+        with self._pending_lock:
+            self._pending[task.id] = task
+            pending = len(self._pending)
+        if pending >= self.batch_size or self._flush_thread is None:
+            self._wakeup.set()
+            if self._flush_thread is None:
+                self.flush()
+
+    def delete(self, task_id: str):
+        """记录任务删除"""
+        with self._pending_lock:
+            self._pending[task_id] = None
+        if self._flush_thread is None:
+            self.flush()
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def flush(self):
+        """把待写状态在一个事务中写入"""
+        with self._pending_lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+
+        with self._snapshot_lock:
+            upserts = [self._to_row(task) for task in batch.values() if task is not None]
+        deletes = [(task_id,) for task_id, task in batch.items() if task is None]
+        columns = ", ".join(self._COLUMNS)
+        placeholders = ", ".join("?" for _ in self._COLUMNS)
+        updates = ", ".join(f"{c}=excluded.{c}" for c in self._COLUMNS[1:])
+
+        with self._db_lock:
+            with self._conn:
+                if upserts:
+                    self._conn.executemany(
+                        f"INSERT INTO tasks ({columns}) VALUES ({placeholders}) "
+                        f"ON CONFLICT(id) DO UPDATE SET {updates}",
+                        upserts
+                    )
+                if deletes:
+                    self._conn.executemany("DELETE FROM tasks WHERE id = ?", deletes)
+        self.stats['flushes'] += 1
+        self.stats['rows_written'] += len(upserts)
+        self.stats['rows_deleted'] += len(deletes)
+
+    def load(self) -> List[Dict[str, Any]]:
+        """读取全部持久化任务行"""
+        with self._db_lock:
+            cursor = self._conn.execute(f"SELECT {', '.join(self._COLUMNS)} FROM tasks")
+            return [dict(zip(self._COLUMNS, row)) for row in cursor.fetchall()]
+
+    def _flush_loop(self):
+        while not self._stop_event.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"Task store flush error: {e}")
+
+    @staticmethod
+    def _to_row(task: Task) -> tuple:
+        # 参数无法pickle的任务只记录状态，args/kwargs 写入 NULL，重新加载时跳过
+        if task.metadata.get('recoverable', True):
+            args, kwargs = _dump_blob(task.args), _dump_blob(task.kwargs)
+        else:
+            args = kwargs = None
+        result = None
+        if task.result is not None:
+            result = json.dumps({
+                'success': task.result.success,
+                'data': task.result.data,
+                'error': task.result.error,
+                'execution_time': task.result.execution_time,
+                'retry_count': task.result.retry_count,
+                'timestamp': task.result.timestamp.isoformat()
+            }, ensure_ascii=False, default=str)
+        return (
+            task.id,
+            task.name,
+            task.status.value,
+            task.config.priority.value,
+            task.metadata.get('func_ref') or _function_ref(task.func),
+            args,
+            kwargs,
+            json.dumps(task.config.to_dict(), ensure_ascii=False, default=str),
+            task.created_at.isoformat(),
+            task.updated_at.isoformat(),
+            task.started_at.isoformat() if task.started_at else None,
+            task.completed_at.isoformat() if task.completed_at else None,
+            task.last_error,
+            task.retry_count,
+            result,
+            task.progress,
+            json.dumps(task.metadata, ensure_ascii=False, default=str)
+        )
+
+
 class TaskManager:
     """任务管理器"""
     
-    def __init__(self, storage_path: Optional[str] = None, max_workers: int = 5):
+    def __init__(
+        self,
+        storage_path: Optional[str] = None,
+        max_workers: int = 5,
+        process_workers: Optional[int] = None,
+        resume_interrupted: bool = True,
+        flush_interval: float = 0.05
+    ):
         self.storage_path = Path(storage_path) if storage_path else Path("./data/tasks")
         self.storage_path.mkdir(parents=True, exist_ok=True)
         
@@ -140,9 +398,25 @@ class TaskManager:
         self.task_lock = threading.RLock()
         self.logger = logging.getLogger(__name__)
         
-        # 线程池执行器
+        # 线程池/进程池执行器（按需创建）
         self.max_workers = max_workers
-        self.executor = None
+        self.process_workers = process_workers or os.cpu_count() or 1
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.process_executor: Optional[ProcessPoolExecutor] = None
+        
+        # 运行中任务的asyncio句柄，用于真正取消执行
+        self._running_futures: Dict[str, asyncio.Task] = {}
+        self._done_events: Dict[str, asyncio.Event] = {}
+        
+        # 可按名称引用的任务函数（用于持久化后重建任务）
+        self.function_registry: Dict[str, Callable] = {}
+        self.resume_interrupted = resume_interrupted
+        self._interrupted: List[str] = []
+        
+        # SQLite持久化任务队列
+        self.store = TaskStore(
+            self.storage_path / "tasks.db", flush_interval=flush_interval, snapshot_lock=self.task_lock
+        )
         
         # 任务事件回调
         self.task_callbacks: Dict[str, List[Callable]] = {
@@ -160,8 +434,21 @@ class TaskManager:
         
     async def start(self):
         """启动任务管理器"""
-        # 创建线程池执行器
-        self.executor = asyncio.get_event_loop().run_in_executor
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="task-worker"
+            )
+        self.store.start()
+        
+        # 此时任务函数通常已注册完毕，未能找回函数的任务给出提示
+        with self.task_lock:
+            for task in self.tasks.values():
+                if task.func is None:
+                    task.func = self._resolve_function(task.metadata.get('func_ref'))
+                if task.func is None and not self._is_finished(task):
+                    self.logger.warning(
+                        f"Task function cannot be resolved: {task.id} ({task.metadata.get('func_ref')})"
+                    )
         
         # 恢复运行中的任务
         await self._recover_running_tasks()
@@ -175,28 +462,63 @@ class TaskManager:
         for task_id in running_task_ids:
             await self.cancel_task(task_id)
         
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        if self.process_executor:
+            self.process_executor.shutdown(wait=False, cancel_futures=True)
+            self.process_executor = None
+        
+        self.store.stop()
+        
         self.logger.info("TaskManager stopped")
     
+    def register_function(self, name: str, func: Callable):
+        """注册可按名称引用的任务函数，重启后据此重建任务"""
+        self.function_registry[name] = func
+        
+        # 绑定已从存储加载、引用该名称的任务
+        ref = f"registry:{name}"
+        with self.task_lock:
+            for task in self.tasks.values():
+                if task.func is None and task.metadata.get('func_ref') == ref:
+                    task.func = func
+    
     def create_task(
         self,
         name: str,
-        func: Callable,
+        func: Union[Callable, str],
         args: tuple = None,
         kwargs: dict = None,
         config: TaskConfig = None,
         task_id: Optional[str] = None
     ) -> str:
-        """创建任务"""
+        """创建任务（func可以是已注册的函数名）"""
         if task_id is None:
             task_id = str(uuid.uuid4())
         
+        metadata = {}
+        if isinstance(func, str):
+            if func not in self.function_registry:
+                raise ValueError(f"Function not registered: {func}")
+            metadata['func_ref'] = f"registry:{func}"
+            func = self.function_registry[func]
+        
+        args = args or ()
+        kwargs = kwargs or {}
+        if _dump_blob(args) is None or _dump_blob(kwargs) is None:
+            # 仍可在本进程执行，但崩溃或重启后无法带参数恢复
+            metadata['recoverable'] = False
+            self.logger.warning(f"Task arguments are not picklable, task will not be recovered after restart: {name}")
+        
         task = Task(
             id=task_id,
             name=name,
             func=func,
-            args=args or (),
-            kwargs=kwargs or {},
-            config=config or TaskConfig()
+            args=args,
+            kwargs=kwargs,
+            config=config or TaskConfig(),
+            metadata=metadata
         )
         
         with self.task_lock:
@@ -222,6 +544,13 @@ class TaskManager:
                 self.logger.warning(f"Task cannot start: {task_id} - current status: {task.status.value}")
                 return False
             
+            if task.func is None:
+                # 函数可能在加载之后才注册
+                task.func = self._resolve_function(task.metadata.get('func_ref'))
+            if task.func is None:
+                self.logger.error(f"Task function cannot be resolved: {task_id}")
+                return False
+            
             # 检查依赖任务
             if not self._check_dependencies(task):
                 self.logger.warning(f"Task dependencies not satisfied: {task_id}")
@@ -235,9 +564,10 @@ class TaskManager:
             self.running_tasks.add(task_id)
         
         self._emit_callback('started', task)
+        self._save_task(task)
         
         # 异步执行任务
-        asyncio.create_task(self._execute_task(task))
+        self._spawn(task)
         
         self.logger.info(f"Task started: {task_id}")
         return True
@@ -257,9 +587,15 @@ class TaskManager:
             task.completed_at = datetime.now()
             task.updated_at = task.completed_at
             self.running_tasks.discard(task_id)
+            running = self._running_futures.pop(task_id, None)
+        
+        # 真正取消正在执行的协程（线程/进程中的函数无法中断，结果会被丢弃）
+        if running is not None and not running.done():
+            running.cancel()
         
         self._emit_callback('cancelled', task)
         self._save_task(task)
+        self._notify_done(task)
         
         self.logger.info(f"Task cancelled: {task_id}")
         return True
@@ -301,7 +637,7 @@ class TaskManager:
             task.updated_at = datetime.now()
         
         # 重新执行任务
-        asyncio.create_task(self._execute_task(task))
+        self._spawn(task)
         
         self._emit_callback('resumed', task)
         self._save_task(task)
@@ -344,10 +680,8 @@ class TaskManager:
             
             del self.tasks[task_id]
         
-        # 删除持久化文件
-        task_file = self.storage_path / f"{task_id}.json"
-        if task_file.exists():
-            task_file.unlink()
+        # 删除持久化记录
+        self.store.delete(task_id)
         
         self.logger.info(f"Task deleted: {task_id}")
         return True
@@ -380,36 +714,85 @@ class TaskManager:
     
     def get_task_stats(self) -> Dict[str, Any]:
         """获取任务统计信息"""
-        stats = {
-            'total': len(self.tasks),
-            'pending': 0,
-            'running': 0,
-            'completed': 0,
-            'failed': 0,
-            'cancelled': 0,
-            'paused': 0
-        }
+        stats = {'total': len(self.tasks)}
+        stats.update({status.value: 0 for status in TaskStatus})
         
         for task in self.tasks.values():
             stats[task.status.value] += 1
         
+        stats['store'] = dict(self.store.stats, pending_writes=self.store.pending_count)
         return stats
     
+    async def wait_for_task(self, task_id: str, timeout: Optional[float] = None) -> Optional[Task]:
+        """等待任务进入最终状态（完成、失败、超时或取消）"""
+        task = self.tasks.get(task_id)
+        if task is None:
+            return None
+        if not self._is_finished(task):
+            event = self._done_events.setdefault(task_id, asyncio.Event())
+            await asyncio.wait_for(event.wait(), timeout)
+        return task
+    
+    @staticmethod
+    def _is_finished(task: Task) -> bool:
+        return task.status in (
+            TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.TIMEOUT, TaskStatus.CANCELLED
+        )
+    
+    def _notify_done(self, task: Task):
+        event = self._done_events.pop(task.id, None)
+        if event is not None:
+            event.set()
+    
+    def _spawn(self, task: Task):
+        """创建执行协程并登记句柄"""
+        running = asyncio.create_task(self._execute_task(task))
+        self._running_futures[task.id] = running
+        running.add_done_callback(functools.partial(self._forget_future, task.id))
+    
+    def _forget_future(self, task_id: str, future: asyncio.Task):
+        if self._running_futures.get(task_id) is future:
+            del self._running_futures[task_id]
+    
+    def _invoke(self, task: Task):
+        """按配置选择执行位置，返回可等待对象"""
+        mode = task.config.executor
+        func = task.func
+        
+        if mode != ExecutorType.PROCESS and asyncio.iscoroutinefunction(func):
+            return func(*task.args, **task.kwargs)
+        if mode == ExecutorType.INLINE:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(func(*task.args, **task.kwargs))
+            return future
+        
+        call = functools.partial(func, *task.args, **task.kwargs)
+        if mode == ExecutorType.PROCESS:
+            if self.process_executor is None:
+                self.process_executor = ProcessPoolExecutor(max_workers=self.process_workers)
+            executor = self.process_executor
+        else:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="task-worker"
+                )
+            executor = self.executor
+        return asyncio.get_running_loop().run_in_executor(executor, call)
+    
     async def _execute_task(self, task: Task):
         """执行任务"""
         try:
             start_time = time.time()
             
-            # 检查超时
+            # 执行任务函数，超时后放弃等待（线程/进程中的函数无法被强制中断）
             if task.config.timeout:
-                # 这里应该使用asyncio.wait_for来设置超时
-                pass
-            
-            # 执行任务函数
-            if asyncio.iscoroutinefunction(task.func):
-                result_data = await task.func(*task.args, **task.kwargs)
+                result_data = await asyncio.wait_for(self._invoke(task), timeout=task.config.timeout)
             else:
-                result_data = task.func(*task.args, **task.kwargs)
+                result_data = await self._invoke(task)
+            
+            if task.status != TaskStatus.RUNNING:
+                # 执行期间已被取消或暂停
+                return
             
             execution_time = time.time() - start_time
             
@@ -423,12 +806,16 @@ class TaskManager:
             
             await self._complete_task(task, result)
             
+        except asyncio.CancelledError:
+            if task.status == TaskStatus.RUNNING:
+                raise
+            
         except asyncio.TimeoutError:
             error_msg = f"Task timeout after {task.config.timeout} seconds"
             await self._fail_task(task, error_msg, is_timeout=True)
             
         except Exception as e:
-            error_msg = str(e)
+            error_msg = str(e) or type(e).__name__
             await self._fail_task(task, error_msg)
     
     async def _complete_task(self, task: Task, result: TaskResult):
@@ -443,6 +830,7 @@ class TaskManager:
         
         self._emit_callback('completed', task)
         self._save_task(task)
+        self._notify_done(task)
         
         self.logger.info(f"Task completed: {task.id} in {result.execution_time:.2f}s")
     
@@ -464,6 +852,7 @@ class TaskManager:
                 self.logger.warning(f"Task failed, retrying in {delay:.1f}s: {task.id} - {error_msg}")
                 
                 # 安排重试
+                self._save_task(task)
                 asyncio.create_task(self._schedule_retry(task, delay))
                 return
             
@@ -482,6 +871,7 @@ class TaskManager:
         
         self._emit_callback('failed', task)
         self._save_task(task)
+        self._notify_done(task)
         
         self.logger.error(f"Task failed permanently: {task.id} - {error_msg}")
     
@@ -498,6 +888,11 @@ class TaskManager:
                 self.logger.warning(f"Task dependencies still not satisfied for retry: {task.id}")
                 task.status = TaskStatus.FAILED
                 self._save_task(task)
+                self._notify_done(task)
+                return
+            
+            if task.status != TaskStatus.RETRYING:
+                # 等待重试期间已被取消
                 return
             
             task.status = TaskStatus.RUNNING
@@ -505,7 +900,7 @@ class TaskManager:
             self.running_tasks.add(task.id)
         
         # 重新执行任务
-        asyncio.create_task(self._execute_task(task))
+        self._spawn(task)
     
     def _check_dependencies(self, task: Task) -> bool:
         """检查任务依赖"""
@@ -532,41 +927,93 @@ class TaskManager:
                     self.logger.error(f"Callback error for event {event}: {e}")
     
     def _save_task(self, task: Task):
-        """保存任务到持久化存储"""
+        """记录任务状态变更到持久化队列（批量落盘）"""
         try:
-            task_file = self.storage_path / f"{task.id}.json"
-            with open(task_file, 'w', encoding='utf-8') as f:
-                json.dump(task.to_dict(), f, indent=2, ensure_ascii=False, default=str)
+            self.store.save(task)
         except Exception as e:
             self.logger.error(f"Failed to save task {task.id}: {e}")
     
+    def _resolve_function(self, ref: Optional[str]) -> Optional[Callable]:
+        """根据持久化的函数引用找回任务函数"""
+        if not ref:
+            return None
+        if ref.startswith("registry:"):
+            return self.function_registry.get(ref[len("registry:"):])
+        return _import_function(ref)
+    
     def _load_tasks(self):
         """从持久化存储加载任务"""
         try:
-            for task_file in self.storage_path.glob("*.json"):
-                with open(task_file, 'r', encoding='utf-8') as f:
-                    task_data = json.load(f)
-                
-                # 重建Task对象
-                task_id = task_data['id']
-                # 这里需要更复杂的重建逻辑，包括datetime和枚举的转换
-                # 简化版本：只加载状态为PENDING或PAUSED的任务
-                
-                if task_data['status'] in ['pending', 'paused']:
-                    # 重新创建任务对象（这里简化处理）
-                    pass
-                    
+            rows = self.store.load()
         except Exception as e:
             self.logger.error(f"Failed to load tasks: {e}")
+            return
+        
+        for row in rows:
+            if row['args'] is None or row['kwargs'] is None:
+                # 参数未能持久化，恢复后会以空参数运行，直接丢弃
+                self.logger.warning(f"Skipping non-recoverable task {row['id']} ({row['name']}): arguments were not persisted")
+                self.store.delete(row['id'])
+                continue
+            try:
+                task = self._task_from_row(row)
+            except Exception as e:
+                self.logger.error(f"Failed to restore task {row.get('id')}: {e}")
+                continue
+            
+            # 上次进程退出时仍在运行的任务，启动时需要恢复
+            if task.status in (TaskStatus.RUNNING, TaskStatus.RETRYING):
+                self._interrupted.append(task.id)
+            self.tasks[task.id] = task
+    
+    def _task_from_row(self, row: Dict[str, Any]) -> Task:
+        """由数据库行重建Task对象"""
+        result = None
+        if row['result']:
+            result_data = json.loads(row['result'])
+            result_data['timestamp'] = _parse_time(result_data.get('timestamp'))
+            result = TaskResult(**result_data)
+        
+        metadata = json.loads(row['metadata']) if row['metadata'] else {}
+        # 已注册函数在 register_function/start 时绑定
+        func = self._resolve_function(row['func_ref'])
+        if row['func_ref'] and (func is None or row['func_ref'].startswith("registry:")):
+            metadata['func_ref'] = row['func_ref']
+        
+        return Task(
+            id=row['id'],
+            name=row['name'],
+            func=func,
+            args=pickle.loads(row['args']),
+            kwargs=pickle.loads(row['kwargs']),
+            status=TaskStatus(row['status']),
+            config=TaskConfig.from_dict(json.loads(row['config'])) if row['config'] else TaskConfig(),
+            created_at=_parse_time(row['created_at']),
+            updated_at=_parse_time(row['updated_at']),
+            started_at=_parse_time(row['started_at']),
+            completed_at=_parse_time(row['completed_at']),
+            last_error=row['last_error'],
+            retry_count=row['retry_count'] or 0,
+            result=result,
+            progress=row['progress'] or 0.0,
+            metadata=metadata
+        )
     
     async def _recover_running_tasks(self):
-        """恢复运行中的任务"""
-        # 简化处理：假设所有非最终状态的任务都需要恢复
-        for task in self.tasks.values():
-            if task.status in [TaskStatus.RUNNING, TaskStatus.RETRYING]:
-                task.status = TaskStatus.PENDING
-                task.updated_at = datetime.now()
-                self._save_task(task)
+        """恢复上次进程中断时仍在运行的任务"""
+        interrupted, self._interrupted = self._interrupted, []
+        for task_id in interrupted:
+            task = self.tasks.get(task_id)
+            if task is None or task.status not in (TaskStatus.RUNNING, TaskStatus.RETRYING):
+                continue
+            
+            task.status = TaskStatus.PENDING
+            task.updated_at = datetime.now()
+            self._save_task(task)
+            
+            if self.resume_interrupted:
+                self.logger.info(f"Resuming interrupted task: {task_id}")
+                await self.start_task(task_id)
     
     def cleanup_completed_tasks(self, max_age_days: int = 7):
         """清理已完成的任务"""
@@ -10,6 +10,8 @@
 """
 
 import asyncio
+import functools
+import heapq
 import uuid
 from datetime import datetime
 from enum import Enum
@@ -67,6 +69,7 @@ class WorkflowStep:
     status: StepStatus = StepStatus.PENDING
     result: Any = None
     error: Optional[str] = None
+    queued_at: Optional[datetime] = None
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
@@ -81,6 +84,7 @@ class WorkflowStep:
             'status': self.status.value,
             'result': self.result,
             'error': self.error,
+            'queued_at': self.queued_at.isoformat() if self.queued_at else None,
             'started_at': self.started_at.isoformat() if self.started_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'metadata': self.metadata
@@ -129,6 +133,7 @@ class Workflow:
     error: Optional[str] = None
     context: Optional[WorkflowContext] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
+    max_concurrency: Optional[int] = None
     
     def add_step(self, step: WorkflowStep):
         """添加步骤"""
@@ -155,6 +160,52 @@ class Workflow:
         
         return ready_steps
     
+    def get_step_dependencies(self, step_id: str) -> List[str]:
+        """获取步骤的全部依赖（工作流依赖表与步骤自身声明的并集）"""
+        deps = list(self.dependencies.get(step_id, []))
+        for dep in self.steps[step_id].dependencies:
+            if dep not in deps:
+                deps.append(dep)
+        return deps
+    
+    def build_execution_graph(self):
+        """构建拓扑索引: 返回 (入度, 后继表, 关键路径优先级)
+        
+        优先级为从该步骤到任一终点的最长路径耗时，耗时取
+        metadata['estimated_duration']（默认1）。存在环时抛出ValueError。
+        """
+        in_degree: Dict[str, int] = {}
+        dependents: Dict[str, List[str]] = defaultdict(list)
+        for step_id in self.steps:
+            deps = self.get_step_dependencies(step_id)
+            for dep in deps:
+                if dep not in self.steps:
+                    raise ValueError(f"Step {step_id} depends on unknown step: {dep}")
+                dependents[dep].append(step_id)
+            in_degree[step_id] = len(deps)
+        
+        # Kahn拓扑排序
+        remaining = dict(in_degree)
+        order = [step_id for step_id, degree in remaining.items() if degree == 0]
+        for step_id in order:
+            for child in dependents[step_id]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    order.append(child)
+        if len(order) != len(self.steps):
+            cyclic = sorted(step_id for step_id, degree in remaining.items() if degree > 0)
+            raise ValueError(f"Workflow has cyclic dependencies: {cyclic}")
+        
+        # 逆拓扑序计算关键路径长度
+        priority: Dict[str, float] = {}
+        for step_id in reversed(order):
+            cost = float(self.steps[step_id].metadata.get('estimated_duration', 1.0))
+            priority[step_id] = cost + max(
+                (priority[child] for child in dependents[step_id]), default=0.0
+            )
+        
+        return in_degree, dependents, priority
+    
     def is_completed(self) -> bool:
         """检查工作流是否完成"""
         return all(step.status == StepStatus.COMPLETED for step in self.steps.values())
@@ -176,19 +227,34 @@ class Workflow:
             'started_at': self.started_at.isoformat() if self.started_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'error': self.error,
-            'metadata': self.metadata
+            'metadata': self.metadata,
+            'max_concurrency': self.max_concurrency
         }
 
 
 class WorkflowEngine:
-    """工作流引擎"""
+    """工作流引擎
+
+    步骤按拓扑索引执行: 依赖计数归零的步骤进入就绪队列，按关键路径长度优先，
+    在单工作流并发上限和全局并发上限内并发运行。
+    """
     
-    def __init__(self, task_manager=None):
+    def __init__(
+        self,
+        task_manager=None,
+        max_concurrent_steps: int = 32,
+        max_workflow_concurrency: int = 8
+    ):
         self.workflows: Dict[str, Workflow] = {}
         self.running_workflows: Set[str] = set()
         self.task_manager = task_manager
         self.logger = logging.getLogger(__name__)
         
+        # 并发上限: 全局（跨工作流）与单工作流默认值
+        self.max_concurrent_steps = max_concurrent_steps
+        self.max_workflow_concurrency = max_workflow_concurrency
+        self._step_semaphore: Optional[asyncio.Semaphore] = None
+        
         # 工作流事件回调
         self.callbacks = {
             'workflow_started': [],
@@ -203,7 +269,8 @@ class WorkflowEngine:
         self,
         name: str,
         description: str = "",
-        metadata: Dict[str, Any] = None
+        metadata: Dict[str, Any] = None,
+        max_concurrency: Optional[int] = None
     ) -> str:
         """创建工作流"""
         workflow_id = str(uuid.uuid4())
@@ -212,7 +279,8 @@ class WorkflowEngine:
             id=workflow_id,
             name=name,
             description=description,
-            metadata=metadata or {}
+            metadata=metadata or {},
+            max_concurrency=max_concurrency
         )
         
         self.workflows[workflow_id] = workflow
@@ -371,14 +439,23 @@ class WorkflowEngine:
         workflow.started_at = datetime.now()
         workflow.context = context or WorkflowContext(workflow_id=workflow_id)
         
-        self.running_workflows.add(workflow_id)
-        
         # 触发工作流开始事件
         self._emit_callback('workflow_started', workflow)
         
+        return await self._run_workflow(workflow)
+    
+    async def _run_workflow(self, workflow: Workflow) -> bool:
+        """执行（或恢复执行）工作流，并根据结果更新状态"""
+        workflow_id = workflow.id
+        self.running_workflows.add(workflow_id)
+        
         try:
             success = await self._execute_workflow_steps(workflow)
             
+            # 执行期间被暂停或取消：保持该状态，暂停的工作流可恢复
+            if workflow.status in (WorkflowStatus.PAUSED, WorkflowStatus.CANCELLED):
+                return False
+            
             if success:
                 workflow.status = WorkflowStatus.COMPLETED
                 workflow.completed_at = datetime.now()
@@ -402,37 +479,72 @@ class WorkflowEngine:
             self.running_workflows.discard(workflow_id)
     
     async def _execute_workflow_steps(self, workflow: Workflow) -> bool:
-        """执行工作流步骤"""
-        completed_steps = set()
+        """按拓扑索引并发执行工作流步骤"""
+        in_degree, dependents, priority = workflow.build_execution_graph()
+        limit = workflow.max_concurrency or self.max_workflow_concurrency
         
-        while True:
-            # 获取准备就绪的步骤
-            ready_steps = workflow.get_ready_steps()
-            
-            if not ready_steps:
-                break
-            
-            # 执行准备就绪的步骤
-            for step_id in ready_steps:
-                if step_id not in completed_steps:
-                    success = await self._execute_step(workflow, step_id)
-                    completed_steps.add(step_id)
-                    
-                    if not success:
-                        return False
-            
-            # 检查工作流是否完成
-            if workflow.is_completed():
-                return True
-            
-            # 如果没有可执行的步骤但还有未完成的步骤，说明有循环依赖或条件阻塞
-            pending_steps = [sid for sid, step in workflow.steps.items() 
-                           if step.status == StepStatus.PENDING]
-            
-            if not pending_steps:
-                break
+        # 就绪队列: (-关键路径长度, 入队序号, 步骤ID)
+        ready: List[tuple] = []
+        sequence = 0
+        
+        def enqueue(step_id: str):
+            nonlocal sequence
+            workflow.steps[step_id].queued_at = datetime.now()
+            heapq.heappush(ready, (-priority[step_id], sequence, step_id))
+            sequence += 1
+        
+        # 已完成的步骤（如恢复执行时）直接释放其后继
+        for step_id, step in workflow.steps.items():
+            if step.status == StepStatus.COMPLETED:
+                for child in dependents[step_id]:
+                    in_degree[child] -= 1
         
-        return workflow.is_completed()
+        for step_id, degree in in_degree.items():
+            if degree == 0 and workflow.steps[step_id].status == StepStatus.PENDING:
+                enqueue(step_id)
+        
+        running: Dict[asyncio.Task, str] = {}
+        failed = False
+        
+        try:
+            while ready or running:
+                # 失败或取消后不再启动新步骤，只等待已启动的步骤结束
+                while (ready and len(running) < limit and not failed
+                       and workflow.status == WorkflowStatus.RUNNING):
+                    _, _, step_id = heapq.heappop(ready)
+                    task = asyncio.create_task(self._run_step_slot(workflow, step_id))
+                    running[task] = step_id
+                
+                if not running:
+                    break
+                
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    step_id = running.pop(finished)
+                    if not finished.result():
+                        failed = True
+                        continue
+                    for child in dependents[step_id]:
+                        in_degree[child] -= 1
+                        if in_degree[child] == 0:
+                            enqueue(child)
+        finally:
+            # 被取消时不遗留孤立的步骤任务
+            for task in running:
+                task.cancel()
+        
+        return not failed and workflow.is_completed()
+    
+    def _get_step_semaphore(self) -> asyncio.Semaphore:
+        """获取全局步骤并发信号量"""
+        if self._step_semaphore is None:
+            self._step_semaphore = asyncio.Semaphore(self.max_concurrent_steps)
+        return self._step_semaphore
+    
+    async def _run_step_slot(self, workflow: Workflow, step_id: str) -> bool:
+        """占用全局并发槽位后执行步骤"""
+        async with self._get_step_semaphore():
+            return await self._execute_step(workflow, step_id)
     
     async def _execute_step(self, workflow: Workflow, step_id: str) -> bool:
         """执行单个步骤"""
@@ -447,13 +559,8 @@ class WorkflowEngine:
         self._emit_callback('step_started', workflow, step)
         
         try:
-            # 执行步骤函数
-            if asyncio.iscoroutinefunction(step.func):
-                result = await self._execute_step_with_retry(step, workflow.context, workflow)
-            else:
-                result = await asyncio.get_event_loop().run_in_executor(
-                    None, self._execute_step_with_retry, step, workflow.context, workflow
-                )
+            # 执行步骤函数（同步函数在重试逻辑内部放到线程池执行）
+            result = await self._execute_step_with_retry(step, workflow.context, workflow)
             
             # 设置步骤结果
             step.result = result
@@ -462,6 +569,7 @@ class WorkflowEngine:
             
             # 保存到上下文
             workflow.context.set_step_result(step_id, result)
+            workflow.context.execution_path.append(step_id)
             
             # 触发步骤完成事件
             self._emit_callback('step_completed', workflow, step)
@@ -515,16 +623,18 @@ class WorkflowEngine:
                     else:
                         result = await asyncio.wait_for(
                             asyncio.get_event_loop().run_in_executor(
-                                None, step.func, *args, **step.kwargs
+                                None, functools.partial(step.func, *args, **step.kwargs)
                             ),
                             timeout=step.timeout
                         )
                 else:
-                    # 正常执行
+                    # 正常执行，同步函数放到线程池避免阻塞其它并发步骤
                     if asyncio.iscoroutinefunction(step.func):
                         result = await step.func(*args, **step.kwargs)
                     else:
-                        result = step.func(*args, **step.kwargs)
+                        result = await asyncio.get_event_loop().run_in_executor(
+                            None, functools.partial(step.func, *args, **step.kwargs)
+                        )
                 
                 return result
                 
@@ -590,8 +700,9 @@ class WorkflowEngine:
         
         workflow.status = WorkflowStatus.RUNNING
         
-        # 重新执行工作流
-        asyncio.create_task(self.execute_workflow(workflow_id, workflow.context))
+        # 暂停前启动的步骤仍在运行时，原执行循环会继续调度；否则从未完成的步骤继续执行
+        if workflow_id not in self.running_workflows:
+            asyncio.create_task(self._run_workflow(workflow))
         
         self.logger.info(f"Workflow resumed: {workflow_id}")
         return True
@@ -609,6 +720,55 @@ class WorkflowEngine:
         
         return workflows
     
+    def get_workflow_timeline(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        """获取工作流运行时间线（相对工作流开始的秒数），用于分析延迟"""
+        workflow = self.workflows.get(workflow_id)
+        if workflow is None:
+            return None
+        
+        origin = workflow.started_at
+        
+        def offset(moment: Optional[datetime]) -> Optional[float]:
+            if moment is None or origin is None:
+                return None
+            return (moment - origin).total_seconds()
+        
+        steps = []
+        for step in workflow.steps.values():
+            queued, started, finished = (
+                offset(step.queued_at), offset(step.started_at), offset(step.completed_at)
+            )
+            steps.append({
+                'step_id': step.id,
+                'name': step.name,
+                'status': step.status.value,
+                'queued': queued,
+                'started': started,
+                'finished': finished,
+                'wait_time': started - queued if started is not None and queued is not None else None,
+                'run_time': finished - started if finished is not None and started is not None else None
+            })
+        steps.sort(key=lambda entry: (entry['queued'] is None, entry['queued'] or 0.0))
+        
+        # 扫描开始/结束事件求观测到的最大并发
+        events = []
+        for entry in steps:
+            if entry['started'] is not None and entry['finished'] is not None:
+                events.append((entry['started'], 1))
+                events.append((entry['finished'], -1))
+        peak = current = 0
+        for _, delta in sorted(events, key=lambda event: (event[0], event[1])):
+            current += delta
+            peak = max(peak, current)
+        
+        return {
+            'workflow_id': workflow.id,
+            'status': workflow.status.value,
+            'total_duration': offset(workflow.completed_at),
+            'max_parallelism': peak,
+            'steps': steps
+        }
+    
     def get_workflow_statistics(self) -> Dict[str, Any]:
         """获取工作流统计信息"""
         stats = {
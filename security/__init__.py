@@ -11,6 +11,8 @@ from .auth import (
     JWTManager,
     OAuthManager,
     APIKeyManager,
+    PasswordHasher,
+    AuthenticationOverloaded,
     User,
     AuthToken,
     LoginAttempt,
@@ -44,6 +46,8 @@ __all__ = [
     "JWTManager",
     "OAuthManager",
     "APIKeyManager",
+    "PasswordHasher",
+    "AuthenticationOverloaded",
     "User",
     "AuthToken",
     "LoginAttempt",
@@ -5,13 +5,17 @@
 基于Moltbot的安全架构设计，支持多种认证方式。
 """
 
+import asyncio
 import hashlib
 import hmac
 import json
 import secrets
+import threading
 import time
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Set, Any, Union
+from typing import Dict, List, Optional, Set, Any, Union, Callable, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 import jwt
@@ -85,7 +89,7 @@ class AuthToken:
     token_type: TokenType
     user_id: str
     expires_at: datetime
-    created_at: datetime
+    created_at: datetime = None
     revoked: bool = False
     metadata: Dict[str, Any] = None
     
@@ -104,6 +108,30 @@ class AuthToken:
     def is_valid(self) -> bool:
         """检查令牌是否有效"""
         return not self.revoked and not self.is_expired
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可JSON序列化的字典（时间为ISO格式，类型为枚举值）"""
+        data = asdict(self)
+        data['token_type'] = self.token_type.value
+        data['expires_at'] = self.expires_at.isoformat()
+        data['created_at'] = self.created_at.isoformat()
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AuthToken':
+        token_type = data['token_type']
+        if token_type.startswith("TokenType."):
+            # 兼容旧格式：json.dumps(default=str) 写入的是枚举的 str()
+            token_type = TokenType[token_type.split(".", 1)[1]]
+        return cls(
+            token=data['token'],
+            token_type=TokenType(token_type),
+            user_id=data['user_id'],
+            expires_at=datetime.fromisoformat(data['expires_at']),
+            created_at=datetime.fromisoformat(data['created_at']) if data.get('created_at') else None,
+            revoked=data.get('revoked', False),
+            metadata=data.get('metadata', {})
+        )
 
 
 @dataclass
@@ -123,13 +151,203 @@ class LoginAttempt:
             self.timestamp = datetime.utcnow()
 
 
+class AuthenticationOverloaded(Exception):
+    """密码哈希池排队已满，请求被拒绝（登录风暴时的负载削减）"""
+    pass
+
+
+def _hash_password(password: str, rounds: int) -> str:
+    """模块级函数，可被进程池pickle"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def _check_password(password: str, hashed_password: str) -> bool:
+    """模块级函数，可被进程池pickle"""
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+class PasswordHasher:
+    """
+    密码哈希执行池
+    
+    bcrypt 每轮耗时约100~300ms，放到独立的有界线程池/进程池中执行，
+    避免阻塞事件循环；排队数超过上限时直接拒绝。
+    """
+    
+    def __init__(self, max_workers: int = 4, max_queue: int = 64,
+                 rounds: int = 12, use_processes: bool = False):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self._latencies: deque = deque(maxlen=1024)
+    
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="password-hasher"
+                    )
+            return self._executor
+    
+    @property
+    def queue_depth(self) -> int:
+        """等待空闲工作线程的请求数"""
+        return max(self.in_flight - self.max_workers, 0)
+    
+    async def _run(self, func: Callable, *args) -> Any:
+        if self.in_flight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise AuthenticationOverloaded("认证请求过多，请稍后重试")
+        
+        self.in_flight += 1
+        self.submitted += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._latencies.append(time.perf_counter() - start)
+    
+    async def hash(self, password: str) -> str:
+        """哈希密码"""
+        return await self._run(_hash_password, password, self.rounds)
+    
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """校验密码"""
+        return await self._run(_check_password, password, hashed_password)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """排队深度、拒绝数量与耗时（含排队时间）"""
+        ordered = sorted(self._latencies)
+        return {
+            "workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_in_flight": self.max_in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_latency": sum(ordered) / len(ordered) if ordered else 0.0,
+            "p95_latency": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] if ordered else 0.0,
+        }
+    
+    def shutdown(self):
+        """关闭执行池"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    有界TTL缓存（LRU淘汰）
+    
+    支持负缓存：不存在/无效的凭证以 None 缓存 negative_ttl 秒，
+    避免对同一无效凭证反复查询存储。
+    """
+    
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0, negative_ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: str, default: Any = _MISSING) -> Any:
+        """
+        读取缓存
+        
+        Returns:
+            缓存值；负缓存命中返回 None；未命中返回 default
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return default
+        
+        self._entries.move_to_end(key)
+        if value is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return value
+    
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """写入缓存，ttl 不超过默认值"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def set_negative(self, key: str):
+        """缓存“不存在/无效”的结果"""
+        self.set(key, None, self.negative_ttl)
+    
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+        }
+
+
 class TokenManager:
     """令牌管理器"""
     
-    def __init__(self, db: Database, memory: MemoryStorage):
+    def __init__(self, db: Database, memory: MemoryStorage,
+                 cache_size: int = 10000, cache_ttl: float = 300.0, negative_ttl: float = 30.0):
         self.db = db
         self.memory = memory
-        self._active_tokens: Dict[str, AuthToken] = {}
+        # 已验证令牌缓存（有界，取代原先无上限的 _active_tokens 字典）
+        self._cache = TTLCache(maxsize=cache_size, ttl=cache_ttl, negative_ttl=negative_ttl)
     
     def generate_token(self, user_id: str, token_type: TokenType, 
                       expires_in: int = 3600, metadata: Dict[str, Any] = None) -> AuthToken:
@@ -152,31 +370,35 @@ class TokenManager:
     
     def verify_token(self, token: str) -> Optional[AuthToken]:
         """验证令牌"""
-        # 先检查内存缓存
-        if token in self._active_tokens:
-            cached_token = self._active_tokens[token]
+        # 先检查缓存（包括无效令牌的负缓存）
+        cached_token = self._cache.get(token)
+        if cached_token is None:
+            return None
+        if cached_token is not _MISSING:
             if cached_token.is_valid:
                 return cached_token
+            self._cache.invalidate(token)
         
-        # 从数据库查询
+        # 从存储查询
         token_data = self.memory.get(f"token:{token}")
         if token_data:
             try:
-                token_dict = json.loads(token_data)
-                auth_token = AuthToken(**token_dict)
-                if auth_token.is_valid:
-                    # 更新缓存
-                    self._active_tokens[token] = auth_token
-                    return auth_token
-            except (json.JSONDecodeError, TypeError):
-                pass
-        
+                auth_token = AuthToken.from_dict(json.loads(token_data))
+            except (json.JSONDecodeError, TypeError, ValueError, KeyError):
+                # 记录无法解析不代表令牌无效，不做负缓存
+                return None
+            if auth_token.is_valid:
+                # 更新缓存，缓存时间不超过令牌剩余有效期
+                self._cache.set(token, auth_token, self._remaining_seconds(auth_token))
+                return auth_token
+        
+        self._cache.set_negative(token)
         return None
     
     def revoke_token(self, token: str) -> bool:
         """撤销令牌"""
-        # 从内存移除
-        self._active_tokens.pop(token, None)
+        # 缓存中标记为无效，避免撤销后仍命中旧缓存
+        self._cache.set_negative(token)
         
         # 从内存存储移除
         self.memory.delete(f"token:{token}")
@@ -190,29 +412,48 @@ class TokenManager:
         """撤销用户所有令牌"""
         revoked_count = 0
         
-        # 清理内存中的令牌
-        tokens_to_remove = []
-        for token, auth_token in self._active_tokens.items():
-            if auth_token.user_id == user_id:
-                tokens_to_remove.append(token)
-        
-        for token in tokens_to_remove:
+        for token in self._load_user_tokens(user_id):
             self.revoke_token(token)
             revoked_count += 1
+        self.memory.delete(f"user_tokens:{user_id}")
         
         # 这里应该实现数据库批量更新逻辑
         
         return revoked_count
     
+    def get_cache_statistics(self) -> Dict[str, Any]:
+        """令牌缓存统计"""
+        return self._cache.get_statistics()
+    
     def _store_token(self, auth_token: AuthToken):
         """存储令牌"""
-        # 存储到内存缓存
-        self._active_tokens[auth_token.token] = auth_token
+        ttl = self._remaining_seconds(auth_token)
+        
+        # 存储到缓存
+        self._cache.set(auth_token.token, auth_token, ttl)
         
         # 存储到内存存储（用于持久化）
-        token_data = json.dumps(asdict(auth_token), default=str)
-        self.memory.set(f"token:{auth_token.token}", token_data, 
-                        ttl=int((auth_token.expires_at - datetime.utcnow()).total_seconds()))
+        token_data = json.dumps(auth_token.to_dict())
+        self.memory.set(f"token:{auth_token.token}", token_data, ttl=int(ttl))
+        
+        # 用户令牌索引，缓存有界后撤销用户全部令牌不能再依赖缓存内容
+        tokens = [t for t in self._load_user_tokens(auth_token.user_id)
+                  if self.memory.get(f"token:{t}") is not None]
+        tokens.append(auth_token.token)
+        self.memory.set(f"user_tokens:{auth_token.user_id}", json.dumps(tokens))
+    
+    def _load_user_tokens(self, user_id: str) -> List[str]:
+        data = self.memory.get(f"user_tokens:{user_id}")
+        if not data:
+            return []
+        try:
+            return json.loads(data)
+        except (json.JSONDecodeError, TypeError):
+            return []
+    
+    @staticmethod
+    def _remaining_seconds(auth_token: AuthToken) -> float:
+        return (auth_token.expires_at - datetime.utcnow()).total_seconds()
 
 
 class JWTManager:
@@ -263,8 +504,11 @@ class JWTManager:
 class APIKeyManager:
     """API密钥管理器"""
     
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, cache_size: int = 10000,
+                 cache_ttl: float = 60.0, negative_ttl: float = 30.0):
         self.db = db
+        # 以密钥哈希为键缓存验证结果，不在内存中保留明文密钥
+        self._cache = TTLCache(maxsize=cache_size, ttl=cache_ttl, negative_ttl=negative_ttl)
     
     def generate_api_key(self, user_id: str, name: str, 
                         permissions: List[str] = None) -> str:
@@ -277,6 +521,7 @@ class APIKeyManager:
         
         # 存储到数据库
         # 这里应该实现具体的数据库插入逻辑
+        self._cache.invalidate(key_hash)
         
         return api_key
     
@@ -284,10 +529,18 @@ class APIKeyManager:
         """验证API密钥"""
         key_hash = hashlib.sha256(api_key.encode()).hexdigest()
         
+        cached = self._cache.get(key_hash)
+        if cached is not _MISSING:
+            return cached
+        
         # 从数据库查询
-        # 这里应该实现具体的数据库查询逻辑
+        key_info = self._lookup_api_key(key_hash)
+        if key_info is None:
+            self._cache.set_negative(key_hash)
+        else:
+            self._cache.set(key_hash, key_info)
         
-        return None
+        return key_info
     
     def revoke_api_key(self, api_key: str) -> bool:
         """撤销API密钥"""
@@ -295,8 +548,18 @@ class APIKeyManager:
         
         # 从数据库删除
         # 这里应该实现具体的数据库删除逻辑
+        self._cache.set_negative(key_hash)
         
         return True
+    
+    def get_cache_statistics(self) -> Dict[str, Any]:
+        """API密钥缓存统计"""
+        return self._cache.get_statistics()
+    
+    def _lookup_api_key(self, key_hash: str) -> Optional[Dict[str, Any]]:
+        """按密钥哈希查询密钥信息"""
+        # 这里应该实现具体的数据库查询逻辑
+        return None
 
 
 class OAuthManager:
@@ -349,6 +612,11 @@ class AuthenticationManager:
         self.jwt_manager = JWTManager(settings.SECRET_KEY)
         self.api_key_manager = APIKeyManager(db)
         self.oauth_manager = OAuthManager(settings)
+        self.password_hasher = PasswordHasher(
+            max_workers=getattr(settings, "PASSWORD_HASH_WORKERS", 4),
+            max_queue=getattr(settings, "PASSWORD_HASH_QUEUE", 64),
+            use_processes=getattr(settings, "PASSWORD_HASH_PROCESSES", False)
+        )
         
         # 配置
         self.max_failed_attempts = 5
@@ -366,7 +634,7 @@ class AuthenticationManager:
         self._validate_password(password)
         
         # 哈希密码
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed_password = await self.password_hasher.hash(password)
         
         # 创建用户
         user = User(
@@ -403,7 +671,7 @@ class AuthenticationManager:
             return None
         
         # 验证密码
-        if not bcrypt.checkpw(password.encode('utf-8'), user.hashed_password.encode('utf-8')):
+        if not await self.password_hasher.verify(password, user.hashed_password):
             await self._handle_failed_login(user, email, ip_address, user_agent)
             return None
         
@@ -476,14 +744,14 @@ class AuthenticationManager:
             return False
         
         # 验证旧密码
-        if not bcrypt.checkpw(old_password.encode('utf-8'), user.hashed_password.encode('utf-8')):
+        if not await self.password_hasher.verify(old_password, user.hashed_password):
             return False
         
         # 验证新密码强度
         self._validate_password(new_password)
         
         # 哈希新密码
-        hashed_password = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed_password = await self.password_hasher.hash(new_password)
         
         # 更新用户
         user.hashed_password = hashed_password
@@ -511,14 +779,14 @@ class AuthenticationManager:
         self._validate_password(new_password)
         
         # 哈希新密码
-        hashed_password = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        hashed_password = await self.password_hasher.hash(new_password)
         
         # 更新用户
         user.hashed_password = hashed_password
         user.updated_at = datetime.utcnow()
         
         # 撤销所有现有令牌
-        self.token_manager.revoke_all_user_tokens(user_id)
+        self.token_manager.revoke_all_user_tokens(user.id)
         
         # 存储更新后的用户
         await self._store_user(user)
@@ -528,6 +796,18 @@ class AuthenticationManager:
         
         return True
     
+    def get_statistics(self) -> Dict[str, Any]:
+        """密码哈希池与凭证缓存统计"""
+        return {
+            "password_hasher": self.password_hasher.get_statistics(),
+            "token_cache": self.token_manager.get_cache_statistics(),
+            "api_key_cache": self.api_key_manager.get_cache_statistics(),
+        }
+    
+    def shutdown(self):
+        """释放密码哈希执行池"""
+        self.password_hasher.shutdown()
+    
     def _validate_password(self, password: str):
         """验证密码强度"""
         if len(password) < self.password_min_length:
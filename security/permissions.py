@@ -7,8 +7,10 @@
 
 import json
 import time
-from typing import Dict, List, Set, Optional, Any, Union
-from dataclasses import dataclass, asdict
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Set, Optional, Any, Union, Iterable, Tuple
+from dataclasses import dataclass, asdict, field
 from enum import Enum
 from ..core.settings import Settings
 from ..storage.database import Database
@@ -139,75 +141,167 @@ class UserRole:
         return cls(**data)
 
 
+class PrefixTrie:
+    """资源前缀字典树，匹配耗时只与资源ID长度有关"""
+    
+    __slots__ = ("_root",)
+    
+    _END = ""
+    
+    def __init__(self):
+        self._root: Dict[str, Any] = {}
+    
+    def insert(self, prefix: str):
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[self._END] = True
+    
+    def matches(self, value: str) -> bool:
+        """value 是否以任一已插入前缀开头"""
+        node = self._root
+        if self._END in node:
+            return True
+        for char in value:
+            node = node.get(char)
+            if node is None:
+                return False
+            if self._END in node:
+                return True
+        return False
+    
+    def __bool__(self) -> bool:
+        return bool(self._root)
+
+
+@dataclass
+class ResourceGrant:
+    """某个 (资源, 操作) 上合并后的授权"""
+    level: int = PermissionLevel.NONE.value
+    unconditional: bool = False
+    resource_ids: Set[str] = field(default_factory=set)
+    prefixes: PrefixTrie = field(default_factory=PrefixTrie)
+    
+    def add(self, permission: Permission):
+        self.level = max(self.level, permission.level.value)
+        conditions = permission.conditions
+        # 与 PermissionChecker._check_resource_conditions 的判定顺序一致
+        if conditions and 'resource_id' in conditions:
+            allowed_ids = conditions['resource_id']
+            if isinstance(allowed_ids, str):
+                allowed_ids = [allowed_ids]
+            self.resource_ids.update(allowed_ids)
+        elif conditions and 'resource_prefix' in conditions:
+            self.prefixes.insert(conditions['resource_prefix'])
+        else:
+            self.unconditional = True
+    
+    def allows(self, resource_id: str) -> bool:
+        return (self.unconditional or resource_id in self.resource_ids
+                or (bool(self.prefixes) and self.prefixes.matches(resource_id)))
+
+
+class AuthorizationIndex:
+    """
+    编译后的授权索引
+    
+    将一组权限ID物化为 (资源, 操作) -> 最高级别 + 条件集合 的映射，
+    每次判定只需一次字典查找，与权限数量无关。
+    """
+    
+    def __init__(self, permission_ids: Iterable[str], permissions: Iterable[Permission],
+                 version: Any = None, valid_until: Optional[datetime] = None):
+        self.permission_ids = frozenset(permission_ids)
+        self.version = version
+        self.valid_until = valid_until
+        self._grants: Dict[Tuple[ResourceType, Action], ResourceGrant] = {}
+        for permission in permissions:
+            key = (permission.resource, permission.action)
+            grant = self._grants.get(key)
+            if grant is None:
+                grant = self._grants[key] = ResourceGrant()
+            grant.add(permission)
+    
+    def is_stale(self, version: Any) -> bool:
+        if version != self.version:
+            return True
+        return self.valid_until is not None and datetime.utcnow() > self.valid_until
+    
+    def has_permission(self, permission_id: str) -> bool:
+        return permission_id in self.permission_ids
+    
+    def level(self, resource: ResourceType, action: Action) -> int:
+        grant = self._grants.get((resource, action))
+        return grant.level if grant else PermissionLevel.NONE.value
+    
+    def allows(self, resource: ResourceType, action: Action, resource_id: str = None) -> bool:
+        """是否允许操作；给出 resource_id 时同时检查资源条件"""
+        grant = self._grants.get((resource, action))
+        if grant is None:
+            return False
+        return not resource_id or grant.allows(resource_id)
+    
+    def allows_many(self, resource: ResourceType, action: Action,
+                    resource_ids: Iterable[str]) -> Dict[str, bool]:
+        """批量判定，用于列表接口过滤"""
+        grant = self._grants.get((resource, action))
+        if grant is None:
+            return {resource_id: False for resource_id in resource_ids}
+        if grant.unconditional:
+            return {resource_id: True for resource_id in resource_ids}
+        return {resource_id: not resource_id or grant.allows(resource_id) for resource_id in resource_ids}
+
+
+# 权限ID列表，或已编译的授权索引
+PermissionSet = Union[List[str], AuthorizationIndex]
+
+
 class PermissionChecker:
-    """权限检查器"""
+    """
+    权限检查器
+    
+    权限ID列表会先编译为 AuthorizationIndex（按权限集合缓存），
+    之后每次判定都是常数时间的字典查找。
+    """
     
     def __init__(self, permission_manager: 'PermissionManager'):
         self.permission_manager = permission_manager
     
-    def has_permission(self, user_permissions: List[str], permission_id: str) -> bool:
+    def has_permission(self, user_permissions: "PermissionSet", permission_id: str) -> bool:
         """检查用户是否有指定权限"""
-        return permission_id in user_permissions
+        return self._index(user_permissions).has_permission(permission_id)
     
-    def has_resource_permission(self, user_permissions: List[str], 
+    def has_resource_permission(self, user_permissions: "PermissionSet", 
                                resource: ResourceType, action: Action) -> bool:
         """检查用户是否有指定资源的操作权限"""
-        for perm_id in user_permissions:
-            perm = self.permission_manager.get_permission(perm_id)
-            if perm and perm.resource == resource and perm.action == action:
-                return True
-        return False
+        return self._index(user_permissions).allows(resource, action)
     
-    def has_minimum_level(self, user_permissions: List[str], 
+    def has_minimum_level(self, user_permissions: "PermissionSet", 
                           resource: ResourceType, action: Action, 
                           min_level: PermissionLevel) -> bool:
         """检查用户是否有最低级别的权限"""
-        max_level = PermissionLevel.NONE
-        for perm_id in user_permissions:
-            perm = self.permission_manager.get_permission(perm_id)
-            if perm and perm.resource == resource and perm.action == action:
-                if perm.level.value > max_level.value:
-                    max_level = perm.level
-        
-        return max_level.value >= min_level.value
+        return self._index(user_permissions).level(resource, action) >= min_level.value
     
-    def can_access_resource(self, user_permissions: List[str], 
+    def can_access_resource(self, user_permissions: "PermissionSet", 
                            resource: ResourceType, resource_id: str = None) -> bool:
         """检查用户是否可以访问指定资源"""
-        # 检查是否有读取权限
-        if not self.has_resource_permission(user_permissions, resource, Action.READ):
-            return False
-        
-        # 如果有资源ID，检查资源级权限
-        if resource_id:
-            for perm_id in user_permissions:
-                perm = self.permission_manager.get_permission(perm_id)
-                if (perm and perm.resource == resource and 
-                    perm.action == Action.READ and 
-                    self._check_resource_conditions(perm, resource_id)):
-                    return True
-            return False
-        
-        return True
+        return self._index(user_permissions).allows(resource, Action.READ, resource_id)
     
-    def can_modify_resource(self, user_permissions: List[str], 
+    def can_modify_resource(self, user_permissions: "PermissionSet", 
                            resource: ResourceType, action: Action, 
                            resource_id: str = None) -> bool:
         """检查用户是否可以修改指定资源"""
-        # 检查是否有修改权限
-        if not self.has_resource_permission(user_permissions, resource, action):
-            return False
-        
-        # 如果有资源ID，检查资源级权限
-        if resource_id:
-            for perm_id in user_permissions:
-                perm = self.permission_manager.get_permission(perm_id)
-                if (perm and perm.resource == resource and perm.action == action and
-                    self._check_resource_conditions(perm, resource_id)):
-                    return True
-            return False
-        
-        return True
+        return self._index(user_permissions).allows(resource, action, resource_id)
+    
+    def authorize_many(self, user_permissions: "PermissionSet", resource: ResourceType,
+                       action: Action, resource_ids: Iterable[str]) -> Dict[str, bool]:
+        """批量检查一组资源，返回 resource_id -> 是否允许"""
+        return self._index(user_permissions).allows_many(resource, action, resource_ids)
+    
+    def _index(self, user_permissions: "PermissionSet") -> AuthorizationIndex:
+        if isinstance(user_permissions, AuthorizationIndex):
+            return user_permissions
+        return self.permission_manager.compile_permissions(user_permissions)
     
     def _check_resource_conditions(self, permission: Permission, resource_id: str) -> bool:
         """检查资源条件"""
@@ -242,6 +336,13 @@ class RoleManager:
         self.memory = memory
         self._roles_cache: Dict[str, Role] = {}
         self._user_roles_cache: Dict[str, List[UserRole]] = {}
+        # 角色定义变化时递增（影响所有用户），用户角色分配变化时递增对应用户的版本
+        self.version = 0
+        self._user_versions: Dict[str, int] = {}
+    
+    def get_user_version(self, user_id: str) -> int:
+        """用户角色分配版本，用于授权索引失效判断"""
+        return self._user_versions.get(user_id, 0)
     
     async def create_role(self, role_id: str, name: str, description: str,
                          permissions: List[str], is_system: bool = False,
@@ -343,6 +444,7 @@ class RoleManager:
         user_role = UserRole(
             user_id=user_id,
             role_id=role_id,
+            assigned_at=None,
             assigned_by=assigned_by,
             expires_at=expires_at,
             metadata=metadata or {}
@@ -431,8 +533,13 @@ class RoleManager:
     
     async def _store_role(self, role: Role):
         """存储角色"""
+        self._put_role(role)
+    
+    def _put_role(self, role: Role):
+        """同步写入角色（初始化默认角色时使用）"""
         # 更新缓存
         self._roles_cache[role.id] = role
+        self.version += 1
         
         # 存储到内存
         role_data = json.dumps(role.to_dict(), default=str)
@@ -442,6 +549,7 @@ class RoleManager:
         """删除角色"""
         # 从缓存移除
         self._roles_cache.pop(role_id, None)
+        self.version += 1
         
         # 从内存移除
         self.memory.delete(f"role:{role_id}")
@@ -455,6 +563,7 @@ class RoleManager:
         if user_role.user_id not in self._user_roles_cache:
             self._user_roles_cache[user_role.user_id] = []
         self._user_roles_cache[user_role.user_id].append(user_role)
+        self._user_versions[user_role.user_id] = self.get_user_version(user_role.user_id) + 1
         
         # 存储到内存
         user_role_data = json.dumps(asdict(user_role), default=str)
@@ -468,12 +577,19 @@ class RoleManager:
                 ur for ur in self._user_roles_cache[user_id] 
                 if ur.role_id != role_id
             ]
+        self._user_versions[user_id] = self.get_user_version(user_id) + 1
         
         # 从内存移除
         self.memory.delete(f"user_role:{user_id}:{role_id}")
         
         # 从数据库删除
         # 这里应该实现具体的删除逻辑
+    
+    async def remove_user(self, user_id: str):
+        """用户被删除时移除其全部角色关联"""
+        for user_role in self._user_roles_cache.pop(user_id, []):
+            self.memory.delete(f"user_role:{user_id}:{user_role.role_id}")
+        self._user_versions.pop(user_id, None)
 
 
 class PermissionManager:
@@ -489,6 +605,13 @@ class PermissionManager:
         # 权限缓存
         self._permissions_cache: Dict[str, Permission] = {}
         
+        # 授权索引：按权限集合 / 按用户缓存，权限或角色变化时按版本失效
+        self._permissions_version = 0
+        self._index_cache_size = 1024
+        self._index_cache: "OrderedDict[frozenset, AuthorizationIndex]" = OrderedDict()
+        self._user_index_cache_size = 4096
+        self._user_indexes: "OrderedDict[str, AuthorizationIndex]" = OrderedDict()
+        
         # 初始化默认权限
         self._initialize_default_permissions()
     
@@ -554,7 +677,7 @@ class PermissionManager:
             permissions=[perm.id for perm in self._permissions_cache.values()],
             is_system=True
         )
-        self.role_manager._store_role(super_admin_role)
+        self.role_manager._put_role(super_admin_role)
         
         # 管理员角色
         admin_role = Role(
@@ -572,7 +695,7 @@ class PermissionManager:
             ],
             is_system=True
         )
-        self.role_manager._store_role(admin_role)
+        self.role_manager._put_role(admin_role)
         
         # 用户角色
         user_role = Role(
@@ -587,7 +710,7 @@ class PermissionManager:
             ],
             is_system=True
         )
-        self.role_manager._store_role(user_role)
+        self.role_manager._put_role(user_role)
         
         # 只读角色
         readonly_role = Role(
@@ -605,7 +728,7 @@ class PermissionManager:
             ],
             is_system=True
         )
-        self.role_manager._store_role(readonly_role)
+        self.role_manager._put_role(readonly_role)
     
     def get_permission(self, permission_id: str) -> Optional[Permission]:
         """获取权限"""
@@ -693,6 +816,7 @@ class PermissionManager:
         """存储权限"""
         # 更新缓存
         self._permissions_cache[permission.id] = permission
+        self._permissions_version += 1
         
         # 存储到内存
         perm_data = json.dumps(permission.to_dict(), default=str)
@@ -702,6 +826,7 @@ class PermissionManager:
         """删除权限"""
         # 从缓存移除
         self._permissions_cache.pop(permission_id, None)
+        self._permissions_version += 1
         
         # 从内存移除
         self.memory.delete(f"permission:{permission_id}")
@@ -709,6 +834,77 @@ class PermissionManager:
         # 从数据库删除
         # 这里应该实现具体的删除逻辑
     
+    def compile_permissions(self, permission_ids: Iterable[str]) -> AuthorizationIndex:
+        """将权限ID集合编译为授权索引（按集合缓存）"""
+        key = frozenset(permission_ids)
+        version = self._permissions_version
+        index = self._index_cache.get(key)
+        if index is not None and not index.is_stale(version):
+            self._index_cache.move_to_end(key)
+            return index
+        
+        permissions = [p for p in (self.get_permission(pid) for pid in key) if p]
+        index = AuthorizationIndex(key, permissions, version)
+        self._index_cache[key] = index
+        self._index_cache.move_to_end(key)
+        while len(self._index_cache) > self._index_cache_size:
+            self._index_cache.popitem(last=False)
+        return index
+    
+    async def get_user_index(self, user_id: str) -> AuthorizationIndex:
+        """获取用户的授权索引，角色/权限未变化时直接复用"""
+        version = (self._permissions_version, self.role_manager.version,
+                   self.role_manager.get_user_version(user_id))
+        index = self._user_indexes.get(user_id)
+        if index is not None and not index.is_stale(version):
+            self._user_indexes.move_to_end(user_id)
+            return index
+        
+        user_roles = await self.role_manager.get_user_roles(user_id)
+        permission_ids = set()
+        for user_role in user_roles:
+            role = self.role_manager.get_role(user_role.role_id)
+            if role:
+                permission_ids.update(role.permissions)
+        
+        # 最早过期的角色到期后重新编译
+        expirations = [datetime.fromisoformat(ur.expires_at) for ur in user_roles if ur.expires_at]
+        index = AuthorizationIndex(
+            permission_ids,
+            [p for p in (self.get_permission(pid) for pid in permission_ids) if p],
+            version,
+            min(expirations) if expirations else None
+        )
+        self._user_indexes[user_id] = index
+        self._user_indexes.move_to_end(user_id)
+        while len(self._user_indexes) > self._user_index_cache_size:
+            self._user_indexes.popitem(last=False)
+        return index
+    
+    def invalidate_user_index(self, user_id: str = None):
+        """清除用户授权索引（不指定用户时清除全部）"""
+        if user_id is None:
+            self._user_indexes.clear()
+        else:
+            self._user_indexes.pop(user_id, None)
+    
+    async def remove_user(self, user_id: str):
+        """用户被删除时清理其角色关联与授权索引"""
+        await self.role_manager.remove_user(user_id)
+        self._user_indexes.pop(user_id, None)
+    
+    async def authorize(self, user_id: str, resource: ResourceType, action: Action,
+                        resource_id: str = None) -> bool:
+        """按用户检查操作权限"""
+        index = await self.get_user_index(user_id)
+        return index.allows(resource, action, resource_id)
+    
+    async def authorize_many(self, user_id: str, resource: ResourceType, action: Action,
+                             resource_ids: Iterable[str]) -> Dict[str, bool]:
+        """按用户批量检查一组资源，用于列表接口"""
+        index = await self.get_user_index(user_id)
+        return index.allows_many(resource, action, resource_ids)
+    
     def check_permission(self, user_permissions: List[str], permission_id: str) -> bool:
         """检查权限"""
         return self.permission_checker.has_permission(user_permissions, permission_id)
@@ -5,17 +5,33 @@
 防止API滥用和DDoS攻击。
 """
 
+import asyncio
 import time
 import threading
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any, Union, Callable
+from contextlib import asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Set, Union, Callable, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
 import bisect
-from ..core.settings import Settings
-from ..storage.database import Database
-from ..storage.memory import MemoryStorage
+
+try:
+    import fcntl
+except ImportError:  # Windows 无 fcntl，仅进程内互斥
+    fcntl = None
+
+if TYPE_CHECKING:
+    # 仅用于类型注解：运行时不依赖 core/storage，限流模块可以单独加载
+    from ..core.settings import Settings
+    from ..storage.database import Database
+    from ..storage.memory import MemoryStorage
 
 
 class RateLimitStrategy(Enum):
@@ -90,6 +106,126 @@ class RateLimitRule:
         return value == pattern
 
 
+class PatternIndex:
+    """
+    模式索引，匹配语义与 RateLimitRule._match_pattern 一致：
+    "*" 匹配全部，"xxx*" 前缀匹配，"*xxx" 后缀匹配，其余精确匹配。
+    前缀/后缀模式存放在字典树中，匹配耗时只与被匹配值的长度有关，与模式数量无关。
+    """
+    
+    __slots__ = ("any", "_exact", "_prefixes", "_suffixes")
+    
+    # 字典树节点中保存位置集合的键（不会与单个字符冲突）
+    _END = None
+    
+    def __init__(self):
+        self.any: Set[int] = set()
+        self._exact: Dict[str, Set[int]] = {}
+        self._prefixes: Dict[Any, Any] = {}
+        self._suffixes: Dict[Any, Any] = {}
+    
+    def add(self, pattern: str, position: int):
+        if pattern == "*":
+            self.any.add(position)
+        elif pattern.endswith("*"):
+            self._insert(self._prefixes, pattern[:-1], position)
+        elif pattern.startswith("*"):
+            self._insert(self._suffixes, reversed(pattern[1:]), position)
+        else:
+            self._exact.setdefault(pattern, set()).add(position)
+    
+    def _insert(self, node: Dict[Any, Any], chars, position: int):
+        for char in chars:
+            node = node.setdefault(char, {})
+        node.setdefault(self._END, set()).add(position)
+    
+    def _walk(self, node: Dict[Any, Any], chars, matched: Set[int]):
+        end = node.get(self._END)
+        if end:
+            matched |= end
+        for char in chars:
+            node = node.get(char)
+            if node is None:
+                return
+            end = node.get(self._END)
+            if end:
+                matched |= end
+    
+    def match(self, value: str) -> Set[int]:
+        """返回模式匹配 value 的所有位置"""
+        matched = set(self.any)
+        exact = self._exact.get(value)
+        if exact:
+            matched |= exact
+        if self._prefixes:
+            self._walk(self._prefixes, value, matched)
+        if self._suffixes:
+            self._walk(self._suffixes, reversed(value), matched)
+        return matched
+
+
+class CompiledRuleSet:
+    """
+    限流规则的编译形式
+    
+    规则变更时整体重建后替换引用，匹配路径不加锁；
+    按端点缓存匹配到的规则位置（有界，先进先出淘汰）。
+    """
+    
+    def __init__(self, rules: List[RateLimitRule], memo_size: int = 4096):
+        self.rules = tuple(rules)
+        self.memo_size = memo_size
+        self._endpoints = PatternIndex()
+        self._users = PatternIndex()
+        # 配置了用户模式的规则位置
+        self._user_filtered: Set[int] = set()
+        
+        for position, rule in enumerate(self.rules):
+            if rule.endpoint_patterns:
+                for pattern in rule.endpoint_patterns:
+                    self._endpoints.add(pattern, position)
+            else:
+                self._endpoints.any.add(position)
+            if rule.user_patterns:
+                self._user_filtered.add(position)
+                for pattern in rule.user_patterns:
+                    self._users.add(pattern, position)
+        
+        self._memo: "OrderedDict[str, Tuple[int, ...]]" = OrderedDict()
+        self._memo_lock = threading.Lock()
+    
+    def _positions(self, endpoint: str) -> Tuple[int, ...]:
+        positions = self._memo.get(endpoint)
+        if positions is not None:
+            return positions
+        # 保持规则的添加顺序
+        positions = tuple(sorted(self._endpoints.match(endpoint)))
+        if self.memo_size > 0:
+            with self._memo_lock:
+                self._memo[endpoint] = positions
+                while len(self._memo) > self.memo_size:
+                    self._memo.popitem(last=False)
+        return positions
+    
+    def for_endpoint(self, endpoint: str) -> List[RateLimitRule]:
+        """匹配端点的规则"""
+        rules = self.rules
+        return [rules[position] for position in self._positions(endpoint)]
+    
+    def matching(self, endpoint: str, user_id: str = None) -> List[RateLimitRule]:
+        """端点和用户模式都匹配的规则"""
+        positions = self._positions(endpoint)
+        rules = self.rules
+        if not user_id or not self._user_filtered:
+            return [rules[position] for position in positions]
+        users = self._users.match(user_id)
+        filtered = self._user_filtered
+        return [
+            rules[position] for position in positions
+            if position not in filtered or position in users
+        ]
+
+
 class RateLimitExceeded(Exception):
     """限流超限异常"""
     
@@ -98,9 +234,28 @@ class RateLimitExceeded(Exception):
         self.retry_after = retry_after
 
 
+@dataclass
+class RateLimitDecision:
+    """单条规则的判定结果"""
+    rule: RateLimitRule
+    key: str
+    allowed: bool
+    count: float = 0.0  # 当前用量（窗口计数 / 漏桶水位 / 令牌桶已用令牌）
+    retry_after: Optional[int] = None
+    error: Optional[str] = None
+
+
 class RateLimitStore(ABC):
     """限流存储抽象基类"""
     
+    # 是否支持 evaluate()：一次调用内评估并记录多条规则
+    atomic = False
+    
+    async def evaluate(self, items: List[Tuple[str, RateLimitRule]], record: bool = True,
+                       all_or_nothing: bool = True) -> List[RateLimitDecision]:
+        """评估（并记录）一个请求匹配的全部规则"""
+        raise NotImplementedError
+    
     @abstractmethod
     async def increment(self, key: str, window: int) -> int:
         """增加计数"""
@@ -163,7 +318,7 @@ class MemoryRateLimitStore(RateLimitStore):
 class DatabaseRateLimitStore(RateLimitStore):
     """数据库限流存储"""
     
-    def __init__(self, db: Database):
+    def __init__(self, db: "Database"):
         self.db = db
     
     async def increment(self, key: str, window: int) -> int:
@@ -184,6 +339,313 @@ class DatabaseRateLimitStore(RateLimitStore):
         return True
 
 
+class SharedMemoryRateLimitStore(RateLimitStore):
+    """
+    共享内存限流存储
+    
+    计数表是一个 mmap 映射的定长文件，同一主机上的多个工作进程（如多个 uvicorn worker）
+    映射同一个文件即共享同一份计数，不需要网络往返：
+    - 开放寻址哈希表，每个槽位保存键哈希、过期时间和三个状态字段，内存占用固定
+    - 固定窗口/滑动窗口保存（窗口序号, 本窗口计数, 上一窗口计数），滑动窗口按双窗口加权估算
+    - 令牌桶/漏桶保存（令牌数或水位, 上次更新时间）
+    - evaluate() 在一次加锁内评估并记录一个请求匹配的全部规则
+    - 进程间用 fcntl.flock 互斥，进程内再加线程锁；异步方法以非阻塞方式重试加锁，不阻塞事件循环
+    - 只复用空槽位或已过期的槽位，不淘汰仍在计数的键（否则攻击者填满探测范围即可重置他人的计数）；
+      探测范围内没有可用槽位时新键按失败关闭处理，请求被拒绝
+    """
+    
+    atomic = True
+    
+    MAGIC = b"ABRL"
+    VERSION = 1
+    HEADER = struct.Struct("<4sII4x")
+    # 键哈希, 过期时间, 状态a, 状态b, 状态c
+    SLOT = struct.Struct("<Qdddd")
+    MAX_PROBE = 16
+    # 非阻塞加锁的重试间隔（秒）
+    LOCK_RETRY_MIN = 0.0001
+    LOCK_RETRY_MAX = 0.005
+    TABLE_FULL = "限流计数表已满"
+    
+    def __init__(self, path: Optional[str] = None, slots: int = 65536):
+        self.path = path or self.default_path()
+        self._lock = threading.Lock()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._slots = self._initialize(max(int(slots), self.MAX_PROBE))
+        self._mm = mmap.mmap(self._fd, self.HEADER.size + self._slots * self.SLOT.size)
+        
+        # 统计
+        self.evaluations = 0
+        self.rules_evaluated = 0
+        self.table_full = 0
+        self._lock_waits: deque = deque(maxlen=1024)
+    
+    @staticmethod
+    def default_path() -> str:
+        """所有工作进程默认映射同一个文件（优先 /dev/shm）"""
+        base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        return os.path.join(base, "agentbus-ratelimit.bin")
+    
+    def _initialize(self, slots: int) -> int:
+        """创建或校验计数表文件，已存在时沿用文件中的槽位数"""
+        with self._file_lock():
+            size = os.fstat(self._fd).st_size
+            if size >= self.HEADER.size:
+                magic, version, existing = self.HEADER.unpack(os.pread(self._fd, self.HEADER.size, 0))
+                if magic == self.MAGIC and version == self.VERSION and existing:
+                    slots = existing
+                else:
+                    # 格式不符：清空重建
+                    os.ftruncate(self._fd, 0)
+                    size = 0
+            expected = self.HEADER.size + slots * self.SLOT.size
+            if size < expected:
+                os.ftruncate(self._fd, expected)
+                os.pwrite(self._fd, self.HEADER.pack(self.MAGIC, self.VERSION, slots), 0)
+        return slots
+    
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+    
+    def _try_file_lock(self) -> bool:
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+    
+    def _file_unlock(self) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+    
+    @asynccontextmanager
+    async def _locked(self):
+        """获取线程锁和文件锁；锁被占用时让出事件循环后重试"""
+        start = time.perf_counter()
+        delay = self.LOCK_RETRY_MIN
+        while True:
+            if self._lock.acquire(blocking=False):
+                if self._try_file_lock():
+                    break
+                self._lock.release()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.LOCK_RETRY_MAX)
+        self._lock_waits.append(time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            self._file_unlock()
+            self._lock.release()
+    
+    @staticmethod
+    def _hash(key: str) -> int:
+        # 0 表示空槽位
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+    
+    def _locate(self, key_hash: int, now: float, create: bool,
+                reserved: Set[int] = frozenset()) -> Tuple[Optional[int], Optional[Tuple[float, float, float]]]:
+        """
+        查找键所在槽位
+        
+        Args:
+            reserved: 本次已分配给其他键、尚未写入的槽位
+        
+        Returns:
+            (槽位偏移, 状态)；状态为 None 表示不存在或已过期。
+            create=True 时未命中返回可写入的空槽位或已过期槽位；探测范围内没有则槽位偏移为 None，
+            从不淘汰仍在计数的键。
+        """
+        base = key_hash % self._slots
+        free = None
+        for probe in range(self.MAX_PROBE):
+            offset = self.HEADER.size + ((base + probe) % self._slots) * self.SLOT.size
+            slot_hash, expires_at, a, b, c = self.SLOT.unpack_from(self._mm, offset)
+            if slot_hash == key_hash:
+                return offset, ((a, b, c) if expires_at >= now else None)
+            if free is None and offset not in reserved and (slot_hash == 0 or expires_at < now):
+                free = offset
+        if not create:
+            return None, None
+        return free, None
+    
+    def _write(self, offset: int, key_hash: int, expires_at: float, state: Tuple[float, float, float]) -> None:
+        self.SLOT.pack_into(self._mm, offset, key_hash, expires_at, *state)
+    
+    @staticmethod
+    def _window_state(state, window: int, now: float) -> Tuple[float, float, float]:
+        """滚动到当前窗口：(窗口序号, 本窗口计数, 上一窗口计数)"""
+        index = float(int(now // window))
+        if state is None:
+            return index, 0.0, 0.0
+        last, current, previous = state
+        if index == last:
+            return state
+        if index == last + 1:
+            return index, 0.0, current
+        return index, 0.0, 0.0
+    
+    @staticmethod
+    def _sliding_estimate(state: Tuple[float, float, float], window: int, now: float) -> float:
+        index, current, previous = state
+        return previous * (1.0 - (now - index * window) / window) + current
+    
+    def _apply(self, rule: RateLimitRule, state, now: float):
+        """
+        按规则策略计算一次请求的结果
+        
+        Returns:
+            (是否放行, 当前用量, 记录后的用量, 记录后的状态, 过期时间, 重试等待秒数)
+        """
+        strategy = rule.strategy
+        if strategy in (RateLimitStrategy.FIXED_WINDOW, RateLimitStrategy.SLIDING_WINDOW):
+            window = max(rule.window, 1)
+            index, current, previous = self._window_state(state, window, now)
+            if strategy == RateLimitStrategy.FIXED_WINDOW:
+                used = current
+            else:
+                used = self._sliding_estimate((index, current, previous), window, now)
+            return (used + 1 <= rule.limit, used, used + 1, (index, current + 1, previous),
+                    (index + 2) * window, (index + 1) * window - now)
+        
+        rate = rule.refill_rate or 1.0
+        if strategy == RateLimitStrategy.TOKEN_BUCKET:
+            capacity = float(rule.burst or rule.limit)
+            tokens = capacity if state is None else min(capacity, state[0] + (now - state[1]) * rate)
+            return (tokens >= 1.0, capacity - tokens, capacity - tokens + 1, (tokens - 1.0, now, 0.0),
+                    now + capacity / rate, (1.0 - tokens) / rate)
+        
+        if strategy == RateLimitStrategy.LEAKY_BUCKET:
+            water = 0.0 if state is None else max(0.0, state[0] - (now - state[1]) * rate)
+            return (water + 1.0 <= rule.limit, water, water + 1.0, (water + 1.0, now, 0.0),
+                    now + (water + 1.0) / rate, (water + 1.0 - rule.limit) / rate)
+        
+        raise ValueError(f"不支持的限流策略: {strategy.value}")
+    
+    async def evaluate(self, items: List[Tuple[str, RateLimitRule]], record: bool = True,
+                       all_or_nothing: bool = True) -> List[RateLimitDecision]:
+        """
+        评估（并记录）一个请求匹配的全部规则
+        
+        Args:
+            items: (限流键, 规则) 列表
+            record: 是否计入放行的请求
+            all_or_nothing: 为 True 时任一规则拒绝则所有规则都不计数
+        """
+        decisions = []
+        updates = []
+        async with self._locked():
+            now = time.time()
+            for key, rule in items:
+                key_hash = self._hash(key)
+                _, state = self._locate(key_hash, now, create=False)
+                try:
+                    allowed, used, after, new_state, expires_at, wait = self._apply(rule, state, now)
+                except Exception as e:
+                    decisions.append(RateLimitDecision(rule, key, False, error=str(e)))
+                    continue
+                decision = RateLimitDecision(
+                    rule, key, allowed, used,
+                    retry_after=None if allowed else max(1, math.ceil(wait))
+                )
+                decisions.append(decision)
+                if allowed:
+                    updates.append((decision, key_hash, expires_at, new_state, after))
+            
+            if record and not (all_or_nothing and len(updates) < len(decisions)):
+                # 先为全部键分配槽位：同一请求的多个新键可能探测到同一个空槽位
+                offsets = {}
+                for _, key_hash, *_ in updates:
+                    if key_hash not in offsets:
+                        offsets[key_hash], _ = self._locate(
+                            key_hash, now, create=True, reserved=set(offsets.values())
+                        )
+                full = [update for update in updates if offsets[update[1]] is None]
+                if full:
+                    # 失败关闭：没有可用槽位的新键不放行
+                    self.table_full += 1
+                    for decision, *_ in full:
+                        decision.allowed = False
+                        decision.error = self.TABLE_FULL
+                        decision.retry_after = 1
+                
+                if not (all_or_nothing and full):
+                    for decision, key_hash, expires_at, new_state, after in updates:
+                        if offsets[key_hash] is not None:
+                            self._write(offsets[key_hash], key_hash, expires_at, new_state)
+                            decision.count = after
+            
+            self.evaluations += 1
+            self.rules_evaluated += len(items)
+        return decisions
+    
+    async def increment(self, key: str, window: int) -> int:
+        """增加计数（滑动窗口）"""
+        window = max(window, 1)
+        async with self._locked():
+            now = time.time()
+            key_hash = self._hash(key)
+            offset, state = self._locate(key_hash, now, create=True)
+            if offset is None:
+                self.table_full += 1
+                raise RateLimitExceeded(self.TABLE_FULL, retry_after=1)
+            index, current, previous = self._window_state(state, window, now)
+            state = (index, current + 1, previous)
+            self._write(offset, key_hash, (index + 2) * window, state)
+            return math.ceil(self._sliding_estimate(state, window, now))
+    
+    async def get_count(self, key: str, window: int = None) -> int:
+        """获取计数（滑动窗口）"""
+        window = max(window or 3600, 1)
+        async with self._locked():
+            now = time.time()
+            _, state = self._locate(self._hash(key), now, create=False)
+            if state is None:
+                return 0
+            return math.ceil(self._sliding_estimate(self._window_state(state, window, now), window, now))
+    
+    async def reset(self, key: str) -> bool:
+        """重置计数"""
+        async with self._locked():
+            key_hash = self._hash(key)
+            offset, state = self._locate(key_hash, time.time(), create=False)
+            if offset is not None:
+                self._write(offset, 0, 0.0, (0.0, 0.0, 0.0))
+            return True
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """评估次数、计数表满拒绝次数和加锁等待时间"""
+        waits = sorted(self._lock_waits)
+        return {
+            "path": self.path,
+            "slots": self._slots,
+            "evaluations": self.evaluations,
+            "rules_evaluated": self.rules_evaluated,
+            "table_full": self.table_full,
+            "lock_wait": {
+                "average": sum(waits) / len(waits) if waits else 0.0,
+                "p95": waits[min(int(len(waits) * 0.95), len(waits) - 1)] if waits else 0.0,
+                "max": waits[-1] if waits else 0.0
+            }
+        }
+    
+    def close(self) -> None:
+        """解除映射（不删除文件，其他进程仍可使用）"""
+        if self._mm is not None:
+            self._mm.close()
+            os.close(self._fd)
+            self._mm = None
+
+
 class RateLimitAlgorithm(ABC):
     """限流算法抽象基类"""
     
@@ -394,13 +856,21 @@ class LeakyBucketAlgorithm(RateLimitAlgorithm):
 class RateLimiter:
     """限流器主类"""
     
-    def __init__(self, settings: Settings, db: Database = None, memory: MemoryStorage = None):
+    def __init__(self, settings: "Settings", db: "Database" = None, memory: "MemoryStorage" = None,
+                 store: RateLimitStore = None):
         self.settings = settings
         self.db = db
         self.memory = memory
         
-        # 选择存储实现
-        if db:
+        # 选择存储实现：多工作进程部署使用共享内存存储，限流在本机所有进程间生效
+        if store is not None:
+            self.store = store
+        elif getattr(settings, "RATE_LIMIT_BACKEND", None) == "shared_memory":
+            self.store = SharedMemoryRateLimitStore(
+                path=getattr(settings, "RATE_LIMIT_SHM_PATH", None),
+                slots=getattr(settings, "RATE_LIMIT_SHM_SLOTS", 65536)
+            )
+        elif db:
             self.store = DatabaseRateLimitStore(db)
         else:
             self.store = MemoryRateLimitStore()
@@ -416,6 +886,9 @@ class RateLimiter:
         # 限流规则
         self.rules: Dict[str, RateLimitRule] = {}
         self._rules_lock = threading.RLock()
+        # 规则变更后置空，下次匹配时重新编译
+        self._compiled: Optional[CompiledRuleSet] = None
+        self.rule_memo_size = getattr(settings, "RATE_LIMIT_RULE_MEMO_SIZE", 4096)
         
         # 加载默认规则
         self._load_default_rules()
@@ -479,81 +952,160 @@ class RateLimiter:
         """添加限流规则"""
         with self._rules_lock:
             self.rules[rule.id] = rule
+            self._compiled = None
     
     def remove_rule(self, rule_id: str) -> bool:
         """移除限流规则"""
         with self._rules_lock:
-            return self.rules.pop(rule_id, None) is not None
+            removed = self.rules.pop(rule_id, None) is not None
+            if removed:
+                self._compiled = None
+            return removed
     
     def get_rule(self, rule_id: str) -> Optional[RateLimitRule]:
         """获取限流规则"""
         with self._rules_lock:
             return self.rules.get(rule_id)
     
+    def _compiled_rules(self) -> CompiledRuleSet:
+        compiled = self._compiled
+        if compiled is None:
+            with self._rules_lock:
+                compiled = self._compiled
+                if compiled is None:
+                    compiled = self._compiled = CompiledRuleSet(
+                        list(self.rules.values()), self.rule_memo_size
+                    )
+        return compiled
+    
     def get_rules_for_endpoint(self, endpoint: str) -> List[RateLimitRule]:
         """获取适用于端点的规则"""
-        with self._rules_lock:
-            return [rule for rule in self.rules.values() if rule.matches_endpoint(endpoint)]
+        return self._compiled_rules().for_endpoint(endpoint)
+    
+    def _matching_rules(self, endpoint: str, user_id: str = None) -> List[RateLimitRule]:
+        """端点和用户模式都匹配的规则"""
+        return self._compiled_rules().matching(endpoint, user_id)
+    
+    def _store_key(self, rule: RateLimitRule, key: str) -> str:
+        # 共享内存存储按键保存各策略的状态；同范围的不同规则会生成相同的键，需按规则区分
+        if self.store.atomic:
+            return f"{rule.id}|{key}"
+        return key
+    
+    def _evaluation_items(self, endpoint: str, user_id: str = None,
+                          ip_address: str = None, **kwargs) -> List[Tuple[str, RateLimitRule]]:
+        return [
+            (self._store_key(rule, self._generate_key(rule, user_id, ip_address, endpoint, **kwargs)), rule)
+            for rule in self._matching_rules(endpoint, user_id)
+        ]
+    
+    async def _evaluate(self, items: List[Tuple[str, RateLimitRule]], record: bool,
+                        all_or_nothing: bool = True) -> List[RateLimitDecision]:
+        """一次评估全部规则：共享内存存储单次加锁完成，其他存储逐条检查后再记录"""
+        if self.store.atomic:
+            return await self.store.evaluate(items, record=record, all_or_nothing=all_or_nothing)
+        
+        decisions = []
+        for key, rule in items:
+            try:
+                allowed = await self.algorithms[rule.strategy].check_rate_limit(key, rule)
+                decisions.append(RateLimitDecision(rule, key, allowed))
+            except Exception as e:
+                decisions.append(RateLimitDecision(rule, key, False, error=str(e)))
+        
+        if record and not (all_or_nothing and not all(d.allowed for d in decisions)):
+            for decision in decisions:
+                if not decision.allowed:
+                    continue
+                try:
+                    decision.count = await self.algorithms[decision.rule.strategy].record_request(
+                        decision.key, decision.rule
+                    )
+                except RateLimitExceeded as e:
+                    decision.allowed = False
+                    decision.retry_after = e.retry_after
+                except Exception as e:
+                    decision.allowed = False
+                    decision.error = str(e)
+        return decisions
+    
+    @staticmethod
+    def _rule_result(decision: RateLimitDecision, **fields) -> Dict[str, Any]:
+        rule = decision.rule
+        result = {
+            "rule_id": rule.id,
+            "rule_name": rule.name,
+            "strategy": rule.strategy.value,
+            "scope": rule.scope.value,
+            **fields,
+            "limit": rule.limit,
+            "window": rule.window
+        }
+        if decision.error:
+            result["error"] = decision.error
+        return result
     
     async def check_rate_limit(self, endpoint: str, user_id: str = None, 
                               ip_address: str = None, **kwargs) -> Dict[str, Any]:
         """检查限流"""
-        rules = self.get_rules_for_endpoint(endpoint)
+        items = self._evaluation_items(endpoint, user_id, ip_address, **kwargs)
         
-        if not rules:
+        if not items:
             return {"allowed": True, "rules_checked": 0}
         
-        results = []
-        overall_allowed = True
+        decisions = await self._evaluate(items, record=False)
         
-        for rule in rules:
-            # 检查用户模式
-            if user_id and not rule.matches_user(user_id):
-                continue
-            
-            # 生成限流键
-            key = self._generate_key(rule, user_id, ip_address, endpoint, **kwargs)
-            
-            try:
-                # 检查限流
-                allowed = await self.algorithms[rule.strategy].check_rate_limit(key, rule)
-                
-                results.append({
-                    "rule_id": rule.id,
-                    "rule_name": rule.name,
-                    "strategy": rule.strategy.value,
-                    "scope": rule.scope.value,
-                    "allowed": allowed,
-                    "limit": rule.limit,
-                    "window": rule.window
-                })
-                
-                if not allowed:
-                    overall_allowed = False
-                    
-            except Exception as e:
-                results.append({
-                    "rule_id": rule.id,
-                    "rule_name": rule.name,
-                    "strategy": rule.strategy.value,
-                    "scope": rule.scope.value,
-                    "allowed": False,
-                    "error": str(e),
-                    "limit": rule.limit,
-                    "window": rule.window
-                })
-                overall_allowed = False
+        return {
+            "allowed": all(d.allowed for d in decisions),
+            "rules_checked": len(decisions),
+            "results": [self._rule_result(d, allowed=d.allowed) for d in decisions]
+        }
+    
+    async def check_and_record(self, endpoint: str, user_id: str = None,
+                               ip_address: str = None, **kwargs) -> Dict[str, Any]:
+        """
+        检查并记录请求（每个请求调用一次）
+        
+        一次评估全部匹配规则，只有所有规则都放行时才计入各规则的计数，
+        被拒绝的请求不消耗任何规则的配额。
+        """
+        items = self._evaluation_items(endpoint, user_id, ip_address, **kwargs)
+        
+        if not items:
+            return {"allowed": True, "rules_checked": 0, "retry_after": None, "results": []}
+        
+        decisions = await self._evaluate(items, record=True)
+        denied = [d for d in decisions if not d.allowed]
         
         return {
-            "allowed": overall_allowed,
-            "rules_checked": len(results),
-            "results": results
+            "allowed": not denied,
+            "rules_checked": len(decisions),
+            "retry_after": max((d.retry_after or 0 for d in denied), default=0) or None,
+            "results": [
+                self._rule_result(d, allowed=d.allowed, retry_after=d.retry_after, count=d.count)
+                for d in decisions
+            ]
         }
     
     async def record_request(self, endpoint: str, user_id: str = None,
                            ip_address: str = None, **kwargs) -> Dict[str, Any]:
         """记录请求"""
-        rules = self.get_rules_for_endpoint(endpoint)
+        if self.store.atomic:
+            items = self._evaluation_items(endpoint, user_id, ip_address, **kwargs)
+            if not items:
+                return {"recorded": True, "rules_applied": 0}
+            decisions = await self._evaluate(items, record=True, all_or_nothing=False)
+            return {
+                "recorded": all(d.allowed for d in decisions),
+                "rules_applied": len(decisions),
+                "results": [
+                    self._rule_result(d, recorded=d.allowed, rate_limited=d.retry_after is not None,
+                                      retry_after=d.retry_after)
+                    for d in decisions
+                ]
+            }
+        
+        rules = self._matching_rules(endpoint, user_id)
         
         if not rules:
             return {"recorded": True, "rules_applied": 0}
@@ -562,10 +1114,6 @@ class RateLimiter:
         overall_success = True
         
         for rule in rules:
-            # 检查用户模式
-            if user_id and not rule.matches_user(user_id):
-                continue
-            
             # 生成限流键
             key = self._generate_key(rule, user_id, ip_address, endpoint, **kwargs)
             
@@ -640,7 +1188,7 @@ class RateLimiter:
     async def get_rate_limit_status(self, endpoint: str, user_id: str = None,
                                   ip_address: str = None, **kwargs) -> Dict[str, Any]:
         """获取限流状态"""
-        rules = self.get_rules_for_endpoint(endpoint)
+        rules = self._matching_rules(endpoint, user_id)
         
         status = {
             "endpoint": endpoint,
@@ -649,11 +1197,25 @@ class RateLimiter:
             "rules": []
         }
         
+        if self.store.atomic:
+            # 共享内存存储中令牌桶/漏桶的状态不是窗口计数，按规则策略读取当前用量
+            items = self._evaluation_items(endpoint, user_id, ip_address, **kwargs)
+            for decision in await self._evaluate(items, record=False):
+                rule = decision.rule
+                if decision.error:
+                    status["rules"].append(self._rule_result(decision))
+                    continue
+                count = math.ceil(decision.count)
+                status["rules"].append(self._rule_result(
+                    decision,
+                    current_count=count,
+                    percentage=(count / rule.limit) * 100 if rule.limit > 0 else 0,
+                    remaining=max(0, rule.limit - count),
+                    reset_time=int(time.time()) + rule.window
+                ))
+            return status
+        
         for rule in rules:
-            # 检查用户模式
-            if user_id and not rule.matches_user(user_id):
-                continue
-            
             # 生成限流键
             key = self._generate_key(rule, user_id, ip_address, endpoint, **kwargs)
             
@@ -692,22 +1254,18 @@ class RateLimiter:
     async def reset_rate_limit(self, endpoint: str, user_id: str = None,
                              ip_address: str = None, **kwargs) -> Dict[str, Any]:
         """重置限流"""
-        rules = self.get_rules_for_endpoint(endpoint)
+        rules = self._matching_rules(endpoint, user_id)
         
         results = []
         total_reset = 0
         
         for rule in rules:
-            # 检查用户模式
-            if user_id and not rule.matches_user(user_id):
-                continue
-            
             # 生成限流键
             key = self._generate_key(rule, user_id, ip_address, endpoint, **kwargs)
             
             # 重置限流
             try:
-                await self.store.reset(key)
+                await self.store.reset(self._store_key(rule, key))
                 results.append({
                     "rule_id": rule.id,
                     "rule_name": rule.name,
@@ -8,7 +8,9 @@ Stream Response Processing service for AgentBus
 
 import asyncio
 import json
+import time
 import uuid
+from collections import deque
 from datetime import datetime
 from typing import Dict, List, Optional, Any, AsyncGenerator, Callable, Union
 from enum import Enum
@@ -50,12 +52,40 @@ class StreamChunk:
     timestamp: datetime = None
     metadata: Dict[str, Any] = None
     error: Optional[str] = None
+    sequence: int = 0  # 由StreamBroker分配的单调递增序号
     
     def __post_init__(self):
         if self.timestamp is None:
             self.timestamp = datetime.now()
         if self.metadata is None:
             self.metadata = {}
+    
+    def to_event(self) -> Dict[str, Any]:
+        """转换为推送给客户端的事件结构"""
+        return {
+            "stream_id": self.stream_id,
+            "event": self.event_type.value,
+            "sequence": self.sequence,
+            "data": {
+                "content": self.content,
+                "token_count": self.token_count,
+                "progress": self.progress,
+                "timestamp": self.timestamp.isoformat(),
+                "metadata": self.metadata,
+                "error": self.error
+            }
+        }
+    
+    def to_json(self) -> str:
+        """编码为JSON（WebSocket帧），每个数据块只编码一次，所有订阅者共享"""
+        encoded = self.__dict__.get("_json")
+        if encoded is None:
+            encoded = self.__dict__["_json"] = json.dumps(self.to_event(), ensure_ascii=False)
+        return encoded
+    
+    def to_sse(self) -> str:
+        """编码为SSE帧"""
+        return f"id: {self.sequence}\ndata: {self.to_json()}\n\n"
 
 
 @dataclass
@@ -68,7 +98,9 @@ class StreamRequest:
     max_tokens: Optional[int] = None
     temperature: float = 0.7
     chunk_size: int = 10  # 每次发送的token数量
-    delay_ms: int = 50  # 发送间隔(毫秒)
+    delay_ms: int = 50  # 最小发送间隔(毫秒)，期间到达的token合并发送
+    flush_latency_ms: int = 30  # token最长等待时间(毫秒)
+    max_flush_bytes: int = 4096  # 单次发送的最大字节数
     metadata: Dict[str, Any] = None
     
     def __post_init__(self):
@@ -76,6 +108,345 @@ class StreamRequest:
             self.metadata = {}
 
 
+TERMINAL_EVENTS = (StreamEventType.COMPLETE, StreamEventType.ERROR, StreamEventType.CANCEL)
+
+
+class SubscriberDropped(Exception):
+    """订阅者落后过多或流已被清理"""
+    
+    def __init__(self, stream_id: str, reason: str, resume_from: int = 0):
+        super().__init__(f"订阅已断开: {stream_id} ({reason})")
+        self.stream_id = stream_id
+        self.reason = reason
+        self.resume_from = resume_from
+
+
+class StreamSubscription:
+    """
+    流订阅
+    
+    每个订阅者持有自己的读取游标，互不影响；
+    get() 与 asyncio.Queue.get() 用法一致，便于替换原有队列。
+    """
+    
+    def __init__(self, buffer: "StreamBuffer", cursor: int, missed: int = 0):
+        self.buffer = buffer
+        self.cursor = cursor  # 下一个要读取的序号
+        self.missed = missed  # 续传时已超出保留窗口的数据块数量
+        self.dropped: Optional[str] = None
+        self.delivered = 0
+        self._finished = False
+    
+    @property
+    def stream_id(self) -> str:
+        return self.buffer.stream_id
+    
+    @property
+    def lag(self) -> int:
+        return self.buffer.next_sequence - self.cursor
+    
+    def get_nowait(self) -> Optional[StreamChunk]:
+        """读取下一个数据块，没有新数据时返回None"""
+        if self.dropped:
+            raise SubscriberDropped(self.stream_id, self.dropped, self.cursor)
+        chunk = self.buffer.read(self.cursor)
+        if chunk is not None:
+            self.cursor = chunk.sequence + 1
+            self.delivered += 1
+        return chunk
+    
+    async def get(self) -> StreamChunk:
+        """等待下一个数据块"""
+        while True:
+            chunk = self.get_nowait()
+            if chunk is not None:
+                return chunk
+            if self.buffer.closed:
+                raise SubscriberDropped(self.stream_id, "closed", self.cursor)
+            await self.buffer.wait()
+    
+    def close(self):
+        """取消订阅"""
+        self.buffer.unsubscribe(self)
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self) -> StreamChunk:
+        if self._finished:
+            raise StopAsyncIteration
+        try:
+            chunk = await self.get()
+        except SubscriberDropped as e:
+            if e.reason == "lagged":
+                raise
+            raise StopAsyncIteration
+        if chunk.event_type in TERMINAL_EVENTS:
+            self._finished = True
+            self.close()
+        return chunk
+
+
+class StreamBuffer:
+    """单个流的只追加环形缓冲区，保留最近 retention 个数据块"""
+    
+    def __init__(self, stream_id: str, retention: int = 1024, max_lag: Optional[int] = None):
+        self.stream_id = stream_id
+        self.retention = retention
+        self.max_lag = min(max_lag or retention, retention)
+        self.next_sequence = 1
+        self.closed = False
+        self.closed_at: Optional[float] = None
+        self.last_activity = time.monotonic()
+        self.subscribers: List[StreamSubscription] = []
+        self.dropped_subscribers = 0
+        self._chunks: deque = deque(maxlen=retention)
+        self._event = asyncio.Event()
+    
+    @property
+    def max_subscriber_lag(self) -> int:
+        """最慢订阅者尚未读取的数据块数量"""
+        return max((s.lag for s in self.subscribers), default=0)
+    
+    @property
+    def first_sequence(self) -> int:
+        """窗口内最早的序号"""
+        return self._chunks[0].sequence if self._chunks else self.next_sequence
+    
+    def append(self, chunk: StreamChunk) -> int:
+        """追加数据块（不阻塞生产者），返回分配的序号"""
+        chunk.sequence = self.next_sequence
+        self.next_sequence += 1
+        self.last_activity = time.monotonic()
+        self._chunks.append(chunk)
+        
+        # 落后超过 max_lag 的订阅者直接断开，生产者不等待慢消费者
+        for subscription in [s for s in self.subscribers if self.next_sequence - s.cursor > self.max_lag]:
+            self._drop(subscription, "lagged")
+        
+        if chunk.event_type in TERMINAL_EVENTS:
+            self.closed = True
+            self.closed_at = time.monotonic()
+        self._wake()
+        return chunk.sequence
+    
+    def read(self, sequence: int) -> Optional[StreamChunk]:
+        """按序号读取，序号尚未产生时返回None"""
+        if sequence >= self.next_sequence:
+            return None
+        first = self.first_sequence
+        if sequence < first:
+            sequence = first
+        return self._chunks[sequence - first]
+    
+    def subscribe(self, last_event_id: Optional[int] = None) -> StreamSubscription:
+        """
+        订阅流
+        
+        Args:
+            last_event_id: 客户端最后收到的序号，从其下一个开始续传；
+                为None时从窗口内最早的数据块开始，超过已产生的序号时按最新位置处理
+        """
+        first = self.first_sequence
+        if last_event_id is None:
+            cursor = first
+        else:
+            cursor = max(min(int(last_event_id), self.next_sequence - 1) + 1, 1)
+        missed = max(first - cursor, 0)
+        subscription = StreamSubscription(self, max(cursor, first), missed)
+        self.subscribers.append(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: StreamSubscription):
+        if subscription in self.subscribers:
+            self.subscribers.remove(subscription)
+        subscription.dropped = subscription.dropped or "unsubscribed"
+    
+    def close(self):
+        """标记结束，唤醒所有等待中的订阅者"""
+        if not self.closed:
+            self.closed = True
+            self.closed_at = time.monotonic()
+            self._wake()
+    
+    async def wait(self):
+        await self._event.wait()
+    
+    def _drop(self, subscription: StreamSubscription, reason: str):
+        self.subscribers.remove(subscription)
+        subscription.dropped = reason
+        self.dropped_subscribers += 1
+        logger.warning(f"流订阅者落后过多已断开: {self.stream_id} (lag={subscription.lag})")
+    
+    def _wake(self):
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+
+class StreamBroker:
+    """
+    流广播器
+    
+    每个流是带单调序号的环形缓冲区，任意数量的订阅者独立读取，
+    支持按 Last-Event-ID 续传；流结束后保留 closed_ttl 秒供断线重连，
+    未结束但超过 idle_ttl 秒没有新数据块的流视为生产者已丢失，一并回收。
+    """
+    
+    def __init__(self, retention: int = 1024, max_lag: Optional[int] = None, closed_ttl: float = 60.0,
+                 idle_ttl: float = 600.0):
+        self.retention = retention
+        self.max_lag = max_lag
+        self.closed_ttl = closed_ttl
+        self.idle_ttl = idle_ttl
+        self.buffers: Dict[str, StreamBuffer] = {}
+        self.published = 0
+    
+    def open(self, stream_id: str) -> StreamBuffer:
+        """创建流缓冲区（已存在时复用）"""
+        self._expire()
+        buffer = self.buffers.get(stream_id)
+        if buffer is None:
+            buffer = StreamBuffer(stream_id, self.retention, self.max_lag)
+            self.buffers[stream_id] = buffer
+        return buffer
+    
+    def publish(self, stream_id: str, chunk: StreamChunk) -> int:
+        """发布数据块，流不存在时返回0"""
+        buffer = self.buffers.get(stream_id)
+        if buffer is None:
+            return 0
+        self.published += 1
+        return buffer.append(chunk)
+    
+    def subscribe(self, stream_id: str, last_event_id: Optional[int] = None) -> Optional[StreamSubscription]:
+        """订阅流，流不存在或已过期时返回None"""
+        self._expire()
+        buffer = self.buffers.get(stream_id)
+        if buffer is None:
+            return None
+        return buffer.subscribe(last_event_id)
+    
+    def close(self, stream_id: str):
+        buffer = self.buffers.get(stream_id)
+        if buffer:
+            buffer.close()
+    
+    def remove(self, stream_id: str):
+        buffer = self.buffers.pop(stream_id, None)
+        if buffer:
+            for subscription in list(buffer.subscribers):
+                buffer._drop(subscription, "removed")
+            buffer.close()
+    
+    def _expire(self):
+        now = time.monotonic()
+        for stream_id, buffer in list(self.buffers.items()):
+            if buffer.closed and now - buffer.closed_at > self.closed_ttl:
+                del self.buffers[stream_id]
+            elif not buffer.closed and now - buffer.last_activity > self.idle_ttl:
+                logger.warning(f"流长时间无数据已回收: {stream_id}")
+                self.remove(stream_id)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """缓冲区与订阅者统计"""
+        self._expire()
+        return {
+            "buffers": len(self.buffers),
+            "published": self.published,
+            "subscribers": sum(len(b.subscribers) for b in self.buffers.values()),
+            "dropped_subscribers": sum(b.dropped_subscribers for b in self.buffers.values()),
+            "retained_chunks": sum(len(b._chunks) for b in self.buffers.values())
+        }
+
+
+class StreamCoalescer:
+    """
+    token合并器
+    
+    达到最大等待时间或最大字节数（先到者）即发送；
+    每批token数量按订阅者消费速度自适应：订阅者积压时加大批量，跟得上时减小批量。
+    """
+    
+    def __init__(
+        self,
+        min_tokens: int = 10,
+        max_bytes: int = 4096,
+        max_latency: float = 0.03,
+        min_interval: float = 0.0
+    ):
+        self.min_tokens = max(min_tokens, 1)
+        self.max_tokens = self.min_tokens * 16
+        self.target_tokens = self.min_tokens
+        self.max_bytes = max_bytes
+        self.max_latency = max_latency
+        self.min_interval = min_interval
+        self.last_flush = float("-inf")
+        self._parts: List[str] = []
+        self._bytes = 0
+        self._first_at: Optional[float] = None
+    
+    @property
+    def pending(self) -> int:
+        return len(self._parts)
+    
+    def add(self, text: str, now: float):
+        if self._first_at is None:
+            self._first_at = now
+        self._parts.append(text)
+        self._bytes += len(text.encode("utf-8"))
+    
+    def deadline(self) -> Optional[float]:
+        """下一次按时间发送的时刻，没有待发送内容时返回None"""
+        if self._first_at is None:
+            return None
+        return max(self._first_at + self.max_latency, self.last_flush + self.min_interval)
+    
+    def should_flush(self, now: float) -> bool:
+        if not self._parts:
+            return False
+        if self._bytes >= self.max_bytes:
+            return True
+        if now < self.last_flush + self.min_interval:
+            return False
+        return len(self._parts) >= self.target_tokens or now >= self._first_at + self.max_latency
+    
+    def flush(self, now: float) -> str:
+        text = "".join(self._parts)
+        self._parts.clear()
+        self._bytes = 0
+        self._first_at = None
+        self.last_flush = now
+        return text
+    
+    def adapt(self, lag: int):
+        """根据订阅者积压的事件数调整批量"""
+        if lag > 1:
+            self.target_tokens = min(self.target_tokens * 2, self.max_tokens)
+        elif lag == 0:
+            self.target_tokens = max(self.target_tokens // 2, self.min_tokens)
+
+
+@dataclass
+class StreamMetrics:
+    """单个流的吞吐指标"""
+    started_at: float
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    events: int = 0
+    bytes: int = 0
+    tokens: int = 0
+    
+    @property
+    def duration(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+    
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+
 class StreamHandler(ABC):
     """流处理器抽象基类"""
     
@@ -103,8 +474,9 @@ class StreamHandler(ABC):
 class WebSocketStreamHandler(StreamHandler):
     """WebSocket流处理器"""
     
-    def __init__(self):
-        self.active_streams: Dict[str, asyncio.Queue] = {}
+    def __init__(self, broker: Optional[StreamBroker] = None):
+        self.broker = broker or StreamBroker()
+        self.active_streams: Dict[str, StreamBuffer] = {}
         self.stream_metadata: Dict[str, StreamRequest] = {}
         self.stream_status: Dict[str, StreamStatus] = {}
         self.subscribers: Dict[str, List[Callable]] = {}  # stream_id -> callbacks
@@ -113,9 +485,8 @@ class WebSocketStreamHandler(StreamHandler):
         """开始WebSocket流式传输"""
         stream_id = request.stream_id
         
-        # 创建流队列
-        queue = asyncio.Queue()
-        self.active_streams[stream_id] = queue
+        # 创建流缓冲区
+        self.active_streams[stream_id] = self.broker.open(stream_id)
         self.stream_metadata[stream_id] = request
         self.stream_status[stream_id] = StreamStatus.PENDING
         
@@ -129,8 +500,8 @@ class WebSocketStreamHandler(StreamHandler):
             return False
         
         try:
-            queue = self.active_streams[stream_id]
-            await queue.put(chunk)
+            # 追加到环形缓冲区，不等待订阅者
+            self.broker.publish(stream_id, chunk)
             
             # 更新状态
             if chunk.event_type == StreamEventType.START:
@@ -158,8 +529,7 @@ class WebSocketStreamHandler(StreamHandler):
                 progress=1.0
             )
             
-            queue = self.active_streams[stream_id]
-            await queue.put(complete_chunk)
+            self.broker.publish(stream_id, complete_chunk)
             
             # 更新状态
             self.stream_status[stream_id] = StreamStatus.COMPLETED
@@ -186,13 +556,12 @@ class WebSocketStreamHandler(StreamHandler):
                 progress=0.0
             )
             
-            queue = self.active_streams[stream_id]
-            await queue.put(cancel_chunk)
+            self.broker.publish(stream_id, cancel_chunk)
             
             # 更新状态
             self.stream_status[stream_id] = StreamStatus.CANCELLED
             
-            # 清理资源
+            # 清理资源（缓冲区保留在broker中，供断线重连的订阅者读取取消事件）
             del self.active_streams[stream_id]
             if stream_id in self.stream_metadata:
                 del self.stream_metadata[stream_id]
@@ -206,9 +575,9 @@ class WebSocketStreamHandler(StreamHandler):
             logger.error(f"取消WebSocket流失败: {e}")
             return False
     
-    async def get_stream_queue(self, stream_id: str) -> Optional[asyncio.Queue]:
-        """获取流队列（用于WebSocket连接）"""
-        return self.active_streams.get(stream_id)
+    async def get_stream_queue(self, stream_id: str) -> Optional[StreamSubscription]:
+        """获取流订阅（用于WebSocket连接），接口与asyncio.Queue.get()兼容"""
+        return self.broker.subscribe(stream_id)
     
     async def subscribe_stream(self, stream_id: str, callback: Callable):
         """订阅流事件"""
@@ -225,8 +594,9 @@ class WebSocketStreamHandler(StreamHandler):
 class HTTPStreamHandler(StreamHandler):
     """HTTP流处理器 (Server-Sent Events)"""
     
-    def __init__(self):
-        self.active_streams: Dict[str, asyncio.Queue] = {}
+    def __init__(self, broker: Optional[StreamBroker] = None):
+        self.broker = broker or StreamBroker()
+        self.active_streams: Dict[str, StreamBuffer] = {}
         self.stream_metadata: Dict[str, StreamRequest] = {}
         self.stream_status: Dict[str, StreamStatus] = {}
         
@@ -234,9 +604,8 @@ class HTTPStreamHandler(StreamHandler):
         """开始HTTP流式传输"""
         stream_id = request.stream_id
         
-        # 创建流队列
-        queue = asyncio.Queue()
-        self.active_streams[stream_id] = queue
+        # 创建流缓冲区
+        self.active_streams[stream_id] = self.broker.open(stream_id)
         self.stream_metadata[stream_id] = request
         self.stream_status[stream_id] = StreamStatus.PENDING
         
@@ -250,8 +619,8 @@ class HTTPStreamHandler(StreamHandler):
             return False
         
         try:
-            queue = self.active_streams[stream_id]
-            await queue.put(chunk)
+            # 追加到环形缓冲区，不等待订阅者
+            self.broker.publish(stream_id, chunk)
             
             # 更新状态
             if chunk.event_type == StreamEventType.START:
@@ -279,8 +648,7 @@ class HTTPStreamHandler(StreamHandler):
                 progress=1.0
             )
             
-            queue = self.active_streams[stream_id]
-            await queue.put(complete_chunk)
+            self.broker.publish(stream_id, complete_chunk)
             
             # 更新状态
             self.stream_status[stream_id] = StreamStatus.COMPLETED
@@ -307,13 +675,12 @@ class HTTPStreamHandler(StreamHandler):
                 progress=0.0
             )
             
-            queue = self.active_streams[stream_id]
-            await queue.put(cancel_chunk)
+            self.broker.publish(stream_id, cancel_chunk)
             
             # 更新状态
             self.stream_status[stream_id] = StreamStatus.CANCELLED
             
-            # 清理资源
+            # 清理资源（缓冲区保留在broker中，供断线重连的订阅者读取取消事件）
             if stream_id in self.active_streams:
                 del self.active_streams[stream_id]
             if stream_id in self.stream_metadata:
@@ -330,12 +697,18 @@ class HTTPStreamHandler(StreamHandler):
 class StreamResponseProcessor:
     """流式响应处理器核心服务"""
     
-    def __init__(self):
+    def __init__(self, broker: Optional[StreamBroker] = None):
+        self.broker = broker or StreamBroker()
         self.handlers: Dict[str, StreamHandler] = {}
         self.active_streams: Dict[str, StreamRequest] = {}
         self.stream_status: Dict[str, StreamStatus] = {}
         self.processing_tasks: Dict[str, asyncio.Task] = {}
         
+        # 吞吐指标：进行中的流 + 已结束流的累计值
+        self.stream_metrics: Dict[str, StreamMetrics] = {}
+        self._finished_totals = {"events": 0, "bytes": 0, "tokens": 0, "duration": 0.0}
+        self._ttft: deque = deque(maxlen=1024)
+        
         # 注册默认处理器
         self._register_default_handlers()
         
@@ -343,8 +716,8 @@ class StreamResponseProcessor:
     
     def _register_default_handlers(self):
         """注册默认流处理器"""
-        self.handlers["websocket"] = WebSocketStreamHandler()
-        self.handlers["http"] = HTTPStreamHandler()
+        self.handlers["websocket"] = WebSocketStreamHandler(self.broker)
+        self.handlers["http"] = HTTPStreamHandler(self.broker)
         logger.info("默认流处理器已注册")
     
     async def initialize(self):
@@ -421,6 +794,9 @@ class StreamResponseProcessor:
         generator_func: Callable[[StreamRequest], AsyncGenerator[str, None]]
     ):
         """处理流式内容"""
+        metrics = self.stream_metrics[stream_id] = StreamMetrics(started_at=time.monotonic())
+        generator = None
+        next_token: Optional[asyncio.Future] = None
         try:
             handler_type = "websocket" if stream_id in self.handlers["websocket"].active_streams else "http"
             handler = self.handlers[handler_type]
@@ -434,52 +810,68 @@ class StreamResponseProcessor:
                 progress=0.0,
                 metadata={"request": asdict(request)}
             )
-            await handler.send_chunk(stream_id, start_chunk)
+            await self._emit(handler, start_chunk, metrics)
             
+            coalescer = StreamCoalescer(
+                min_tokens=request.chunk_size,
+                max_bytes=request.max_flush_bytes,
+                max_latency=request.flush_latency_ms / 1000,
+                min_interval=request.delay_ms / 1000
+            )
             total_tokens = 0
-            chunk_buffer = ""
             
-            # 流式处理内容
-            async for content_chunk in generator_func(request):
+            async def flush(progress: Optional[float] = None):
+                # 发布前取积压量：发布后跟得上的订阅者也至少落后1个事件
+                buffer = self.broker.buffers.get(stream_id)
+                lag = buffer.max_subscriber_lag if buffer is not None else None
+                token_chunk = StreamChunk(
+                    stream_id=stream_id,
+                    event_type=StreamEventType.TOKEN,
+                    content=coalescer.flush(time.monotonic()),
+                    token_count=total_tokens,
+                    progress=progress if progress is not None else min(total_tokens / (request.max_tokens or 1000), 1.0)
+                )
+                await self._emit(handler, token_chunk, metrics)
+                if lag is not None:
+                    coalescer.adapt(lag)
+            
+            # 流式处理内容：等待下一个token时不取消生成器，超时即按时间发送
+            generator = generator_func(request).__aiter__()
+            next_token = asyncio.ensure_future(generator.__anext__())
+            while True:
+                deadline = coalescer.deadline()
+                timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+                done, _ = await asyncio.wait({next_token}, timeout=timeout)
+                
                 if stream_id not in self.active_streams:
                     # 流已被取消
                     break
                 
-                chunk_buffer += content_chunk
-                total_tokens += 1
-                
-                # 按chunk_size发送
-                if len(chunk_buffer) >= request.chunk_size or total_tokens % request.chunk_size == 0:
-                    token_chunk = StreamChunk(
-                        stream_id=stream_id,
-                        event_type=StreamEventType.TOKEN,
-                        content=chunk_buffer,
-                        token_count=total_tokens,
-                        progress=min(total_tokens / (request.max_tokens or 1000), 1.0)
-                    )
-                    
-                    await handler.send_chunk(stream_id, token_chunk)
-                    
-                    # 重置缓冲区
-                    chunk_buffer = ""
+                if done:
+                    try:
+                        content_chunk = next_token.result()
+                    except StopAsyncIteration:
+                        next_token = None
+                        break
+                    next_token = asyncio.ensure_future(generator.__anext__())
                     
-                    # 添加延迟（模拟实时流）
-                    if request.delay_ms > 0:
-                        await asyncio.sleep(request.delay_ms / 1000)
+                    total_tokens += 1
+                    metrics.tokens = total_tokens
+                    if metrics.first_token_at is None:
+                        metrics.first_token_at = time.monotonic()
+                        self._ttft.append(metrics.time_to_first_token)
+                    coalescer.add(content_chunk, time.monotonic())
+                
+                if coalescer.should_flush(time.monotonic()):
+                    await flush()
             
             # 发送剩余内容
-            if chunk_buffer:
-                final_chunk = StreamChunk(
-                    stream_id=stream_id,
-                    event_type=StreamEventType.TOKEN,
-                    content=chunk_buffer,
-                    token_count=total_tokens,
-                    progress=1.0
-                )
-                await handler.send_chunk(stream_id, final_chunk)
+            if coalescer.pending:
+                await flush(progress=1.0)
             
             # 发送完成事件
             await handler.complete_stream(stream_id)
+            metrics.events += 1
             
             logger.info(f"流式处理已完成: {stream_id}")
             
@@ -492,10 +884,38 @@ class StreamResponseProcessor:
             await self._handle_stream_error(stream_id, str(e))
             
         finally:
+            if next_token is not None and not next_token.done():
+                next_token.cancel()
+                await asyncio.gather(next_token, return_exceptions=True)
+            if generator is not None and hasattr(generator, "aclose"):
+                try:
+                    await generator.aclose()
+                except Exception:
+                    pass
+            
+            self._finish_metrics(stream_id)
+            
             # 清理任务
             if stream_id in self.processing_tasks:
                 del self.processing_tasks[stream_id]
     
+    async def _emit(self, handler: StreamHandler, chunk: StreamChunk, metrics: StreamMetrics):
+        """发送数据块并计入吞吐指标"""
+        await handler.send_chunk(chunk.stream_id, chunk)
+        metrics.events += 1
+        metrics.bytes += len(chunk.content.encode("utf-8"))
+    
+    def _finish_metrics(self, stream_id: str):
+        metrics = self.stream_metrics.pop(stream_id, None)
+        if metrics is None:
+            return
+        metrics.finished_at = time.monotonic()
+        totals = self._finished_totals
+        totals["events"] += metrics.events
+        totals["bytes"] += metrics.bytes
+        totals["tokens"] += metrics.tokens
+        totals["duration"] += metrics.duration
+    
     async def _handle_stream_error(self, stream_id: str, error_message: str):
         """处理流错误"""
         try:
@@ -549,14 +969,19 @@ class StreamResponseProcessor:
         """获取流状态"""
         return self.stream_status.get(stream_id)
     
-    async def get_stream_queue(self, stream_id: str) -> Optional[asyncio.Queue]:
-        """获取流队列"""
-        # 首先检查WebSocket处理器
-        if stream_id in self.handlers["websocket"].active_streams:
-            return await self.handlers["websocket"].get_stream_queue(stream_id)
+    async def get_stream_queue(self, stream_id: str) -> Optional[StreamSubscription]:
+        """获取流订阅（从保留窗口起点读取），接口与asyncio.Queue.get()兼容"""
+        return self.broker.subscribe(stream_id)
+    
+    def subscribe(self, stream_id: str, last_event_id: Optional[int] = None) -> Optional[StreamSubscription]:
+        """
+        订阅流，每个订阅者独立读取全部数据块
         
-        # 然后检查HTTP处理器
-        return self.handlers["http"].active_streams.get(stream_id)
+        Args:
+            stream_id: 流ID
+            last_event_id: 客户端最后收到的序号（SSE Last-Event-ID），从下一个开始续传
+        """
+        return self.broker.subscribe(stream_id, last_event_id)
     
     async def list_active_streams(self) -> List[str]:
         """列出活跃流"""
@@ -568,7 +993,9 @@ class StreamResponseProcessor:
             "active_streams": len(self.active_streams),
             "total_streams": len(self.stream_status),
             "by_status": {},
-            "processing_tasks": len(self.processing_tasks)
+            "processing_tasks": len(self.processing_tasks),
+            "broker": self.broker.get_statistics(),
+            "throughput": self._throughput_stats()
         }
         
         # 按状态统计
@@ -578,6 +1005,30 @@ class StreamResponseProcessor:
         
         return stats
     
+    def _throughput_stats(self) -> Dict[str, Any]:
+        """事件/秒、字节/秒（按流的处理时长计）以及首token延迟"""
+        totals = dict(self._finished_totals)
+        for metrics in self.stream_metrics.values():
+            totals["events"] += metrics.events
+            totals["bytes"] += metrics.bytes
+            totals["tokens"] += metrics.tokens
+            totals["duration"] += metrics.duration
+        
+        duration = totals["duration"]
+        ordered = sorted(self._ttft)
+        return {
+            "events": totals["events"],
+            "bytes": totals["bytes"],
+            "tokens": totals["tokens"],
+            "events_per_second": totals["events"] / duration if duration else 0.0,
+            "bytes_per_second": totals["bytes"] / duration if duration else 0.0,
+            "time_to_first_token": {
+                "average": sum(ordered) / len(ordered) if ordered else 0.0,
+                "p95": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] if ordered else 0.0,
+                "max": ordered[-1] if ordered else 0.0
+            }
+        }
+    
     # 辅助方法：创建模拟AI响应生成器
     async def simulate_ai_response(self, request: StreamRequest) -> AsyncGenerator[str, None]:
         """模拟AI响应生成器（用于测试）"""
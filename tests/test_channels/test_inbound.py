@@ -0,0 +1,276 @@
+"""
+AgentBus入站消息分发测试
+
+测试异步处理器分发、会话内顺序、跨会话并行、过载丢弃、延迟统计，
+以及使用模拟轮询适配器的负载测试。
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from channels.base import (
+    ChannelAccountConfig,
+    ChannelCapabilities,
+    ChannelConfig,
+    Message,
+    MessageMetadata,
+    MessageType,
+)
+from channels.inbound import DROP_NEWEST, InboundDispatcher
+from channels.manager import ChannelManager
+from channels import test_channel
+
+
+class PollingAdapter(test_channel.TestAdapter):
+    """模拟轮询接收的测试适配器"""
+
+    async def poll(self, batches):
+        """每轮交付一批消息，记录接收循环被阻塞的时间"""
+        self.poll_time = 0.0
+        for batch in batches:
+            start = time.perf_counter()
+            for message in batch:
+                self._notify_message_handlers(message)
+            self.poll_time += time.perf_counter() - start
+            await asyncio.sleep(0)
+
+
+def make_config(channel_id="in", channel_type="inbound_test"):
+    return ChannelConfig(
+        channel_id=channel_id,
+        channel_name="Inbound",
+        channel_type=channel_type,
+        accounts={"acc": ChannelAccountConfig(account_id="acc", configured=True)},
+        default_account_id="acc",
+        capabilities=ChannelCapabilities()
+    )
+
+
+def make_message(content, chat="c1", channel_id="in"):
+    return Message(
+        type=MessageType.TEXT,
+        content=content,
+        metadata=MessageMetadata(channel_id=channel_id, sender_id=f"user-{chat}",
+                                 custom_data={"chat_id": chat})
+    )
+
+
+class TestInboundDispatcher:
+    """测试入站分发器"""
+
+    @pytest.mark.asyncio
+    async def test_order_per_chat_parallel_across_chats(self):
+        seen = {}
+
+        async def deliver(message, channel_id):
+            await asyncio.sleep(0.05)
+            seen.setdefault(message.metadata.custom_data["chat_id"], []).append(message.content)
+
+        dispatcher = InboundDispatcher(deliver)
+        start = time.perf_counter()
+        for i in range(3):
+            for chat in ("a", "b", "c", "d"):
+                assert dispatcher.submit(make_message(f"{chat}{i}", chat), "in")
+        assert time.perf_counter() - start < 0.05
+
+        assert await dispatcher.drain(timeout=2)
+        # 每个会话3条顺序处理，4个会话并行
+        assert time.perf_counter() - start < 0.3
+        assert seen == {chat: [f"{chat}{i}" for i in range(3)] for chat in "abcd"}
+
+        stats = dispatcher.get_statistics()
+        assert stats["processed"] == 12
+        assert stats["depth"] == 0
+        assert stats["active_chats"] == 0
+        assert stats["dispatch_latency"]["max"] >= 0.1
+
+    @pytest.mark.asyncio
+    async def test_chat_queue_sheds_oldest(self):
+        processed = []
+        release = asyncio.Event()
+
+        async def deliver(message, channel_id):
+            await release.wait()
+            processed.append(message.content)
+
+        dispatcher = InboundDispatcher(deliver, max_chat_queue=2)
+        dispatcher.submit(make_message("m0"), "in")
+        await asyncio.sleep(0.01)
+        for i in range(1, 6):
+            dispatcher.submit(make_message(f"m{i}"), "in")
+
+        release.set()
+        await dispatcher.drain(timeout=1)
+        # m0 在处理中；排队上限2条，保留最新的消息
+        assert processed == ["m0", "m4", "m5"]
+        assert dispatcher.get_statistics()["shed"]["chat_full"] == 3
+
+    @pytest.mark.asyncio
+    async def test_drop_newest_and_global_overload(self):
+        async def deliver(message, channel_id):
+            await asyncio.sleep(0.01)
+
+        dispatcher = InboundDispatcher(deliver, max_chat_queue=2, max_pending=3, drop_policy=DROP_NEWEST)
+        results = [dispatcher.submit(make_message(f"m{i}"), "in") for i in range(3)]
+        assert results == [True, True, False]
+
+        results = [dispatcher.submit(make_message("x", chat=f"o{i}"), "in") for i in range(2)]
+        assert results == [True, False]
+
+        await dispatcher.drain(timeout=1)
+        stats = dispatcher.get_statistics()
+        assert stats["shed"] == {"chat_full": 1, "overload": 1}
+        assert stats["processed"] == 3
+
+    @pytest.mark.asyncio
+    async def test_handler_errors_counted(self):
+        async def deliver(message, channel_id):
+            if message.content == "bad":
+                raise ValueError("boom")
+
+        dispatcher = InboundDispatcher(deliver)
+        for content in ("ok", "bad", "ok"):
+            dispatcher.submit(make_message(content), "in")
+        await dispatcher.drain(timeout=1)
+
+        stats = dispatcher.get_statistics()
+        assert stats["errors"] == 1
+        assert stats["processed"] == 3
+
+    @pytest.mark.asyncio
+    async def test_submit_from_other_thread(self):
+        received = []
+
+        async def deliver(message, channel_id):
+            received.append(message.content)
+
+        dispatcher = InboundDispatcher(deliver)
+        dispatcher.submit(make_message("main"), "in")
+        thread = threading.Thread(target=dispatcher.submit, args=(make_message("thread"), "in"))
+        thread.start()
+        thread.join()
+
+        await asyncio.sleep(0.01)
+        await dispatcher.drain(timeout=1)
+        assert received == ["main", "thread"]
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_backlog_after_timeout(self):
+        async def deliver(message, channel_id):
+            await asyncio.sleep(1)
+
+        dispatcher = InboundDispatcher(deliver)
+        for i in range(3):
+            dispatcher.submit(make_message(f"m{i}"), "in")
+
+        await dispatcher.close(timeout=0.05)
+        stats = dispatcher.get_statistics()
+        assert stats["depth"] == 0
+        assert stats["shed"]["overload"] == 2
+
+
+class TestManagerInbound:
+    """测试渠道管理器接入入站分发器"""
+
+    @pytest.fixture(autouse=True)
+    def register_factory(self):
+        from channels import channel_registry
+        channel_registry.register_factory("inbound_test", PollingAdapter)
+        yield
+        channel_registry._factories.pop("inbound_test", None)
+
+    @pytest.mark.asyncio
+    async def test_async_and_blocking_handlers(self, tmp_path):
+        manager = ChannelManager(config_path=tmp_path / "channels.json")
+        await manager.register_channel(make_config())
+        adapter = manager.get_channel_adapter("in")
+
+        inline, async_seen, blocking_threads = [], [], []
+
+        async def async_handler(message, channel_id):
+            await asyncio.sleep(0.05)
+            async_seen.append((message.content, channel_id))
+
+        def blocking_handler(message, channel_id):
+            blocking_threads.append(threading.current_thread())
+            time.sleep(0.05)
+
+        manager.add_message_handler(lambda message, channel_id: inline.append(message.content))
+        manager.add_message_handler(async_handler)
+        manager.add_message_handler(blocking_handler, blocking=True)
+
+        await adapter.poll([[make_message("hello")]])
+        # 同步处理器仍在接收路径中调用，异步/阻塞处理器不阻塞轮询
+        assert inline == ["hello"]
+        assert async_seen == []
+        assert adapter.poll_time < 0.02
+
+        await manager.stop()
+        assert async_seen == [("hello", "in")]
+        assert blocking_threads[0] is not threading.main_thread()
+
+        stats = manager.get_statistics()["inbound"]
+        assert stats["processed"] == 1
+        assert stats["handler_time_average"] >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_removed_handler_not_dispatched(self, tmp_path):
+        manager = ChannelManager(config_path=tmp_path / "channels.json")
+        await manager.register_channel(make_config())
+
+        async def handler(message, channel_id):
+            pass
+
+        manager.add_message_handler(handler)
+        manager.remove_message_handler(handler)
+        await manager.get_channel_adapter("in").poll([[make_message("x")]])
+        assert manager.get_statistics()["inbound"]["received"] == 0
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_load_many_adapters_and_chats(self, tmp_path):
+        """负载测试：多个轮询适配器、每个多个会话，慢处理器不拖慢接收循环"""
+        manager = ChannelManager(config_path=tmp_path / "channels.json")
+        channels = [f"in{i}" for i in range(4)]
+        for channel_id in channels:
+            await manager.register_channel(make_config(channel_id))
+
+        chats, per_chat, delay = 25, 8, 0.01
+        order = {}
+
+        async def slow_handler(message, channel_id):
+            await asyncio.sleep(delay)
+            order.setdefault((channel_id, message.metadata.custom_data["chat_id"]), []).append(
+                int(message.content)
+            )
+
+        manager.add_message_handler(slow_handler)
+
+        adapters = [manager.get_channel_adapter(c) for c in channels]
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            adapter.poll([
+                [make_message(str(i), f"chat{c}", adapter.channel_id) for c in range(chats)]
+                for i in range(per_chat)
+            ])
+            for adapter in adapters
+        ))
+        poll_elapsed = time.perf_counter() - start
+        assert await manager._inbound.drain(timeout=10)
+        elapsed = time.perf_counter() - start
+
+        total = len(channels) * chats * per_chat
+        # 串行处理需要 total * delay = 8s；轮询本身不等待处理器
+        assert poll_elapsed < 0.5
+        assert elapsed < total * delay / 4
+        assert len(order) == len(channels) * chats
+        assert all(seq == list(range(per_chat)) for seq in order.values())
+
+        stats = manager.get_statistics()["inbound"]
+        assert stats["processed"] == total
+        assert stats["shed"] == {"chat_full": 0, "overload": 0}
+        assert stats["dispatch_latency"]["p95"] > 0
+        await manager.stop()
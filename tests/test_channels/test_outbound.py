@@ -0,0 +1,370 @@
+"""
+AgentBus出站消息管道测试
+
+测试出站队列的限速、会话内顺序、合并发送、重试以及统计信息。
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from channels.base import (
+    ChannelAccountConfig,
+    ChannelAdapter,
+    ChannelCapabilities,
+    ChannelConfig,
+    ChannelState,
+    ChannelStatus,
+    ConnectionStatus,
+    Message,
+    MessageMetadata,
+    MessageType,
+)
+from channels.manager import ChannelManager
+from channels.outbound import OutboundPipeline, OutboundRequest, TokenBucket
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__("rate limited")
+        self.retry_after = retry_after
+
+
+class RecordingAdapter(ChannelAdapter):
+    """记录发送内容的适配器，可按次数模拟失败"""
+
+    def __init__(self, config, delay=0.0, failures=0, error=None):
+        super().__init__(config)
+        self.delay = delay
+        self.failures = failures
+        self.error = error or ConnectionError("network down")
+        self.sent = []
+        self.attempts = 0
+
+    @property
+    def channel_id(self):
+        return self.config.channel_id
+
+    @property
+    def channel_name(self):
+        return self.config.channel_name
+
+    @property
+    def capabilities(self):
+        return self.config.capabilities
+
+    async def connect(self, account_id):
+        return True
+
+    async def disconnect(self, account_id):
+        return True
+
+    async def is_connected(self, account_id):
+        return True
+
+    async def send_message(self, message, account_id=None):
+        self.attempts += 1
+        if self.failures > 0:
+            self.failures -= 1
+            raise self.error
+        await asyncio.sleep(self.delay)
+        self.sent.append((time.perf_counter(), message.content, account_id))
+        return True
+
+    async def send_media(self, message, media_url, account_id=None):
+        self.sent.append((time.perf_counter(), media_url, account_id))
+        return True
+
+    async def send_poll(self, question, options, account_id=None):
+        await asyncio.sleep(self.delay)
+        self.sent.append((time.perf_counter(), question, account_id))
+        return True
+
+    async def get_status(self, account_id):
+        return ChannelStatus(
+            account_id=account_id,
+            state=ChannelState.ENABLED,
+            connection_status=ConnectionStatus.CONNECTED,
+            connected=True
+        )
+
+    async def configure_account(self, account_config):
+        return True
+
+
+def make_config(channel_type="test", **capabilities):
+    return ChannelConfig(
+        channel_id="out",
+        channel_name="Outbound",
+        channel_type=channel_type,
+        accounts={"acc": ChannelAccountConfig(account_id="acc", configured=True)},
+        default_account_id="acc",
+        capabilities=ChannelCapabilities(**capabilities)
+    )
+
+
+def make_request(content, chat="c1"):
+    return OutboundRequest(
+        kind="message",
+        channel_id="out",
+        account_id="acc",
+        chat_key=chat,
+        future=asyncio.get_running_loop().create_future(),
+        message=Message(
+            type=MessageType.TEXT,
+            content=content,
+            metadata=MessageMetadata(channel_id="out", custom_data={"chat_id": chat})
+        )
+    )
+
+
+class TestTokenBucket:
+    """测试令牌桶"""
+
+    def test_burst_then_delay(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        for _ in range(2):
+            assert bucket.delay() == 0
+            bucket.consume()
+        assert 0 < bucket.delay() <= 0.1
+
+
+class TestOutboundPipeline:
+    """测试出站管道调度"""
+
+    @pytest.mark.asyncio
+    async def test_submit_returns_future_without_blocking(self):
+        adapter = RecordingAdapter(make_config(), delay=0.1)
+        pipeline = OutboundPipeline()
+
+        start = time.perf_counter()
+        future = pipeline.submit(make_request("hi"), adapter)
+        assert time.perf_counter() - start < 0.05
+        assert not future.done()
+
+        assert await future is True
+        assert adapter.sent[0][1] == "hi"
+
+    @pytest.mark.asyncio
+    async def test_account_rate_limit(self):
+        adapter = RecordingAdapter(make_config(rate_limit=20, rate_burst=1))
+        pipeline = OutboundPipeline()
+
+        futures = [pipeline.submit(make_request(f"m{i}", chat=f"c{i}"), adapter) for i in range(5)]
+        start = time.perf_counter()
+        assert all(await asyncio.gather(*futures))
+
+        # 突发1条，其余4条按每秒20条放行
+        assert time.perf_counter() - start >= 0.18
+        assert pipeline.get_statistics()["throttled"] > 0
+
+    @pytest.mark.asyncio
+    async def test_chat_limit_does_not_block_other_chats(self):
+        adapter = RecordingAdapter(make_config(chat_rate_limit=5, chat_rate_burst=1))
+        pipeline = OutboundPipeline()
+
+        slow = [pipeline.submit(make_request(f"a{i}", chat="busy"), adapter) for i in range(3)]
+        fast = pipeline.submit(make_request("b0", chat="other"), adapter)
+
+        await fast
+        assert sum(1 for _, content, _ in adapter.sent if content.startswith("a")) < 3
+        await asyncio.gather(*slow)
+
+        contents = [content for _, content, _ in adapter.sent if content.startswith("a")]
+        assert contents == ["a0", "a1", "a2"]
+
+    @pytest.mark.asyncio
+    async def test_platform_defaults(self):
+        adapter = RecordingAdapter(make_config("telegram"))
+        pipeline = OutboundPipeline()
+
+        await pipeline.submit(make_request("x"), adapter, channel_type="telegram")
+        queue = pipeline.get_statistics()["queues"]["out:acc"]
+        assert queue["rate_limit"] == 30.0
+        assert queue["chat_rate_limit"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_coalesce_same_chat(self):
+        adapter = RecordingAdapter(make_config(coalesce_messages=True), delay=0.05)
+        pipeline = OutboundPipeline()
+
+        futures = [pipeline.submit(make_request(f"line{i}"), adapter) for i in range(4)]
+        other = pipeline.submit(make_request("elsewhere", chat="c2"), adapter)
+        assert all(await asyncio.gather(*futures, other))
+
+        contents = sorted(content for _, content, _ in adapter.sent)
+        # 同一会话排队中的短文本合并为一次发送，其他会话不受影响
+        assert contents == ["elsewhere", "line0\nline1\nline2\nline3"]
+        assert pipeline.get_statistics()["coalesced"] == 3
+
+        # 在途期间到达的消息合并为下一批
+        first = pipeline.submit(make_request("a"), adapter)
+        await asyncio.sleep(0.01)
+        rest = [pipeline.submit(make_request(c), adapter) for c in ("b", "c")]
+        await asyncio.gather(first, *rest)
+        assert [content for _, content, _ in adapter.sent[-2:]] == ["a", "b\nc"]
+
+    @pytest.mark.asyncio
+    async def test_no_coalesce_by_default(self):
+        adapter = RecordingAdapter(make_config(), delay=0.01)
+        pipeline = OutboundPipeline()
+
+        await asyncio.gather(*(pipeline.submit(make_request(f"m{i}"), adapter) for i in range(5)))
+        assert [content for _, content, _ in adapter.sent] == [f"m{i}" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_retry_with_jitter(self):
+        adapter = RecordingAdapter(make_config(), failures=2)
+        pipeline = OutboundPipeline(retry_base_delay=0.01)
+
+        assert await pipeline.submit(make_request("retry"), adapter) is True
+        assert adapter.attempts == 3
+        assert pipeline.get_statistics()["retries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_retry_after_honoured_and_exhausted(self):
+        adapter = RecordingAdapter(make_config(), failures=10, error=RateLimited(0.02))
+        pipeline = OutboundPipeline(max_retries=2)
+
+        start = time.perf_counter()
+        assert await pipeline.submit(make_request("x"), adapter) is False
+        assert time.perf_counter() - start >= 0.04
+        stats = pipeline.get_statistics()
+        assert stats["failed"] == 1
+        assert stats["retries"] == 2
+
+
+class TestCancellation:
+    """测试关闭或移除渠道时在途请求的 Future 会被释放"""
+
+    @pytest.mark.asyncio
+    async def test_close_resolves_in_flight_send(self):
+        adapter = RecordingAdapter(make_config(), delay=10)
+        pipeline = OutboundPipeline()
+        in_flight = pipeline.submit(make_request("slow", chat="c1"), adapter)
+        queued = pipeline.submit(make_request("queued", chat="c1"), adapter)
+        await asyncio.sleep(0.01)
+
+        waiter = asyncio.create_task(asyncio.wait_for(asyncio.shield(in_flight), 2))
+        await pipeline.close(timeout=0.05)
+        assert await waiter is False
+        assert await asyncio.wait_for(queued, 1) is False
+        assert pipeline.get_statistics()["failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_close_during_coalesce_window(self):
+        adapter = RecordingAdapter(make_config(coalesce_messages=True))
+        pipeline = OutboundPipeline(coalesce_window=10)
+        future = pipeline.submit(make_request("a"), adapter)
+        await asyncio.sleep(0.01)
+        await pipeline.close(timeout=0.05)
+        assert await asyncio.wait_for(future, 1) is False
+
+    @pytest.mark.asyncio
+    async def test_remove_channel_resolves_in_flight_send(self):
+        adapter = RecordingAdapter(make_config(), delay=10)
+        pipeline = OutboundPipeline()
+        future = pipeline.submit(make_request("slow"), adapter)
+        await asyncio.sleep(0.01)
+        pipeline.remove_channel("out")
+        assert await asyncio.wait_for(future, 1) is False
+
+
+class TestManagerOutbound:
+    """测试渠道管理器接入出站管道"""
+
+    @pytest.fixture(autouse=True)
+    def register_factory(self):
+        from channels import channel_registry
+        channel_registry.register_factory("outbound_test", lambda config: RecordingAdapter(config, delay=0.05))
+        yield
+        channel_registry._factories.pop("outbound_test", None)
+
+    @pytest.mark.asyncio
+    async def test_submit_message_and_statistics(self, tmp_path):
+        manager = ChannelManager(config_path=tmp_path / "channels.json")
+        await manager.register_channel(make_config("outbound_test"))
+
+        futures = [manager.submit_message("out", f"m{i}", chat_id=f"c{i}") for i in range(3)]
+        futures.append(manager.submit_media("out", "pic", "http://example.com/a.png"))
+        futures.append(manager.submit_poll("out", "Q?", ["a", "b"]))
+        assert all(await asyncio.gather(*futures))
+
+        adapter = manager.get_channel_adapter("out")
+        assert len(adapter.sent) == 5
+        # 未指定账户时适配器仍收到 None，队列按默认账户划分
+        assert {account for _, _, account in adapter.sent} == {None}
+
+        stats = manager.get_statistics()["outbound"]
+        assert stats["sent"] == 5
+        assert stats["depth"] == 0
+        assert stats["latency"]["max"] >= 0.05
+        assert "out:acc" in stats["queues"]
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_unknown_channel_future(self, tmp_path):
+        manager = ChannelManager(config_path=tmp_path / "channels.json")
+        assert await manager.submit_message("missing", "hi") is False
+
+    @pytest.mark.asyncio
+    async def test_stop_drains_queue(self, tmp_path):
+        manager = ChannelManager(config_path=tmp_path / "channels.json")
+        await manager.register_channel(make_config("outbound_test"))
+
+        futures = [manager.submit_message("out", f"m{i}") for i in range(3)]
+        await manager.stop()
+        assert all(f.done() and f.result() for f in futures)
+
+    @pytest.mark.asyncio
+    async def test_send_across_unregister_returns_false(self, tmp_path):
+        manager = ChannelManager(config_path=tmp_path / "channels.json")
+        await manager.register_channel(make_config("outbound_test"))
+        manager.get_channel_adapter("out").delay = 10
+
+        send = asyncio.create_task(manager.send_message("out", "slow"))
+        await asyncio.sleep(0.01)
+        await manager.unregister_channel("out")
+        assert await asyncio.wait_for(send, 1) is False
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_messages_without_chat_not_serialized(self, tmp_path):
+        manager = ChannelManager(config_path=tmp_path / "channels.json")
+        await manager.register_channel(make_config("outbound_test"))
+
+        # 没有 chat_id/thread_id 的消息互不等待；同一会话的消息仍按顺序发送
+        start = time.perf_counter()
+        assert all(await asyncio.gather(*(manager.send_message("out", f"m{i}") for i in range(3))))
+        assert time.perf_counter() - start < 0.09
+
+        start = time.perf_counter()
+        assert all(await asyncio.gather(
+            *(manager.send_message("out", f"t{i}", thread_id="t") for i in range(2))
+        ))
+        assert time.perf_counter() - start >= 0.1
+        sent = [content for _, content, _ in manager.get_channel_adapter("out").sent]
+        assert sent[-2:] == ["t0", "t1"]
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_polls_keyed_by_chat(self, tmp_path):
+        manager = ChannelManager(config_path=tmp_path / "channels.json")
+        await manager.register_channel(make_config("outbound_test"))
+
+        # 不同会话（或未指定会话）的投票并行发送，同一会话的投票按顺序发送
+        start = time.perf_counter()
+        assert all(await asyncio.gather(
+            manager.send_poll("out", "Q1", ["a"]),
+            manager.send_poll("out", "Q2", ["a"]),
+            manager.send_poll("out", "Q3", ["a"], chat_id="g1"),
+        ))
+        assert time.perf_counter() - start < 0.09
+
+        start = time.perf_counter()
+        await asyncio.gather(*(manager.send_poll("out", f"S{i}", ["a"], chat_id="g2") for i in range(2)))
+        assert time.perf_counter() - start >= 0.1
+        sent = [question for _, question, _ in manager.get_channel_adapter("out").sent]
+        assert sent[-2:] == ["S0", "S1"]
+        await manager.stop()
@@ -0,0 +1,3 @@
+"""
+AgentBus配置系统测试
+"""
@@ -0,0 +1,189 @@
+"""
+AgentBus配置备份管理器测试
+
+测试分块备份的增量写入与去重、基于清单的校验、单文件恢复，
+以及清理旧备份后未引用块的垃圾回收。
+"""
+
+import json
+import os
+
+import pytest
+
+from config.backup_manager import (
+    BackupCompression,
+    BackupFormat,
+    ChunkStore,
+    ConfigBackupManager,
+)
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+
+
+def bump_mtime(path, seconds=10):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 1_000_000_000))
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    root = tmp_path / "config"
+    write(root / "app.yaml", b"name: agentbus\nport: 8000\n")
+    write(root / "services" / "db.json", b'{"url": "sqlite:///x.db"}')
+    # 多块文件：内容互不相同，便于验证块级去重
+    write(root / "services" / "large.yaml",
+          b"".join(f"key{i}: {i:08d}\n".encode() for i in range(20000)))
+    return root
+
+
+@pytest.fixture
+def manager(config_dir):
+    manager = ConfigBackupManager(config_dir)
+    manager._backup_config["chunk_size"] = 4096
+    yield manager
+    manager.cleanup()
+
+
+def test_chunk_store_roundtrip(tmp_path):
+    store = ChunkStore(tmp_path / "chunks")
+    digest, written = store.put(b"hello" * 100)
+    assert written > 0
+    assert store.put(b"hello" * 100) == (digest, 0)
+    raw_digest, _ = store.put(b"raw", compress=False)
+
+    assert store.get(digest, verify=True) == b"hello" * 100
+    assert store.get(raw_digest) == b"raw"
+    assert sorted(store.iter_digests()) == sorted([digest, raw_digest])
+    assert store.collect({digest}) == (1, 4)
+    assert not store.has(raw_digest)
+
+
+def test_backup_excludes_backup_dir(manager, config_dir):
+    first = manager.create_backup("first")
+    second = manager.create_backup("second")
+    assert first != second
+    manifest = manager._load_manifest(second)
+    assert sorted(manifest["files"]) == ["app.yaml", "services/db.json", "services/large.yaml"]
+
+
+def test_incremental_backup_writes_only_new_chunks(manager, config_dir):
+    first = manager.create_backup("base")
+    base = manager._get_backup_metadata(first).metadata
+    assert base["new_chunks"] > 3
+
+    # 未变化的文件直接沿用上一份清单
+    unchanged = manager._get_backup_metadata(manager.create_backup("same")).metadata
+    assert unchanged == {"reused_files": 3, "new_chunks": 0, "stored_bytes": 0}
+
+    # 大文件中间改一个字节，只有一个块需要写入
+    large = config_dir / "services" / "large.yaml"
+    data = bytearray(large.read_bytes())
+    data[len(data) // 2] = ord("X")
+    large.write_bytes(bytes(data))
+    bump_mtime(large)
+    changed = manager._get_backup_metadata(manager.create_backup("edit")).metadata
+    assert changed["reused_files"] == 2
+    assert changed["new_chunks"] == 1
+
+    # mtime 变化但内容相同：重新读取，但不写入新块
+    bump_mtime(config_dir / "app.yaml")
+    touched = manager._get_backup_metadata(manager.create_backup("touch")).metadata
+    assert touched["reused_files"] == 2
+    assert touched["new_chunks"] == 0
+
+
+def test_verify_uses_manifest(manager):
+    backup_id = manager.create_backup("verify", compression=BackupCompression.NONE)
+    assert manager.verify_backup(backup_id) == (True, [])
+    assert manager.verify_backup(backup_id, deep=True) == (True, [])
+
+    manifest = manager._load_manifest(backup_id)
+    digest = manifest["files"]["app.yaml"]["chunks"][0]
+    chunk = manager._chunks._path(digest)
+
+    # 块内容损坏：快速校验只检查存在性，深度校验能发现
+    chunk.write_bytes(b"r" + b"corrupted")
+    assert manager.verify_backup(backup_id)[0]
+    valid, errors = manager.verify_backup(backup_id, deep=True)
+    assert not valid and "app.yaml" in errors[0]
+
+    chunk.unlink()
+    valid, errors = manager.verify_backup(backup_id)
+    assert not valid and digest in errors[0]
+
+
+def test_verify_detects_manifest_tampering(manager):
+    backup_id = manager.create_backup("tamper")
+    manifest_file = manager.backup_dir / backup_id / "manifest.json"
+    manifest = json.loads(manifest_file.read_text())
+    manifest["files"].pop("app.yaml")
+    manifest_file.write_text(json.dumps(manifest))
+    assert manager.verify_backup(backup_id) == (False, ["备份清单校验和不匹配"])
+
+
+def test_restore_backup_and_single_file(manager, config_dir, tmp_path):
+    original = {
+        path.relative_to(config_dir).as_posix(): path.read_bytes()
+        for path in config_dir.rglob("*") if path.is_file() and "backups" not in path.parts
+    }
+    backup_id = manager.create_backup("restore")
+
+    target = tmp_path / "restored"
+    result = manager.restore_backup(backup_id, target_dir=target)
+    assert result.success, result.errors
+    assert {
+        path.relative_to(target).as_posix(): path.read_bytes()
+        for path in target.rglob("*") if path.is_file()
+    } == original
+
+    # 不允许覆盖时报告冲突
+    result = manager.restore_backup(backup_id, target_dir=target)
+    assert not result.success and len(result.errors) == 3
+
+    (config_dir / "services" / "db.json").write_bytes(b"{}")
+    restored = manager.restore_file(backup_id, "services/db.json")
+    assert restored == (config_dir / "services" / "db.json").resolve()
+    assert restored.read_bytes() == original["services/db.json"]
+    assert manager.restore_file(backup_id, "missing.yaml") is None
+
+
+def test_restore_rejects_escaping_paths(manager, tmp_path):
+    backup_id = manager.create_backup("escape")
+    with pytest.raises(ValueError):
+        manager._safe_target(tmp_path, "../outside.yaml")
+    assert manager.restore_file(backup_id, "../app.yaml") is None
+
+
+def test_cleanup_collects_unreferenced_chunks(manager, config_dir):
+    large = config_dir / "services" / "large.yaml"
+    first = manager.create_backup("gc")
+    first_chunks = set(manager._load_manifest(first)["files"]["services/large.yaml"]["chunks"])
+
+    large.write_bytes(b"replaced: true\n")
+    bump_mtime(large)
+    second = manager.create_backup("gc")
+    kept = {
+        digest
+        for entry in manager._load_manifest(second)["files"].values()
+        for digest in entry["chunks"]
+    }
+
+    manager._backup_config["max_backups"] = 1
+    assert manager.cleanup_old_backups() == 1
+    assert [backup.id for backup in manager.list_backups()] == [second]
+
+    remaining = set(manager._chunks.iter_digests())
+    assert remaining == kept
+    assert not (first_chunks - kept) & remaining
+    assert manager.verify_backup(second, deep=True) == (True, [])
+
+
+def test_legacy_formats_still_supported(manager):
+    backup_id = manager.create_backup("legacy", format=BackupFormat.ZIP)
+    metadata = manager._get_backup_metadata(backup_id)
+    assert metadata.format == BackupFormat.ZIP
+    assert metadata.file_count == 3
+    assert manager.verify_backup(backup_id) == (True, [])
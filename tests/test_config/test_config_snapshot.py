@@ -0,0 +1,183 @@
+"""
+AgentBus配置快照测试
+
+测试展平快照的查找语义、类型化访问器、增量验证与完整验证的一致性，
+以及文件变更后快照的替换。
+"""
+
+import random
+import time
+
+import pytest
+import yaml
+
+from config.config_manager import ConfigManager, FrozenConfig
+from config.security import ConfigValidator, ValidationRule, ValidationSeverity
+
+
+BASE_CONFIG = {
+    "app_name": "agentbus",
+    "environment": "development",
+    "host": "127.0.0.1",
+    "port": 8000,
+    "log_level": "INFO",
+    "database": {"pool": {"size": 5, "timeout": 30}, "url": "sqlite:///x.db"},
+    "features": ["a", "b"],
+    "dotted.key": 1,
+}
+
+
+class TestFrozenConfig:
+    """测试展平快照"""
+
+    def test_lookup_matches_nested_walk(self, tmp_path):
+        manager = ConfigManager(tmp_path)
+        snapshot = FrozenConfig(BASE_CONFIG, 1)
+        paths = [
+            "port", "database", "database.pool", "database.pool.size", "database.url",
+            "features", "features.0", "dotted.key", "dotted", "missing", "port.x", "",
+        ]
+        for path in paths:
+            expected = manager._get_nested_value(BASE_CONFIG, path, "default")
+            assert snapshot.get(path, "default") == expected, path
+
+    def test_snapshot_is_read_only(self):
+        snapshot = FrozenConfig(BASE_CONFIG, 1)
+        with pytest.raises(TypeError):
+            snapshot.flat["port"] = 1
+
+    def test_changed_keys(self):
+        old = FrozenConfig(BASE_CONFIG, 1)
+        data = dict(BASE_CONFIG, port=9000, extra=True)
+        data["database"] = {"pool": {"size": 6, "timeout": 30}, "url": "sqlite:///x.db"}
+        new = FrozenConfig(data, 2)
+        assert new.changed_keys(old) == {"port", "database", "extra"}
+        assert new.changed_keys(None) == set(data)
+
+    def test_incremental_matches_full_flatten(self, tmp_path):
+        manager = ConfigManager(tmp_path)
+        manager._config_data = dict(BASE_CONFIG)
+        manager._publish_snapshot()
+        rng = random.Random(7)
+        for _ in range(200):
+            path = ".".join(rng.choice(["database", "pool", "size", "x", "port"])
+                            for _ in range(rng.randrange(1, 4)))
+            value = rng.choice([1, "s", {"x": {"size": 2}}])
+            try:
+                manager.set_config_value(path, value)
+            except TypeError:
+                continue
+            full = FrozenConfig(dict(manager._config_data), 0)
+            assert dict(manager.get_snapshot().flat) == dict(full.flat), path
+
+
+class TestConfigAccessor:
+    """测试类型化访问器"""
+
+    def test_accessor_follows_snapshot(self, tmp_path):
+        manager = ConfigManager(tmp_path)
+        size = manager.accessor("database.pool.size", 1, int)
+        debug = manager.accessor("debug", False, bool)
+        assert size.get() == 1
+        assert debug() is False
+
+        manager.set_config_value("database.pool.size", "12")
+        manager.set_config_value("debug", "yes")
+        assert size.get() == 12
+        assert debug() is True
+        assert manager.get_config_value("database.pool.size") == "12"
+
+        manager.set_config_value("database.pool.size", "not-a-number")
+        assert size.get() == 1
+
+    def test_cached_until_version_changes(self, tmp_path):
+        manager = ConfigManager(tmp_path)
+        manager.set_config_value("port", 8000)
+        port = manager.accessor("port", value_type=int)
+        version = manager.get_snapshot().version
+        assert port.get() == 8000
+        assert port._cached[0] == version
+
+        # 修改管理器内部的可变数据不影响已发布的快照
+        manager._config_data["port"] = 1
+        assert port.get() == 8000
+        manager.set_config_value("port", 9000)
+        assert port.get() == 9000
+
+
+class TestIncrementalValidation:
+    """测试增量验证"""
+
+    def test_matches_full_validation(self):
+        validator = ConfigValidator()
+        rng = random.Random(3)
+        config = dict(BASE_CONFIG)
+        result, state = validator.validate_incremental(config)
+
+        choices = {
+            "port": [80, 70000, "x"],
+            "log_level": ["INFO", "TRACE"],
+            "environment": ["development", "production"],
+            "debug": [True, False],
+            "secret_key": ["short", "x" * 40, "password"],
+            "cors_origins": ["*", ["https://a"]],
+            "workers": [1, 4],
+            "unrelated": [1, 2],
+        }
+        for _ in range(50):
+            previous = dict(config)
+            key = rng.choice(list(choices))
+            config[key] = rng.choice(choices[key])
+            changed = FrozenConfig(config, 2).changed_keys(FrozenConfig(previous, 1))
+            result, state = validator.validate_incremental(config, changed, state)
+            assert result == validator.validate_config(config)
+
+    def test_only_affected_units_rerun(self, monkeypatch):
+        validator = ConfigValidator()
+        _, state = validator.validate_incremental(BASE_CONFIG)
+
+        calls = []
+        original = validator._run_rule
+        monkeypatch.setattr(validator, "_run_rule",
+                            lambda rule, config: calls.append(rule.field) or original(rule, config))
+        validator.validate_incremental(dict(BASE_CONFIG, port=1), {"port"}, state)
+        assert calls == ["port"]
+
+    def test_rule_change_invalidates_state(self):
+        validator = ConfigValidator()
+        _, state = validator.validate_incremental(BASE_CONFIG)
+        validator.add_validation_rule(ValidationRule(
+            field="app_name", rule_type="min_length", parameters={"min_length": 1},
+            severity=ValidationSeverity.WARNING, message="名称"
+        ))
+        result, _ = validator.validate_incremental(BASE_CONFIG, set(), state)
+        assert "app_name: 名称" in result.warnings
+
+
+class TestManagerReload:
+    """测试文件变更后的快照替换"""
+
+    def test_reload_swaps_snapshot_once(self, tmp_path):
+        config_file = tmp_path / "config.yaml"
+        config_file.write_text(yaml.dump({"app_name": "x", "environment": "development",
+                                          "host": "127.0.0.1", "port": 8000}))
+        manager = ConfigManager(tmp_path)
+        assert manager.initialize()
+        try:
+            port = manager.accessor("port", value_type=int)
+            assert port.get() == 8000
+            version = manager.get_snapshot().version
+
+            config_file.write_text(yaml.dump({"app_name": "x", "environment": "development",
+                                              "host": "127.0.0.1", "port": 9000}))
+            deadline = time.time() + 5
+            while port.get() != 9000 and time.time() < deadline:
+                time.sleep(0.05)
+            assert port.get() == 9000
+
+            # 重新加载写入的快照文件不会再次触发重新加载
+            time.sleep(0.8)
+            assert manager.get_snapshot().version == version + 1
+            assert manager.validate() == manager._validator.validate_config(manager.get_snapshot().data)
+        finally:
+            manager._watcher.stop()
@@ -0,0 +1,273 @@
+"""
+AgentBus配置监听器测试
+
+测试轮询扫描器的目录缓存、各后端的变更检测、写入突发的防抖合并，
+以及内容未变时的去重。
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from config.config_types import ConfigEvent
+from config.watcher import (
+    BACKEND_INOTIFY,
+    BACKEND_POLLING,
+    BACKEND_WATCHDOG,
+    HAS_WATCHDOG,
+    ConfigTreeScanner,
+    ConfigWatcher,
+    InotifyBackend,
+    WatchEventType,
+)
+
+
+class EventCollector:
+    """收集回调事件，可等待指定数量的事件"""
+
+    def __init__(self):
+        self.events = []
+        self._condition = threading.Condition()
+
+    def __call__(self, event):
+        with self._condition:
+            self.events.append(event)
+            self._condition.notify_all()
+
+    def wait(self, count=1, timeout=3.0):
+        with self._condition:
+            return self._condition.wait_for(lambda: len(self.events) >= count, timeout)
+
+
+def bump_mtime(path, seconds=1):
+    """保证 mtime 变化（部分文件系统时间戳粒度较粗）"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 1_000_000_000))
+
+
+class TestConfigTreeScanner:
+    """测试轮询扫描器"""
+
+    def test_baseline_then_changes(self, tmp_path):
+        (tmp_path / "a.yaml").write_text("a: 1")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "b.json").write_text("{}")
+        (tmp_path / "notes.txt").write_text("ignored")
+
+        scanner = ConfigTreeScanner(tmp_path)
+        assert scanner.scan() == []
+        assert set(scanner.files) == {str(tmp_path / "a.yaml"), str(tmp_path / "sub" / "b.json")}
+
+        (tmp_path / "a.yaml").write_text("a: 22")
+        bump_mtime(tmp_path / "a.yaml")
+        (tmp_path / "sub" / "c.toml").write_text("x = 1")
+        bump_mtime(tmp_path / "sub")
+        (tmp_path / "sub" / "b.json").unlink()
+
+        changes = sorted(scanner.scan())
+        assert changes == sorted([
+            (str(tmp_path / "a.yaml"), WatchEventType.MODIFIED),
+            (str(tmp_path / "sub" / "c.toml"), WatchEventType.CREATED),
+            (str(tmp_path / "sub" / "b.json"), WatchEventType.DELETED),
+        ])
+
+    def test_unchanged_directories_not_relisted(self, tmp_path):
+        for i in range(5):
+            directory = tmp_path / f"d{i}"
+            directory.mkdir()
+            (directory / "x.yaml").write_text("x: 1")
+
+        scanner = ConfigTreeScanner(tmp_path)
+        scanner.scan()
+        listings = scanner.listings
+        for _ in range(3):
+            assert scanner.scan() == []
+        assert scanner.listings == listings
+
+    def test_removed_directory_reports_deletions(self, tmp_path):
+        directory = tmp_path / "nested" / "deep"
+        directory.mkdir(parents=True)
+        (directory / "x.yaml").write_text("x: 1")
+
+        scanner = ConfigTreeScanner(tmp_path)
+        scanner.scan()
+        (directory / "x.yaml").unlink()
+        directory.rmdir()
+        (tmp_path / "nested").rmdir()
+
+        assert scanner.scan() == [(str(directory / "x.yaml"), WatchEventType.DELETED)]
+        assert scanner.files == {}
+
+
+BACKENDS = [BACKEND_POLLING]
+if HAS_WATCHDOG:
+    BACKENDS.append(BACKEND_WATCHDOG)
+if InotifyBackend.available():
+    BACKENDS.append(BACKEND_INOTIFY)
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    return request.param
+
+
+def make_watcher(path, backend, **kwargs):
+    options = {"poll_interval": 0.05, "debounce": 0.1, "max_delay": 1.0}
+    options.update(kwargs)
+    return ConfigWatcher(path, backend=backend, **options)
+
+
+class TestConfigWatcher:
+    """测试配置监听器"""
+
+    def test_backend_selected(self, tmp_path, backend):
+        watcher = make_watcher(tmp_path, backend)
+        watcher.start()
+        try:
+            assert watcher.backend == backend
+        finally:
+            watcher.stop()
+
+    def test_burst_coalesced_into_one_event(self, tmp_path, backend):
+        target = tmp_path / "app.yaml"
+        target.write_text("v: 0")
+        collector = EventCollector()
+        watcher = make_watcher(tmp_path, backend, debounce=0.3)
+        watcher.add_callback(collector)
+        watcher.start()
+        try:
+            # 编辑器保存时的多次写入
+            for i in range(1, 6):
+                target.write_text(f"v: {i}")
+                bump_mtime(target, i)
+                time.sleep(0.02)
+
+            assert collector.wait(1)
+            time.sleep(0.5)
+            assert len(collector.events) == 1
+            event = collector.events[0]
+            assert event.event_type == ConfigEvent.UPDATED
+            assert event.path == target
+            assert event.data["file_size"] == len("v: 5")
+        finally:
+            watcher.stop()
+
+    def test_multiple_files_single_reload(self, tmp_path, backend):
+        collector = EventCollector()
+        watcher = make_watcher(tmp_path, backend, debounce=0.3)
+        watcher.add_callback(collector)
+        watcher.start()
+        try:
+            (tmp_path / "a.yaml").write_text("a: 1")
+            (tmp_path / "b.json").write_text("{}")
+            (tmp_path / "ignored.txt").write_text("x")
+
+            assert collector.wait(1)
+            time.sleep(0.4)
+            assert len(collector.events) == 1
+            event = collector.events[0]
+            assert event.event_type == ConfigEvent.RELOADED
+            assert event.path == tmp_path
+            assert sorted(c["path"] for c in event.data["changes"]) == [
+                str(tmp_path / "a.yaml"), str(tmp_path / "b.json")
+            ]
+            assert {c["event_type"] for c in event.data["changes"]} == {"created"}
+            assert len(watcher.get_watched_files()) == 2
+        finally:
+            watcher.stop()
+
+    def test_unchanged_content_suppressed(self, tmp_path, backend):
+        target = tmp_path / "app.yaml"
+        target.write_text("v: 1")
+        collector = EventCollector()
+        watcher = make_watcher(tmp_path, backend)
+        watcher.add_callback(collector)
+        watcher.start()
+        try:
+            target.write_text("v: 2")
+            bump_mtime(target)
+            assert collector.wait(1)
+
+            # 只更新时间戳 / 写入相同内容
+            time.sleep(0.2)
+            target.write_text("v: 2")
+            bump_mtime(target, 2)
+            time.sleep(0.5)
+            assert len(collector.events) == 1
+            assert watcher.get_statistics()["duplicates_suppressed"] >= 1
+
+            target.unlink()
+            assert collector.wait(2)
+            assert collector.events[1].data["event_type"] == "deleted"
+        finally:
+            watcher.stop()
+
+    def test_new_directory_files_detected(self, tmp_path, backend):
+        collector = EventCollector()
+        watcher = make_watcher(tmp_path, backend)
+        watcher.add_callback(collector)
+        watcher.start()
+        try:
+            nested = tmp_path / "env" / "prod"
+            nested.mkdir(parents=True)
+            (nested / "db.yaml").write_text("host: x")
+
+            assert collector.wait(1)
+            paths = {c["path"] for event in collector.events for c in event.data["changes"]}
+            assert str(nested / "db.yaml") in paths
+        finally:
+            watcher.stop()
+
+    def test_force_rescan_and_statistics(self, tmp_path):
+        (tmp_path / "a.yaml").write_text("a: 1")
+        collector = EventCollector()
+        # 轮询间隔很长：只由 force_rescan 触发扫描
+        watcher = make_watcher(tmp_path, BACKEND_POLLING, poll_interval=60)
+        watcher.add_callback(collector)
+        watcher.start()
+        try:
+            (tmp_path / "a.yaml").write_text("a: 2")
+            bump_mtime(tmp_path / "a.yaml")
+            watcher.force_rescan()
+            assert collector.wait(1)
+
+            stats = watcher.get_statistics()
+            assert stats["backend"] == BACKEND_POLLING
+            assert stats["watched_files"] == 1
+            assert stats["files_hashed"] == 1
+            assert stats["batches_emitted"] == 1
+        finally:
+            watcher.stop()
+
+    def test_force_rescan_runs_on_processing_thread(self, tmp_path):
+        (tmp_path / "a.yaml").write_text("a: 1")
+        collector = EventCollector()
+        watcher = make_watcher(tmp_path, BACKEND_POLLING, poll_interval=60)
+        watcher.add_callback(collector)
+        watcher.start()
+
+        scan_threads = []
+        scan = watcher._scan
+
+        def recording_scan():
+            scan_threads.append(threading.current_thread())
+            return scan()
+
+        watcher._scan = recording_scan
+        try:
+            (tmp_path / "a.yaml").write_text("a: 2")
+            bump_mtime(tmp_path / "a.yaml")
+            callers = [threading.Thread(target=watcher.force_rescan) for _ in range(8)]
+            for thread in callers:
+                thread.start()
+            for thread in callers:
+                thread.join()
+
+            assert collector.wait(1)
+            assert scan_threads
+            assert set(scan_threads) == {watcher._watch_thread}
+            assert watcher.get_statistics()["changes_emitted"] == 1
+        finally:
+            watcher.stop()
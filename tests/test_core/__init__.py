@@ -0,0 +1,3 @@
+"""
+AgentBus核心模块测试
+"""
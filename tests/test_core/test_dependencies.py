@@ -0,0 +1,299 @@
+"""
+AgentBus服务容器测试
+
+测试按依赖并行预热、并发获取时的单次初始化、失败与不可用服务的处理、
+就绪状态与启动报告，以及带缓存的并发健康检查。
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+import core.dependencies as dependencies
+from core.dependencies import ServiceContainer, ServiceSpec, ServiceUnavailableError
+
+
+class FakeService:
+    def __init__(self, name, events):
+        self.name = name
+        self.events = events
+        self.stopped = False
+
+    async def stats(self):
+        return {"name": self.name}
+
+    def stop(self):
+        self.stopped = True
+        self.events.append(("stop", self.name))
+
+
+def slow_factory(name, events, delay=0.1, fail=False):
+    calls = []
+
+    async def factory():
+        calls.append(name)
+        events.append(("start", name))
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError(f"{name} boom")
+        events.append(("ready", name))
+        return FakeService(name, events)
+
+    factory.calls = calls
+    return factory
+
+
+def make_container(events, **kwargs):
+    container = ServiceContainer(**kwargs)
+    container.register(ServiceSpec("a", "A", factory=slow_factory("a", events),
+                                   health_check=lambda s: s.stats(), shutdown=lambda s: s.stop()))
+    container.register(ServiceSpec("b", "B", factory=slow_factory("b", events),
+                                   health_check=lambda s: s.stats(), shutdown=lambda s: s.stop()))
+    container.register(ServiceSpec("c", "C", factory=slow_factory("c", events), depends_on=("a", "b"),
+                                   shutdown=lambda s: s.stop()))
+    return container
+
+
+class TestRegistration:
+    """测试服务注册"""
+
+    def test_dependencies_must_be_registered_first(self):
+        container = ServiceContainer()
+        with pytest.raises(ValueError):
+            container.register(ServiceSpec("x", "X", depends_on=("y",)))
+        container.register(ServiceSpec("y", "Y"))
+        with pytest.raises(ValueError):
+            container.register(ServiceSpec("y", "Y"))
+
+
+class TestWarmup:
+    """测试启动预热"""
+
+    async def test_independent_services_start_in_parallel(self):
+        events = []
+        container = make_container(events)
+
+        start = time.perf_counter()
+        report = await container.warmup()
+        elapsed = time.perf_counter() - start
+
+        # a、b 并行，c 等二者完成后才开始：总耗时约两层而非三个服务之和
+        assert elapsed < 0.28
+        assert events.index(("start", "c")) > events.index(("ready", "a"))
+        assert events.index(("start", "c")) > events.index(("ready", "b"))
+        assert events.index(("start", "b")) < events.index(("ready", "a"))
+
+        assert report["ready"] and container.ready
+        record = report["services"]["c"]
+        assert record["status"] == "ready" and record["source"] == "container"
+        assert record["dependency_wait_ms"] >= 80
+        assert record["init_ms"] >= 80
+
+    async def test_concurrent_get_initializes_once(self):
+        events = []
+        factory = slow_factory("a", events)
+        container = ServiceContainer()
+        container.register(ServiceSpec("a", "A", factory=factory))
+
+        results = await asyncio.gather(*(container.get("a") for _ in range(10)))
+        assert len({id(result) for result in results}) == 1
+        assert factory.calls == ["a"]
+        assert container.peek("a") is results[0]
+
+    async def test_cancelled_caller_does_not_cancel_initialization(self):
+        events = []
+        container = ServiceContainer()
+        container.register(ServiceSpec("a", "A", factory=slow_factory("a", events)))
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(container.get("a"), 0.01)
+        assert (await container.get("a")).name == "a"
+        assert events.count(("start", "a")) == 1
+
+    async def test_failure_propagates_to_dependents_and_retries(self):
+        events = []
+        container = ServiceContainer()
+        container.register(ServiceSpec("a", "A", factory=slow_factory("a", events, delay=0.01, fail=True)))
+        container.register(ServiceSpec("b", "B", factory=slow_factory("b", events, delay=0.01),
+                                       depends_on=("a",)))
+
+        report = await container.warmup()
+        assert not report["ready"]
+        assert report["services"]["a"]["status"] == "failed"
+        assert report["services"]["a"]["error"] == "a boom"
+        assert report["services"]["b"]["status"] == "failed"
+        assert "a boom" in report["services"]["b"]["error"]
+        assert ("start", "b") not in events
+
+        # 修复后再次获取会重新初始化
+        container._specs["a"].factory = slow_factory("a", events, delay=0.01)
+        assert (await container.get("b")).name == "b"
+        assert container.ready
+
+    async def test_application_instances_are_adopted(self):
+        events = []
+        app = SimpleNamespace(a=FakeService("from-app", events), manager=None)
+        container = ServiceContainer(app_provider=lambda: app)
+        factory = slow_factory("a", events)
+        container.register(ServiceSpec("a", "A", factory=factory, app_attr="a"))
+        container.register(ServiceSpec("manager", "管理器", app_attr="manager", required=False))
+
+        report = await container.warmup()
+        assert (await container.get("a")).name == "from-app"
+        assert factory.calls == []
+        assert report["services"]["a"]["source"] == "application"
+        assert report["services"]["manager"]["status"] == "unavailable"
+        # 非必需服务不可用不影响就绪
+        assert report["ready"]
+        with pytest.raises(ServiceUnavailableError):
+            await container.get("manager")
+
+        # 主应用稍后提供实例时可以取到
+        app.manager = FakeService("manager", events)
+        assert (await container.get("manager")).name == "manager"
+
+    async def test_missing_application_is_unavailable(self):
+        def no_app():
+            raise RuntimeError("应用程序未初始化")
+
+        container = ServiceContainer(app_provider=no_app)
+        container.register(ServiceSpec("manager", "管理器", app_attr="manager"))
+        report = await container.warmup()
+        assert report["services"]["manager"]["error"] == "管理器未初始化"
+        assert not report["ready"]
+
+    async def test_warmup_timeout_continues_in_background(self):
+        events = []
+        container = ServiceContainer()
+        container.register(ServiceSpec("a", "A", factory=slow_factory("a", events, delay=0.2)))
+
+        report = await container.warmup(timeout=0.02)
+        assert report["warmed_up"] and not report["ready"]
+        assert report["services"]["a"]["status"] == "starting"
+
+        await container.get("a")
+        assert container.ready
+
+    async def test_shutdown_stops_owned_services_in_reverse_order(self):
+        events = []
+        app = SimpleNamespace(b=FakeService("b", events))
+        container = make_container(events)
+        container._app_provider = lambda: app
+        container._specs["b"].app_attr = "b"
+        await container.warmup()
+
+        await container.shutdown()
+        # b 由主应用提供，不由容器关闭
+        assert [event for event in events if event[0] == "stop"] == [("stop", "c"), ("stop", "a")]
+        assert not container.ready
+        assert container.peek("a") is None
+        assert container.startup_report()["services"]["a"]["status"] == "pending"
+
+
+class TestHealthChecks:
+    """测试健康检查"""
+
+    async def test_checks_run_concurrently_with_timeout(self):
+        calls = []
+
+        async def slow_check(service):
+            calls.append(service)
+            await asyncio.sleep(0.1)
+
+        async def hanging_check(service):
+            await asyncio.sleep(10)
+
+        async def failing_check(service):
+            raise RuntimeError("down")
+
+        container = ServiceContainer(health_timeout=0.15)
+        for name in ("s1", "s2", "s3"):
+            container.register(ServiceSpec(name, name, factory=slow_factory(name, [], delay=0),
+                                           health_check=slow_check))
+        container.register(ServiceSpec("hang", "hang", factory=slow_factory("hang", [], delay=0),
+                                       health_check=hanging_check))
+        container.register(ServiceSpec("bad", "bad", factory=slow_factory("bad", [], delay=0),
+                                       health_check=failing_check))
+        container.register(ServiceSpec("lazy", "lazy", factory=slow_factory("lazy", [], delay=0)))
+        for name in ("s1", "s2", "s3", "hang", "bad"):
+            await container.get(name)
+
+        start = time.perf_counter()
+        health = await container.check_health()
+        assert time.perf_counter() - start < 0.3
+        assert len(calls) == 3
+        assert health["s1"] == health["s2"] == health["s3"] == "healthy"
+        assert health["hang"] == health["bad"] == "unhealthy"
+        assert health["lazy"] == "not_initialized"
+        assert health["status"] == "unhealthy"
+        assert health["errors"]["bad"] == "down"
+        assert "超时" in health["errors"]["hang"]
+
+    async def test_results_cached_for_ttl(self):
+        calls = []
+
+        async def check(service):
+            calls.append(service)
+            await asyncio.sleep(0.02)
+
+        container = ServiceContainer(health_ttl=0.2)
+        container.register(ServiceSpec("a", "A", factory=slow_factory("a", [], delay=0), health_check=check))
+        await container.get("a")
+
+        # 并发调用共享同一轮检查，之后在 TTL 内复用结果
+        results = await asyncio.gather(*(container.check_health() for _ in range(5)))
+        assert all(result is results[0] for result in results)
+        assert await container.check_health() is results[0]
+        assert len(calls) == 1
+        assert results[0] == {"a": "healthy", "status": "healthy"}
+
+        await container.check_health(force=True)
+        assert len(calls) == 2
+        await asyncio.sleep(0.25)
+        await container.check_health()
+        assert len(calls) == 3
+
+
+class TestModuleWiring:
+    """测试模块级依赖与就绪端点"""
+
+    async def test_getter_maps_unavailable_to_503(self, monkeypatch):
+        container = ServiceContainer()
+        container.register(ServiceSpec("plugin_manager", "插件管理器", app_attr="plugin_manager"))
+        monkeypatch.setattr(dependencies, "container", container)
+        with pytest.raises(HTTPException) as exc_info:
+            await dependencies.get_plugin_manager()
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.detail == "插件管理器未初始化"
+
+    def test_ready_endpoint_gated_on_warmup(self, monkeypatch):
+        from api.main import create_app
+
+        container = ServiceContainer()
+        container.register(ServiceSpec("a", "A", factory=slow_factory("a", [], delay=0)))
+        monkeypatch.setattr(dependencies, "container", container)
+
+        # 不进入 TestClient 上下文，不触发启动事件
+        client = TestClient(create_app())
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["warmed_up"] is False
+
+        asyncio.run(container.warmup())
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["services"]["a"]["status"] == "ready"
+
+    def test_default_services_declared(self):
+        specs = dependencies.container._specs
+        assert set(specs) == {
+            "hitl_service", "communication_map", "message_channel", "knowledge_bus",
+            "multi_model_coordinator", "stream_response_processor",
+            "channel_manager", "plugin_manager",
+        }
+        assert specs["plugin_manager"].depends_on == ("hitl_service", "knowledge_bus")
+        assert not specs["plugin_manager"].required and not specs["channel_manager"].required
@@ -0,0 +1,3 @@
+"""
+AgentBus Hook系统测试
+"""
@@ -0,0 +1,113 @@
+"""
+Hook engine dispatch tests
+"""
+
+import asyncio
+import time
+
+from hooks.core import HookEngine
+from hooks.types import (
+    Hook, HookEntry, HookEvent, HookEventType, HookExecutionContext,
+    HookMetadata, HookResult, HookSource
+)
+
+
+def make_event(action: str = "received") -> HookEvent:
+    return HookEvent(
+        type=HookEventType.MESSAGE,
+        action=action,
+        session_key="s1",
+        context=HookExecutionContext(session_key="s1")
+    )
+
+
+def make_entry(name: str, **metadata) -> HookEntry:
+    return HookEntry(
+        hook=Hook(name=name, description="", source=HookSource.BUNDLED),
+        metadata=HookMetadata(**metadata)
+    )
+
+
+def recording_handler(log, name, delay=0.0):
+    async def handler(event):
+        log.append(("start", name))
+        await asyncio.sleep(delay)
+        log.append(("end", name))
+        return HookResult(success=True)
+    return handler
+
+
+class TestHookEngineDispatch:
+    """Dispatch without a global lock"""
+
+    async def test_events_processed_concurrently(self):
+        engine = HookEngine()
+        engine.registry.register("message", recording_handler([], "slow", 0.2))
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(engine.trigger(make_event()) for _ in range(5)))
+        elapsed = time.perf_counter() - start
+
+        assert all(r[0].success for r in results)
+        assert elapsed < 0.6
+
+    async def test_priority_tiers(self):
+        engine = HookEngine()
+        log = []
+        engine.registry.register("message", recording_handler(log, "low-a", 0.05), priority=0)
+        engine.registry.register("message:received", recording_handler(log, "low-b", 0.05), priority=0)
+        engine.registry.register("message", recording_handler(log, "high", 0.05), priority=10)
+
+        results = await engine.trigger(make_event())
+
+        assert len(results) == 3
+        assert log[:2] == [("start", "high"), ("end", "high")]
+        # Handlers in the same tier overlap
+        assert {log[2][1], log[3][1]} == {"low-a", "low-b"}
+        assert log[2][0] == log[3][0] == "start"
+
+    async def test_dispatch_table_copy_on_write(self):
+        engine = HookEngine()
+        log = []
+        engine.registry.register("message", recording_handler(log, "a"))
+        table = engine.registry.get_dispatch_table("message", "received")
+        assert engine.registry.get_dispatch_table("message", "received") is table
+
+        engine.registry.register("message", recording_handler(log, "b"))
+        assert len(table[0]) == 1
+        assert len(engine.registry.get_dispatch_table("message", "received")[0]) == 2
+
+    async def test_handler_concurrency_limit(self):
+        engine = HookEngine()
+        engine.registry.register(
+            "message", recording_handler([], "limited", 0.05),
+            hook_entry=make_entry("limited", max_concurrency=2)
+        )
+
+        await asyncio.gather(*(engine.trigger(make_event()) for _ in range(6)))
+
+        metrics = engine.get_handler_metrics()["message:limited"]
+        assert metrics["calls"] == 6
+        assert metrics["peak_in_flight"] == 2
+        assert metrics["throttled"] >= 1
+
+    async def test_timeout_metrics(self):
+        engine = HookEngine()
+        engine.registry.register(
+            "message", recording_handler([], "sleepy", 1.0),
+            hook_entry=make_entry("sleepy", timeout=0.05)
+        )
+
+        results = await engine.trigger(make_event())
+
+        assert not results[0].success
+        metrics = engine.get_handler_metrics()["message:sleepy"]
+        assert metrics["timeouts"] == 1
+        assert engine.get_statistics()["registry"]["timeouts"] == 1
+
+    async def test_unregister(self):
+        engine = HookEngine()
+        handler = recording_handler([], "gone")
+        engine.registry.register("message", handler, hook_entry=make_entry("gone"))
+        assert engine.registry.unregister("message", handler)
+        assert await engine.trigger(make_event()) == []
@@ -0,0 +1,225 @@
+"""
+Async observer hook queue tests
+"""
+
+import asyncio
+import time
+
+from hooks.core import HookEngine
+from hooks.types import (
+    Hook, HookEntry, HookEvent, HookEventType, HookExecutionContext,
+    HookMetadata, HookResult, HookSource
+)
+
+
+def make_event(action: str = "received") -> HookEvent:
+    return HookEvent(
+        type=HookEventType.MESSAGE,
+        action=action,
+        session_key="s1",
+        context=HookExecutionContext(session_key="s1")
+    )
+
+
+def make_entry(name: str, **metadata) -> HookEntry:
+    return HookEntry(
+        hook=Hook(name=name, description="", source=HookSource.BUNDLED),
+        metadata=HookMetadata(**metadata)
+    )
+
+
+async def sync_handler(event):
+    return HookResult(success=True, messages=["sync"])
+
+
+class TestObserverDispatch:
+    """Observers do not block the caller"""
+
+    async def test_caller_does_not_wait_for_observer(self):
+        engine = HookEngine()
+        seen = []
+
+        async def slow_observer(event):
+            await asyncio.sleep(0.2)
+            seen.append(event.action)
+            return HookResult(success=True)
+
+        engine.registry.register("message", slow_observer, hook_entry=make_entry("audit", mode="async"))
+        engine.registry.register("message", sync_handler)
+
+        start = time.perf_counter()
+        results = await engine.trigger(make_event())
+        elapsed = time.perf_counter() - start
+
+        assert len(results) == 1
+        assert results[0].messages == ["sync"]
+        assert elapsed < 0.1
+        assert seen == []
+
+        assert await engine.observers.drain(timeout=1.0)
+        assert seen == ["received"]
+        await engine.shutdown()
+
+    async def test_observer_only_event(self):
+        engine = HookEngine()
+        seen = []
+
+        async def observer(event):
+            seen.append(event.action)
+            return HookResult(success=True)
+
+        engine.registry.register("message", observer, hook_entry=make_entry("audit", mode="async"))
+
+        assert await engine.trigger(make_event()) == []
+        await engine.observers.drain(timeout=1.0)
+        assert seen == ["received"]
+        await engine.shutdown()
+
+    async def test_batches_and_ordering(self):
+        engine = HookEngine()
+        batches = []
+
+        async def batch_observer(events):
+            batches.append([e.action for e in events])
+            await asyncio.sleep(0.01)
+            return HookResult(success=True)
+
+        engine.registry.register(
+            "message", batch_observer,
+            hook_entry=make_entry("metrics", mode="async", batch_size=10)
+        )
+
+        for i in range(25):
+            await engine.trigger(make_event(f"a{i}"))
+        await engine.observers.drain(timeout=1.0)
+
+        flat = [action for batch in batches for action in batch]
+        assert flat == [f"a{i}" for i in range(25)]
+        assert all(len(batch) <= 10 for batch in batches)
+        assert len(batches) < 25
+
+        stats = engine.observers.get_statistics()
+        assert stats['processed'] == 25
+        assert stats['depth'] == 0
+        await engine.shutdown()
+
+    async def test_reregister_keeps_pending_events(self):
+        engine = HookEngine(observer_workers=1)
+        old_seen, new_seen = [], []
+        gate = asyncio.Event()
+
+        async def old_observer(event):
+            await gate.wait()
+            old_seen.append(event.action)
+            return HookResult(success=True)
+
+        async def new_observer(event):
+            new_seen.append(event.action)
+            return HookResult(success=True)
+
+        entry = make_entry("audit", mode="async", queue_size=10)
+        engine.registry.register("message", old_observer, hook_entry=entry)
+        for i in range(4):
+            await engine.trigger(make_event(f"a{i}"))
+        await asyncio.sleep(0.01)
+
+        # Reload the handler while events are still queued for it
+        engine.registry.unregister("message", old_observer)
+        engine.registry.register("message", new_observer, hook_entry=entry)
+        await engine.trigger(make_event("a4"))
+        gate.set()
+        assert await engine.observers.drain(timeout=1.0)
+
+        assert old_seen + new_seen == [f"a{i}" for i in range(5)]
+        assert old_seen == ["a0"]
+        stats = engine.observers.get_statistics()["handlers"]["message:audit"]
+        assert stats["enqueued"] == 5
+        assert stats["processed"] == 5
+        assert stats["dropped"] == 0
+        await engine.shutdown()
+
+
+class TestBackpressure:
+    """Drop policies when an observer falls behind"""
+
+    async def _flood(self, drop_policy, count=20, queue_size=5):
+        engine = HookEngine(observer_workers=1)
+        seen = []
+        gate = asyncio.Event()
+
+        async def observer(event):
+            await gate.wait()
+            seen.append(event.action)
+            return HookResult(success=True)
+
+        engine.registry.register(
+            "message", observer,
+            hook_entry=make_entry("slow", mode="async", queue_size=queue_size, drop_policy=drop_policy)
+        )
+        for i in range(count):
+            await engine.trigger(make_event(f"e{i}"))
+        return engine, seen, gate
+
+    async def test_drop_oldest(self):
+        engine, seen, gate = await self._flood("drop_oldest")
+        gate.set()
+        await engine.observers.drain(timeout=1.0)
+
+        # The first event was already in flight; the newest five survive
+        assert seen[-5:] == [f"e{i}" for i in range(15, 20)]
+        assert engine.observers.get_statistics()['dropped'] == 20 - len(seen)
+        await engine.shutdown()
+
+    async def test_drop_newest(self):
+        engine, seen, gate = await self._flood("drop_newest")
+        gate.set()
+        await engine.observers.drain(timeout=1.0)
+
+        assert seen == [f"e{i}" for i in range(len(seen))]
+        assert engine.observers.get_statistics()['dropped'] == 20 - len(seen)
+        await engine.shutdown()
+
+    async def test_block_waits_for_space(self):
+        engine = HookEngine(observer_workers=1)
+        seen = []
+
+        async def observer(event):
+            await asyncio.sleep(0.01)
+            seen.append(event.action)
+            return HookResult(success=True)
+
+        engine.registry.register(
+            "message", observer,
+            hook_entry=make_entry("slow", mode="async", queue_size=2, drop_policy="block")
+        )
+        for i in range(10):
+            await engine.trigger(make_event(f"e{i}"))
+        await engine.observers.drain(timeout=1.0)
+
+        assert seen == [f"e{i}" for i in range(10)]
+        assert engine.observers.get_statistics()['dropped'] == 0
+        await engine.shutdown()
+
+
+class TestObserverStatistics:
+    """Queue stats exposed through the engine and manager"""
+
+    async def test_statistics_reported(self, monkeypatch):
+        from hooks import manager
+
+        engine = HookEngine()
+        monkeypatch.setattr(manager, "get_hook_engine", lambda: engine)
+
+        async def observer(event):
+            return HookResult(success=False, error="boom")
+
+        engine.registry.register("message", observer, hook_entry=make_entry("audit", mode="async"))
+        await engine.trigger(make_event())
+        await engine.observers.drain(timeout=1.0)
+
+        stats = manager.HookManager().get_statistics()['async_hooks']
+        assert stats['enqueued'] == 1
+        assert stats['failed'] == 1
+        assert stats['drain_latency']['max'] >= 0.0
+        assert engine.get_statistics()['observer_queue']['processed'] == 1
+        await engine.shutdown()
@@ -0,0 +1,3 @@
+"""
+AgentBus日志系统测试
+"""
@@ -0,0 +1,196 @@
+"""
+列式块格式测试
+
+验证块的编码/解码、利用块尾（时间范围、级别位图、logger字典）跳过整块、
+按索引偏移读取单条记录，以及所有字段类型的往返。
+"""
+
+import io
+from datetime import datetime, timedelta
+
+import pytest
+
+from agentbus_logging import log_storage
+from agentbus_logging.log_manager import LogRecord
+from agentbus_logging.log_storage import (
+    BLOCK_CODEC_NONE,
+    BLOCK_CODEC_ZLIB,
+    BLOCK_HEADER,
+    BLOCK_MAGIC,
+    BlockFooter,
+    CompressionType,
+    LogStorage,
+    StorageConfig,
+    StorageStrategy,
+    block_row_to_record,
+    encode_block,
+    read_block_at,
+)
+
+
+# 段的时间范围按写入时的墙钟记录，记录时间戳需要落在段开始之后
+BASE_TIME = datetime.now().replace(microsecond=0) + timedelta(minutes=5)
+LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+
+
+def make_record(i: int, **overrides) -> LogRecord:
+    fields = dict(
+        timestamp=(BASE_TIME + timedelta(seconds=i)).isoformat(),
+        level=LEVELS[i % 4],
+        logger=f"svc{i % 3}",
+        message=f"message {i}",
+        module="test",
+        function="make_record",
+        line=i,
+    )
+    fields.update(overrides)
+    return LogRecord(**fields)
+
+
+def decode(block: bytes):
+    return read_block_at(io.BytesIO(block), 0)
+
+
+@pytest.fixture
+def columnar(tmp_path):
+    """写入 40 条记录、每块 10 条的列式存储"""
+    storage = LogStorage(StorageConfig(
+        base_path=str(tmp_path), strategy=StorageStrategy.COLUMNAR, block_size=10
+    ))
+    for i in range(40):
+        storage.write_record(make_record(i))
+    storage.flush()
+    yield storage
+    storage.close()
+
+
+@pytest.fixture
+def decoded_blocks(monkeypatch):
+    """统计被解码的列数据块数"""
+    calls = []
+    original = log_storage.decode_block_payload
+
+    def counting(codec, payload):
+        calls.append(codec)
+        return original(codec, payload)
+
+    monkeypatch.setattr(log_storage, "decode_block_payload", counting)
+    return calls
+
+
+class TestBlockEncoding:
+    """块编码测试"""
+
+    @pytest.mark.parametrize("compression, codec", [
+        (CompressionType.NONE, BLOCK_CODEC_NONE),
+        (CompressionType.GZIP, BLOCK_CODEC_ZLIB),
+        (CompressionType.ZSTD, BLOCK_CODEC_ZLIB),
+    ])
+    def test_encode_decode(self, compression, codec):
+        records = [make_record(i) for i in range(25)]
+        block = encode_block(records, compression)
+
+        magic, block_codec, payload_len, footer_len = BLOCK_HEADER.unpack_from(block)
+        assert magic == BLOCK_MAGIC
+        assert block_codec == codec
+        assert len(block) == BLOCK_HEADER.size + payload_len + footer_len
+
+        footer, columns = decode(block)
+        assert [block_row_to_record(footer, columns, row) for row in range(footer.count)] == records
+
+    def test_footer_summary(self):
+        records = [make_record(i) for i in (5, 1, 9, 3)]
+        footer, _ = decode(encode_block(records, CompressionType.NONE))
+        assert footer.count == 4
+        assert footer.min_timestamp == records[1].timestamp
+        assert footer.max_timestamp == records[2].timestamp
+        assert footer.loggers == ["svc2", "svc1", "svc0"]
+        # 位图第 n 位对应块内第 n 行
+        assert footer.level_bitmaps == {"INFO": 0b0111, "ERROR": 0b1000}
+        assert BlockFooter.from_dict(footer.to_dict()) == footer
+
+    def test_invalid_magic(self):
+        block = bytearray(encode_block([make_record(0)], CompressionType.NONE))
+        block[:4] = b"XXXX"
+        with pytest.raises(ValueError):
+            decode(bytes(block))
+
+    def test_all_field_types_round_trip(self):
+        records = [
+            make_record(
+                0, message="中文消息 \"quoted\"\n\ttab", thread_id=2 ** 40, process_id=1,
+                extra_fields={"nested": {"list": [1, 2.5, None, True]}, "text": "ü"},
+            ),
+            make_record(1, thread_id=None, process_id=None, extra_fields=None),
+            make_record(2, line=0, module="", function="", extra_fields={}),
+            make_record(3, timestamp="2024-01-01T12:00:03Z", level="CRITICAL"),
+        ]
+        for compression in (CompressionType.NONE, CompressionType.GZIP):
+            footer, columns = decode(encode_block(records, compression))
+            decoded = [block_row_to_record(footer, columns, row) for row in range(footer.count)]
+            assert decoded == records
+            assert type(decoded[0].thread_id) is int
+            assert type(decoded[0].extra_fields["nested"]["list"][1]) is float
+
+
+class TestBlockSkipping:
+    """块跳过测试"""
+
+    def test_full_scan_matches_filters(self, columnar):
+        start = BASE_TIME + timedelta(seconds=12)
+        end = BASE_TIME + timedelta(seconds=27)
+        records = list(columnar._full_scan_query(
+            start_time=start, end_time=end, levels=["ERROR"], loggers=["svc0"]
+        ))
+        assert sorted(record.line for record in records) == [15, 27]
+
+    def test_time_range_skips_blocks(self, columnar, decoded_blocks):
+        start = BASE_TIME + timedelta(seconds=21)
+        end = BASE_TIME + timedelta(seconds=24)
+        records = list(columnar._full_scan_query(start_time=start, end_time=end))
+        assert sorted(record.line for record in records) == [21, 22, 23, 24]
+        # 只有第三个块（20-29）与时间范围相交
+        assert len(decoded_blocks) == 1
+
+    def test_level_bitmap_skips_blocks(self, columnar, decoded_blocks):
+        assert list(columnar._full_scan_query(levels=["CRITICAL"])) == []
+        assert decoded_blocks == []
+
+    def test_logger_dictionary_skips_blocks(self, columnar, decoded_blocks):
+        assert list(columnar._full_scan_query(loggers=["missing"])) == []
+        assert decoded_blocks == []
+
+        records = list(columnar._full_scan_query(loggers=["svc1"]))
+        assert sorted(record.line for record in records) == list(range(1, 40, 3))
+        assert len(decoded_blocks) == 4
+
+
+class TestOffsetFetch:
+    """按索引偏移读取测试"""
+
+    def test_indexed_query_fetches_rows_by_offset(self, columnar):
+        rows = columnar._index_db.execute(
+            "SELECT position, size, block_row FROM log_index ORDER BY id"
+        ).fetchall()
+        assert len(rows) == 40
+        positions = sorted({position for position, _, _ in rows})
+        assert len(positions) == 4
+        assert [block_row for _, _, block_row in rows] == list(range(10)) * 4
+
+        records = list(columnar.query_records(levels=["WARNING"], loggers=["svc2"]))
+        assert sorted(record.line for record in records) == [2, 14, 26, 38]
+
+    def test_block_cache_decodes_each_block_once(self, columnar, decoded_blocks):
+        records = list(columnar.query_records())
+        assert sorted(record.line for record in records) == list(range(40))
+        assert len(decoded_blocks) == 4
+
+    def test_fetch_single_row(self, columnar):
+        position, block_row, file_path = columnar._index_db.execute("""
+            SELECT li.position, li.block_row, s.file_path
+            FROM log_index li JOIN meta.segments s ON li.segment_id = s.id
+            WHERE li.timestamp = ?
+        """, ((BASE_TIME + timedelta(seconds=33)).isoformat(),)).fetchone()
+        assert block_row == 3
+        record = columnar._fetch_record(file_path, False, position, 0, block_row)
+        assert record == make_record(33)
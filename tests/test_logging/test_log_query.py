@@ -0,0 +1,122 @@
+"""
+日志查询引擎测试
+
+在普通文本与 gzip 压缩的日志段上建立索引并查询，验证结果顺序、过滤条件，
+以及每个文件在一次查询中只打开一次、查询结束后关闭。
+"""
+
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from agentbus_logging.log_query import LogFileReader, LogQuery, LogQueryEngine
+
+
+BASE_TIME = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def make_line(i: int) -> str:
+    return json.dumps({
+        "timestamp": (BASE_TIME + timedelta(seconds=i)).isoformat(),
+        "level": "ERROR" if i % 5 == 0 else "INFO",
+        "logger": f"svc{i % 2}",
+        "message": f"message {i}",
+        "module": "test",
+        "function": "make_line",
+        "line": i,
+    }) + "\n"
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    """两个段：偶数记录写入普通文件，奇数记录写入gzip文件"""
+    root = tmp_path / "logs"
+    root.mkdir()
+    (root / "plain.log").write_text("".join(make_line(i) for i in range(0, 200, 2)))
+    with gzip.open(root / "archived.log.gz", "wt") as f:
+        f.write("".join(make_line(i) for i in range(1, 200, 2)))
+    return root
+
+
+@pytest.fixture
+def engine(log_dir, tmp_path):
+    engine = LogQueryEngine([str(log_dir)], str(tmp_path / "index.db"), read_batch_size=16)
+    engine.index_logs()
+    return engine
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """记录查询期间打开和关闭的文件读取器"""
+    readers = []
+    original = LogFileReader.open
+
+    def tracking_open(self):
+        readers.append(self)
+        return original(self)
+
+    monkeypatch.setattr(LogFileReader, "open", tracking_open)
+    return readers
+
+
+class TestLogQueryEngine:
+    """查询引擎测试"""
+
+    @pytest.mark.parametrize("sort_order", ["asc", "desc"])
+    def test_query_plain_and_gzip_in_index_order(self, engine, opened, sort_order):
+        records = engine.query(LogQuery(sort_order=sort_order))
+        lines = [record.line for record in records]
+        expected = list(range(200))
+        assert lines == (expected if sort_order == "asc" else expected[::-1])
+
+        # 每个文件整个查询只打开一次，查询结束后全部关闭
+        assert sorted(reader.compressed for reader in opened) == [False, True]
+        assert all(reader._file_handle is None for reader in opened)
+
+    def test_filters_and_limit(self, engine):
+        records = engine.query(LogQuery(levels=["ERROR"], loggers=["svc1"], sort_order="asc"))
+        assert [record.line for record in records] == list(range(5, 200, 10))
+
+        records = engine.query(LogQuery(limit=7, offset=3, sort_order="asc"))
+        assert [record.line for record in records] == list(range(3, 10))
+
+    def test_early_stop_closes_handles(self, engine, opened):
+        results = engine.iter_query(LogQuery(sort_order="asc"))
+        assert [next(results).line for _ in range(3)] == [0, 1, 2]
+        assert opened and any(reader._file_handle is not None for reader in opened)
+
+        results.close()
+        assert all(reader._file_handle is None for reader in opened)
+
+    def test_missing_file_is_skipped(self, engine, log_dir):
+        (log_dir / "archived.log.gz").unlink()
+        records = engine.query(LogQuery(sort_order="asc"))
+        assert [record.line for record in records] == list(range(0, 200, 2))
+
+
+class TestLogFileReader:
+    """文件读取器测试"""
+
+    @pytest.mark.parametrize("compressed", [False, True])
+    def test_read_records_by_offset(self, tmp_path, compressed):
+        lines = [make_line(i).encode() for i in range(50)]
+        offsets = [sum(len(line) for line in lines[:i]) for i in range(50)]
+        path = tmp_path / ("segment.log.gz" if compressed else "segment.log")
+        if compressed:
+            with gzip.open(path, "wb") as f:
+                f.write(b"".join(lines))
+        else:
+            path.write_bytes(b"".join(lines))
+
+        wanted = [offsets[i] for i in (40, 3, 17, 3)]
+        with LogFileReader(str(path), compressed) as reader:
+            records = reader.read_records(wanted, 1024)
+        assert {offset: record.line for offset, record in records.items()} == {
+            offsets[3]: 3, offsets[17]: 17, offsets[40]: 40
+        }
+        assert reader._file_handle is None
+
+        # 未打开时单条读取仍然可用
+        assert LogFileReader(str(path), compressed).read_record(offsets[9], 1024).line == 9
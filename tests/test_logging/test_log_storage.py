@@ -0,0 +1,84 @@
+"""
+日志存储测试
+
+验证同一分区周期内反复打开、关闭存储时段文件不会冲突，以及索引查询与写入并发。
+"""
+
+import threading
+from datetime import datetime
+
+import pytest
+
+from agentbus_logging.log_manager import LogRecord
+from agentbus_logging.log_storage import (
+    CompressionType,
+    LogStorage,
+    StorageConfig,
+    StorageStrategy,
+)
+
+
+def make_record(i: int, logger: str = "test.storage") -> LogRecord:
+    return LogRecord(
+        timestamp=datetime.now().isoformat(),
+        level="INFO",
+        logger=logger,
+        message=f"message {i}",
+        module="test",
+        function="make_record",
+        line=i,
+    )
+
+
+@pytest.mark.parametrize("strategy, compression", [
+    (StorageStrategy.JSON, CompressionType.GZIP),
+    (StorageStrategy.JSON, CompressionType.NONE),
+    (StorageStrategy.COLUMNAR, CompressionType.NONE),
+])
+def test_reopen_within_same_partition(tmp_path, strategy, compression):
+    config = StorageConfig(base_path=str(tmp_path), strategy=strategy, compression=compression)
+    for round_no in range(3):
+        storage = LogStorage(config)
+        for i in range(5):
+            storage.write_record(make_record(round_no * 5 + i))
+        storage.close()
+
+    storage = LogStorage(config)
+    try:
+        rows = storage._metadata_db.execute("SELECT file_path FROM segments").fetchall()
+        paths = [row[0] for row in rows]
+        assert len(paths) == len(set(paths)) >= 3
+        # 每轮写入的记录都还能查到，之前的压缩段没有被覆盖
+        messages = {record.message for record in storage.query_records()}
+        assert messages == {f"message {i}" for i in range(15)}
+    finally:
+        storage.close()
+
+
+def test_indexed_query_concurrent_with_writes(tmp_path):
+    config = StorageConfig(base_path=str(tmp_path), compression=CompressionType.NONE,
+                           write_buffer_size=8)
+    storage = LogStorage(config)
+    errors = []
+
+    def writer():
+        try:
+            for i in range(400):
+                storage.write_record(make_record(i))
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        while thread.is_alive():
+            list(storage.query_records(limit=20))
+    except Exception as e:
+        errors.append(e)
+    finally:
+        thread.join()
+    try:
+        assert errors == []
+        assert len(list(storage.query_records())) == 400
+    finally:
+        storage.close()
@@ -0,0 +1,101 @@
+"""
+指标收集器测试
+"""
+
+import random
+import threading
+
+from agentbus_logging.metrics import MetricType, MetricsCollector, QuantileSketch
+
+
+class TestQuantileSketch:
+    """分位数草图测试"""
+
+    def test_quantiles_within_relative_accuracy(self):
+        rng = random.Random(42)
+        values = [rng.lognormvariate(0, 1) for _ in range(20000)]
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+
+        ordered = sorted(values)
+        for q in (0.5, 0.9, 0.99):
+            expected = ordered[int(q * (len(ordered) - 1))]
+            assert abs(sketch.quantile(q) - expected) <= expected * 0.02
+
+    def test_merge_equals_single_sketch(self):
+        left, right, combined = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for i in range(1, 1001):
+            (left if i % 2 else right).add(i)
+            combined.add(i)
+
+        left.merge(right)
+        assert left.count == combined.count == 1000
+        assert left.sum == combined.sum
+        assert left.quantile(0.95) == combined.quantile(0.95)
+
+    def test_zero_and_negative_values(self):
+        sketch = QuantileSketch()
+        for value in (-5.0, 0.0, 0.0, 5.0):
+            sketch.add(value)
+        assert sketch.min == -5.0
+        assert sketch.quantile(0.5) == 0.0
+        assert sketch.quantile(1.0) == 5.0
+
+
+class TestMetricsCollector:
+    """指标收集器测试"""
+
+    def test_concurrent_counters_are_exact(self):
+        collector = MetricsCollector(shard_count=4)
+
+        def worker():
+            for _ in range(1000):
+                collector.increment_counter("requests", 1, {"route": "/a"})
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        metric = collector.metrics['requests:{"route": "/a"}']
+        assert metric.type == MetricType.COUNTER
+        assert metric.value == 8000
+
+    def test_response_time_stats_merge_label_sets(self):
+        collector = MetricsCollector()
+        for i in range(1, 101):
+            collector.record_timer("latency", i / 100, {"route": "/a" if i % 2 else "/b"})
+
+        stats = collector.get_response_time_stats("latency")
+        assert stats["min"] == 0.01
+        assert stats["max"] == 1.0
+        assert abs(stats["p50"] - 0.5) < 0.02
+        assert collector.get_timer_sketch("latency", {"route": "/a"}).count == 50
+
+    def test_prometheus_exposition(self):
+        collector = MetricsCollector()
+        collector.increment_counter("http.requests", 2, {"method": "GET"})
+        collector.set_gauge("queue_depth", 7)
+        collector.record_timer("latency", 0.25)
+
+        text = collector.export_metrics("prometheus")
+        assert "# TYPE http_requests counter" in text
+        assert 'http_requests{method="GET"} 2' in text
+        assert "queue_depth 7" in text
+        assert "# TYPE latency summary" in text
+        assert 'latency{quantile="0.5"}' in text
+        assert "latency_count 1" in text
+
+    def test_prometheus_namespaces_colliding_families(self):
+        collector = MetricsCollector()
+        collector.record_timer("latency", 0.25)
+        collector.record_histogram("latency", 3.0)
+
+        text = collector.export_metrics("prometheus")
+        assert text.count("# TYPE latency ") == 1
+        assert "# TYPE latency summary" in text
+        assert "# TYPE latency_histogram summary" in text
+        assert "latency_count 1" in text
+        assert "latency_histogram_count 1" in text
@@ -0,0 +1,207 @@
+"""
+远程日志传输测试
+
+使用内置的 CentralizedLogServer 验证批量发送、spool 溢出和补发。
+"""
+
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from agentbus_logging.log_manager import LogRecord
+from agentbus_logging.remote_transport import (
+    CentralizedLogServer,
+    HTTPLogTransport,
+    decode_records,
+    encode_records,
+)
+
+
+def make_record(i: int) -> LogRecord:
+    return LogRecord(
+        timestamp=datetime.now().isoformat(),
+        level="INFO",
+        logger="test.remote",
+        message=f"message {i}",
+        module="test",
+        function="make_record",
+        line=i,
+    )
+
+
+def wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+@pytest.fixture
+def log_server():
+    """在后台线程启动集中式日志服务器"""
+    server = CentralizedLogServer(port=0)
+    received = []
+    lock = threading.Lock()
+
+    def handler(records):
+        with lock:
+            received.extend(records)
+
+    server.add_log_handler(handler)
+    thread = threading.Thread(target=server.start, daemon=True)
+    thread.start()
+    assert wait_for(lambda: server._running)
+
+    yield server, received
+
+    server.stop()
+
+
+class TestEncoding:
+    """批次编码测试"""
+
+    @pytest.mark.parametrize("compress", [True, False])
+    def test_round_trip(self, compress):
+        records = [make_record(i) for i in range(10)]
+        payload = encode_records(records, compress)
+        assert decode_records(payload, compress) == records
+
+
+class TestHTTPLogTransport:
+    """HTTP传输测试"""
+
+    def test_ships_batches_to_server(self, log_server):
+        server, received = log_server
+        transport = HTTPLogTransport(
+            "http", f"http://127.0.0.1:{server.port}/logs",
+            batch_size=10, batch_timeout=0.05
+        )
+
+        for i in range(95):
+            transport.write(make_record(i))
+        transport.close()
+
+        assert sorted(r.line for r in received) == list(range(95))
+        stats = transport.get_stats()
+        assert stats["sent_records"] == 95
+        assert stats["dropped_records"] == 0
+        assert stats["buffered_records"] == 0
+
+    def test_unreachable_collector_spools_and_recovers(self, log_server, tmp_path):
+        server, received = log_server
+        dead = HTTPLogTransport(
+            "spool", "http://127.0.0.1:9/logs",
+            batch_size=5, batch_timeout=0.05, retry_count=1,
+            timeout=1, spool_dir=str(tmp_path)
+        )
+        for i in range(12):
+            dead.write(make_record(i))
+        dead.close()
+
+        stats = dead.get_stats()
+        assert stats["spooled_records"] == 12
+        assert stats["dropped_records"] == 0
+        assert list((tmp_path / "spool").iterdir())
+
+        # 同名传输重启后补发spool中的批次
+        alive = HTTPLogTransport(
+            "spool", f"http://127.0.0.1:{server.port}/logs",
+            batch_size=5, batch_timeout=0.05, spool_dir=str(tmp_path)
+        )
+        alive.flush()
+        assert wait_for(lambda: len(received) == 12)
+        alive.close()
+
+        assert sorted(r.line for r in received) == list(range(12))
+        assert alive.get_stats()["spooled_batches"] == 0
+
+    def test_buffer_overflow_without_spool_drops(self):
+        transport = HTTPLogTransport(
+            "overflow", "http://127.0.0.1:9/logs",
+            batch_size=5, batch_timeout=60, max_buffer_records=5, retry_count=1, timeout=1
+        )
+        for i in range(20):
+            transport.write(make_record(i))
+
+        assert transport.get_stats()["buffered_records"] <= 5
+        transport.close()
+
+        stats = transport.get_stats()
+        assert stats["dropped_records"] == 20
+        assert stats["sent_records"] == 0
+
+
+class TestSpoolRecovery:
+    """spool崩溃恢复与死信测试"""
+
+    def test_tmp_leftovers_finished_or_removed(self, tmp_path):
+        spool = tmp_path / "tmp"
+        spool.mkdir()
+        payload = encode_records([make_record(i) for i in range(3)], True)
+        (spool / "00000000000000000001-000000-3.ndjson.gz.tmp").write_bytes(payload)
+        (spool / "00000000000000000002-000000-3.ndjson.gz.tmp").write_bytes(payload[:10])
+
+        transport = HTTPLogTransport(
+            "tmp", "http://127.0.0.1:9/logs", batch_timeout=60, spool_dir=str(tmp_path)
+        )
+        try:
+            assert [file.name for file in transport._spool_files] == [
+                "00000000000000000001-000000-3.ndjson.gz"
+            ]
+            assert sorted(file.name for file in spool.iterdir()) == [
+                "00000000000000000001-000000-3.ndjson.gz"
+            ]
+        finally:
+            transport.close()
+
+    def test_failing_batch_moves_to_dead_letter(self, log_server, tmp_path):
+        server, received = log_server
+        spool = tmp_path / "dlq"
+        spool.mkdir()
+        # 第一个批次内容损坏，服务端始终拒绝
+        (spool / "00000000000000000001-000000-1.ndjson").write_bytes(b"not json\n")
+        (spool / "00000000000000000002-000000-2.ndjson").write_bytes(
+            encode_records([make_record(0), make_record(1)], False)
+        )
+
+        transport = HTTPLogTransport(
+            "dlq", f"http://127.0.0.1:{server.port}/logs",
+            batch_timeout=60, retry_count=1, max_retry_delay=0.01,
+            max_spool_attempts=3, spool_dir=str(tmp_path)
+        )
+        transport.flush()
+        try:
+            assert wait_for(lambda: transport.get_stats()["dead_letter_batches"] == 1)
+            assert len(received) == 2
+            stats = transport.get_stats()
+            assert stats["spooled_batches"] == 0
+            assert stats["spool_bytes"] == 0
+            assert [file.name for file in (spool / "dead").iterdir()] == [
+                "00000000000000000001-000000-1.ndjson"
+            ]
+        finally:
+            transport.close()
+
+    def test_close_releases_sessions(self, log_server):
+        server, _ = log_server
+        transport = HTTPLogTransport(
+            "sessions", f"http://127.0.0.1:{server.port}/logs",
+            batch_size=5, batch_timeout=0.05
+        )
+        for i in range(20):
+            transport.write(make_record(i))
+        transport.flush()
+        assert wait_for(lambda: transport.get_stats()["sent_records"] == 20)
+        sessions = list(transport._sessions)
+        assert sessions
+
+        closed = []
+        for session in sessions:
+            session.close = lambda session=session: closed.append(session)
+        transport.close()
+        assert closed == sessions
+        assert transport._sessions == []
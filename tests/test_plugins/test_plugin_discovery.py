@@ -0,0 +1,213 @@
+"""
+AgentBus插件发现缓存测试
+
+测试静态AST扫描、发现缓存以及首次激活时的延迟导入。
+"""
+
+import logging
+import os
+
+import pytest
+
+from plugins.core import PluginContext, PluginStatus
+from plugins.discovery import PluginDiscoveryCache, scan_plugin_source
+from plugins.manager import PluginManager
+
+
+PLUGIN_SOURCE = '''
+from plugins import AgentBusPlugin, PluginContext
+
+raise RuntimeError("module executed during discovery")
+
+class {cls}(AgentBusPlugin):
+    def get_info(self):
+        return {{
+            'id': '{plugin_id}',
+            'name': '{cls} Plugin',
+            'version': '{version}',
+            'description': 'static',
+            'author': 'Test',
+            'dependencies': ['base']
+        }}
+'''
+
+LAZY_SOURCE = '''
+from plugins import AgentBusPlugin, PluginContext
+
+IMPORTS.append(__name__)
+
+class LazyPlugin(AgentBusPlugin):
+    def get_info(self):
+        return {
+            'id': 'lazy_plugin',
+            'name': 'Lazy Plugin',
+            'version': '1.0.0',
+            'description': 'imported on activation',
+        }
+
+    async def activate(self):
+        await super().activate()
+        self.register_tool("ping", "Ping", self.ping)
+
+    def ping(self):
+        return "pong"
+'''
+
+
+def write_plugin(directory, filename, cls="TestPlugin", plugin_id="test_plugin", version="1.0.0"):
+    path = os.path.join(directory, filename)
+    with open(path, 'w') as f:
+        f.write(PLUGIN_SOURCE.format(cls=cls, plugin_id=plugin_id, version=version))
+    return path
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache" / "plugin_discovery.json")
+
+
+@pytest.fixture
+def make_manager(cache_path):
+    def factory(*plugin_dirs):
+        context = PluginContext(config={}, logger=logging.getLogger("test_discovery"), runtime={})
+        return PluginManager(context, plugin_dirs=list(plugin_dirs), discovery_cache_path=cache_path)
+    return factory
+
+
+class TestStaticScan:
+    """测试静态AST扫描"""
+
+    def test_scan_extracts_literal_info(self):
+        records = scan_plugin_source(PLUGIN_SOURCE.format(cls="Demo", plugin_id="demo", version="2.0"))
+        assert len(records) == 1
+        assert records[0]['class_name'] == 'Demo'
+        assert records[0]['plugin_id'] == 'demo'
+        assert records[0]['version'] == '2.0'
+        assert records[0]['dependencies'] == ['base']
+
+    def test_scan_non_literal_id_and_inheritance(self):
+        source = '''
+import plugins
+
+class Base(plugins.AgentBusPlugin):
+    def get_info(self):
+        return {'id': self.plugin_id, 'name': 'Base'}
+
+class Derived(Base):
+    pass
+
+class Abstract(plugins.AgentBusPlugin):
+    pass
+
+class Unrelated:
+    def get_info(self):
+        return {}
+'''
+        records = {r['class_name']: r for r in scan_plugin_source(source)}
+        assert set(records) == {'Base', 'Derived'}
+        assert records['Base']['plugin_id'] == 'base'
+        assert records['Derived']['name'] == 'Base'
+
+
+class TestDiscoveryCache:
+    """测试发现缓存"""
+
+    @pytest.mark.asyncio
+    async def test_discover_does_not_execute_modules(self, make_manager, tmp_path):
+        path = write_plugin(str(tmp_path), "static_plugin.py")
+        manager = make_manager(str(tmp_path))
+
+        discovered = await manager.discover_plugins()
+        assert [p.plugin_id for p in discovered] == ['test_plugin']
+        assert discovered[0].module_path == path
+        assert discovered[0].status == PluginStatus.UNLOADED
+
+    @pytest.mark.asyncio
+    async def test_cache_reused_across_managers(self, make_manager, tmp_path, cache_path):
+        write_plugin(str(tmp_path), "a_plugin.py", "APlugin", "a")
+        write_plugin(str(tmp_path), "b_plugin.py", "BPlugin", "b")
+
+        first = make_manager(str(tmp_path))
+        await first.discover_plugins()
+        assert first._discovery_stats['cache_misses'] == 2
+        assert os.path.exists(cache_path)
+
+        second = make_manager(str(tmp_path))
+        discovered = await second.discover_plugins()
+        assert sorted(p.plugin_id for p in discovered) == ['a', 'b']
+        stats = (await second.get_plugin_stats())['discovery']
+        assert stats['cache_hits'] == 2
+        assert stats['cache_misses'] == 0
+
+    def test_cache_validates_mtime_then_hash(self, tmp_path):
+        path = write_plugin(str(tmp_path), "p.py", version="1.0.0")
+        cache = PluginDiscoveryCache()
+        cache.scan_file(path)
+
+        # 仅修改mtime：内容哈希一致，仍然命中
+        os.utime(path, ns=(1, 1))
+        assert cache.scan_file(path)[0]['version'] == '1.0.0'
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        # 内容变化：重新扫描
+        write_plugin(str(tmp_path), "p.py", version="2.0.0")
+        os.utime(path, ns=(2, 2))
+        assert cache.scan_file(path)[0]['version'] == '2.0.0'
+        assert cache.misses == 2
+
+    @pytest.mark.asyncio
+    async def test_removed_files_pruned(self, make_manager, tmp_path):
+        path = write_plugin(str(tmp_path), "gone.py")
+        manager = make_manager(str(tmp_path))
+        await manager.discover_plugins()
+        assert path in manager._discovery_cache._entries
+
+        os.remove(path)
+        assert await manager.discover_plugins() == []
+        assert path not in manager._discovery_cache._entries
+
+    @pytest.mark.asyncio
+    async def test_multiple_directories(self, make_manager, tmp_path):
+        dirs = []
+        for i in range(3):
+            directory = tmp_path / f"dir{i}"
+            directory.mkdir()
+            write_plugin(str(directory), f"plugin_{i}.py", f"Plugin{i}", f"plugin_{i}")
+            dirs.append(str(directory))
+
+        manager = make_manager(*dirs, str(tmp_path / "missing"))
+        discovered = await manager.discover_plugins()
+        assert [p.plugin_id for p in discovered] == ['plugin_0', 'plugin_1', 'plugin_2']
+        assert manager._discovery_stats['directories'] == 3
+
+
+class TestLazyActivation:
+    """测试首次激活时延迟导入"""
+
+    @pytest.mark.asyncio
+    async def test_activate_imports_discovered_plugin(self, make_manager, tmp_path):
+        import builtins
+        imports = []
+        builtins.IMPORTS = imports
+        try:
+            (tmp_path / "lazy_plugin.py").write_text(LAZY_SOURCE)
+            manager = make_manager(str(tmp_path))
+
+            await manager.discover_plugins()
+            assert imports == []
+            assert manager.get_plugin('lazy_plugin') is None
+            assert [p.plugin_id for p in manager.list_discovered_plugins()] == ['lazy_plugin']
+
+            assert await manager.activate_plugin('lazy_plugin')
+            assert len(imports) == 1
+            assert manager.get_plugin_status('lazy_plugin') == PluginStatus.ACTIVE
+            assert manager.get_plugin_info('lazy_plugin').status == PluginStatus.ACTIVE
+            assert 'ping' in manager.get_tools()
+        finally:
+            del builtins.IMPORTS
+
+    @pytest.mark.asyncio
+    async def test_activate_unknown_plugin(self, make_manager, tmp_path):
+        manager = make_manager(str(tmp_path))
+        await manager.discover_plugins()
+        assert await manager.activate_plugin('missing') is False
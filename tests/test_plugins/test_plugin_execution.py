@@ -0,0 +1,200 @@
+"""
+AgentBus插件执行策略测试
+
+测试钩子并发执行、同步函数线程池卸载、进程池隔离、超时以及插件指标。
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+import pytest
+
+from plugins.core import AgentBusPlugin, ExecutionMode, PluginContext
+from plugins.manager import PluginManager
+
+
+def cpu_square(x):
+    """模块级函数，可被进程池pickle"""
+    return x * x
+
+
+class PolicyPlugin(AgentBusPlugin):
+    def __init__(self, plugin_id, context, priority=0, delay=0.1):
+        super().__init__(plugin_id, context)
+        self.priority = priority
+        self.delay = delay
+        self.threads = []
+
+    def get_info(self):
+        return {'id': self.plugin_id, 'name': self.plugin_id, 'version': '1.0.0'}
+
+    async def activate(self):
+        await super().activate()
+        self.register_hook("async_event", self.async_hook, priority=self.priority)
+        self.register_hook("sync_event", self.sync_hook, priority=self.priority)
+        self.register_hook("slow_event", self.slow_hook, timeout=0.05)
+        self.register_tool(f"{self.plugin_id}_blocking", "Blocking tool", self.blocking_tool)
+        self.register_tool(f"{self.plugin_id}_slow", "Slow tool", self.slow_tool, timeout=0.05)
+        self.register_tool(f"{self.plugin_id}_cpu", "CPU tool", cpu_square, execution=ExecutionMode.PROCESS)
+        self.register_tool(f"{self.plugin_id}_inline", "Inline tool", self.inline_tool, execution="inline")
+
+    async def async_hook(self, message):
+        await asyncio.sleep(self.delay)
+        return f"{self.plugin_id}: {message}"
+
+    def sync_hook(self, message):
+        self.threads.append(threading.current_thread())
+        time.sleep(self.delay)
+        return f"{self.plugin_id}: {message}"
+
+    async def slow_hook(self, message):
+        await asyncio.sleep(1)
+        return "late"
+
+    def blocking_tool(self):
+        self.threads.append(threading.current_thread())
+        time.sleep(self.delay)
+        return "done"
+
+    async def slow_tool(self):
+        await asyncio.sleep(1)
+
+    def inline_tool(self):
+        self.threads.append(threading.current_thread())
+        return "inline"
+
+
+@pytest.fixture
+async def manager(tmp_path):
+    context = PluginContext(config={}, logger=logging.getLogger("test_execution"), runtime={})
+    manager = PluginManager(context, plugin_dirs=[str(tmp_path)],
+                            discovery_cache_path=str(tmp_path / "cache.json"))
+    yield manager
+    await manager.shutdown()
+
+
+async def add_plugin(manager, plugin_id, **kwargs):
+    plugin = PolicyPlugin(plugin_id, manager._context, **kwargs)
+    manager._plugins[plugin_id] = plugin
+    assert await manager.activate_plugin(plugin_id)
+    return plugin
+
+
+class TestHookExecution:
+    """测试钩子执行策略"""
+
+    @pytest.mark.asyncio
+    async def test_same_priority_hooks_run_concurrently(self, manager):
+        for i in range(4):
+            await add_plugin(manager, f"p{i}")
+
+        start = time.perf_counter()
+        results = await manager.execute_hook("async_event", "hi")
+        elapsed = time.perf_counter() - start
+
+        assert sorted(results) == [f"p{i}: hi" for i in range(4)]
+        assert elapsed < 0.3
+
+    @pytest.mark.asyncio
+    async def test_priority_order_preserved(self, manager):
+        await add_plugin(manager, "low", priority=1, delay=0.0)
+        await add_plugin(manager, "high", priority=10, delay=0.05)
+
+        results = await manager.execute_hook("async_event", "x")
+        assert results == ["high: x", "low: x"]
+
+    @pytest.mark.asyncio
+    async def test_sync_hooks_offloaded(self, manager):
+        plugins = [await add_plugin(manager, f"s{i}") for i in range(3)]
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        start = time.perf_counter()
+        results = await manager.execute_hook("sync_event", "y")
+        elapsed = time.perf_counter() - start
+        task.cancel()
+
+        assert len(results) == 3
+        assert elapsed < 0.3
+        assert ticks >= 3
+        main = threading.main_thread()
+        assert all(t is not main for p in plugins for t in p.threads)
+
+    @pytest.mark.asyncio
+    async def test_hook_timeout(self, manager):
+        await add_plugin(manager, "slow")
+
+        assert await manager.execute_hook("slow_event", "z") == []
+        metrics = manager.get_plugin_metrics("slow")
+        assert metrics['timeouts'] == 1
+        assert metrics['errors'] == 1
+
+
+class TestToolExecution:
+    """测试工具执行策略"""
+
+    @pytest.mark.asyncio
+    async def test_blocking_tool_runs_in_thread(self, manager):
+        plugin = await add_plugin(manager, "t", delay=0.05)
+
+        assert await manager.execute_tool("t_blocking") == "done"
+        assert plugin.threads[0] is not threading.main_thread()
+
+    @pytest.mark.asyncio
+    async def test_inline_tool(self, manager):
+        plugin = await add_plugin(manager, "t")
+
+        assert await manager.execute_tool("t_inline") == "inline"
+        assert plugin.threads[0] is threading.main_thread()
+
+    @pytest.mark.asyncio
+    async def test_process_tool(self, manager):
+        await add_plugin(manager, "t")
+
+        assert await manager.execute_tool("t_cpu", 12) == 144
+
+    @pytest.mark.asyncio
+    async def test_tool_timeout_returns_error(self, manager):
+        await add_plugin(manager, "t")
+
+        result = await manager.execute_tool("t_slow")
+        assert isinstance(result, asyncio.TimeoutError)
+
+    @pytest.mark.asyncio
+    async def test_default_timeout(self, manager):
+        await add_plugin(manager, "t", delay=0.5)
+        manager.default_timeout = 0.05
+
+        result = await manager.execute_tool("t_blocking")
+        assert isinstance(result, asyncio.TimeoutError)
+
+
+class TestPluginMetrics:
+    """测试插件指标"""
+
+    @pytest.mark.asyncio
+    async def test_metrics_in_plugin_stats(self, manager):
+        await add_plugin(manager, "m", delay=0.01)
+
+        await manager.execute_hook("async_event", "a")
+        await manager.execute_tool("m_blocking")
+        await manager.execute_tool("m_slow")
+
+        stats = await manager.get_plugin_stats()
+        metrics = stats['plugin_metrics']['m']
+        assert metrics['hook_calls'] == 1
+        assert metrics['tool_calls'] == 2
+        assert metrics['errors'] == 1
+        assert metrics['timeouts'] == 1
+        assert metrics['error_rate'] == pytest.approx(1 / 3)
+        assert metrics['max_latency'] >= 0.05
+        assert metrics['avg_latency'] > 0
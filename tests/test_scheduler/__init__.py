@@ -0,0 +1,3 @@
+"""
+AgentBus调度器测试
+"""
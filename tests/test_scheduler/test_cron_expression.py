@@ -0,0 +1,70 @@
+"""
+Cron表达式测试
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from scheduler.cron_handler import CronExpression, CronHandler
+
+
+FROM = datetime(2026, 10, 18, 12, 30, 15)  # 周日
+
+
+class TestCronExpression:
+    """编译后的Cron表达式测试"""
+
+    @pytest.mark.parametrize("expression, expected", [
+        ("* * * * *", datetime(2026, 10, 18, 12, 31)),
+        ("*/2 * * * * *", datetime(2026, 10, 18, 12, 30, 16)),
+        ("0 9 * * 1", datetime(2026, 10, 19, 9, 0)),
+        ("0 9 * * 7", datetime(2026, 10, 25, 9, 0)),
+        ("0 9 * * 0", datetime(2026, 10, 25, 9, 0)),
+        ("0 9 1 * *", datetime(2026, 11, 1, 9, 0)),
+        ("0 0 1 1,4,7,10 *", datetime(2027, 1, 1, 0, 0)),
+        ("0 0 29 2 *", datetime(2028, 2, 29, 0, 0)),
+        ("5/15 * * * *", datetime(2026, 10, 18, 12, 35)),
+        ("0 9 * * MON-FRI", datetime(2026, 10, 19, 9, 0)),
+        ("0 12 * JAN *", datetime(2027, 1, 1, 12, 0)),
+    ])
+    def test_next_run(self, expression, expected):
+        assert CronExpression(expression).get_next_run(FROM) == expected
+
+    def test_next_run_is_strictly_later(self):
+        expr = CronExpression("30 12 * * *")
+        at = datetime(2026, 10, 18, 12, 30)
+        assert expr.get_next_run(at) == at + timedelta(days=1)
+
+    def test_day_of_month_or_day_of_week(self):
+        # 日和星期同时限定时满足任一即可（标准cron语义）
+        expr = CronExpression("0 9 13 * 5")
+        assert expr.get_next_run(FROM) == datetime(2026, 10, 23, 9, 0)
+
+    def test_impossible_schedule_returns_none(self):
+        assert CronExpression("0 0 30 2 *").get_next_run(FROM) is None
+
+    def test_matches_consistent_with_next_run(self):
+        expr = CronExpression("*/7 3-5 * * 2,4")
+        current = FROM
+        for _ in range(50):
+            current = expr.get_next_run(current)
+            assert expr._matches(current)
+
+    def test_timezone(self):
+        expr = CronExpression("0 9 * * *", timezone="Asia/Shanghai")
+        result = expr.get_next_run(datetime(2026, 10, 18, 0, 0, tzinfo=timezone.utc))
+        assert result.utcoffset() == timedelta(hours=8)
+        assert result.astimezone(timezone.utc) == datetime(2026, 10, 18, 1, 0, tzinfo=timezone.utc)
+
+    def test_timezone_skips_nonexistent_time(self):
+        # 美东2026-03-08 02:30因夏令时不存在
+        expr = CronExpression("30 2 * * *", timezone="America/New_York")
+        result = expr.get_next_run(datetime(2026, 3, 8, 1, 0))
+        assert result.replace(tzinfo=None) == datetime(2026, 3, 9, 2, 30)
+
+    @pytest.mark.parametrize("expression", [
+        "61 * * * *", "a * * * *", "* * * *", "*/0 * * * *", "5-1 * * * *", "* * 0 * *",
+    ])
+    def test_invalid_expressions(self, expression):
+        assert not CronHandler.validate_cron_expression(expression)
@@ -0,0 +1,148 @@
+"""
+Cron处理器调度循环测试
+"""
+
+import asyncio
+import time
+
+from scheduler.cron_handler import CronHandler, MisfirePolicy, OverlapPolicy
+
+
+class _Probe:
+    """记录并发度的测试任务"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.current = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def run(self):
+        self.calls += 1
+        self.current += 1
+        self.peak = max(self.peak, self.current)
+        try:
+            await self.release.wait()
+        finally:
+            self.current -= 1
+
+
+def _add(handler, probe, **options):
+    task_id = handler.add_scheduled_task("probe", "0 0 1 1 *", probe.run, **options)
+    return handler.get_scheduled_task(task_id)
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestCronHandlerDispatch:
+    """派发与并发策略测试"""
+
+    async def test_overlap_skip(self):
+        handler = CronHandler()
+        probe = _Probe()
+        task = _add(handler, probe)
+        now = time.time()
+        handler._fire(task, now, now)
+        await _settle()
+        handler._fire(task, now, now)
+        assert task.skipped_runs == 1
+        probe.release.set()
+        await _settle()
+        assert probe.calls == 1
+        assert task.active_runs == 0
+
+    async def test_overlap_queue(self):
+        handler = CronHandler()
+        probe = _Probe()
+        task = _add(handler, probe, overlap_policy="queue")
+        now = time.time()
+        handler._fire(task, now, now)
+        handler._fire(task, now, now)
+        await _settle()
+        assert probe.calls == 1
+        probe.release.set()
+        await asyncio.gather(*handler._inflight)
+        assert probe.calls == 2
+        assert probe.peak == 1
+
+    async def test_overlap_allow_bounded_by_workers(self):
+        handler = CronHandler(max_workers=2)
+        probe = _Probe()
+        task = _add(handler, probe, overlap_policy=OverlapPolicy.ALLOW)
+        now = time.time()
+        for _ in range(5):
+            handler._fire(task, now, now)
+        await _settle()
+        assert probe.peak == 2
+        assert handler.get_statistics()['pending_runs'] == 3
+        probe.release.set()
+        await asyncio.gather(*handler._inflight)
+        assert probe.calls == 5
+        assert task.run_count == 5
+
+    async def test_misfire_policies(self):
+        handler = CronHandler(misfire_grace_time=1.0)
+        probe = _Probe()
+        probe.release.set()
+        skip = _add(handler, probe, misfire_policy=MisfirePolicy.SKIP)
+        run_once = _add(handler, probe)
+        now = time.time()
+        handler._fire(skip, now - 30, now)
+        handler._fire(run_once, now - 30, now)
+        await asyncio.gather(*handler._inflight)
+        assert skip.misfired_runs == 1 and skip.run_count == 0
+        assert run_once.misfired_runs == 1 and run_once.run_count == 1
+        assert handler.get_statistics()['misfired_runs'] == 2
+
+    async def test_max_runs(self):
+        handler = CronHandler()
+        probe = _Probe()
+        probe.release.set()
+        task = _add(handler, probe, max_runs=1, overlap_policy="allow")
+        now = time.time()
+        handler._fire(task, now, now)
+        handler._fire(task, now, now)
+        await asyncio.gather(*handler._inflight)
+        assert probe.calls == 1
+        assert not task.enabled
+
+
+class TestCronHandlerLoop:
+    """堆驱动调度循环测试"""
+
+    async def test_loop_wakes_for_new_task_and_records_lag(self):
+        handler = CronHandler()
+        await handler.start()
+        try:
+            calls = []
+            handler.add_scheduled_task("tick", "* * * * * *", lambda: calls.append(time.time()))
+            await asyncio.sleep(1.2)
+        finally:
+            await handler.stop()
+
+        assert calls
+        lag = handler.get_statistics()['scheduling_lag']
+        assert lag['count'] == len(calls)
+        assert lag['max'] < 0.5
+
+    async def test_slow_task_does_not_block_others(self):
+        handler = CronHandler()
+        fast_calls = []
+
+        async def slow():
+            await asyncio.sleep(3)
+
+        handler.add_scheduled_task("slow", "* * * * * *", slow)
+        handler.add_scheduled_task("fast", "* * * * * *", lambda: fast_calls.append(1))
+        await handler.start()
+        try:
+            await asyncio.sleep(2.2)
+        finally:
+            handler.shutdown_timeout = 0.1
+            await handler.stop()
+
+        assert len(fast_calls) >= 2
+        assert handler.get_statistics()['skipped_runs'] >= 1
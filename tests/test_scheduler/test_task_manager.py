@@ -0,0 +1,194 @@
+"""
+任务管理器测试
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from scheduler.task_manager import ExecutorType, TaskConfig, TaskManager, TaskStatus
+
+
+def double(value):
+    return value * 2
+
+
+def worker_pid():
+    return os.getpid()
+
+
+def slow_sync(seconds):
+    time.sleep(seconds)
+    return "done"
+
+
+@pytest.fixture
+async def manager(tmp_path):
+    manager = TaskManager(storage_path=str(tmp_path / "tasks"))
+    await manager.start()
+    yield manager
+    await manager.stop()
+
+
+class TestTaskExecution:
+    """执行位置与超时测试"""
+
+    async def test_sync_function_runs_off_loop(self, manager):
+        loop_thread = threading.get_ident()
+        task_id = manager.create_task("thread", threading.get_ident)
+        await manager.start_task(task_id)
+        task = await manager.wait_for_task(task_id, timeout=5)
+        assert task.status == TaskStatus.COMPLETED
+        assert task.result.data != loop_thread
+
+    async def test_process_executor(self, manager):
+        task_id = manager.create_task(
+            "process", worker_pid, config=TaskConfig(executor=ExecutorType.PROCESS)
+        )
+        await manager.start_task(task_id)
+        task = await manager.wait_for_task(task_id, timeout=30)
+        assert task.status == TaskStatus.COMPLETED
+        assert task.result.data != os.getpid()
+
+    async def test_timeout_enforced(self, manager):
+        async def hang():
+            await asyncio.sleep(10)
+
+        task_id = manager.create_task(
+            "hang", hang, config=TaskConfig(timeout=0.1, auto_retry=False)
+        )
+        await manager.start_task(task_id)
+        task = await manager.wait_for_task(task_id, timeout=5)
+        assert task.status == TaskStatus.TIMEOUT
+
+    async def test_cancel_interrupts_coroutine(self, manager):
+        finished = []
+
+        async def long_job():
+            await asyncio.sleep(10)
+            finished.append(True)
+
+        task_id = manager.create_task("long", long_job)
+        await manager.start_task(task_id)
+        await asyncio.sleep(0.05)
+        assert await manager.cancel_task(task_id)
+        await asyncio.sleep(0.05)
+        assert manager.get_task(task_id).status == TaskStatus.CANCELLED
+        assert not manager._running_futures
+        assert not finished
+
+
+class TestTaskPersistence:
+    """SQLite持久化与崩溃恢复测试"""
+
+    async def test_state_survives_restart(self, tmp_path):
+        path = str(tmp_path / "tasks")
+        first = TaskManager(storage_path=path)
+        await first.start()
+        task_id = first.create_task("double", double, args=(21,))
+        await first.start_task(task_id)
+        await first.wait_for_task(task_id, timeout=5)
+        await first.stop()
+
+        second = TaskManager(storage_path=path)
+        task = second.get_task(task_id)
+        assert task.status == TaskStatus.COMPLETED
+        assert task.result.data == 42
+        assert task.func is double
+        assert task.args == (21,)
+        assert second.get_task_stats()['completed'] == 1
+
+    async def test_interrupted_task_resumed(self, tmp_path):
+        path = str(tmp_path / "tasks")
+        crashed = TaskManager(storage_path=path)
+        await crashed.start()
+        task_id = crashed.create_task("slow", slow_sync, args=(0.5,))
+        await crashed.start_task(task_id)
+        crashed.store.flush()  # 进程在任务运行中崩溃
+
+        recovered = TaskManager(storage_path=path)
+        assert recovered.get_task(task_id).status == TaskStatus.RUNNING
+        await recovered.start()
+        task = await recovered.wait_for_task(task_id, timeout=5)
+        assert task.status == TaskStatus.COMPLETED
+        assert task.result.data == "done"
+        await recovered.stop()
+        await crashed.stop()
+
+    async def test_registered_function_reference(self, tmp_path):
+        path = str(tmp_path / "tasks")
+        first = TaskManager(storage_path=path)
+        first.register_function("square", lambda x: x * x)
+        task_id = first.create_task("square", "square", args=(3,))
+        first.store.stop()
+
+        second = TaskManager(storage_path=path)
+        assert second.get_task(task_id).func is None
+        second.register_function("square", lambda x: x * x)
+        await second.start()
+        await second.start_task(task_id)
+        task = await second.wait_for_task(task_id, timeout=5)
+        assert task.result.data == 9
+        await second.stop()
+
+    async def test_unpicklable_arguments_not_recovered(self, tmp_path):
+        path = str(tmp_path / "tasks")
+        first = TaskManager(storage_path=path)
+        lock = threading.Lock()
+        task_id = first.create_task("locked", double, args=(lock,))
+        kept_id = first.create_task("double", double, args=(1,))
+        assert first.get_task(task_id).metadata['recoverable'] is False
+        first.store.stop()
+
+        second = TaskManager(storage_path=path)
+        # 参数无法恢复的任务被丢弃，而不是以空参数重新运行
+        assert second.get_task(task_id) is None
+        assert second.get_task(kept_id).args == (1,)
+        assert [row['id'] for row in second.store.load()] == [kept_id]
+        second.store.stop()
+
+    async def test_registration_binds_loaded_tasks(self, tmp_path):
+        path = str(tmp_path / "tasks")
+        first = TaskManager(storage_path=path)
+        first.register_function("double", double)
+        task_id = first.create_task("double", "double", args=(4,))
+        first.store.stop()
+
+        second = TaskManager(storage_path=path)
+        assert second.get_task(task_id).func is None
+        second.register_function("double", double)
+        assert second.get_task(task_id).func is double
+        second.store.stop()
+
+    async def test_flush_snapshots_under_manager_lock(self, manager):
+        task_id = manager.create_task("double", double, args=(1,))
+        manager.store.flush()
+        flushed = threading.Event()
+
+        with manager.task_lock:
+            task = manager.get_task(task_id)
+            task.progress = 0.5
+            manager.store.save(task)
+            thread = threading.Thread(target=lambda: (manager.store.flush(), flushed.set()))
+            thread.start()
+            # 持有管理器锁期间不会序列化半更新的任务
+            assert not flushed.wait(0.1)
+            task.progress = 1.0
+        thread.join(timeout=5)
+        assert flushed.is_set()
+        row = {r['id']: r for r in manager.store.load()}[task_id]
+        assert row['progress'] == 1.0
+
+    async def test_state_changes_batched(self, manager):
+        ids = [manager.create_task(f"t{i}", double, args=(i,)) for i in range(50)]
+        for task_id in ids:
+            await manager.start_task(task_id)
+        for task_id in ids:
+            await manager.wait_for_task(task_id, timeout=5)
+        manager.store.flush()
+        store = manager.get_task_stats()['store']
+        assert store['rows_written'] >= 50
+        assert store['flushes'] < store['rows_written']
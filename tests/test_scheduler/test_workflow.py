@@ -0,0 +1,168 @@
+"""
+工作流并行DAG执行测试
+"""
+
+import asyncio
+
+import pytest
+
+from scheduler.workflow import StepStatus, WorkflowEngine, WorkflowStatus
+
+
+def _tracker():
+    """返回记录执行顺序与并发度的步骤函数工厂"""
+    state = {'current': 0, 'peak': 0, 'order': []}
+
+    def make(name, delay=0.05):
+        async def step(*_):
+            state['current'] += 1
+            state['peak'] = max(state['peak'], state['current'])
+            state['order'].append(name)
+            await asyncio.sleep(delay)
+            state['current'] -= 1
+            return name
+        return step
+
+    return state, make
+
+
+class TestWorkflowExecution:
+    """拓扑索引执行器测试"""
+
+    async def test_independent_branches_run_concurrently(self):
+        engine = WorkflowEngine()
+        state, make = _tracker()
+        wf = engine.create_workflow("fan-out")
+        root = engine.add_task_step(wf, "root", make("root"), step_id="root")
+        branches = [
+            engine.add_task_step(wf, f"b{i}", make(f"b{i}", 0.1), dependencies=[root])
+            for i in range(4)
+        ]
+        engine.add_task_step(wf, "sink", make("sink"), dependencies=branches)
+
+        assert await engine.execute_workflow(wf)
+        assert state['order'][0] == "root"
+        assert state['order'][-1] == "sink"
+        assert state['peak'] >= 4
+
+        timeline = engine.get_workflow_timeline(wf)
+        assert timeline['max_parallelism'] >= 4
+        assert all(entry['run_time'] is not None for entry in timeline['steps'])
+
+    async def test_dependency_results_passed_in_order(self):
+        engine = WorkflowEngine()
+        wf = engine.create_workflow("chain")
+        a = engine.add_task_step(wf, "a", lambda: 2)
+        b = engine.add_task_step(wf, "b", lambda x: x * 10)
+        engine.set_dependencies(wf, {b: [a]})
+
+        assert await engine.execute_workflow(wf)
+        assert engine.get_workflow(wf).steps[b].result == 20
+
+    async def test_workflow_concurrency_limit(self):
+        engine = WorkflowEngine()
+        state, make = _tracker()
+        wf = engine.create_workflow("limited", max_concurrency=2)
+        for i in range(6):
+            engine.add_task_step(wf, f"s{i}", make(f"s{i}"))
+
+        assert await engine.execute_workflow(wf)
+        assert state['peak'] == 2
+
+    async def test_global_concurrency_limit(self):
+        engine = WorkflowEngine(max_concurrent_steps=3)
+        state, make = _tracker()
+        workflows = []
+        for n in range(2):
+            wf = engine.create_workflow(f"wf{n}")
+            for i in range(4):
+                engine.add_task_step(wf, f"s{i}", make(f"{n}-{i}"))
+            workflows.append(wf)
+
+        results = await asyncio.gather(*(engine.execute_workflow(wf) for wf in workflows))
+        assert all(results)
+        assert state['peak'] == 3
+
+    async def test_critical_path_first(self):
+        engine = WorkflowEngine()
+        state, make = _tracker()
+        wf = engine.create_workflow("priority", max_concurrency=1)
+        engine.add_task_step(wf, "short", make("short"), step_id="short")
+        engine.add_task_step(wf, "long", make("long"), step_id="long",
+                             metadata={'estimated_duration': 10})
+        engine.add_task_step(wf, "tail", make("tail"), step_id="tail", dependencies=["long"])
+
+        assert await engine.execute_workflow(wf)
+        assert state['order'] == ["long", "short", "tail"]
+
+    async def test_failure_stops_downstream(self):
+        engine = WorkflowEngine()
+
+        async def boom():
+            raise RuntimeError("boom")
+
+        wf = engine.create_workflow("failing")
+        bad = engine.add_task_step(wf, "bad", boom, max_retries=0)
+        after = engine.add_task_step(wf, "after", lambda: None, dependencies=[bad])
+
+        assert not await engine.execute_workflow(wf)
+        workflow = engine.get_workflow(wf)
+        assert workflow.steps[bad].status == StepStatus.FAILED
+        assert workflow.steps[after].status == StepStatus.PENDING
+        assert workflow.status == WorkflowStatus.FAILED
+
+    async def test_pause_mid_run_then_resume(self):
+        engine = WorkflowEngine()
+        state, make = _tracker()
+        wf = engine.create_workflow("pausable")
+        a = engine.add_task_step(wf, "a", make("a", 0.1))
+        b = engine.add_task_step(wf, "b", make("b"), dependencies=[a])
+        c = engine.add_task_step(wf, "c", make("c"), dependencies=[b])
+
+        run = asyncio.create_task(engine.execute_workflow(wf))
+        await asyncio.sleep(0.02)
+        assert engine.pause_workflow(wf)
+
+        # 已启动的步骤跑完后停下，不启动后续步骤，也不标记为失败
+        assert not await run
+        workflow = engine.get_workflow(wf)
+        assert workflow.status == WorkflowStatus.PAUSED
+        assert workflow.error is None
+        assert workflow.steps[a].status == StepStatus.COMPLETED
+        assert workflow.steps[b].status == StepStatus.PENDING
+
+        assert engine.resume_workflow(wf)
+        for _ in range(50):
+            if workflow.status != WorkflowStatus.RUNNING:
+                break
+            await asyncio.sleep(0.02)
+        assert workflow.status == WorkflowStatus.COMPLETED
+        assert workflow.steps[c].status == StepStatus.COMPLETED
+        assert state['order'] == ["a", "b", "c"]
+
+    async def test_resume_before_running_step_finishes(self):
+        engine = WorkflowEngine()
+        state, make = _tracker()
+        wf = engine.create_workflow("quick-resume")
+        a = engine.add_task_step(wf, "a", make("a", 0.1))
+        engine.add_task_step(wf, "b", make("b"), dependencies=[a])
+
+        run = asyncio.create_task(engine.execute_workflow(wf))
+        await asyncio.sleep(0.02)
+        assert engine.pause_workflow(wf)
+        assert engine.resume_workflow(wf)
+
+        # 原执行循环继续调度，不会重复执行正在运行的步骤
+        assert await run
+        assert engine.get_workflow(wf).status == WorkflowStatus.COMPLETED
+        assert state['order'] == ["a", "b"]
+
+    def test_cycle_detected(self):
+        engine = WorkflowEngine()
+        wf = engine.create_workflow("cycle")
+        engine.add_task_step(wf, "a", lambda: None, step_id="a")
+        engine.add_task_step(wf, "b", lambda: None, step_id="b")
+        engine.set_dependencies(wf, {"a": ["b"], "b": ["a"]})
+
+        with pytest.raises(ValueError):
+            engine.get_workflow(wf).build_execution_graph()
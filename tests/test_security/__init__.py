@@ -0,0 +1,74 @@
+"""
+AgentBus安全模块测试
+
+security/__init__.py 会导入 auth/encryption，它们通过 ``..core``、``..storage``
+相对导入依赖完整的 agentbus 包结构；限流模块运行时不依赖其他包，测试中按文件加载。
+认证/权限模块挂在 ``agentbus.security`` 下按文件加载，相对导入的依赖以
+sys.modules 中的桩模块替代。
+"""
+
+import importlib.util
+import sys
+import types
+from pathlib import Path
+
+SECURITY_DIR = Path(__file__).resolve().parents[2] / "security"
+
+
+def _load(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_rate_limiter():
+    """按文件加载 security/rate_limiter.py"""
+    name = "security.rate_limiter"
+    if name in sys.modules:
+        return sys.modules[name]
+    return _load(name, SECURITY_DIR / "rate_limiter.py")
+
+
+def _stub_module(name, package=False, **attrs):
+    if name in sys.modules:
+        return sys.modules[name]
+    module = types.ModuleType(name)
+    if package:
+        module.__path__ = []
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+def load_security_module(module_name):
+    """按文件加载 security/<module_name>.py（如 auth、permissions）"""
+    name = f"agentbus.security.{module_name}"
+    if name in sys.modules:
+        return sys.modules[name]
+
+    _stub_module("agentbus", package=True)
+    _stub_module("agentbus.security", package=True)
+    _stub_module("agentbus.core", package=True)
+    _stub_module("agentbus.core.settings", Settings=type("Settings", (), {}))
+    _stub_module("agentbus.storage", package=True)
+    _stub_module("agentbus.storage.database", Database=type("Database", (), {}))
+    _stub_module("agentbus.storage.memory", MemoryStorage=type("MemoryStorage", (), {}))
+    return _load(name, SECURITY_DIR / f"{module_name}.py")
+
+
+class FakeMemoryStorage:
+    """MemoryStorage 的最小替身：同步 get/set/delete，忽略 ttl"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
@@ -0,0 +1,196 @@
+"""
+认证模块测试
+
+测试密码哈希池的卸载与排队削减、令牌TTL/LRU缓存与负缓存、
+缓存淘汰后从存储恢复令牌，以及撤销后缓存失效。
+"""
+
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from . import FakeMemoryStorage, load_security_module
+
+
+auth = load_security_module("auth")
+AuthenticationOverloaded = auth.AuthenticationOverloaded
+AuthToken = auth.AuthToken
+PasswordHasher = auth.PasswordHasher
+TTLCache = auth.TTLCache
+TokenManager = auth.TokenManager
+TokenType = auth.TokenType
+
+
+@pytest.fixture
+def memory():
+    return FakeMemoryStorage()
+
+
+class TestPasswordHasher:
+    """测试密码哈希执行池"""
+
+    @pytest.mark.asyncio
+    async def test_hash_and_verify_off_loop(self):
+        hasher = PasswordHasher(max_workers=2, rounds=4)
+        try:
+            hashed = await hasher.hash("s3cret-password")
+            assert await hasher.verify("s3cret-password", hashed)
+            assert not await hasher.verify("wrong-password", hashed)
+
+            stats = hasher.get_statistics()
+            assert stats["submitted"] == stats["completed"] == 3
+            assert stats["in_flight"] == 0
+        finally:
+            hasher.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_sheds_load_when_queue_full(self, monkeypatch):
+        release = threading.Event()
+
+        def slow_check(password, hashed_password):
+            release.wait(5)
+            return True
+
+        monkeypatch.setattr(auth, "_check_password", slow_check)
+        hasher = PasswordHasher(max_workers=1, max_queue=1, rounds=4)
+        try:
+            pending = [asyncio.create_task(hasher.verify("p", "h")) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            assert hasher.queue_depth == 1
+
+            with pytest.raises(AuthenticationOverloaded):
+                await hasher.verify("p", "h")
+
+            release.set()
+            assert await asyncio.gather(*pending) == [True, True]
+            stats = hasher.get_statistics()
+            assert stats["rejected"] == 1
+            assert stats["max_in_flight"] == 2
+        finally:
+            release.set()
+            hasher.shutdown()
+
+
+class TestTTLCache:
+    """测试有界TTL缓存"""
+
+    def test_lru_eviction_and_expiry(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr(auth.time, "monotonic", lambda: now[0])
+        cache = TTLCache(maxsize=2, ttl=10, negative_ttl=1)
+
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        assert cache.get("b", "miss") == "miss"
+        assert cache.evictions == 1
+
+        # 负缓存同样占用容量，淘汰最久未使用的 a
+        cache.set_negative("bad")
+        assert cache.get("bad") is None
+        assert cache.get("a", "miss") == "miss"
+        now[0] += 1
+        assert cache.get("bad", "miss") == "miss"
+        assert cache.get("c") == 3
+
+        now[0] += 10
+        assert cache.get("c", "miss") == "miss"
+
+    def test_ttl_capped_by_default(self, monkeypatch):
+        now = [0.0]
+        monkeypatch.setattr(auth.time, "monotonic", lambda: now[0])
+        cache = TTLCache(ttl=5)
+        cache.set("k", "v", ttl=3600)
+        now[0] = 5
+        assert cache.get("k", "miss") == "miss"
+        cache.set("gone", "v", ttl=0)
+        assert len(cache) == 0
+
+
+class TestTokenManager:
+    """测试令牌验证缓存"""
+
+    def test_verify_after_cache_ttl(self, memory):
+        manager = TokenManager(None, memory, cache_ttl=0.05)
+        token = manager.generate_token("u1", TokenType.ACCESS, expires_in=3600)
+        assert manager.verify_token(token.token) is token
+
+        time.sleep(0.06)
+        restored = manager.verify_token(token.token)
+        assert restored is not None
+        assert restored.token_type == TokenType.ACCESS
+        assert restored.expires_at == token.expires_at
+        assert restored.created_at == token.created_at
+        # 恢复后重新进入缓存
+        assert manager.verify_token(token.token) is restored
+
+    def test_verify_after_lru_eviction(self, memory):
+        manager = TokenManager(None, memory, cache_size=1)
+        first = manager.generate_token("u1", TokenType.ACCESS)
+        manager.generate_token("u2", TokenType.REFRESH)
+        assert manager.get_cache_statistics()["evictions"] == 1
+
+        restored = manager.verify_token(first.token)
+        assert restored is not None and restored.user_id == "u1"
+
+    def test_expired_token_rejected(self, memory):
+        manager = TokenManager(None, memory, cache_ttl=0.05)
+        token = manager.generate_token("u1", TokenType.ACCESS, expires_in=3600)
+        data = json.loads(memory.get(f"token:{token.token}"))
+        data["expires_at"] = datetime(2000, 1, 1).isoformat()
+        memory.set(f"token:{token.token}", json.dumps(data))
+
+        time.sleep(0.06)
+        assert manager.verify_token(token.token) is None
+
+    def test_unknown_token_negative_cached(self, memory):
+        manager = TokenManager(None, memory, negative_ttl=0.05)
+        assert manager.verify_token("missing") is None
+        assert manager.verify_token("missing") is None
+        assert manager.get_cache_statistics()["negative_hits"] == 1
+
+        # 负缓存过期后重新查询存储
+        token = AuthToken("missing", TokenType.ACCESS, "u1",
+                          datetime.utcnow() + timedelta(days=1))
+        memory.set("token:missing", json.dumps(token.to_dict()))
+        time.sleep(0.06)
+        assert manager.verify_token("missing").user_id == "u1"
+
+    def test_unreadable_record_not_negative_cached(self, memory):
+        manager = TokenManager(None, memory)
+        memory.set("token:t", "{not json")
+        assert manager.verify_token("t") is None
+        assert manager.get_cache_statistics()["size"] == 0
+
+        token = AuthToken("t", TokenType.ACCESS, "u1",
+                          datetime.utcnow() + timedelta(days=1))
+        memory.set("token:t", json.dumps(token.to_dict()))
+        assert manager.verify_token("t") is not None
+
+    def test_reads_legacy_records(self, memory):
+        manager = TokenManager(None, memory)
+        token = AuthToken("legacy", TokenType.REFRESH, "u1",
+                          datetime.utcnow() + timedelta(days=1))
+        memory.set("token:legacy", json.dumps(auth.asdict(token), default=str))
+
+        restored = manager.verify_token("legacy")
+        assert restored.token_type == TokenType.REFRESH
+        assert restored.expires_at == token.expires_at
+
+    def test_revoke_invalidates_cache(self, memory):
+        manager = TokenManager(None, memory)
+        token = manager.generate_token("u1", TokenType.ACCESS)
+        assert manager.verify_token(token.token) is not None
+
+        assert manager.revoke_token(token.token)
+        assert manager.verify_token(token.token) is None
+
+        tokens = [manager.generate_token("u2", TokenType.ACCESS) for _ in range(3)]
+        assert all(manager.verify_token(t.token) for t in tokens)
+        assert manager.revoke_all_user_tokens("u2") == 3
+        assert not any(manager.verify_token(t.token) for t in tokens)
@@ -0,0 +1,208 @@
+"""
+授权索引测试
+
+测试资源ID精确匹配与前缀匹配、默认拒绝、按用户缓存的索引在角色/权限变化后失效，
+以及批量判定与逐个判定结果一致。
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from . import FakeMemoryStorage, load_security_module
+
+
+permissions = load_security_module("permissions")
+Action = permissions.Action
+AuthorizationIndex = permissions.AuthorizationIndex
+Permission = permissions.Permission
+PermissionChecker = permissions.PermissionChecker
+PermissionLevel = permissions.PermissionLevel
+PermissionManager = permissions.PermissionManager
+PrefixTrie = permissions.PrefixTrie
+ResourceType = permissions.ResourceType
+
+
+RESOURCE_IDS = ["a1", "a2", "a3", "proj/x", "proj/y/z", "projx", "other", ""]
+
+
+def agent_permission(permission_id, action=Action.READ, level=PermissionLevel.READ, **conditions):
+    return Permission(permission_id, permission_id, "", ResourceType.AGENT, action, level, conditions)
+
+
+def reference_allows(grants, resource, action, resource_id):
+    """逐条权限判定（编译索引之前的实现）"""
+    checker = PermissionChecker(None)
+    return any(
+        p.resource == resource and p.action == action
+        and (not resource_id or checker._check_resource_conditions(p, resource_id))
+        for p in grants
+    )
+
+
+@pytest.fixture
+def manager():
+    return PermissionManager(None, None, FakeMemoryStorage())
+
+
+async def grant_role(manager, user_id, role_id, permission_ids, **kwargs):
+    await manager.role_manager.create_role(role_id, role_id, "", permission_ids)
+    await manager.role_manager.assign_role_to_user(user_id, role_id, "admin", **kwargs)
+
+
+class TestPrefixTrie:
+    """测试资源前缀字典树"""
+
+    def test_prefix_matching(self):
+        trie = PrefixTrie()
+        assert not trie
+        trie.insert("proj/")
+        trie.insert("tmp")
+        assert trie.matches("proj/x")
+        assert trie.matches("tmp")
+        assert trie.matches("tmp/file")
+        assert not trie.matches("proj")
+        assert not trie.matches("other")
+
+        trie.insert("")
+        assert trie.matches("anything")
+
+
+class TestAuthorizationIndex:
+    """测试编译后的授权索引"""
+
+    def test_exact_and_prefix_conditions(self):
+        grants = [
+            agent_permission("ids", resource_id=["a1", "a2"]),
+            agent_permission("one", resource_id="a3"),
+            agent_permission("prefix", resource_prefix="proj/"),
+        ]
+        index = AuthorizationIndex([p.id for p in grants], grants)
+
+        assert index.allows(ResourceType.AGENT, Action.READ, "a1")
+        assert index.allows(ResourceType.AGENT, Action.READ, "a3")
+        assert index.allows(ResourceType.AGENT, Action.READ, "proj/y/z")
+        assert not index.allows(ResourceType.AGENT, Action.READ, "projx")
+        assert not index.allows(ResourceType.AGENT, Action.READ, "other")
+        # 不指定资源ID时只判断是否有该操作的授权
+        assert index.allows(ResourceType.AGENT, Action.READ)
+
+    def test_unconditional_grant_allows_everything(self):
+        grants = [agent_permission("ids", resource_id=["a1"]), agent_permission("all")]
+        index = AuthorizationIndex([p.id for p in grants], grants)
+        assert all(index.allows(ResourceType.AGENT, Action.READ, r) for r in RESOURCE_IDS)
+
+    def test_denied_by_default(self):
+        grants = [agent_permission("ids", resource_id=["a1"], level=PermissionLevel.ADMIN)]
+        index = AuthorizationIndex([p.id for p in grants], grants)
+
+        # 级别再高也不放宽资源条件；其他资源/操作没有授权即拒绝
+        assert not index.allows(ResourceType.AGENT, Action.READ, "a2")
+        assert not index.allows(ResourceType.AGENT, Action.UPDATE, "a1")
+        assert not index.allows(ResourceType.CHANNEL, Action.READ)
+        assert index.level(ResourceType.AGENT, Action.UPDATE) == PermissionLevel.NONE.value
+        assert index.allows_many(ResourceType.CHANNEL, Action.READ, ["a1"]) == {"a1": False}
+
+    def test_level_is_highest_grant(self):
+        grants = [
+            agent_permission("read", level=PermissionLevel.READ),
+            agent_permission("admin", level=PermissionLevel.ADMIN, resource_id="a1"),
+        ]
+        index = AuthorizationIndex([p.id for p in grants], grants)
+        assert index.level(ResourceType.AGENT, Action.READ) == PermissionLevel.ADMIN.value
+
+    @pytest.mark.parametrize("conditions", [
+        [{"resource_id": ["a1", "a2"]}],
+        [{"resource_prefix": "proj/"}, {"resource_id": "other"}],
+        [{"resource_prefix": ""}],
+        [{"resource_tags": ["t"]}],
+        [{}],
+    ])
+    def test_matches_reference_checks(self, conditions):
+        grants = [agent_permission(f"p{i}", **c) for i, c in enumerate(conditions)]
+        index = AuthorizationIndex([p.id for p in grants], grants)
+        for resource_id in RESOURCE_IDS:
+            expected = reference_allows(grants, ResourceType.AGENT, Action.READ, resource_id)
+            assert index.allows(ResourceType.AGENT, Action.READ, resource_id) == expected
+
+        batch = index.allows_many(ResourceType.AGENT, Action.READ, RESOURCE_IDS)
+        assert batch == {r: index.allows(ResourceType.AGENT, Action.READ, r) for r in RESOURCE_IDS}
+
+
+class TestUserIndex:
+    """测试按用户缓存的授权索引"""
+
+    @pytest.mark.asyncio
+    async def test_authorize_many_agrees_with_authorize(self, manager):
+        await manager.create_permission("agent.read.some", "", "", ResourceType.AGENT, Action.READ,
+                                        PermissionLevel.READ, {"resource_id": ["a1", "a2"]})
+        await manager.create_permission("agent.read.proj", "", "", ResourceType.AGENT, Action.READ,
+                                        PermissionLevel.READ, {"resource_prefix": "proj/"})
+        await grant_role(manager, "u1", "viewer", ["agent.read.some", "agent.read.proj"])
+
+        batch = await manager.authorize_many("u1", ResourceType.AGENT, Action.READ, RESOURCE_IDS)
+        single = {r: await manager.authorize("u1", ResourceType.AGENT, Action.READ, r)
+                  for r in RESOURCE_IDS}
+        assert batch == single
+        assert [r for r, allowed in batch.items() if allowed] == ["a1", "a2", "proj/x", "proj/y/z", ""]
+
+    @pytest.mark.asyncio
+    async def test_index_reused_until_roles_change(self, manager):
+        await grant_role(manager, "u1", "viewer", ["agent.read"])
+        index = await manager.get_user_index("u1")
+        assert await manager.get_user_index("u1") is index
+        assert not await manager.authorize("u1", ResourceType.AGENT, Action.UPDATE)
+
+        # 分配新角色
+        await grant_role(manager, "u1", "editor", ["agent.update"])
+        assert await manager.authorize("u1", ResourceType.AGENT, Action.UPDATE)
+
+        # 修改角色定义
+        await manager.role_manager.update_role("editor", permissions=["agent.delete"])
+        assert not await manager.authorize("u1", ResourceType.AGENT, Action.UPDATE)
+        assert await manager.authorize("u1", ResourceType.AGENT, Action.DELETE)
+
+        # 撤销角色
+        assert await manager.role_manager.revoke_role_from_user("u1", "editor")
+        assert not await manager.authorize("u1", ResourceType.AGENT, Action.DELETE)
+        assert await manager.authorize("u1", ResourceType.AGENT, Action.READ)
+
+    @pytest.mark.asyncio
+    async def test_index_invalidated_by_permission_update(self, manager):
+        await manager.create_permission("agent.read.some", "", "", ResourceType.AGENT, Action.READ,
+                                        PermissionLevel.READ, {"resource_id": ["a1"]})
+        await grant_role(manager, "u1", "viewer", ["agent.read.some"])
+        assert not await manager.authorize("u1", ResourceType.AGENT, Action.READ, "a2")
+
+        await manager.update_permission("agent.read.some", conditions={"resource_id": ["a2"]})
+        assert await manager.authorize("u1", ResourceType.AGENT, Action.READ, "a2")
+        assert not await manager.authorize("u1", ResourceType.AGENT, Action.READ, "a1")
+
+    @pytest.mark.asyncio
+    async def test_index_recompiled_when_role_expires(self, manager):
+        expires_at = (datetime.utcnow() + timedelta(milliseconds=50)).isoformat()
+        await grant_role(manager, "u1", "temp", ["agent.read"], expires_at=expires_at)
+        assert await manager.authorize("u1", ResourceType.AGENT, Action.READ)
+
+        await asyncio.sleep(0.06)
+        assert not await manager.authorize("u1", ResourceType.AGENT, Action.READ)
+
+    @pytest.mark.asyncio
+    async def test_remove_user_evicts_index(self, manager):
+        await grant_role(manager, "u1", "viewer", ["agent.read"])
+        assert await manager.authorize("u1", ResourceType.AGENT, Action.READ)
+
+        await manager.remove_user("u1")
+        assert "u1" not in manager._user_indexes
+        assert "user_role:u1:viewer" not in manager.memory.data
+        assert not await manager.authorize("u1", ResourceType.AGENT, Action.READ)
+
+    @pytest.mark.asyncio
+    async def test_user_index_cache_bounded(self, manager):
+        manager._user_index_cache_size = 3
+        for i in range(5):
+            await manager.get_user_index(f"u{i}")
+        await manager.get_user_index("u2")
+        await manager.get_user_index("u5")
+        assert list(manager._user_indexes) == ["u4", "u2", "u5"]
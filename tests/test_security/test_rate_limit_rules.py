@@ -0,0 +1,191 @@
+"""
+限流规则匹配测试
+
+验证 PatternIndex 的通配/前缀/后缀/精确匹配与 RateLimitRule._match_pattern 一致，
+CompiledRuleSet 按规则添加顺序返回结果，以及规则变更后匹配缓存失效。
+"""
+
+import random
+
+import pytest
+
+from . import load_rate_limiter
+
+
+rate_limiter = load_rate_limiter()
+CompiledRuleSet = rate_limiter.CompiledRuleSet
+PatternIndex = rate_limiter.PatternIndex
+RateLimiter = rate_limiter.RateLimiter
+RateLimitRule = rate_limiter.RateLimitRule
+RateLimitScope = rate_limiter.RateLimitScope
+RateLimitStrategy = rate_limiter.RateLimitStrategy
+
+
+def make_rule(rule_id, endpoints=None, users=None):
+    return RateLimitRule(
+        id=rule_id,
+        name=rule_id,
+        strategy=RateLimitStrategy.FIXED_WINDOW,
+        scope=RateLimitScope.USER_ENDPOINT,
+        limit=10,
+        window=60,
+        endpoint_patterns=endpoints,
+        user_patterns=users,
+    )
+
+
+def legacy_matching(rules, endpoint, user_id=None):
+    """旧实现：逐条调用 matches_endpoint / matches_user"""
+    return [
+        rule for rule in rules
+        if rule.matches_endpoint(endpoint) and not (user_id and not rule.matches_user(user_id))
+    ]
+
+
+class TestPatternIndex:
+    """模式索引测试"""
+
+    @pytest.fixture
+    def index(self):
+        index = PatternIndex()
+        for position, pattern in enumerate([
+            "*", "/api/*", "/api/users/*", "*.json", "*/export",
+            "/api/users/1", "/api/users/1", "/", "*", "",
+        ]):
+            index.add(pattern, position)
+        return index
+
+    @pytest.mark.parametrize("value, expected", [
+        ("/api/users/1", {0, 1, 2, 5, 6, 8}),
+        ("/api/users/2.json", {0, 1, 2, 3, 8}),
+        ("/api/export", {0, 1, 4, 8}),
+        ("/", {0, 7, 8}),
+        ("", {0, 8, 9}),
+        ("/other", {0, 8}),
+    ])
+    def test_wildcard_prefix_suffix_exact(self, index, value, expected):
+        assert index.match(value) == expected
+
+    def test_only_trailing_star_is_a_wildcard(self):
+        # 与 _match_pattern 一致："**" 是前缀 "*"，"*a*" 是前缀 "*a"
+        index = PatternIndex()
+        index.add("**", 0)
+        index.add("*a*", 1)
+        assert index.match("anything") == set()
+        assert index.match("*abc") == {0, 1}
+        assert index.match("*b") == {0}
+
+    def test_match_returns_fresh_set(self):
+        index = PatternIndex()
+        index.add("*", 0)
+        index.match("x").add(99)
+        assert index.match("x") == {0}
+
+    def test_agrees_with_rule_matching(self):
+        rng = random.Random(5)
+        segments = ["api", "v1", "users", "1", "x.json", "export", ""]
+        values = ["/".join(rng.choice(segments) for _ in range(rng.randrange(1, 4))) for _ in range(200)]
+        patterns = (
+            ["*"]
+            + [value[:rng.randrange(len(value) + 1)] + "*" for value in values[:40]]
+            + ["*" + value[rng.randrange(len(value) + 1):] for value in values[40:80]]
+            + values[80:120]
+        )
+        index = PatternIndex()
+        for position, pattern in enumerate(patterns):
+            index.add(pattern, position)
+
+        rule = make_rule("probe")
+        for value in values:
+            expected = {
+                position for position, pattern in enumerate(patterns)
+                if rule._match_pattern(value, pattern)
+            }
+            assert index.match(value) == expected, value
+
+
+class TestCompiledRuleSet:
+    """规则编译测试"""
+
+    @pytest.fixture
+    def rules(self):
+        return [
+            make_rule("global"),
+            make_rule("api", ["/api/*"]),
+            make_rule("json", ["*.json"], ["tenant-*"]),
+            make_rule("login", ["/api/auth/login"], ["*"]),
+            make_rule("admin", ["/api/*", "/admin/*"], ["admin", "root-*"]),
+        ]
+
+    @pytest.mark.parametrize("endpoint, user_id", [
+        ("/api/auth/login", None),
+        ("/api/auth/login", "admin"),
+        ("/api/data.json", "tenant-7"),
+        ("/api/data.json", "guest"),
+        ("/admin/panel", "root-1"),
+        ("/admin/panel", "guest"),
+        ("/static/app.json", None),
+    ])
+    def test_matches_legacy_in_rule_order(self, rules, endpoint, user_id):
+        compiled = CompiledRuleSet(rules)
+        expected = [rule.id for rule in legacy_matching(rules, endpoint, user_id)]
+        assert [rule.id for rule in compiled.matching(endpoint, user_id)] == expected
+        assert [rule.id for rule in compiled.for_endpoint(endpoint)] == [
+            rule.id for rule in rules if rule.matches_endpoint(endpoint)
+        ]
+
+    def test_precedence_follows_insertion_order(self, rules):
+        compiled = CompiledRuleSet(list(reversed(rules)))
+        assert [rule.id for rule in compiled.matching("/api/x.json", "tenant-1")] == [
+            "json", "api", "global"
+        ]
+
+    def test_memo_is_bounded(self, rules):
+        compiled = CompiledRuleSet(rules, memo_size=3)
+        for i in range(10):
+            compiled.for_endpoint(f"/api/{i}")
+        assert list(compiled._memo) == ["/api/7", "/api/8", "/api/9"]
+
+        disabled = CompiledRuleSet(rules, memo_size=0)
+        disabled.for_endpoint("/api/1")
+        assert not disabled._memo
+
+
+class TestRateLimiterRules:
+    """限流器规则变更测试"""
+
+    @pytest.fixture
+    def limiter(self):
+        limiter = RateLimiter(settings=None)
+        for rule_id in list(limiter.rules):
+            limiter.remove_rule(rule_id)
+        limiter.add_rule(make_rule("api", ["/api/*"]))
+        return limiter
+
+    def test_add_rule_invalidates_memo(self, limiter):
+        assert [rule.id for rule in limiter._matching_rules("/api/export")] == ["api"]
+        compiled = limiter._compiled_rules()
+        assert "/api/export" in compiled._memo
+
+        limiter.add_rule(make_rule("export", ["*/export"]))
+        assert limiter._compiled_rules() is not compiled
+        assert [rule.id for rule in limiter._matching_rules("/api/export")] == ["api", "export"]
+
+    def test_replace_and_remove_rule(self, limiter):
+        assert [rule.id for rule in limiter._matching_rules("/api/users", "bob")] == ["api"]
+
+        # 同ID替换规则后使用新的模式
+        limiter.add_rule(make_rule("api", ["/api/*"], ["alice"]))
+        assert limiter._matching_rules("/api/users", "bob") == []
+        assert [rule.id for rule in limiter._matching_rules("/api/users", "alice")] == ["api"]
+
+        compiled = limiter._compiled_rules()
+        assert limiter.remove_rule("api")
+        assert not limiter.remove_rule("api")
+        assert limiter._compiled_rules() is not compiled
+        assert limiter._matching_rules("/api/users", "alice") == []
+
+    def test_get_rules_for_endpoint(self, limiter):
+        limiter.add_rule(make_rule("json", ["*.json"], ["tenant-*"]))
+        assert [rule.id for rule in limiter.get_rules_for_endpoint("/api/a.json")] == ["api", "json"]
+        assert [rule.id for rule in limiter._matching_rules("/api/a.json", "guest")] == ["api"]
@@ -0,0 +1,163 @@
+"""
+共享内存限流存储测试
+
+验证多进程共享同一计数表时限流精确生效、计数表满时不淘汰仍在计数的键，
+以及等待文件锁时不阻塞事件循环。
+"""
+
+import asyncio
+import multiprocessing
+import time
+
+import pytest
+
+from . import load_rate_limiter
+
+
+rate_limiter = load_rate_limiter()
+RateLimitExceeded = rate_limiter.RateLimitExceeded
+RateLimitRule = rate_limiter.RateLimitRule
+RateLimitScope = rate_limiter.RateLimitScope
+RateLimitStrategy = rate_limiter.RateLimitStrategy
+SharedMemoryRateLimitStore = rate_limiter.SharedMemoryRateLimitStore
+
+pytestmark = pytest.mark.skipif(rate_limiter.fcntl is None, reason="需要 fcntl 进程间文件锁")
+
+
+def make_rule(limit=100, window=3600, strategy=RateLimitStrategy.FIXED_WINDOW):
+    return RateLimitRule(
+        id="rule", name="rule", strategy=strategy,
+        scope=RateLimitScope.USER, limit=limit, window=window,
+    )
+
+
+def worker(path, attempts, start, results):
+    """在子进程中对同一个键连续发起请求，返回放行次数"""
+    async def run():
+        store = SharedMemoryRateLimitStore(path=path, slots=1024)
+        rule = make_rule()
+        allowed = 0
+        start.wait()
+        for _ in range(attempts):
+            decisions = await store.evaluate([("user:victim", rule)])
+            allowed += decisions[0].allowed
+        store.close()
+        return allowed
+
+    results.put(asyncio.run(run()))
+
+
+class TestMultiProcess:
+    """多进程共享计数测试"""
+
+    def test_limit_is_exact_across_processes(self, tmp_path):
+        path = str(tmp_path / "ratelimit.bin")
+        context = multiprocessing.get_context("fork")
+        start = context.Event()
+        results = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(path, 100, start, results))
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        start.set()
+        allowed = [results.get(timeout=30) for _ in processes]
+        for process in processes:
+            process.join(timeout=30)
+            assert process.exitcode == 0
+
+        assert sum(allowed) == 100
+
+        store = SharedMemoryRateLimitStore(path=path)
+        try:
+            assert asyncio.run(store.evaluate([("user:victim", make_rule())]))[0].allowed is False
+        finally:
+            store.close()
+
+
+class TestTableFull:
+    """计数表满时的处理"""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        # 槽位数等于探测长度：所有键落在同一个探测范围内
+        store = SharedMemoryRateLimitStore(path=str(tmp_path / "full.bin"), slots=16)
+        yield store
+        store.close()
+
+    async def test_live_counters_are_not_evicted(self, store):
+        rule = make_rule(limit=3)
+        for _ in range(3):
+            assert (await store.evaluate([("user:victim", rule)]))[0].allowed
+        assert not (await store.evaluate([("user:victim", rule)]))[0].allowed
+
+        # 攻击者用大量新键填满整个探测范围
+        for i in range(15):
+            assert (await store.evaluate([(f"user:attacker{i}", rule)]))[0].allowed
+        decision = (await store.evaluate([("user:attacker-extra", rule)]))[0]
+        assert not decision.allowed
+        assert decision.error == store.TABLE_FULL
+        assert decision.retry_after == 1
+
+        # 受害者的计数没有被重置
+        assert not (await store.evaluate([("user:victim", rule)]))[0].allowed
+        assert await store.get_count("user:victim", 3600) == 3
+        assert store.get_statistics()["table_full"] == 1
+
+        with pytest.raises(RateLimitExceeded):
+            await store.increment("user:attacker-extra", 60)
+
+    async def test_expired_slots_are_reused(self, store, monkeypatch):
+        rule = make_rule(limit=1, window=1)
+        for i in range(16):
+            assert (await store.evaluate([(f"user:{i}", rule)]))[0].allowed
+        assert not (await store.evaluate([("user:new", rule)]))[0].allowed
+
+        # 固定窗口计数在两个窗口后过期，槽位可以复用
+        now = time.time()
+        monkeypatch.setattr(rate_limiter.time, "time", lambda: now + 3)
+        assert (await store.evaluate([("user:new", rule)]))[0].allowed
+
+    async def test_all_or_nothing_when_one_key_has_no_slot(self, store):
+        rule = make_rule(limit=5)
+        for i in range(15):
+            await store.evaluate([(f"user:{i}", rule)])
+
+        decisions = await store.evaluate([("user:0", rule), ("user:a", rule), ("user:b", rule)])
+        assert [decision.allowed for decision in decisions] == [True, True, False]
+        # 有规则被拒绝时不计数：user:0 仍为 1，user:a 未写入
+        assert await store.get_count("user:0", 3600) == 1
+        assert await store.get_count("user:a", 3600) == 0
+
+
+class TestLocking:
+    """加锁不阻塞事件循环"""
+
+    async def test_waiting_for_file_lock_yields(self, tmp_path):
+        path = str(tmp_path / "lock.bin")
+        holder = SharedMemoryRateLimitStore(path=path)
+        store = SharedMemoryRateLimitStore(path=path)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        ticking = asyncio.create_task(ticker())
+        try:
+            # 另一个文件描述符持有 flock，模拟其他进程正在更新计数表
+            with holder._file_lock():
+                evaluation = asyncio.create_task(store.evaluate([("user:x", make_rule())]))
+                await asyncio.sleep(0.1)
+                assert not evaluation.done()
+                assert ticks >= 5
+            decisions = await asyncio.wait_for(evaluation, timeout=1)
+            assert decisions[0].allowed
+            assert store.get_statistics()["lock_wait"]["max"] >= 0.05
+        finally:
+            ticking.cancel()
+            holder.close()
+            store.close()
@@ -0,0 +1,3 @@
+"""
+AgentBus服务层测试
+"""
@@ -0,0 +1,192 @@
+"""
+AgentBus流广播器测试
+
+测试多订阅者独立读取、序号续传、保留窗口、慢订阅者断开，
+以及流式响应处理器接入广播器后的行为。
+"""
+
+import asyncio
+
+import pytest
+
+from services.stream_response import (
+    StreamBroker,
+    StreamChunk,
+    StreamEventType,
+    StreamRequest,
+    StreamResponseProcessor,
+    SubscriberDropped,
+)
+
+
+def token(stream_id, content):
+    return StreamChunk(stream_id=stream_id, event_type=StreamEventType.TOKEN, content=content)
+
+
+def complete(stream_id):
+    return StreamChunk(stream_id=stream_id, event_type=StreamEventType.COMPLETE)
+
+
+async def collect(subscription):
+    return [chunk async for chunk in subscription]
+
+
+class TestStreamBroker:
+    """测试流广播器"""
+
+    @pytest.mark.asyncio
+    async def test_subscribers_read_independently(self):
+        broker = StreamBroker()
+        broker.open("s")
+        first = broker.subscribe("s")
+        second = broker.subscribe("s")
+
+        readers = [asyncio.create_task(collect(first)), asyncio.create_task(collect(second))]
+        await asyncio.sleep(0)
+        for i in range(5):
+            broker.publish("s", token("s", f"t{i}"))
+            await asyncio.sleep(0)
+        broker.publish("s", complete("s"))
+
+        results = await asyncio.gather(*readers)
+        for chunks in results:
+            assert [c.content for c in chunks[:-1]] == [f"t{i}" for i in range(5)]
+            assert [c.sequence for c in chunks] == list(range(1, 7))
+            assert chunks[-1].event_type == StreamEventType.COMPLETE
+        assert broker.get_statistics()["subscribers"] == 0
+
+    @pytest.mark.asyncio
+    async def test_resume_from_last_event_id(self):
+        broker = StreamBroker()
+        broker.open("s")
+        for i in range(5):
+            broker.publish("s", token("s", f"t{i}"))
+        broker.publish("s", complete("s"))
+
+        resumed = broker.subscribe("s", last_event_id=3)
+        chunks = await collect(resumed)
+        assert [c.sequence for c in chunks] == [4, 5, 6]
+        assert resumed.missed == 0
+
+    @pytest.mark.asyncio
+    async def test_retention_window(self):
+        broker = StreamBroker(retention=4)
+        buffer = broker.open("s")
+        for i in range(10):
+            broker.publish("s", token("s", f"t{i}"))
+
+        assert buffer.first_sequence == 7
+        late = broker.subscribe("s", last_event_id=2)
+        assert late.missed == 4
+        assert late.get_nowait().sequence == 7
+
+    @pytest.mark.asyncio
+    async def test_slow_subscriber_dropped_without_blocking(self):
+        broker = StreamBroker(retention=100, max_lag=5)
+        broker.open("s")
+        slow = broker.subscribe("s")
+        fast = broker.subscribe("s")
+
+        for i in range(10):
+            broker.publish("s", token("s", f"t{i}"))
+            assert fast.get_nowait().content == f"t{i}"
+
+        assert slow.dropped == "lagged"
+        with pytest.raises(SubscriberDropped) as info:
+            await slow.get()
+        assert info.value.resume_from == 1
+        assert broker.get_statistics()["dropped_subscribers"] == 1
+
+        # 断开后可按序号重新订阅
+        again = broker.subscribe("s", last_event_id=8)
+        assert [again.get_nowait().sequence for _ in range(2)] == [9, 10]
+
+    @pytest.mark.asyncio
+    async def test_closed_buffer_expires(self):
+        broker = StreamBroker(closed_ttl=0.05)
+        broker.open("s")
+        broker.publish("s", complete("s"))
+        assert broker.subscribe("s") is not None
+
+        await asyncio.sleep(0.06)
+        assert broker.subscribe("s") is None
+        assert broker.get_statistics()["buffers"] == 0
+
+    @pytest.mark.asyncio
+    async def test_idle_buffer_expires(self):
+        broker = StreamBroker(idle_ttl=0.05)
+        broker.open("idle")
+        broker.open("busy")
+        waiting = broker.subscribe("idle")
+        reader = asyncio.create_task(waiting.get())
+
+        for _ in range(4):
+            await asyncio.sleep(0.02)
+            broker.publish("busy", token("busy", "x"))
+        assert broker.get_statistics()["buffers"] == 1
+        assert broker.subscribe("idle") is None
+        assert broker.subscribe("busy") is not None
+
+        with pytest.raises(SubscriberDropped):
+            await asyncio.wait_for(reader, 1)
+
+    @pytest.mark.asyncio
+    async def test_resume_past_head_clamps_to_next_sequence(self):
+        broker = StreamBroker()
+        broker.open("s")
+        for i in range(3):
+            broker.publish("s", token("s", str(i)))
+
+        ahead = broker.subscribe("s", last_event_id=100)
+        assert ahead.cursor == 4 and ahead.lag == 0
+        assert ahead.get_nowait() is None
+
+        broker.publish("s", token("s", "next"))
+        assert ahead.get_nowait().content == "next"
+
+
+class TestProcessorFanOut:
+    """测试流式响应处理器的多订阅者分发"""
+
+    @pytest.mark.asyncio
+    async def test_multiple_consumers_receive_all_tokens(self):
+        processor = StreamResponseProcessor()
+        request = StreamRequest(stream_id="p1", chunk_size=1, delay_ms=0)
+        await processor.create_stream(request)
+
+        consumers = [processor.subscribe("p1") for _ in range(3)]
+        legacy = await processor.get_stream_queue("p1")
+
+        async def generator(_request):
+            for word in ("a", "b", "c"):
+                yield word
+
+        await processor.start_stream_processing("p1", generator)
+        results = await asyncio.gather(*(collect(c) for c in consumers))
+
+        for chunks in results:
+            types = [c.event_type for c in chunks]
+            assert types[0] == StreamEventType.START
+            assert types[-1] == StreamEventType.COMPLETE
+            assert "".join(c.content for c in chunks) == "abc"
+
+        # 兼容原有队列接口
+        assert (await legacy.get()).event_type == StreamEventType.START
+
+        # 重连的订阅者从断点续传
+        first_token = results[0][1]
+        resumed = processor.subscribe("p1", last_event_id=first_token.sequence)
+        assert "".join(c.content for c in await collect(resumed)) == "abc"[len(first_token.content):]
+
+        stats = await processor.get_stream_stats()
+        assert stats["broker"]["published"] == len(results[0])
+
+    @pytest.mark.asyncio
+    async def test_cancelled_stream_visible_to_subscribers(self):
+        processor = StreamResponseProcessor()
+        await processor.create_stream(StreamRequest(stream_id="p2"), "http")
+        subscription = processor.subscribe("p2")
+
+        assert await processor.cancel_stream("p2")
+        chunks = await collect(subscription)
+        assert chunks[-1].event_type == StreamEventType.CANCEL
@@ -0,0 +1,230 @@
+"""
+AgentBus流式token合并测试
+
+测试按时间/字节数发送、最小发送间隔、按消费速度自适应批量、
+帧预编码以及吞吐统计。
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from services.stream_response import (
+    StreamChunk,
+    StreamCoalescer,
+    StreamEventType,
+    StreamRequest,
+    StreamResponseProcessor,
+)
+
+
+async def run_stream(processor, generator, **request_kwargs):
+    request = StreamRequest(stream_id=request_kwargs.pop("stream_id", "s"), **request_kwargs)
+    await processor.create_stream(request)
+    subscription = processor.subscribe(request.stream_id)
+    await processor.start_stream_processing(request.stream_id, generator)
+
+    received = []
+    async for chunk in subscription:
+        received.append((time.monotonic(), chunk))
+    return received
+
+
+def tokens_of(received):
+    return [chunk for _, chunk in received if chunk.event_type == StreamEventType.TOKEN]
+
+
+class TestStreamCoalescer:
+    """测试合并器"""
+
+    def test_flush_on_tokens_bytes_or_latency(self):
+        coalescer = StreamCoalescer(min_tokens=3, max_bytes=10, max_latency=0.03)
+        coalescer.add("a", 0.0)
+        coalescer.add("b", 0.01)
+        assert not coalescer.should_flush(0.02)
+        assert coalescer.should_flush(0.031)
+        assert coalescer.flush(0.031) == "ab"
+        assert coalescer.deadline() is None
+
+        coalescer.add("0123456789", 0.04)
+        assert coalescer.should_flush(0.04)
+
+    def test_min_interval_defers_flush(self):
+        coalescer = StreamCoalescer(min_tokens=1, max_latency=0.0, min_interval=0.05)
+        coalescer.add("a", 0.0)
+        coalescer.flush(0.0)
+        coalescer.add("b", 0.01)
+        assert not coalescer.should_flush(0.02)
+        assert coalescer.deadline() == pytest.approx(0.05)
+        assert coalescer.should_flush(0.05)
+
+    def test_adapts_to_consumer_lag(self):
+        coalescer = StreamCoalescer(min_tokens=4)
+        coalescer.adapt(5)
+        coalescer.adapt(5)
+        assert coalescer.target_tokens == 16
+        coalescer.adapt(0)
+        assert coalescer.target_tokens == 8
+        for _ in range(10):
+            coalescer.adapt(100)
+        assert coalescer.target_tokens == coalescer.max_tokens
+
+
+class TestProcessorCoalescing:
+    """测试流式处理的合并发送"""
+
+    @pytest.mark.asyncio
+    async def test_fast_generator_batches(self):
+        processor = StreamResponseProcessor()
+
+        async def fast(_request):
+            for i in range(100):
+                yield f"t{i} "
+
+        received = await run_stream(processor, fast, chunk_size=10, delay_ms=0)
+        tokens = tokens_of(received)
+        assert "".join(c.content for c in tokens) == "".join(f"t{i} " for i in range(100))
+        assert len(tokens) <= 10
+        assert tokens[-1].token_count == 100
+
+    @pytest.mark.asyncio
+    async def test_slow_generator_flushes_on_latency(self):
+        processor = StreamResponseProcessor()
+        produced = []
+
+        async def slow(_request):
+            for i in range(4):
+                await asyncio.sleep(0.05)
+                produced.append(time.monotonic())
+                yield f"w{i}"
+
+        received = await run_stream(processor, slow, chunk_size=10, delay_ms=0, flush_latency_ms=20)
+        tokens = tokens_of(received)
+        # 每个token在最长等待时间内送达，不等凑满chunk_size
+        assert [c.content for c in tokens] == ["w0", "w1", "w2", "w3"]
+        first_arrival = next(t for t, c in received if c.event_type == StreamEventType.TOKEN)
+        assert first_arrival - produced[0] < 0.04
+        assert first_arrival < produced[-1]
+
+    @pytest.mark.asyncio
+    async def test_max_bytes_bounds_frames(self):
+        processor = StreamResponseProcessor()
+
+        async def large(_request):
+            for _ in range(10):
+                yield "x" * 100
+
+        received = await run_stream(processor, large, chunk_size=100, delay_ms=0, max_flush_bytes=250)
+        tokens = tokens_of(received)
+        assert len(tokens) >= 3
+        assert all(len(c.content) <= 300 for c in tokens)
+
+    @pytest.mark.asyncio
+    async def test_delay_is_min_interval_not_sleep(self):
+        processor = StreamResponseProcessor()
+
+        async def steady(_request):
+            for i in range(20):
+                await asyncio.sleep(0.005)
+                yield "."
+
+        start = time.monotonic()
+        received = await run_stream(processor, steady, chunk_size=1, delay_ms=40)
+        elapsed = time.monotonic() - start
+        tokens = tokens_of(received)
+        assert "".join(c.content for c in tokens) == "." * 20
+        # 原实现每次发送后固定睡眠 delay_ms：20 x 40ms
+        assert len(tokens) < 10
+        assert elapsed < 0.3
+
+    @pytest.mark.asyncio
+    async def test_batch_shrinks_after_consumer_catches_up(self):
+        processor = StreamResponseProcessor()
+        backlog_done = asyncio.Event()
+        caught_up = asyncio.Event()
+
+        async def bursty(_request):
+            for _ in range(200):
+                yield "a"
+            backlog_done.set()
+            await caught_up.wait()
+            for _ in range(200):
+                yield "b"
+
+        request = StreamRequest(stream_id="adaptive", chunk_size=2, delay_ms=0)
+        await processor.create_stream(request)
+        subscription = processor.subscribe("adaptive")
+        await processor.start_stream_processing("adaptive", bursty)
+
+        # 订阅者暂停读取期间积压，批量增大
+        await asyncio.wait_for(backlog_done.wait(), timeout=1)
+        await asyncio.sleep(0.1)
+        received = []
+        while (chunk := subscription.get_nowait()) is not None:
+            received.append(chunk)
+        caught_up.set()
+        received.extend([chunk async for chunk in subscription])
+
+        tokens = [c for c in received if c.event_type == StreamEventType.TOKEN]
+        sizes = [len(c.content) for c in tokens]
+        backlog = [n for c, n in zip(tokens, sizes) if c.content[0] == "a"]
+        steady = [n for c, n in zip(tokens, sizes) if c.content[0] == "b"][:-1]
+        assert "".join(c.content for c in tokens) == "a" * 200 + "b" * 200
+        assert max(backlog) >= 16
+
+        # 跟上之后批量回落到 chunk_size
+        assert steady[0] >= 16
+        assert steady[-5:] == [2] * 5
+
+    @pytest.mark.asyncio
+    async def test_cancel_closes_generator(self):
+        processor = StreamResponseProcessor()
+        closed = asyncio.Event()
+
+        async def endless(_request):
+            try:
+                while True:
+                    await asyncio.sleep(0.01)
+                    yield "t"
+            finally:
+                closed.set()
+
+        await processor.create_stream(StreamRequest(stream_id="c", delay_ms=0))
+        await processor.start_stream_processing("c", endless)
+        await asyncio.sleep(0.05)
+        await processor.cancel_stream("c")
+        await asyncio.wait_for(closed.wait(), timeout=1)
+        assert processor.stream_metrics == {}
+
+
+class TestFramesAndStats:
+    """测试帧预编码与吞吐统计"""
+
+    def test_frame_encoded_once(self):
+        chunk = StreamChunk(stream_id="s", event_type=StreamEventType.TOKEN, content="你好")
+        chunk.sequence = 7
+        frame = chunk.to_sse()
+        assert frame.startswith("id: 7\ndata: ")
+        assert '"你好"' in frame
+        assert chunk.to_json() is chunk.to_json()
+
+    @pytest.mark.asyncio
+    async def test_throughput_stats(self):
+        processor = StreamResponseProcessor()
+
+        async def generator(_request):
+            await asyncio.sleep(0.02)
+            for i in range(20):
+                yield "ab"
+
+        await run_stream(processor, generator, chunk_size=5, delay_ms=0)
+        await asyncio.sleep(0)
+
+        throughput = (await processor.get_stream_stats())["throughput"]
+        assert throughput["tokens"] == 20
+        assert throughput["bytes"] == 40
+        assert throughput["events"] >= 6
+        assert throughput["events_per_second"] > 0
+        assert throughput["bytes_per_second"] > 0
+        assert throughput["time_to_first_token"]["max"] >= 0.02